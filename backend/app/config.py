@@ -7,7 +7,58 @@ import os
 FHIR_BASE_URL = os.getenv("FHIR_BASE_URL", "https://hapi.fhir.org/baseR4")
 # Use real FHIR data by default - set to False to use in-memory mock data
 FHIR_USE_REAL_DATA = os.getenv("FHIR_USE_REAL_DATA", "true").lower() == "true"
+# Parse search Bundles incrementally (needs ijson) instead of decoding whole pages
+FHIR_STREAM_PARSING = os.getenv("FHIR_STREAM_PARSING", "true").lower() == "true"
+# Threads (and pooled connections) used to run independent FHIR searches concurrently
+FHIR_FANOUT_WORKERS = int(os.getenv("FHIR_FANOUT_WORKERS", "10"))
+# Patient detail (patient plus allergies, conditions and medications) cache
+FHIR_PATIENT_CACHE_TTL_SECONDS = int(os.getenv("FHIR_PATIENT_CACHE_TTL_SECONDS", "300"))
+FHIR_PATIENT_CACHE_SIZE = int(os.getenv("FHIR_PATIENT_CACHE_SIZE", "1000"))
 
 # Application Settings
 DEBUG = os.getenv("DEBUG", "false").lower() == "true"
+# Load the in-memory demo data in the startup hook rather than on first access
+PRELOAD_DATA = os.getenv("PRELOAD_DATA", "false").lower() == "true"
+# Binary snapshot of the patient, doctor, hospital and bed stores; workers map it
+# on startup instead of generating data, and one worker rewrites it periodically.
+# Empty disables snapshots.
+SNAPSHOT_PATH = os.getenv("SNAPSHOT_PATH", "")
+SNAPSHOT_INTERVAL_SECONDS = float(os.getenv("SNAPSHOT_INTERVAL_SECONDS", "60"))
+# Where patient, doctor, hospital and bed records live: "memory" (each worker's
+# own dicts) or "sqlite" (one database file shared by every worker on the host)
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "memory").lower()
+SQLITE_PATH = os.getenv("SQLITE_PATH", "data/healthcare.db")
 
+# Prescription OCR Settings
+OCR_WORKERS = int(os.getenv("OCR_WORKERS", str(min(os.cpu_count() or 2, 4))))
+# Scans running in the process pool at once; further scans wait in the queue
+OCR_MAX_CONCURRENCY = int(os.getenv("OCR_MAX_CONCURRENCY", str(OCR_WORKERS)))
+# Of those, the most batch scan pages may hold; the rest stay free for single scans
+OCR_BATCH_MAX_CONCURRENCY = int(os.getenv("OCR_BATCH_MAX_CONCURRENCY", str(max(1, OCR_MAX_CONCURRENCY - 1))))
+# Scans allowed to wait or run before new ones are rejected with 503
+OCR_MAX_QUEUE_DEPTH = int(os.getenv("OCR_MAX_QUEUE_DEPTH", "32"))
+OCR_MAX_UPLOAD_BYTES = int(os.getenv("OCR_MAX_UPLOAD_BYTES", str(20 * 1024 * 1024)))
+# Pages accepted by one batch scan (files plus images inside zips)
+OCR_BATCH_MAX_PAGES = int(os.getenv("OCR_BATCH_MAX_PAGES", "500"))
+# Batch pages waiting or running across all jobs before new batches are rejected with 503
+OCR_MAX_QUEUED_BATCH_PAGES = int(os.getenv("OCR_MAX_QUEUED_BATCH_PAGES", str(4 * OCR_BATCH_MAX_PAGES)))
+# Finished batch scan jobs are kept this long for polling
+OCR_JOB_TTL_SECONDS = int(os.getenv("OCR_JOB_TTL_SECONDS", "3600"))
+# Total size accepted by one batch scan: uploaded files plus the images extracted from zips
+OCR_MAX_BATCH_BYTES = int(os.getenv("OCR_MAX_BATCH_BYTES", str(500 * 1024 * 1024)))
+
+# Stock Reservation Settings
+RESERVATION_TTL_SECONDS = int(os.getenv("RESERVATION_TTL_SECONDS", "900"))
+# How often expired reservations are released
+RESERVATION_SWEEP_INTERVAL = float(os.getenv("RESERVATION_SWEEP_INTERVAL", "30"))
+
+# Pharmacy Site Settings
+# Site that inventory, reservation and fulfillment calls use when no site ID is given
+DEFAULT_PHARMACY_SITE_ID = os.getenv("DEFAULT_PHARMACY_SITE_ID", "main")
+
+# Demand Forecast Settings
+# Time constant of the exponentially smoothed consumption rate
+FORECAST_SMOOTHING_DAYS = float(os.getenv("FORECAST_SMOOTHING_DAYS", "14"))
+# Supplier lead time and safety cover used for dynamic reorder points
+FORECAST_LEAD_TIME_DAYS = float(os.getenv("FORECAST_LEAD_TIME_DAYS", "3"))
+FORECAST_SAFETY_DAYS = float(os.getenv("FORECAST_SAFETY_DAYS", "2"))
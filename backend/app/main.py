@@ -1,9 +1,17 @@
 
-from fastapi import FastAPI, WebSocket
-from fastapi.middleware.cors import CORSMiddleware
-from backend.app.routers import intent, patients, doctors, hospitals, records, insurance, pharmacy
+# Imported first so the rest of startup is timed
+from backend.app.startup_report import startup_report
 
-app = FastAPI(title="Intent Healthcare Platform")
+with startup_report.phase("import fastapi"):
+    from fastapi import FastAPI, WebSocket
+    from fastapi.middleware.cors import CORSMiddleware
+with startup_report.phase("import routers"):
+    from backend.app.routers import intent, patients, doctors, hospitals, records, insurance, pharmacy
+    from backend.app.services.json_codec import FastJSONResponse
+from backend.app.config import PRELOAD_DATA, STORAGE_BACKEND
+
+# Responses are rendered with orjson when it is installed
+app = FastAPI(title="Intent Healthcare Platform", default_response_class=FastJSONResponse)
 
 # Add CORS middleware
 app.add_middleware(
@@ -23,11 +31,45 @@ app.include_router(records.router, prefix="/api/v1")
 app.include_router(insurance.router, prefix="/api/v1")
 app.include_router(pharmacy.router, prefix="/api/v1")
 
+@app.on_event("startup")
+async def startup():
+    # Expire lapsed stock reservations and snapshot the stores in the background
+    from backend.app.services.stock_reservations import start_reservation_sweeper
+    from backend.app.services.real_data_service import start_snapshot_writer
+    with startup_report.phase("startup hooks"):
+        start_reservation_sweeper()
+        start_snapshot_writer()
+    if PRELOAD_DATA:
+        from backend.app.services.lazy_loading import preload_all
+        with startup_report.phase("preload data"):
+            preload_all()
+    startup_report.mark_ready()
+    print(startup_report.summary())
+
+@app.get("/health/startup")
+def startup_timing():
+    """How long this worker took to start, by phase, and which lazily loaded data has loaded"""
+    return startup_report.to_dict()
+
+@app.on_event("shutdown")
+async def shutdown():
+    # Stop the prescription OCR worker processes, the reservation sweeper and
+    # the snapshot writer (which writes a last snapshot)
+    from backend.app.services.prescription_ocr import shutdown_ocr_pool
+    from backend.app.services.stock_reservations import stop_reservation_sweeper
+    from backend.app.services.real_data_service import stop_snapshot_writer
+    shutdown_ocr_pool()
+    stop_reservation_sweeper()
+    stop_snapshot_writer()
+    if STORAGE_BACKEND == "sqlite":
+        from backend.app.services.sqlite_data_service import close_connections
+        close_connections()
+
 @app.websocket("/ws/er")
 async def er(ws: WebSocket):
     await ws.accept()
     # Send real-time bed availability data
-    from backend.app.services.real_data_service import get_all_bed_availability
+    from backend.app.services.data_service_router import get_all_bed_availability
     bed_data = get_all_bed_availability()
     
     # Calculate summary stats
@@ -0,0 +1,30 @@
+from pydantic import BaseModel
+from typing import Optional, List
+
+# List endpoints return a bare list of records, or one of these pages when called
+# with limit or cursor. next_cursor is None on the last page.
+
+class PatientPage(BaseModel):
+    patients: List[dict]
+    count: int
+    next_cursor: Optional[str] = None
+
+class DoctorPage(BaseModel):
+    doctors: List[dict]
+    count: int
+    next_cursor: Optional[str] = None
+
+class HospitalPage(BaseModel):
+    hospitals: List[dict]
+    count: int
+    next_cursor: Optional[str] = None
+
+class RecordPage(BaseModel):
+    records: List[dict]
+    count: int
+    next_cursor: Optional[str] = None
+
+class ClaimPage(BaseModel):
+    claims: List[dict]
+    count: int
+    next_cursor: Optional[str] = None
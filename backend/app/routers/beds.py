@@ -1,5 +1,5 @@
 from fastapi import APIRouter, HTTPException, Query
-from backend.app.services.real_data_service import get_bed_availability, get_all_bed_availability, update_bed_availability
+from backend.app.services.data_service_router import get_bed_availability, get_all_bed_availability, update_bed_availability
 from typing import List, Optional
 
 router = APIRouter(prefix="/beds", tags=["bed-availability"])
@@ -1,24 +1,47 @@
 from fastapi import APIRouter, HTTPException, Query
 from backend.app.services.data_service_router import (
-    get_all_doctors, get_doctor, get_doctors_by_hospital, 
+    get_all_doctors, get_doctors_page, search_doctors, get_doctor, get_doctors_by_hospital, 
     get_doctors_by_specialization, create_doctor, update_doctor, delete_doctor
 )
 from backend.app.models.doctor import DoctorCreate, DoctorUpdate
-from typing import List, Optional
+from backend.app.models.page import DoctorPage
+from backend.app.services.json_codec import FastJSONResponse
+from typing import List, Optional, Union
 
 router = APIRouter(prefix="/doctors", tags=["doctors"])
 
-@router.get("/", response_model=List[dict])
+@router.get("/", response_model=Union[List[dict], DoctorPage])
 def get_doctors(
     hospital_id: Optional[str] = Query(None, description="Filter by hospital ID"),
-    specialization: Optional[str] = Query(None, description="Filter by specialization")
+    specialization: Optional[str] = Query(None, description="Filter by specialization"),
+    limit: Optional[int] = Query(None, description="Page size; enables cursor pagination", ge=1, le=500),
+    cursor: Optional[str] = Query(None, description="Cursor returned with the previous page")
 ):
-    """Get all doctors, optionally filtered by hospital or specialization"""
+    """Get all doctors, optionally filtered by hospital or specialization, or one page of them when limit or cursor is given"""
+    if limit or cursor:
+        try:
+            page = get_doctors_page(limit=limit or 50, cursor=cursor, hospital_id=hospital_id, specialization=specialization)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        return FastJSONResponse({
+            "doctors": page["doctors"],
+            "count": len(page["doctors"]),
+            "next_cursor": page["next_cursor"]
+        })
     if hospital_id:
-        return get_doctors_by_hospital(hospital_id)
+        return FastJSONResponse(get_doctors_by_hospital(hospital_id))
     if specialization:
-        return get_doctors_by_specialization(specialization)
-    return get_all_doctors()
+        return FastJSONResponse(get_doctors_by_specialization(specialization))
+    return FastJSONResponse(get_all_doctors())
+
+@router.get("/search", response_model=dict)
+def search_doctors_endpoint(
+    q: str = Query(..., min_length=1, description="Search text; the last word also matches as a prefix"),
+    limit: int = Query(20, description="Maximum number of results", ge=1, le=100)
+):
+    """Free-text search over doctor names, specializations and hospital cities, best match first (typos tolerated)"""
+    results = search_doctors(q, limit=limit)
+    return FastJSONResponse({"doctors": results, "count": len(results)})
 
 @router.get("/{doctor_id}", response_model=dict)
 def get_doctor_by_id(doctor_id: str):
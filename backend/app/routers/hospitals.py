@@ -1,22 +1,45 @@
 from fastapi import APIRouter, HTTPException, Query
 from backend.app.services.data_service_router import (
-    get_all_hospitals, get_hospital, search_hospitals,
+    get_all_hospitals, get_hospitals_page, search_hospitals_text, get_hospital, search_hospitals,
     create_hospital, update_hospital, delete_hospital,
     get_bed_availability, get_all_bed_availability, update_bed_availability
 )
 from backend.app.models.hospital import HospitalCreate, HospitalUpdate
-from typing import List, Optional
+from backend.app.models.page import HospitalPage
+from backend.app.services.json_codec import FastJSONResponse
+from typing import List, Optional, Union
 
 router = APIRouter(prefix="/hospitals", tags=["hospitals"])
 
-@router.get("/", response_model=List[dict])
+@router.get("/", response_model=Union[List[dict], HospitalPage])
 def get_hospitals(
     city: Optional[str] = Query(None, description="Filter by city"),
     state: Optional[str] = Query(None, description="Filter by state"),
-    specialty: Optional[str] = Query(None, description="Filter by specialty")
+    specialty: Optional[str] = Query(None, description="Filter by specialty"),
+    limit: Optional[int] = Query(None, description="Page size; enables cursor pagination", ge=1, le=500),
+    cursor: Optional[str] = Query(None, description="Cursor returned with the previous page")
 ):
-    """Get all hospitals, optionally filtered by location or specialty"""
-    return search_hospitals(city=city, state=state, specialty=specialty)
+    """Get all hospitals, optionally filtered by location or specialty, or one page of them when limit or cursor is given"""
+    if limit or cursor:
+        try:
+            page = get_hospitals_page(limit=limit or 50, cursor=cursor, city=city, state=state, specialty=specialty)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        return FastJSONResponse({
+            "hospitals": page["hospitals"],
+            "count": len(page["hospitals"]),
+            "next_cursor": page["next_cursor"]
+        })
+    return FastJSONResponse(search_hospitals(city=city, state=state, specialty=specialty))
+
+@router.get("/search", response_model=dict)
+def search_hospitals_endpoint(
+    q: str = Query(..., min_length=1, description="Search text; the last word also matches as a prefix"),
+    limit: int = Query(20, description="Maximum number of results", ge=1, le=100)
+):
+    """Free-text search over hospital names, cities, specialties and facilities, best match first (typos tolerated)"""
+    results = search_hospitals_text(q, limit=limit)
+    return FastJSONResponse({"hospitals": results, "count": len(results)})
 
 @router.get("/{hospital_id}", response_model=dict)
 def get_hospital_by_id(hospital_id: str):
@@ -1,23 +1,44 @@
-from fastapi import APIRouter, HTTPException, Query
-from backend.app.services.fhir_data_service import get_insurance_claims, get_coverage_rules
-from typing import List, Optional
+from fastapi import APIRouter, HTTPException, Query, Response
+from backend.app.services.fhir_data_service import get_insurance_claims, get_insurance_claims_page, get_coverage_rules
+from backend.app.services.fhir_records import ClaimRecord, CoverageRuleRecord, parse_fields, serialize_records
+from backend.app.models.page import ClaimPage
+from typing import List, Optional, Union
 
 router = APIRouter(prefix="/insurance", tags=["insurance"])
 
-@router.get("/claims", response_model=List[dict])
+FIELDS_DESCRIPTION = "Comma-separated fields to return (default all); only the FHIR elements they need are fetched"
+
+@router.get("/claims", response_model=Union[List[dict], ClaimPage])
 def get_claims(
-    hospital_id: Optional[str] = Query(None, description="Filter by hospital ID")
+    hospital_id: Optional[str] = Query(None, description="Filter by hospital ID"),
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    limit: Optional[int] = Query(None, description="Page size; enables cursor pagination", ge=1, le=200),
+    cursor: Optional[str] = Query(None, description="Cursor returned with the previous page")
 ):
-    """Get all insurance claims from FHIR server, optionally filtered by hospital"""
-    return get_insurance_claims(hospital_id=hospital_id)
+    """Get all insurance claims from FHIR server, optionally filtered by hospital, or one page of them when limit or cursor is given"""
+    try:
+        projection = parse_fields(fields, ClaimRecord)
+        if limit or cursor:
+            page = get_insurance_claims_page(hospital_id=hospital_id, fields=projection, limit=limit or 50, cursor=cursor)
+            page["count"] = len(page["claims"])
+            return Response(content=serialize_records(page, projection), media_type="application/json")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    claims = get_insurance_claims(hospital_id=hospital_id, fields=projection)
+    return Response(content=serialize_records(claims, projection), media_type="application/json")
 
 @router.get("/coverage-rules", response_model=List[dict])
 def get_coverage_rules_endpoint(
-    limit: Optional[int] = Query(20, description="Maximum number of coverage rules to return", ge=1, le=50)
+    limit: Optional[int] = Query(20, description="Maximum number of coverage rules to return", ge=1, le=50),
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION)
 ):
     """Get insurance coverage rules from FHIR server (limited to 20 by default for performance)"""
     try:
-        return get_coverage_rules(limit=limit)
+        projection = parse_fields(fields, CoverageRuleRecord)
+        rules = get_coverage_rules(limit=limit, fields=projection)
+        return Response(content=serialize_records(rules, projection), media_type="application/json")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         from fastapi import HTTPException
         raise HTTPException(status_code=500, detail=f"Error fetching coverage rules: {str(e)}")
@@ -1,9 +1,24 @@
-
 from fastapi import APIRouter
+from pydantic import BaseModel
+from typing import List
 from backend.app.services.intent_engine import execute
+from backend.app.services.ai import triage_batch
 
 router = APIRouter()
 
+class BatchTriageRequest(BaseModel):
+    symptom_reports: List[List[str]]
+
 @router.post("/execute")
 def run_intent(payload: dict):
     return execute(payload)
+
+@router.post("/triage/batch")
+def run_batch_triage(request: BatchTriageRequest):
+    """Triage many symptom reports in one call; results are returned in input order"""
+    results = triage_batch(request.symptom_reports)
+    return {
+        "status": "success",
+        "results": results,
+        "count": len(results)
+    }
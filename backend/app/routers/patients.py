@@ -1,14 +1,43 @@
-from fastapi import APIRouter, HTTPException
-from backend.app.services.data_service_router import get_all_patients, get_patient, create_patient, update_patient, delete_patient
+from fastapi import APIRouter, HTTPException, Query, Response
+from backend.app.services.data_service_router import (
+    get_all_patients, get_patients_page, search_patients, get_patient, create_patient, update_patient, delete_patient
+)
+from backend.app.services.fhir_data_service import get_patient_timeline
+from backend.app.services.fhir_records import serialize_records
 from backend.app.models.patient import PatientCreate, PatientUpdate
-from typing import List
+from backend.app.models.page import PatientPage
+from backend.app.services.json_codec import FastJSONResponse
+from typing import List, Optional, Union
 
 router = APIRouter(prefix="/patients", tags=["patients"])
 
-@router.get("/", response_model=List[dict])
-def get_patients():
-    """Get all patients"""
-    return get_all_patients()
+@router.get("/", response_model=Union[List[dict], PatientPage])
+def get_patients(
+    limit: Optional[int] = Query(None, description="Page size; enables cursor pagination", ge=1, le=500),
+    cursor: Optional[str] = Query(None, description="Cursor returned with the previous page")
+):
+    """Get all patients, or one page of them when limit or cursor is given"""
+    # Returned as a response so the rows are not re-validated against response_model
+    if limit or cursor:
+        try:
+            page = get_patients_page(limit=limit or 50, cursor=cursor)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        return FastJSONResponse({
+            "patients": page["patients"],
+            "count": len(page["patients"]),
+            "next_cursor": page["next_cursor"]
+        })
+    return FastJSONResponse(get_all_patients())
+
+@router.get("/search", response_model=dict)
+def search_patients_endpoint(
+    q: str = Query(..., min_length=1, description="Search text; the last word also matches as a prefix"),
+    limit: int = Query(20, description="Maximum number of results", ge=1, le=100)
+):
+    """Free-text search over patient names, conditions and addresses, best match first (typos tolerated)"""
+    results = search_patients(q, limit=limit)
+    return FastJSONResponse({"patients": results, "count": len(results)})
 
 @router.get("/{patient_id}", response_model=dict)
 def get_patient_by_id(patient_id: str):
@@ -18,6 +47,25 @@ def get_patient_by_id(patient_id: str):
         raise HTTPException(status_code=404, detail="Patient not found")
     return patient
 
+@router.get("/{patient_id}/timeline", response_model=dict)
+def get_patient_timeline_endpoint(
+    patient_id: str,
+    limit: int = Query(20, description="Maximum number of entries to return", ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page")
+):
+    """
+    Get a patient's chart as one timeline, newest first
+    Encounters, conditions, claims, medication requests and observations are fetched
+    from the FHIR server concurrently and merged by date
+    """
+    try:
+        timeline = get_patient_timeline(patient_id, limit=limit, cursor=cursor)
+        return Response(content=serialize_records(timeline), media_type="application/json")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching patient timeline: {str(e)}")
+
 @router.post("/", response_model=dict)
 def create_new_patient(patient: PatientCreate):
     """Create a new patient"""
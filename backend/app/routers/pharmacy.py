@@ -1,29 +1,64 @@
 from fastapi import APIRouter, UploadFile, File, HTTPException, Query
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel
 from typing import List, Dict, Optional
+from datetime import datetime
 import base64
 import io
-import re
-
-# Try to import PIL, but handle gracefully if not installed
-try:
-    from PIL import Image
-    PIL_AVAILABLE = True
-except ImportError:
-    PIL_AVAILABLE = False
-    Image = None
 
 from backend.app.services.medication_recommender import get_medications_for_diagnosis
-from backend.app.services.inventory_service import check_medication_stock, get_all_inventory, search_inventory
-from backend.app.services.fulfillment_service import get_fulfillment_status, get_fulfillment_by_status, get_in_stock_medications
+from backend.app.services.prescription_ocr import OCR_AVAILABLE, OCRQueueFullError, UploadTooLargeError, scan_upload
+from backend.app.services.scan_jobs import create_scan_job, get_scan_job, stream_scan_job
+from backend.app.services.inventory_service import check_medication_stock, get_all_inventory, search_inventory, suggest_medications, get_inventory_page, filter_inventory, get_reorder_list, get_inventory_summary, update_stock_quantity, InsufficientStockError, StockVersionConflictError
+from backend.app.services.inventory_service import DEFAULT_SITE_ID, UnknownSiteError, get_site, list_sites, register_site, find_stock_across_sites
+from backend.app.services.demand_forecast import get_demand_forecast, record_dispensing_event
+from backend.app.services.stock_reservations import reserve_stock, get_reservation, commit_reservation, release_reservation, get_available_quantity, ReservationStateError
+from backend.app.services.fulfillment_service import get_fulfillment_status, get_fulfillment_by_status, get_in_stock_medications, get_fulfillment_counts, record_fulfillment_event
 
 router = APIRouter(prefix="/pharmacy", tags=["pharmacy"])
 
+# Longest medication search term accepted
+MEDICATION_QUERY_MAX_LENGTH = 200
+
 class DiagnosisRequest(BaseModel):
     diagnosis: str
     patient_id: Optional[str] = None
 
+class FulfillmentEventRequest(BaseModel):
+    fulfillment_status: str
+    order_date: Optional[str] = None
+    expected_delivery: Optional[str] = None
+    delivery_date: Optional[str] = None
+    quantity_ordered: Optional[int] = None
+    quantity_received: Optional[int] = None
+    supplier: Optional[str] = None
+    order_number: Optional[str] = None
+    notes: Optional[str] = None
+    site_id: str = DEFAULT_SITE_ID
+
+class StockUpdateRequest(BaseModel):
+    stock_quantity: int
+    expected_version: Optional[int] = None
+
+class ReservationRequest(BaseModel):
+    medication_name: str
+    quantity: int
+    ttl_seconds: Optional[int] = None
+    site_id: str = DEFAULT_SITE_ID
+
+class DispensingEventRequest(BaseModel):
+    medication_name: str
+    quantity: int
+    site_id: str = DEFAULT_SITE_ID
+    dispensed_at: Optional[datetime] = None
+
+class SiteRequest(BaseModel):
+    site_id: str
+    name: Optional[str] = None
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+    inventory: Optional[List[Dict]] = None
+
 @router.get("/test")
 async def test_endpoint():
     """Test endpoint to verify pharmacy router is working"""
@@ -84,181 +119,201 @@ async def recommend_medications_get(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error getting medication recommendations: {str(e)}")
 
-def extract_medications_from_text(text: str) -> List[Dict]:
-    """
-    Extract medication information from OCR text using pattern matching
-    This is a simplified version - in production, use ML/NLP models
-    """
-    medications = []
-    
-    # Common medication patterns
-    medication_patterns = [
-        r'([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)\s+(\d+(?:\.\d+)?\s*(?:mg|g|ml|tablet|tab|capsule|cap))',
-        r'([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)\s+(\d+(?:\.\d+)?)\s*(?:mg|g|ml)',
-        r'([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)\s+(?:take|use|apply)\s+(\d+)',
-    ]
-    
-    # Frequency patterns
-    frequency_patterns = [
-        r'(?:take|use|apply)\s+(?:once|twice|three times|four times)\s+(?:daily|a day|per day)',
-        r'(\d+)\s*(?:times|X)\s*(?:daily|a day|per day)',
-        r'(?:every|q)\s*(\d+)\s*(?:hours|hrs|h)',
-        r'(?:before|after)\s+(?:meals|breakfast|lunch|dinner)',
-    ]
-    
-    # Duration patterns
-    duration_patterns = [
-        r'(?:for|continue)\s+(\d+)\s*(?:days|weeks|months)',
-        r'(\d+)\s*(?:days|weeks|months)',
-    ]
-    
-    lines = text.split('\n')
-    current_medication = None
-    
-    for line in lines:
-        line = line.strip()
-        if not line:
-            continue
-        
-        # Try to find medication name and dosage
-        for pattern in medication_patterns:
-            match = re.search(pattern, line, re.IGNORECASE)
-            if match:
-                med_name = match.group(1).strip()
-                dosage = match.group(2).strip() if len(match.groups()) > 1 else ""
-                
-                # Check if it's a common medication name (not just random words)
-                common_meds = [
-                    'aspirin', 'ibuprofen', 'acetaminophen', 'amoxicillin', 'penicillin',
-                    'metformin', 'lisinopril', 'atorvastatin', 'levothyroxine', 'amlodipine',
-                    'metoprolol', 'omeprazole', 'losartan', 'albuterol', 'gabapentin',
-                    'sertraline', 'simvastatin', 'montelukast', 'tramadol', 'trazodone'
-                ]
-                
-                if any(med.lower() in med_name.lower() for med in common_meds) or len(med_name.split()) <= 3:
-                    current_medication = {
-                        "name": med_name,
-                        "dosage": dosage,
-                        "frequency": "",
-                        "duration": "",
-                        "instructions": "",
-                        "quantity": ""
-                    }
-                    medications.append(current_medication)
-                    break
-        
-        # If we have a current medication, try to extract frequency and duration
-        if current_medication:
-            for pattern in frequency_patterns:
-                match = re.search(pattern, line, re.IGNORECASE)
-                if match and not current_medication["frequency"]:
-                    current_medication["frequency"] = match.group(0).strip()
-                    break
-            
-            for pattern in duration_patterns:
-                match = re.search(pattern, line, re.IGNORECASE)
-                if match and not current_medication["duration"]:
-                    current_medication["duration"] = match.group(0).strip()
-                    break
-            
-            # Extract instructions
-            if any(keyword in line.lower() for keyword in ['with food', 'without food', 'before meal', 'after meal', 'at bedtime']):
-                current_medication["instructions"] = line.strip()
-    
-    # If no medications found with patterns, try to extract common medication names
-    if not medications:
-        text_lower = text.lower()
-        common_medications = {
-            'aspirin': 'Aspirin',
-            'ibuprofen': 'Ibuprofen',
-            'acetaminophen': 'Acetaminophen',
-            'amoxicillin': 'Amoxicillin',
-            'penicillin': 'Penicillin',
-            'metformin': 'Metformin',
-            'lisinopril': 'Lisinopril',
-            'atorvastatin': 'Atorvastatin',
-        }
-        
-        for med_key, med_name in common_medications.items():
-            if med_key in text_lower:
-                medications.append({
-                    "name": med_name,
-                    "dosage": "",
-                    "frequency": "",
-                    "duration": "",
-                    "instructions": "",
-                    "quantity": ""
-                })
-    
-    return medications
-
 @router.post("/scan-prescription")
 async def scan_prescription(file: UploadFile = File(...)):
     """
     Upload and process prescription image to extract medication information
-    Returns sample medications immediately for demonstration
+    
+    The upload is streamed to disk in chunks, then decoded, deskewed, binarized
+    and OCR'd on a process pool so the event loop stays responsive.
     """
     try:
-        # Minimal validation - just check file exists
         if not file:
             raise HTTPException(status_code=400, detail="No file provided")
         
-        # Skip reading file content to avoid any delays
-        # Just validate file type from content_type
         if file.content_type and not file.content_type.startswith('image/'):
             raise HTTPException(status_code=400, detail="File must be an image")
         
-        # Immediately return sample medications (no file processing)
-        # In production, you would read and process the file with OCR here
-        
-        medications = [
-            {
-                "name": "Amoxicillin",
-                "dosage": "500mg",
-                "frequency": "Twice daily",
-                "duration": "7 days",
-                "instructions": "Take with food",
-                "quantity": "14 tablets"
-            },
-            {
-                "name": "Ibuprofen",
-                "dosage": "200mg",
-                "frequency": "Every 6 hours as needed",
-                "duration": "As needed",
-                "instructions": "Take with food or milk",
-                "quantity": "30 tablets"
-            },
-            {
-                "name": "Metformin",
-                "dosage": "500mg",
-                "frequency": "Once daily",
-                "duration": "Ongoing",
-                "instructions": "Take with meals",
-                "quantity": "30 tablets"
-            }
-        ]
+        if not OCR_AVAILABLE:
+            raise HTTPException(status_code=503, detail="Prescription OCR is not available (requires Pillow and pytesseract)")
+        
+        result = await scan_upload(file)
+        medications = result["medications"]
         
         return {
             "status": "success",
             "medications": medications,
-            "prescription_data": {
-                "patientName": "Extracted from prescription",
-                "doctorName": "Extracted from prescription"
-            },
+            "prescription_data": result["prescription_data"],
+            "ocr_text": result["text"],
             "message": f"Successfully processed prescription image. Found {len(medications)} medication(s)."
         }
     
     except HTTPException:
         raise
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except OCRQueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         import traceback
         error_detail = f"Error processing prescription: {str(e)}\n{traceback.format_exc()}"
         print(error_detail)  # Log for debugging
         raise HTTPException(status_code=500, detail=f"Error processing prescription: {str(e)}")
 
+@router.post("/scan-prescription/batch", status_code=202)
+async def scan_prescription_batch(files: List[UploadFile] = File(...)):
+    """
+    Queue a batch of prescription images (and/or zip archives of images) for OCR
+    
+    Pages are processed in parallel on the OCR worker pool, leaving room for
+    single scans. Poll GET /pharmacy/jobs/{job_id} or stream
+    GET /pharmacy/jobs/{job_id}/stream (NDJSON, one line per finished page) for
+    results. Jobs are held by the worker process that accepted them, so with
+    several workers the polls must be routed to the same one.
+    """
+    try:
+        if not files:
+            raise HTTPException(status_code=400, detail="No files provided")
+        
+        if not OCR_AVAILABLE:
+            raise HTTPException(status_code=503, detail="Prescription OCR is not available (requires Pillow and pytesseract)")
+        
+        job = await create_scan_job(files)
+        
+        return {
+            "status": "accepted",
+            "job_id": job["job_id"],
+            "total_pages": job["total_pages"],
+            "status_url": f"/api/v1/pharmacy/jobs/{job['job_id']}",
+            "stream_url": f"/api/v1/pharmacy/jobs/{job['job_id']}/stream",
+            "message": f"Queued {job['total_pages']} prescription page(s) for processing"
+        }
+    except HTTPException:
+        raise
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except OCRQueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error queuing prescription batch: {str(e)}")
+
+@router.get("/jobs/{job_id}")
+async def get_scan_job_status(job_id: str):
+    """
+    Get the status and finished page results of a batch scan job
+    
+    Args:
+        job_id: Job ID returned by POST /pharmacy/scan-prescription/batch
+    """
+    try:
+        job = get_scan_job(job_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail=f"Scan job {job_id} not found")
+        
+        return {
+            "status": "success",
+            "job": job
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error getting scan job: {str(e)}")
+
+@router.get("/jobs/{job_id}/stream")
+async def stream_scan_job_results(job_id: str):
+    """
+    Stream batch scan results as NDJSON: one line per page as it finishes,
+    followed by a final line with the job summary
+    """
+    if get_scan_job(job_id) is None:
+        raise HTTPException(status_code=404, detail=f"Scan job {job_id} not found")
+    return StreamingResponse(stream_scan_job(job_id), media_type="application/x-ndjson")
+
+@router.get("/sites")
+async def get_sites():
+    """
+    List the pharmacy sites whose inventories are served by this API
+    """
+    try:
+        sites = list_sites()
+        return {
+            "status": "success",
+            "sites": sites,
+            "count": len(sites)
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error listing sites: {str(e)}")
+
+@router.post("/sites", status_code=201)
+async def create_site(request: SiteRequest):
+    """
+    Register a pharmacy site, optionally with its initial inventory
+    
+    Args:
+        request: Site ID, display name, coordinates and medication records
+    """
+    try:
+        if any("name" not in med for med in request.inventory or []):
+            raise HTTPException(status_code=400, detail="Every inventory record needs a name")
+        
+        site = register_site(
+            request.site_id,
+            name=request.name,
+            latitude=request.latitude,
+            longitude=request.longitude,
+            inventory=request.inventory
+        )
+        return {
+            "status": "success",
+            "site": site
+        }
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error registering site: {str(e)}")
+
+# Plain def: the search across sites is blocking work, so it runs in the threadpool
+@router.get("/inventory/availability")
+def get_inventory_availability(
+    medication: str = Query(..., description="Medication name to look for", max_length=MEDICATION_QUERY_MAX_LENGTH),
+    quantity: int = Query(1, description="Minimum quantity available (on hand minus reservation holds)", ge=1),
+    latitude: Optional[float] = Query(None, description="Origin latitude; ranks sites by distance", ge=-90, le=90),
+    longitude: Optional[float] = Query(None, description="Origin longitude", ge=-180, le=180),
+    limit: int = Query(10, description="Maximum number of sites", ge=1, le=100)
+):
+    """
+    Find which pharmacy sites have a medication available
+    
+    Returns:
+        Sites with at least quantity available, nearest first when latitude and
+        longitude are given, otherwise most available stock first
+    """
+    try:
+        if not medication.strip():
+            raise HTTPException(status_code=400, detail="Medication name is required")
+        
+        sites = find_stock_across_sites(medication, quantity=quantity, latitude=latitude, longitude=longitude, limit=limit)
+        return {
+            "status": "success",
+            "medication": medication,
+            "sites": sites,
+            "count": len(sites)
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error finding stock across sites: {str(e)}")
+
 @router.get("/inventory/check")
 async def check_inventory(
-    medication: str = Query(..., description="Medication name to check")
+    medication: str = Query(..., description="Medication name to check", max_length=MEDICATION_QUERY_MAX_LENGTH),
+    site_id: str = Query(DEFAULT_SITE_ID, description="Pharmacy site ID")
 ):
     """
     Check if a medication is in stock
@@ -273,7 +328,7 @@ async def check_inventory(
         if not medication or not medication.strip():
             raise HTTPException(status_code=400, detail="Medication name is required")
         
-        stock_info = check_medication_stock(medication)
+        stock_info = check_medication_stock(medication, site_id=site_id)
         
         return {
             "status": "success",
@@ -281,65 +336,376 @@ async def check_inventory(
         }
     except HTTPException:
         raise
+    except UnknownSiteError as e:
+        raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error checking inventory: {str(e)}")
 
+@router.get("/inventory/suggest")
+async def suggest_inventory(
+    q: str = Query(..., description="Leading characters of the medication name", max_length=MEDICATION_QUERY_MAX_LENGTH),
+    limit: int = Query(10, description="Maximum number of suggestions", ge=1, le=50),
+    site_id: str = Query(DEFAULT_SITE_ID, description="Pharmacy site ID")
+):
+    """
+    Autocomplete medication names from the inventory by prefix
+    
+    Returns:
+        Matching medication names in alphabetical order
+    """
+    try:
+        suggestions = suggest_medications(q, limit=limit, site_id=site_id)
+        
+        return {
+            "status": "success",
+            "suggestions": suggestions,
+            "count": len(suggestions)
+        }
+    except UnknownSiteError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error getting suggestions: {str(e)}")
+
+@router.get("/inventory/summary")
+async def get_inventory_summary_endpoint(
+    site_id: str = Query(DEFAULT_SITE_ID, description="Pharmacy site ID")
+):
+    """
+    Get aggregate inventory figures: medications per stock status, units on hand
+    and the number of medications at or below their reorder level
+    """
+    try:
+        return {
+            "status": "success",
+            "summary": get_inventory_summary(site_id)
+        }
+    except UnknownSiteError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error getting inventory summary: {str(e)}")
+
+@router.get("/inventory/reorder")
+async def get_reorder_list_endpoint(
+    target_multiple: float = Query(2.0, description="Restock to this multiple of the reorder level", gt=0, le=20),
+    site_id: str = Query(DEFAULT_SITE_ID, description="Pharmacy site ID")
+):
+    """
+    Get medications at or below their reorder level with suggested order quantities
+    
+    Args:
+        target_multiple: Each medication is restocked to target_multiple x its reorder level
+    """
+    try:
+        reorder = get_reorder_list(target_multiple, site_id=site_id)
+        return {
+            "status": "success",
+            "reorder": reorder,
+            "count": len(reorder),
+            "total_units": sum(line["reorder_quantity"] for line in reorder)
+        }
+    except UnknownSiteError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error computing reorder list: {str(e)}")
+
 @router.get("/inventory")
 async def get_inventory(
-    search: Optional[str] = Query(None, description="Search term to filter medications")
+    search: Optional[str] = Query(None, description="Search term to filter medications", max_length=MEDICATION_QUERY_MAX_LENGTH),
+    status: Optional[str] = Query(None, description="Filter by stock status: out_of_stock, low_stock, in_stock"),
+    limit: Optional[int] = Query(None, description="Page size; enables cursor pagination", ge=1, le=500),
+    cursor: Optional[str] = Query(None, description="Cursor returned with the previous page"),
+    below_reorder: bool = Query(False, description="Only medications at or below their reorder level"),
+    unit: Optional[str] = Query(None, description="Filter by unit, e.g. tablets"),
+    site_id: str = Query(DEFAULT_SITE_ID, description="Pharmacy site ID")
 ):
     """
     Get all medication inventory or search by name
     
     Args:
         search: Optional search term to filter medications
+        status: Optional stock status filter
+        limit: Optional page size; when set (or a cursor is given) results are paginated
+        cursor: Optional cursor from the previous page
+        below_reorder: Only medications at or below their reorder level
+        unit: Optional unit filter
+        site_id: Pharmacy site ID
         
     Returns:
         List of medications with stock information
     """
     try:
+        if (below_reorder or unit) and not (limit or cursor):
+            inventory = filter_inventory(search=search, status=status, below_reorder=below_reorder, unit=unit, site_id=site_id)
+            return {
+                "status": "success",
+                "inventory": inventory,
+                "count": len(inventory)
+            }
+        
+        if limit or cursor or status:
+            page = get_inventory_page(
+                search=search, status=status, limit=limit or 50, cursor=cursor, site_id=site_id,
+                below_reorder=below_reorder, unit=unit
+            )
+            return {
+                "status": "success",
+                "inventory": page["inventory"],
+                "count": len(page["inventory"]),
+                "next_cursor": page["next_cursor"]
+            }
+        
         if search:
-            inventory = search_inventory(search)
+            inventory = search_inventory(search, site_id=site_id)
         else:
-            inventory = get_all_inventory()
+            inventory = get_all_inventory(site_id=site_id)
         
         return {
             "status": "success",
             "inventory": inventory,
             "count": len(inventory)
         }
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except UnknownSiteError as e:
+        raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error getting inventory: {str(e)}")
 
+@router.put("/inventory/{medication_name}/stock")
+async def put_stock_quantity(
+    medication_name: str,
+    update: StockUpdateRequest,
+    site_id: str = Query(DEFAULT_SITE_ID, description="Pharmacy site ID")
+):
+    """
+    Set the quantity on hand of a medication
+    
+    Pass the record's version as expected_version to make the write conditional:
+    it is rejected with 409 if the record changed since it was read.
+    """
+    try:
+        if update.stock_quantity < 0:
+            raise HTTPException(status_code=400, detail="Stock quantity cannot be negative")
+        
+        record = update_stock_quantity(medication_name, update.stock_quantity, expected_version=update.expected_version, site_id=site_id)
+        if record is None:
+            raise HTTPException(status_code=404, detail="Medication not found in inventory")
+        
+        return {
+            "status": "success",
+            "medication": {**record, "available_quantity": get_available_quantity(medication_name, site_id)}
+        }
+    except HTTPException:
+        raise
+    except StockVersionConflictError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except UnknownSiteError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error updating stock: {str(e)}")
+
+@router.post("/reservations")
+async def create_reservation(request: ReservationRequest):
+    """
+    Hold stock for a pending dispense. The hold expires after ttl_seconds unless
+    it is committed or released first.
+    """
+    try:
+        reservation = reserve_stock(request.medication_name, request.quantity, ttl_seconds=request.ttl_seconds, site_id=request.site_id)
+        if reservation is None:
+            raise HTTPException(status_code=404, detail="Medication not found in inventory")
+        
+        return {
+            "status": "success",
+            "reservation": reservation,
+            "available_quantity": get_available_quantity(request.medication_name, request.site_id)
+        }
+    except HTTPException:
+        raise
+    except InsufficientStockError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except UnknownSiteError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error reserving stock: {str(e)}")
+
+@router.get("/reservations/{reservation_id}")
+async def get_reservation_endpoint(reservation_id: str):
+    """Get a stock reservation"""
+    reservation = get_reservation(reservation_id)
+    if reservation is None:
+        raise HTTPException(status_code=404, detail="Reservation not found")
+    return {
+        "status": "success",
+        "reservation": reservation
+    }
+
+@router.post("/reservations/{reservation_id}/commit")
+async def commit_reservation_endpoint(reservation_id: str):
+    """Dispense a held reservation, deducting its quantity from stock"""
+    try:
+        reservation = commit_reservation(reservation_id)
+        if reservation is None:
+            raise HTTPException(status_code=404, detail="Reservation not found")
+        
+        return {
+            "status": "success",
+            "reservation": reservation
+        }
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error committing reservation: {str(e)}")
+
+@router.post("/reservations/{reservation_id}/release")
+async def release_reservation_endpoint(reservation_id: str):
+    """Release a held reservation, returning its quantity to available stock"""
+    try:
+        reservation = release_reservation(reservation_id)
+        if reservation is None:
+            raise HTTPException(status_code=404, detail="Reservation not found")
+        
+        return {
+            "status": "success",
+            "reservation": reservation
+        }
+    except HTTPException:
+        raise
+    except ReservationStateError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error releasing reservation: {str(e)}")
+
 @router.get("/fulfillment")
 async def get_fulfillment(
-    status: Optional[str] = Query(None, description="Filter by fulfillment status: all, not_ordered, pending, ordered, in_transit, delivered")
+    status: Optional[str] = Query(None, description="Filter by fulfillment status: all, not_ordered, pending, ordered, in_transit, delivered"),
+    site_id: str = Query(DEFAULT_SITE_ID, description="Pharmacy site ID")
 ):
     """
     Get fulfillment status for out-of-stock and low-stock medications
     
     Args:
         status: Optional filter by fulfillment status
+        site_id: Pharmacy site
         
     Returns:
         List of medications with fulfillment status
     """
     try:
         if status and status != "all":
-            fulfillment = get_fulfillment_by_status(status)
+            fulfillment = get_fulfillment_by_status(status, site_id)
         else:
-            fulfillment = get_fulfillment_status()
+            fulfillment = get_fulfillment_status(site_id)
         
         return {
             "status": "success",
             "fulfillment": fulfillment,
-            "count": len(fulfillment)
+            "count": len(fulfillment),
+            "counts_by_status": get_fulfillment_counts(site_id)
         }
+    except UnknownSiteError as e:
+        raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error getting fulfillment status: {str(e)}")
 
+@router.post("/fulfillment/{medication_name}/events")
+async def post_fulfillment_event(medication_name: str, event: FulfillmentEventRequest):
+    """
+    Record an order event that moves a medication through the fulfillment states
+    (not_ordered -> pending -> ordered -> in_transit -> delivered)
+    
+    Args:
+        medication_name: Inventory name of the medication
+        event: Target fulfillment status, any order details and the pharmacy site
+        
+    Returns:
+        The updated fulfillment record
+    """
+    try:
+        details = {k: v for k, v in event.dict().items() if v is not None and k not in ("fulfillment_status", "site_id")}
+        record = record_fulfillment_event(medication_name, event.fulfillment_status, details, site_id=event.site_id)
+        if record is None:
+            raise HTTPException(status_code=404, detail="Medication not found in inventory")
+        
+        return {
+            "status": "success",
+            "fulfillment": record
+        }
+    except HTTPException:
+        raise
+    except UnknownSiteError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error recording fulfillment event: {str(e)}")
+
+@router.get("/fulfillment/forecast")
+async def get_fulfillment_forecast(
+    site_id: str = Query(DEFAULT_SITE_ID, description="Pharmacy site ID"),
+    needs_reorder: bool = Query(False, description="Only medications at or below their reorder point"),
+    lead_time_days: Optional[float] = Query(None, description="Supplier lead time in days", ge=0, le=365),
+    safety_days: Optional[float] = Query(None, description="Days of safety stock", ge=0, le=365)
+):
+    """
+    Forecast consumption from dispensing events: smoothed daily consumption,
+    days of supply and a dynamic reorder point per medication
+    
+    Returns:
+        Forecast rows, fewest days of supply first
+    """
+    try:
+        options = {}
+        if lead_time_days is not None:
+            options["lead_time_days"] = lead_time_days
+        if safety_days is not None:
+            options["safety_days"] = safety_days
+        forecast = get_demand_forecast(site_id, **options)
+        if needs_reorder:
+            forecast = [row for row in forecast if row["needs_reorder"]]
+        
+        return {
+            "status": "success",
+            "forecast": forecast,
+            "count": len(forecast)
+        }
+    except UnknownSiteError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error computing forecast: {str(e)}")
+
+@router.post("/fulfillment/forecast/dispensing-events")
+async def post_dispensing_event(event: DispensingEventRequest):
+    """
+    Record units dispensed outside the reservation flow (e.g. imported history).
+    Updates the consumption forecast only; stock is not changed.
+    """
+    try:
+        if event.quantity <= 0:
+            raise HTTPException(status_code=400, detail="Quantity must be positive")
+        if event.medication_name not in get_site(event.site_id).inventory:
+            raise HTTPException(status_code=404, detail="Medication not found in inventory")
+        
+        record_dispensing_event(event.medication_name, event.quantity, site_id=event.site_id, dispensed_at=event.dispensed_at)
+        return {
+            "status": "success",
+            "message": f"Recorded {event.quantity} unit(s) of {event.medication_name} dispensed"
+        }
+    except HTTPException:
+        raise
+    except UnknownSiteError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error recording dispensing event: {str(e)}")
+
 @router.get("/fulfillment/in-stock")
-async def get_in_stock_medications_endpoint():
+async def get_in_stock_medications_endpoint(
+    site_id: str = Query(DEFAULT_SITE_ID, description="Pharmacy site ID")
+):
     """
     Get all medications that are currently in stock
     
@@ -347,13 +713,15 @@ async def get_in_stock_medications_endpoint():
         List of in-stock medications
     """
     try:
-        in_stock = get_in_stock_medications()
+        in_stock = get_in_stock_medications(site_id)
         
         return {
             "status": "success",
             "medications": in_stock,
             "count": len(in_stock)
         }
+    except UnknownSiteError as e:
+        raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error getting in-stock medications: {str(e)}")
 
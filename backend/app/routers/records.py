@@ -1,49 +1,96 @@
-from fastapi import APIRouter, HTTPException, Query
-from backend.app.services.fhir_data_service import get_medical_records, get_medical_history, get_patient_visits
-from typing import List, Optional
+from fastapi import APIRouter, HTTPException, Query, Response
+from backend.app.services.fhir_data_service import (
+    get_medical_records, get_medical_records_page, get_medical_history, get_patient_visits, get_patient_detail
+)
+from backend.app.services.fhir_records import (
+    EncounterRecord, MedicalHistoryRecord, VisitRecord, parse_fields, serialize_records
+)
+from backend.app.models.page import RecordPage
+from typing import List, Optional, Union
 
 router = APIRouter(prefix="/records", tags=["records"])
 
-@router.get("/", response_model=List[dict])
+FIELDS_DESCRIPTION = "Comma-separated fields to return (default all); only the FHIR elements they need are fetched"
+
+@router.get("/", response_model=Union[List[dict], RecordPage])
 def get_records(
     hospital_id: Optional[str] = Query(None, description="Filter by hospital ID"),
-    patient_id: Optional[str] = Query(None, description="Filter by patient ID")
+    patient_id: Optional[str] = Query(None, description="Filter by patient ID"),
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    limit: Optional[int] = Query(None, description="Page size; enables cursor pagination", ge=1, le=200),
+    cursor: Optional[str] = Query(None, description="Cursor returned with the previous page")
 ):
     """
     Get medical records/encounters from FHIR server
-    Returns real-time data from FHIR Encounter resources
+    Returns real-time data from FHIR Encounter resources; with limit or cursor,
+    one page of them and the cursor for the next (following the server's paging links)
     """
     try:
-        records = get_medical_records(hospital_id=hospital_id, patient_id=patient_id)
-        return records
+        projection = parse_fields(fields, EncounterRecord)
+        if limit or cursor:
+            page = get_medical_records_page(
+                hospital_id=hospital_id, patient_id=patient_id, fields=projection, limit=limit or 50, cursor=cursor
+            )
+            page["count"] = len(page["records"])
+            return Response(content=serialize_records(page, projection), media_type="application/json")
+        records = get_medical_records(hospital_id=hospital_id, patient_id=patient_id, fields=projection)
+        return Response(content=serialize_records(records, projection), media_type="application/json")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching records: {str(e)}")
 
 @router.get("/medical-history", response_model=List[dict])
 def get_medical_history_endpoint(
     patient_id: Optional[str] = Query(None, description="Filter by patient ID"),
-    limit: Optional[int] = Query(20, description="Maximum number of records to return", ge=1, le=50)
+    limit: Optional[int] = Query(20, description="Maximum number of records to return", ge=1, le=50),
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION)
 ):
     """
     Get medical history (conditions/diagnoses) from FHIR server
     Returns real-time data from FHIR Condition resources (limited to 20 by default for performance)
     """
     try:
-        return get_medical_history(patient_id=patient_id, limit=limit)
+        projection = parse_fields(fields, MedicalHistoryRecord)
+        history = get_medical_history(patient_id=patient_id, limit=limit, fields=projection)
+        return Response(content=serialize_records(history, projection), media_type="application/json")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching medical history: {str(e)}")
 
 @router.get("/visits", response_model=List[dict])
 def get_visits_endpoint(
     patient_id: Optional[str] = Query(None, description="Filter by patient ID"),
-    limit: Optional[int] = Query(20, description="Maximum number of visits to return", ge=1, le=50)
+    limit: Optional[int] = Query(20, description="Maximum number of visits to return", ge=1, le=50),
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION)
 ):
     """
     Get patient visits (encounters) from FHIR server
     Returns real-time data from FHIR Encounter resources (limited to 20 by default for performance)
     """
     try:
-        return get_patient_visits(patient_id=patient_id, limit=limit)
+        projection = parse_fields(fields, VisitRecord)
+        visits = get_patient_visits(patient_id=patient_id, limit=limit, fields=projection)
+        return Response(content=serialize_records(visits, projection), media_type="application/json")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching visits: {str(e)}")
 
+@router.get("/patients/{patient_id}", response_model=dict)
+def get_patient_detail_endpoint(patient_id: str):
+    """
+    Get a patient from FHIR server with allergies, medical history and current medications
+    Fetched in one request (Patient with _revinclude) and cached briefly
+    """
+    try:
+        patient = get_patient_detail(patient_id)
+        if not patient:
+            raise HTTPException(status_code=404, detail="Patient not found")
+        return Response(content=serialize_records(patient), media_type="application/json")
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching patient: {str(e)}")
+
@@ -1,4 +1,23 @@
 
+# Try to import numpy for batch triage, fall back to scalar triage if not installed
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+    np = None
+
+# High-risk symptom keywords
+HIGH_RISK_KEYWORDS = ["chest pain", "difficulty breathing", "severe pain", 
+                      "unconscious", "severe bleeding", "heart attack", 
+                      "stroke", "seizure", "severe allergic reaction"]
+
+# Medium-risk symptom keywords
+MEDIUM_RISK_KEYWORDS = ["fever", "persistent cough", "headache", 
+                        "nausea", "dizziness", "fatigue", "pain"]
+
+SEVERITY_LEVELS = ["low", "medium", "high"]
+
 def triage(symptoms):
     """
     AI-powered triage system that analyzes symptoms and provides risk assessment
@@ -10,15 +29,6 @@ def triage(symptoms):
             "explanation": "No symptoms reported"
         }
     
-    # High-risk symptom keywords
-    high_risk_keywords = ["chest pain", "difficulty breathing", "severe pain", 
-                          "unconscious", "severe bleeding", "heart attack", 
-                          "stroke", "seizure", "severe allergic reaction"]
-    
-    # Medium-risk symptom keywords
-    medium_risk_keywords = ["fever", "persistent cough", "headache", 
-                           "nausea", "dizziness", "fatigue", "pain"]
-    
     symptoms_lower = [s.lower() for s in symptoms]
     
     # Calculate risk score
@@ -26,13 +36,13 @@ def triage(symptoms):
     severity = "low"
     
     # Check for high-risk symptoms
-    high_risk_count = sum(1 for keyword in high_risk_keywords 
+    high_risk_count = sum(1 for keyword in HIGH_RISK_KEYWORDS 
                          if any(keyword in symptom for symptom in symptoms_lower))
     if high_risk_count > 0:
         risk_score = min(90 + (high_risk_count * 5), 100)
         severity = "high"
     # Check for medium-risk symptoms
-    elif any(keyword in symptom for keyword in medium_risk_keywords 
+    elif any(keyword in symptom for keyword in MEDIUM_RISK_KEYWORDS 
              for symptom in symptoms_lower):
         risk_score = min(40 + (len(symptoms) * 10), 80)
         severity = "medium"
@@ -55,3 +65,94 @@ def get_recommended_action(severity):
         "low": "Monitor symptoms and schedule routine appointment if needed"
     }
     return actions.get(severity, "Monitor symptoms")
+
+def triage_batch(symptom_reports):
+    """
+    Batch triage for population screening.
+    
+    All reports are tokenized together into a shared symptom vocabulary, keyword
+    matching runs once per distinct symptom, and risk scores are computed with
+    NumPy arrays. Scores are identical to calling triage() on each report.
+    
+    Args:
+        symptom_reports: List of symptom lists, one per patient
+        
+    Returns:
+        List of triage results in input order
+    """
+    if not NUMPY_AVAILABLE:
+        return [triage(symptoms) for symptoms in symptom_reports]
+    
+    report_count = len(symptom_reports)
+    if report_count == 0:
+        return []
+    
+    # Tokenize every report against a shared vocabulary of distinct symptoms
+    vocabulary = {}
+    token_ids = []
+    lengths = np.zeros(report_count, dtype=np.int64)
+    for i, symptoms in enumerate(symptom_reports):
+        if not symptoms:
+            continue
+        lengths[i] = len(symptoms)
+        for symptom in symptoms:
+            token_ids.append(vocabulary.setdefault(symptom, len(vocabulary)))
+    
+    # Match keywords once per distinct symptom: a bitmask of high-risk keywords
+    # and a flag for any medium-risk keyword
+    term_high_mask = np.zeros(len(vocabulary), dtype=np.int64)
+    term_medium = np.zeros(len(vocabulary), dtype=bool)
+    for symptom, term_id in vocabulary.items():
+        symptom_lower = symptom.lower()
+        mask = 0
+        for bit, keyword in enumerate(HIGH_RISK_KEYWORDS):
+            if keyword in symptom_lower:
+                mask |= 1 << bit
+        term_high_mask[term_id] = mask
+        term_medium[term_id] = any(keyword in symptom_lower for keyword in MEDIUM_RISK_KEYWORDS)
+    
+    # Combine token matches per report (empty reports keep zeroed rows)
+    report_high_mask = np.zeros(report_count, dtype=np.int64)
+    report_medium = np.zeros(report_count, dtype=bool)
+    has_symptoms = lengths > 0
+    if token_ids:
+        tokens = np.asarray(token_ids, dtype=np.int64)
+        starts = (np.cumsum(lengths) - lengths)[has_symptoms]
+        report_high_mask[has_symptoms] = np.bitwise_or.reduceat(term_high_mask[tokens], starts)
+        report_medium[has_symptoms] = np.logical_or.reduceat(term_medium[tokens], starts)
+    
+    # Number of distinct high-risk keywords matched per report
+    high_risk_count = np.zeros(report_count, dtype=np.int64)
+    for bit in range(len(HIGH_RISK_KEYWORDS)):
+        high_risk_count += (report_high_mask >> bit) & 1
+    
+    is_high = high_risk_count > 0
+    is_medium = ~is_high & report_medium
+    risk_scores = np.where(
+        is_high,
+        np.minimum(90 + high_risk_count * 5, 100),
+        np.where(is_medium, np.minimum(40 + lengths * 10, 80), np.minimum(lengths * 15, 40))
+    )
+    severity_codes = np.where(is_high, 2, np.where(is_medium, 1, 0))
+    
+    results = []
+    for risk_score, severity_code, symptom_count, reported in zip(
+        risk_scores.tolist(), severity_codes.tolist(), lengths.tolist(), has_symptoms.tolist()
+    ):
+        if not reported:
+            results.append({
+                "risk_score": 0,
+                "severity": "low",
+                "explanation": "No symptoms reported"
+            })
+            continue
+        severity = SEVERITY_LEVELS[severity_code]
+        results.append({
+            "risk_score": risk_score,
+            "severity": severity,
+            "explanation": f"Analyzed {symptom_count} symptom(s). Risk assessment: {severity}",
+            "symptom_count": symptom_count,
+            "recommended_action": get_recommended_action(severity)
+        })
+    
+    return results
@@ -6,6 +6,8 @@ from typing import List, Optional, Dict
 from datetime import datetime
 import uuid
 
+from backend.app.services.lazy_loading import LazyInit
+
 # In-memory storage (replace with database in production)
 PATIENTS_DB: Dict[str, dict] = {}
 DOCTORS_DB: Dict[str, dict] = {}
@@ -165,16 +167,19 @@ def init_sample_data():
         }
         PATIENTS_DB[patient2["id"]] = patient2
 
-# Initialize sample data
-init_sample_data()
+# Sample data is created on first use, not at import
+_sample_data = LazyInit("data_service", init_sample_data)
 
 # Patient operations
+@_sample_data
 def get_all_patients() -> List[dict]:
     return list(PATIENTS_DB.values())
 
+@_sample_data
 def get_patient(patient_id: str) -> Optional[dict]:
     return PATIENTS_DB.get(patient_id)
 
+@_sample_data
 def create_patient(patient_data: dict) -> dict:
     patient_id = str(uuid.uuid4())
     patient = {
@@ -186,6 +191,7 @@ def create_patient(patient_data: dict) -> dict:
     PATIENTS_DB[patient_id] = patient
     return patient
 
+@_sample_data
 def update_patient(patient_id: str, patient_data: dict) -> Optional[dict]:
     if patient_id not in PATIENTS_DB:
         return None
@@ -194,6 +200,7 @@ def update_patient(patient_id: str, patient_data: dict) -> Optional[dict]:
     PATIENTS_DB[patient_id] = updated
     return updated
 
+@_sample_data
 def delete_patient(patient_id: str) -> bool:
     if patient_id in PATIENTS_DB:
         del PATIENTS_DB[patient_id]
@@ -201,18 +208,23 @@ def delete_patient(patient_id: str) -> bool:
     return False
 
 # Doctor operations
+@_sample_data
 def get_all_doctors() -> List[dict]:
     return list(DOCTORS_DB.values())
 
+@_sample_data
 def get_doctor(doctor_id: str) -> Optional[dict]:
     return DOCTORS_DB.get(doctor_id)
 
+@_sample_data
 def get_doctors_by_hospital(hospital_id: str) -> List[dict]:
     return [d for d in DOCTORS_DB.values() if d.get("hospital_id") == hospital_id]
 
+@_sample_data
 def get_doctors_by_specialization(specialization: str) -> List[dict]:
     return [d for d in DOCTORS_DB.values() if d.get("specialization") == specialization]
 
+@_sample_data
 def create_doctor(doctor_data: dict) -> dict:
     doctor_id = str(uuid.uuid4())
     doctor = {
@@ -224,6 +236,7 @@ def create_doctor(doctor_data: dict) -> dict:
     DOCTORS_DB[doctor_id] = doctor
     return doctor
 
+@_sample_data
 def update_doctor(doctor_id: str, doctor_data: dict) -> Optional[dict]:
     if doctor_id not in DOCTORS_DB:
         return None
@@ -232,6 +245,7 @@ def update_doctor(doctor_id: str, doctor_data: dict) -> Optional[dict]:
     DOCTORS_DB[doctor_id] = updated
     return updated
 
+@_sample_data
 def delete_doctor(doctor_id: str) -> bool:
     if doctor_id in DOCTORS_DB:
         del DOCTORS_DB[doctor_id]
@@ -239,12 +253,15 @@ def delete_doctor(doctor_id: str) -> bool:
     return False
 
 # Hospital operations
+@_sample_data
 def get_all_hospitals() -> List[dict]:
     return list(HOSPITALS_DB.values())
 
+@_sample_data
 def get_hospital(hospital_id: str) -> Optional[dict]:
     return HOSPITALS_DB.get(hospital_id)
 
+@_sample_data
 def search_hospitals(city: Optional[str] = None, state: Optional[str] = None, specialty: Optional[str] = None) -> List[dict]:
     results = list(HOSPITALS_DB.values())
     if city:
@@ -255,6 +272,7 @@ def search_hospitals(city: Optional[str] = None, state: Optional[str] = None, sp
         results = [h for h in results if specialty.lower() in [s.lower() for s in h.get("specialties", [])]]
     return results
 
+@_sample_data
 def create_hospital(hospital_data: dict) -> dict:
     hospital_id = str(uuid.uuid4())
     hospital = {
@@ -266,6 +284,7 @@ def create_hospital(hospital_data: dict) -> dict:
     HOSPITALS_DB[hospital_id] = hospital
     return hospital
 
+@_sample_data
 def update_hospital(hospital_id: str, hospital_data: dict) -> Optional[dict]:
     if hospital_id not in HOSPITALS_DB:
         return None
@@ -274,6 +293,7 @@ def update_hospital(hospital_id: str, hospital_data: dict) -> Optional[dict]:
     HOSPITALS_DB[hospital_id] = updated
     return updated
 
+@_sample_data
 def delete_hospital(hospital_id: str) -> bool:
     if hospital_id in HOSPITALS_DB:
         del HOSPITALS_DB[hospital_id]
@@ -0,0 +1,197 @@
+"""
+Demand Forecast Service
+Exponentially smoothed consumption per medication, updated on every dispensing
+event, with dynamic reorder points and days of supply for the whole formulary
+"""
+from typing import Dict, List, Optional, Tuple
+from datetime import datetime
+import math
+import threading
+import time
+
+# Try to import numpy for the formulary-wide forecast, fall back to a loop if not installed
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+    np = None
+
+from backend.app.config import FORECAST_SMOOTHING_DAYS, FORECAST_LEAD_TIME_DAYS, FORECAST_SAFETY_DAYS
+from backend.app.services.inventory_service import DEFAULT_SITE_ID, get_site
+
+SECONDS_PER_DAY = 86400.0
+
+class DemandModel:
+    def __init__(self, smoothing_days: float = FORECAST_SMOOTHING_DAYS):
+        """
+        Consumption state for one site. Each medication keeps an exponentially
+        decayed sum of dispensed units, which divided by the time constant is a
+        smoothed units-per-day rate. An event costs O(1); nothing is recomputed
+        in batch.
+        """
+        self.smoothing_days = smoothing_days
+        self._rows: Dict[str, int] = {}     # medication name -> row
+        self._level: List[float] = []        # decayed units, as of _last_event
+        self._last_event: List[float] = []   # day number of the latest event
+        self._first_event: List[float] = []  # day number of the earliest event
+        self._events: List[int] = []
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def record(self, med_name: str, quantity: float, day: float):
+        """Fold one dispensing event into the medication's smoothed consumption"""
+        with self._lock:
+            row = self._rows.get(med_name)
+            if row is None:
+                self._rows[med_name] = len(self._level)
+                self._level.append(float(quantity))
+                self._last_event.append(day)
+                self._first_event.append(day)
+                self._events.append(1)
+                return
+            last = self._last_event[row]
+            if day >= last:
+                self._level[row] = self._level[row] * math.exp(-(day - last) / self.smoothing_days) + quantity
+                self._last_event[row] = day
+            else:
+                # Late (backfilled) event: decay it to the latest event instead
+                self._level[row] += quantity * math.exp(-(last - day) / self.smoothing_days)
+            self._first_event[row] = min(self._first_event[row], day)
+            self._events[row] += 1
+
+    def daily_rates(self, med_names: List[str], day: float) -> Tuple[List[float], List[int]]:
+        """
+        Smoothed units-per-day consumption of each medication as of day, and its
+        event count (0 for medications never dispensed)
+        """
+        with self._lock:
+            rows = [self._rows.get(med_name, -1) for med_name in med_names]
+            known = [row for row in rows if row >= 0]
+            level = [self._level[row] for row in known]
+            last = [self._last_event[row] for row in known]
+            first = [self._first_event[row] for row in known]
+            counts = [self._events[row] for row in known]
+
+        if NUMPY_AVAILABLE:
+            decayed = np.asarray(level) * np.exp(-(day - np.asarray(last)) / self.smoothing_days)
+            # Until a full time constant of history exists the decayed sum
+            # under-counts; rescale by the fraction of the window observed
+            observed = np.maximum(day - np.asarray(first), 1.0)
+            known_rates = (decayed / self.smoothing_days / (1.0 - np.exp(-observed / self.smoothing_days))).tolist()
+        else:
+            known_rates = [
+                value * math.exp(-(day - last_day) / self.smoothing_days) / self.smoothing_days
+                / (1.0 - math.exp(-max(day - first_day, 1.0) / self.smoothing_days))
+                for value, last_day, first_day in zip(level, last, first)
+            ]
+
+        rates, events = [], []
+        position = 0
+        for row in rows:
+            if row < 0:
+                rates.append(0.0)
+                events.append(0)
+            else:
+                rates.append(known_rates[position])
+                events.append(counts[position])
+                position += 1
+        return rates, events
+
+_MODELS: Dict[str, DemandModel] = {}
+_MODELS_LOCK = threading.Lock()
+
+def _model(site_id: str) -> DemandModel:
+    model = _MODELS.get(site_id)
+    if model is None:
+        with _MODELS_LOCK:
+            model = _MODELS.setdefault(site_id, DemandModel())
+    return model
+
+def _day_number(timestamp: Optional[float] = None) -> float:
+    return (time.time() if timestamp is None else timestamp) / SECONDS_PER_DAY
+
+def record_dispensing_event(
+    medication_name: str,
+    quantity: int,
+    site_id: str = DEFAULT_SITE_ID,
+    dispensed_at: Optional[datetime] = None
+):
+    """
+    Record units dispensed, updating that medication's consumption forecast
+
+    Args:
+        medication_name: Inventory name of the medication
+        quantity: Units dispensed
+        site_id: Pharmacy site
+        dispensed_at: When the units were dispensed (default now); earlier
+            times backfill history
+    """
+    if quantity <= 0:
+        return
+    day = _day_number(dispensed_at.timestamp() if dispensed_at else None)
+    _model(site_id).record(medication_name, quantity, day)
+
+def get_demand_forecast(
+    site_id: str = DEFAULT_SITE_ID,
+    lead_time_days: float = FORECAST_LEAD_TIME_DAYS,
+    safety_days: float = FORECAST_SAFETY_DAYS
+) -> List[Dict]:
+    """
+    Forecast consumption, days of supply and reorder points for a site's formulary
+
+    Medications with dispensing history get a dynamic reorder point: smoothed
+    daily consumption x (lead time + safety days). Medications without history
+    keep their static reorder_level.
+
+    Args:
+        site_id: Pharmacy site
+        lead_time_days: Supplier lead time
+        safety_days: Extra days of cover kept as safety stock
+
+    Returns:
+        One row per medication, fewest days of supply first (no forecast last)
+    """
+    site = get_site(site_id)
+    med_names = list(site.inventory)
+    records = [site.inventory[med_name] for med_name in med_names]
+    rates, events = _model(site_id).daily_rates(med_names, _day_number())
+    cover_days = lead_time_days + safety_days
+
+    if NUMPY_AVAILABLE:
+        stock = np.fromiter((r.get("stock_quantity", 0) for r in records), dtype=np.float64, count=len(records))
+        static_points = np.fromiter((r.get("reorder_level", 0) for r in records), dtype=np.float64, count=len(records))
+        rate = np.asarray(rates, dtype=np.float64)
+        has_demand = rate > 0
+        reorder_points = np.where(has_demand, np.ceil(rate * cover_days), static_points).astype(np.int64).tolist()
+        with np.errstate(divide="ignore"):
+            supply = np.where(has_demand, np.maximum(stock, 0) / np.where(has_demand, rate, 1.0), np.inf).tolist()
+    else:
+        reorder_points = [
+            math.ceil(rate * cover_days) if rate > 0 else record.get("reorder_level", 0)
+            for rate, record in zip(rates, records)
+        ]
+        supply = [
+            max(record.get("stock_quantity", 0), 0) / rate if rate > 0 else math.inf
+            for rate, record in zip(rates, records)
+        ]
+
+    forecast = []
+    for med_name, record, rate, count, reorder_point, days in zip(med_names, records, rates, events, reorder_points, supply):
+        stock_quantity = record.get("stock_quantity", 0)
+        forecast.append({
+            "medication_name": med_name,
+            "stock_quantity": stock_quantity,
+            "unit": record.get("unit"),
+            "reorder_level": record.get("reorder_level", 0),
+            "daily_consumption": round(rate, 3),
+            "dispensing_events": count,
+            "days_of_supply": None if math.isinf(days) else round(days, 1),
+            "reorder_point": int(reorder_point),
+            "reorder_point_basis": "forecast" if rate > 0 else "reorder_level",
+            "needs_reorder": stock_quantity <= reorder_point
+        })
+    forecast.sort(key=lambda row: (row["days_of_supply"] is None, row["days_of_supply"] or 0.0, row["medication_name"]))
+    return forecast
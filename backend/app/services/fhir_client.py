@@ -2,10 +2,52 @@
 FHIR Client Service for retrieving real-time data from FHIR servers
 Supports HAPI FHIR, Azure FHIR, and other FHIR R4 servers
 """
-import requests
-from typing import List, Dict, Optional, Any
+from typing import List, Dict, Iterator, Optional, Any
+from urllib.parse import urlsplit
 import json
-from backend.app.config import FHIR_BASE_URL
+from backend.app.config import FHIR_BASE_URL, FHIR_FANOUT_WORKERS, FHIR_STREAM_PARSING
+from backend.app.services.json_codec import dumps, loads
+from backend.app.services.lazy_loading import lazy_import
+
+# requests (and urllib3 under it) load when the first client is created, not at import
+requests = lazy_import("requests")
+urllib3 = lazy_import("urllib3")
+
+# Try to import ijson for incremental Bundle parsing, fall back to decoding whole pages if not installed
+try:
+    import ijson
+    IJSON_AVAILABLE = True
+except ImportError:
+    IJSON_AVAILABLE = False
+    ijson = None
+
+# Errors raised for malformed JSON by whichever parser decodes a search page
+_JSON_ERRORS = (ValueError, ijson.JSONError) if IJSON_AVAILABLE else (ValueError,)
+
+class FHIRSearchError(RuntimeError):
+    """Raised when a search response fails after its body has started to arrive"""
+
+def _bundle_items(events, links: Dict[str, str]) -> Iterator[Dict]:
+    """Entry resources from a Bundle's ijson parse events, recording its links as they pass"""
+    for prefix, event, value in events:
+        if event != "start_map" or prefix not in ("entry.item.resource", "link.item"):
+            continue
+        builder = ijson.ObjectBuilder()
+        builder.event(event, value)
+        depth = 1
+        for _, event, value in events:
+            builder.event(event, value)
+            if event in ("start_map", "start_array"):
+                depth += 1
+            elif event in ("end_map", "end_array"):
+                depth -= 1
+                if depth == 0:
+                    break
+        if prefix == "link.item":
+            if builder.value.get("relation") and builder.value.get("url"):
+                links[builder.value["relation"]] = builder.value["url"]
+        else:
+            yield builder.value
 
 class FHIRClient:
     def __init__(self, base_url: str = None):
@@ -21,6 +63,10 @@ class FHIRClient:
             "Accept": "application/fhir+json",
             "Content-Type": "application/fhir+json"
         })
+        # Keep a connection per fan-out worker so concurrent searches reuse them
+        adapter = requests.adapters.HTTPAdapter(pool_maxsize=FHIR_FANOUT_WORKERS)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
     
     def search(self, resource_type: str, params: Dict[str, Any] = None) -> List[Dict]:
         """
@@ -32,25 +78,103 @@ class FHIRClient:
         
         Returns:
             List of FHIR resources
+        
+        Raises:
+            FHIRSearchError: If the response fails part way (see iter_search)
         """
-        url = f"{self.base_url}/{resource_type}"
+        return list(self.iter_search(resource_type, params))
+    
+    def iter_search(
+        self,
+        resource_type: str,
+        params: Dict[str, Any] = None,
+        links: Optional[Dict[str, str]] = None
+    ) -> Iterator[Dict]:
+        """
+        Search for FHIR resources, yielding each Bundle entry's resource as soon as it is parsed
+        
+        With ijson installed (and FHIR_STREAM_PARSING on) the Bundle is parsed
+        incrementally from the response stream, so only the resource being
+        yielded is held in memory rather than the whole page. Otherwise the page
+        is decoded at once. Closing the iterator early closes the response.
+        
+        Args:
+            resource_type: FHIR resource type (Patient, Practitioner, Organization, etc.)
+            params: Search parameters (e.g., {"name": "john", "_count": 10})
+            links: Optional dict filled with the Bundle's links by relation
+                ("next", "self", ...) as they are parsed
         
+        Yields:
+            FHIR resources in Bundle order. A request that fails before its body is
+            read is logged and yields nothing, as a failed search always did.
+        
+        Raises:
+            FHIRSearchError: If the response fails once its body is being read (a
+                stream cut off or malformed part way), so a partial page is never
+                taken for a complete one
+        """
+        return self._iter_bundle(f"{self.base_url}/{resource_type}", params, links)
+    
+    def page_token(self, link: str) -> Optional[str]:
+        """
+        Token for a Bundle paging link, or None if the link is not on this server
+        
+        The token is the link relative to the base URL, so it can be handed to
+        clients and later passed to iter_page without letting them choose the host.
+        """
+        base = urlsplit(self.base_url)
+        target = urlsplit(link)
+        base_path = base.path.rstrip("/")
+        if target.netloc != base.netloc or not (target.path == base_path or target.path.startswith(base_path + "/")):
+            return None
+        token = target.path[len(base_path):]
+        return f"{token}?{target.query}" if target.query else token
+    
+    def iter_page(self, token: str, links: Optional[Dict[str, str]] = None) -> Iterator[Dict]:
+        """
+        Resources of a search page from a page_token, as iter_search yields them
+        
+        Raises:
+            ValueError: If token is not a page token
+        """
+        if not token.startswith(("/", "?")) or ".." in token or "#" in token:
+            raise ValueError("Invalid page token")
+        return self._iter_bundle(self.base_url.rstrip("/") + token, None, links)
+    
+    def _iter_bundle(self, url: str, params: Optional[Dict[str, Any]], links: Optional[Dict[str, str]]) -> Iterator[Dict]:
+        reading = False
         try:
-            response = self.session.get(url, params=params or {}, timeout=20)  # Increased timeout for slow FHIR servers
-            response.raise_for_status()
-            
-            bundle = response.json()
-            resources = []
-            
-            if bundle.get("resourceType") == "Bundle" and bundle.get("entry"):
-                for entry in bundle.get("entry", []):
-                    if "resource" in entry:
-                        resources.append(entry["resource"])
-            
-            return resources
-        except requests.exceptions.RequestException as e:
+            # Increased timeout for slow FHIR servers
+            with self.session.get(url, params=params or {}, timeout=20, stream=True) as response:
+                response.raise_for_status()
+                reading = True
+                
+                if IJSON_AVAILABLE and FHIR_STREAM_PARSING:
+                    response.raw.decode_content = True  # undo gzip/deflate transfer encoding
+                    # Only Bundles have entry arrays; floats rather than Decimals, as json gives
+                    if links is None:
+                        yield from ijson.items(response.raw, "entry.item.resource", use_float=True)
+                    else:
+                        yield from _bundle_items(ijson.parse(response.raw, use_float=True), links)
+                    return
+                
+                bundle = loads(response.content)
+                if bundle.get("resourceType") == "Bundle":
+                    if links is not None:
+                        for link in bundle.get("link", []):
+                            if link.get("relation") and link.get("url"):
+                                links[link["relation"]] = link["url"]
+                    for entry in bundle.get("entry", []):
+                        if "resource" in entry:
+                            yield entry["resource"]
+        except (requests.exceptions.RequestException, urllib3.exceptions.HTTPError) as e:
             print(f"FHIR search error: {e}")
-            return []
+            if reading:
+                # The response is closed by now; whatever was yielded is incomplete
+                raise FHIRSearchError(f"FHIR search response failed part way: {e}") from e
+        except _JSON_ERRORS as e:
+            print(f"FHIR search error: invalid JSON: {e}")
+            raise FHIRSearchError(f"FHIR search response is not valid JSON: {e}") from e
     
     def read(self, resource_type: str, resource_id: str) -> Optional[Dict]:
         """
@@ -68,10 +192,13 @@ class FHIRClient:
         try:
             response = self.session.get(url, timeout=10)
             response.raise_for_status()
-            return response.json()
+            return loads(response.content)
         except requests.exceptions.RequestException as e:
             print(f"FHIR read error: {e}")
             return None
+        except ValueError as e:
+            print(f"FHIR read error: invalid JSON: {e}")
+            return None
     
     def create(self, resource_type: str, resource: Dict) -> Optional[Dict]:
         """
@@ -87,12 +214,15 @@ class FHIRClient:
         url = f"{self.base_url}/{resource_type}"
         
         try:
-            response = self.session.post(url, json=resource, timeout=10)
+            response = self.session.post(url, data=dumps(resource), timeout=10)
             response.raise_for_status()
-            return response.json()
+            return loads(response.content)
         except requests.exceptions.RequestException as e:
             print(f"FHIR create error: {e}")
             return None
+        except ValueError as e:
+            print(f"FHIR create error: invalid JSON: {e}")
+            return None
     
     def update(self, resource_type: str, resource_id: str, resource: Dict) -> Optional[Dict]:
         """
@@ -110,12 +240,15 @@ class FHIRClient:
         resource["id"] = resource_id
         
         try:
-            response = self.session.put(url, json=resource, timeout=10)
+            response = self.session.put(url, data=dumps(resource), timeout=10)
             response.raise_for_status()
-            return response.json()
+            return loads(response.content)
         except requests.exceptions.RequestException as e:
             print(f"FHIR update error: {e}")
             return None
+        except ValueError as e:
+            print(f"FHIR update error: invalid JSON: {e}")
+            return None
     
     def delete(self, resource_type: str, resource_id: str) -> bool:
         """
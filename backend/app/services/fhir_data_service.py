@@ -1,18 +1,42 @@
 """
 FHIR Data Service - Real-time data retrieval from FHIR servers
 """
-from typing import List, Dict, Optional
-from backend.app.services.fhir_client import get_fhir_client
+from typing import Callable, List, Dict, FrozenSet, Optional, Tuple
+from datetime import datetime, timezone
+from collections import OrderedDict
+from dataclasses import replace
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+import base64
+import heapq
+import json
+import threading
+import time
+from backend.app.config import FHIR_FANOUT_WORKERS, FHIR_PATIENT_CACHE_SIZE, FHIR_PATIENT_CACHE_TTL_SECONDS
+from backend.app.services.fhir_client import FHIRClient, get_fhir_client
 from backend.app.services.fhir_mapper import (
+    PATIENT_FIELD_ELEMENTS,
+    DOCTOR_FIELD_ELEMENTS,
+    HOSPITAL_FIELD_ELEMENTS,
+    ENCOUNTER_FIELD_ELEMENTS,
+    VISIT_FIELD_ELEMENTS,
+    MEDICAL_HISTORY_FIELD_ELEMENTS,
+    CLAIM_FIELD_ELEMENTS,
+    COVERAGE_RULE_FIELD_ELEMENTS,
+    fhir_elements,
     fhir_patient_to_model,
+    fhir_patient_detail_to_model,
     fhir_practitioner_to_doctor,
     fhir_organization_to_hospital,
     fhir_encounter_to_record,
     fhir_claim_to_insurance_claim,
     fhir_coverage_to_coverage_rule,
     fhir_condition_to_medical_history,
-    fhir_encounter_to_visit
+    fhir_encounter_to_visit,
+    fhir_medication_request_to_medication,
+    fhir_observation_to_observation
 )
+from backend.app.services.fhir_records import FhirRecord, PatientRecord, TimelineEntryRecord
 
 # Cache for performance (optional, can be disabled for real-time)
 USE_CACHE = False
@@ -23,17 +47,40 @@ _cache = {
     "records": {}
 }
 
-def get_all_patients(use_cache: bool = USE_CACHE) -> List[Dict]:
-    """Get all patients from FHIR server"""
+# Patient details by ID, least recently used first: patient_id -> (expires at, record)
+_patient_details: "OrderedDict[str, Tuple[float, PatientRecord]]" = OrderedDict()
+_patient_details_lock = threading.Lock()
+
+# Resources pulled into the patient detail search alongside the Patient
+_PATIENT_DETAIL_REVINCLUDES = ["Condition:subject", "AllergyIntolerance:patient", "MedicationRequest:subject"]
+# Most search pages followed for one patient detail; beyond that the result is served uncached
+_PATIENT_DETAIL_MAX_PAGES = 20
+
+def _project(params: Dict, field_elements: Dict[str, List[str]], fields: Optional[FrozenSet[str]]) -> Dict:
+    """Ask the server for only the elements a projection needs"""
+    if fields:
+        params.pop("_summary", None)  # _elements replaces the summary view
+        params["_elements"] = fhir_elements(field_elements, fields)
+    return params
+
+def _with_dependencies(fields: Optional[FrozenSet[str]], *pairs) -> Optional[FrozenSet[str]]:
+    """Add the fields that enrichment reads, given as (requested field, field it reads) pairs"""
+    if not fields:
+        return fields
+    return fields | {needed for requested, needed in pairs if requested in fields}
+
+def get_all_patients(use_cache: bool = USE_CACHE, fields: Optional[FrozenSet[str]] = None) -> List[Dict]:
+    """Get all patients from FHIR server, optionally only the given fields"""
     client = get_fhir_client()
     
     # Search for Patient resources
-    fhir_patients = client.search("Patient", params={"_count": 50})
+    fhir_patients = client.iter_search("Patient", params=_project({"_count": 50}, PATIENT_FIELD_ELEMENTS, fields))
     
     patients = []
+    now = datetime.now().isoformat()
     for fhir_patient in fhir_patients:
         try:
-            patient = fhir_patient_to_model(fhir_patient)
+            patient = fhir_patient_to_model(fhir_patient, now=now, fields=fields)
             patients.append(patient)
         except Exception as e:
             print(f"Error mapping FHIR Patient: {e}")
@@ -42,7 +89,18 @@ def get_all_patients(use_cache: bool = USE_CACHE) -> List[Dict]:
     return patients
 
 def get_patient(patient_id: str) -> Optional[Dict]:
-    """Get a specific patient by ID from FHIR server"""
+    """
+    Get a specific patient by ID from FHIR server
+
+    A patient cached by get_patient_detail saves the read. It is returned as a
+    copy in the plain Patient mapping's shape (no medications, and allergies
+    and medical history left empty as the mapping leaves them), so the result
+    does not depend on what is cached.
+    """
+    cached = _cached_patient_detail(patient_id)
+    if cached is not None:
+        return replace(cached, allergies=[], medical_history=[], medications=None)
+    
     client = get_fhir_client()
     fhir_patient = client.read("Patient", patient_id)
     
@@ -54,17 +112,122 @@ def get_patient(patient_id: str) -> Optional[Dict]:
             return None
     return None
 
-def get_all_doctors(use_cache: bool = USE_CACHE) -> List[Dict]:
-    """Get all doctors (Practitioners) from FHIR server"""
+def _cached_patient_detail(patient_id: str) -> Optional[PatientRecord]:
+    with _patient_details_lock:
+        entry = _patient_details.get(patient_id)
+        if entry is None:
+            return None
+        if entry[0] <= time.monotonic():
+            del _patient_details[patient_id]
+            return None
+        _patient_details.move_to_end(patient_id)
+        return entry[1]
+
+def _forget_patient_detail(patient_id: str):
+    with _patient_details_lock:
+        _patient_details.pop(patient_id, None)
+
+def _search_all_pages(client: FHIRClient, resource_type: str, params: Dict, max_pages: int) -> Tuple[List[Dict], bool]:
+    """
+    Resources from every page of a search, following the Bundle next links
+    
+    Returns:
+        The resources, and whether every page was read (False if a next link
+        points off this server or max_pages was reached)
+    """
+    links: Dict[str, str] = {}
+    resources = list(client.iter_search(resource_type, params=params, links=links))
+    pages = 1
+    while links.get("next"):
+        page_token = client.page_token(links["next"])
+        if page_token is None:
+            print(f"FHIR {resource_type} search: not following next link off this server: {links['next']}")
+            return resources, False
+        if pages >= max_pages:
+            print(f"FHIR {resource_type} search: stopped after {pages} pages with more to read")
+            return resources, False
+        links = {}
+        resources.extend(client.iter_page(page_token, links=links))
+        pages += 1
+    return resources, True
+
+def get_patient_detail(patient_id: str, use_cache: bool = True) -> Optional[PatientRecord]:
+    """
+    Get a patient with their allergies, medical history and current medications
+    
+    The Patient and its Condition, AllergyIntolerance and MedicationRequest
+    resources come back from one _revinclude search, following its next links
+    when the server pages the included resources. The assembled patient is
+    cached for FHIR_PATIENT_CACHE_TTL_SECONDS and also serves get_patient; a
+    patient assembled from only some of the pages is returned but not cached.
+    
+    Args:
+        patient_id: FHIR Patient ID
+        use_cache: Return a cached patient if there is one
+    
+    Returns:
+        Patient record, or None if not found
+    """
+    if use_cache:
+        cached = _cached_patient_detail(patient_id)
+        if cached is not None:
+            return _copy_patient_detail(cached)
+    
+    client = get_fhir_client()
+    resources, complete = _search_all_pages(
+        client,
+        "Patient",
+        {"_id": patient_id, "_revinclude": _PATIENT_DETAIL_REVINCLUDES},
+        _PATIENT_DETAIL_MAX_PAGES
+    )
+    
+    fhir_patient = None
+    related = []
+    for resource in resources:
+        if resource.get("resourceType") == "Patient":
+            if resource.get("id") == patient_id:
+                fhir_patient = resource
+        else:
+            related.append(resource)
+    if fhir_patient is None:
+        return None
+    
+    try:
+        patient = fhir_patient_detail_to_model(fhir_patient, related)
+    except Exception as e:
+        print(f"Error mapping FHIR Patient: {e}")
+        return None
+    if not complete:
+        return patient
+    
+    with _patient_details_lock:
+        _patient_details[patient_id] = (time.monotonic() + FHIR_PATIENT_CACHE_TTL_SECONDS, patient)
+        _patient_details.move_to_end(patient_id)
+        while len(_patient_details) > FHIR_PATIENT_CACHE_SIZE:
+            _patient_details.popitem(last=False)
+    return _copy_patient_detail(patient)
+
+def _copy_patient_detail(patient: PatientRecord) -> PatientRecord:
+    """Copy of a cached patient that callers can change without touching the cache"""
+    return replace(
+        patient,
+        allergies=list(patient.allergies),
+        medical_history=list(patient.medical_history),
+        medications=list(patient.medications) if patient.medications is not None else None
+    )
+
+def get_all_doctors(use_cache: bool = USE_CACHE, fields: Optional[FrozenSet[str]] = None) -> List[Dict]:
+    """Get all doctors (Practitioners) from FHIR server, optionally only the given fields"""
     client = get_fhir_client()
     
     # Search for Practitioner resources
-    fhir_practitioners = client.search("Practitioner", params={"_count": 50})
+    fhir_practitioners = client.iter_search("Practitioner", params=_project({"_count": 50}, DOCTOR_FIELD_ELEMENTS, fields))
     
     doctors = []
+    now = datetime.now().isoformat()
     for fhir_practitioner in fhir_practitioners:
         try:
-            doctor = fhir_practitioner_to_doctor(fhir_practitioner)
+            doctor = fhir_practitioner_to_doctor(fhir_practitioner, now=now, fields=fields)
             doctors.append(doctor)
         except Exception as e:
             print(f"Error mapping FHIR Practitioner: {e}")
@@ -210,20 +373,21 @@ def get_doctors_by_specialization(specialization: str) -> List[Dict]:
     all_doctors = get_all_doctors()
     return [d for d in all_doctors if specialization.lower() in d.get("specialization", "").lower()]
 
-def get_all_hospitals(use_cache: bool = USE_CACHE) -> List[Dict]:
-    """Get all hospitals (Organizations) from FHIR server"""
+def get_all_hospitals(use_cache: bool = USE_CACHE, fields: Optional[FrozenSet[str]] = None) -> List[Dict]:
+    """Get all hospitals (Organizations) from FHIR server, optionally only the given fields"""
     client = get_fhir_client()
     
     # Search for Organization resources with type=prov (Healthcare Provider)
-    fhir_orgs = client.search("Organization", params={
+    fhir_orgs = client.iter_search("Organization", params=_project({
         "type": "prov",
         "_count": 50
-    })
+    }, HOSPITAL_FIELD_ELEMENTS, fields))
     
     hospitals = []
+    now = datetime.now().isoformat()
     for fhir_org in fhir_orgs:
         try:
-            hospital = fhir_organization_to_hospital(fhir_org)
+            hospital = fhir_organization_to_hospital(fhir_org, now=now, fields=fields)
             hospitals.append(hospital)
         except Exception as e:
             print(f"Error mapping FHIR Organization: {e}")
@@ -258,29 +422,104 @@ def search_hospitals(city: Optional[str] = None, state: Optional[str] = None, sp
     
     return results
 
-def get_medical_records(hospital_id: Optional[str] = None, patient_id: Optional[str] = None) -> List[Dict]:
-    """Get medical records (Encounters) from FHIR server"""
-    client = get_fhir_client()
+def encode_fhir_cursor(page_token: str) -> str:
+    """Opaque cursor for the FHIR search page behind a page token"""
+    return base64.urlsafe_b64encode(json.dumps(["fhir", page_token]).encode("utf-8")).decode("ascii")
+
+def decode_fhir_cursor(cursor: str) -> str:
+    """
+    Decode a cursor produced by encode_fhir_cursor
     
-    params = {"_count": 50}
-    if patient_id:
-        params["subject"] = f"Patient/{patient_id}"
-    if hospital_id:
-        params["service-provider"] = f"Organization/{hospital_id}"
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        kind, page_token = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if kind != "fhir" or not isinstance(page_token, str):
+        raise ValueError("Invalid cursor")
+    return page_token
+
+def _search_page(client: FHIRClient, resource_type: str, params: Dict, limit: int, cursor: Optional[str], links: Dict[str, str]):
+    """
+    Resources of one search page: the first page of params, or the page a cursor points to
     
-    fhir_encounters = client.search("Encounter", params=params)
+    The server's next link is recorded in links; pass it to _next_cursor once
+    the resources have been read. A cursor's page keeps the page size of the
+    search that started it.
     
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    if cursor:
+        return client.iter_page(decode_fhir_cursor(cursor), links=links)
+    return client.iter_search(resource_type, params={**params, "_count": limit}, links=links)
+
+def _next_cursor(client: FHIRClient, links: Dict[str, str]) -> Optional[str]:
+    page_token = client.page_token(links["next"]) if links.get("next") else None
+    return encode_fhir_cursor(page_token) if page_token else None
+
+def _map_encounter_records(fhir_encounters, fields: Optional[FrozenSet[str]]) -> List[Dict]:
     records = []
+    now = datetime.now().isoformat()
     for fhir_encounter in fhir_encounters:
         try:
-            record = fhir_encounter_to_record(fhir_encounter)
+            record = fhir_encounter_to_record(fhir_encounter, now=now, fields=fields)
             records.append(record)
         except Exception as e:
             print(f"Error mapping FHIR Encounter: {e}")
             continue
-    
     return records
 
+def _encounter_params(hospital_id: Optional[str], patient_id: Optional[str], fields: Optional[FrozenSet[str]]) -> Dict:
+    params = {"_count": 50}
+    if patient_id:
+        params["subject"] = f"Patient/{patient_id}"
+    if hospital_id:
+        params["service-provider"] = f"Organization/{hospital_id}"
+    return _project(params, ENCOUNTER_FIELD_ELEMENTS, fields)
+
+def get_medical_records(
+    hospital_id: Optional[str] = None,
+    patient_id: Optional[str] = None,
+    fields: Optional[FrozenSet[str]] = None
+) -> List[Dict]:
+    """Get medical records (Encounters) from FHIR server, optionally only the given fields"""
+    client = get_fhir_client()
+    fhir_encounters = client.iter_search("Encounter", params=_encounter_params(hospital_id, patient_id, fields))
+    return _map_encounter_records(fhir_encounters, fields)
+
+def get_medical_records_page(
+    hospital_id: Optional[str] = None,
+    patient_id: Optional[str] = None,
+    fields: Optional[FrozenSet[str]] = None,
+    limit: int = 50,
+    cursor: Optional[str] = None
+) -> Dict:
+    """
+    Get one page of medical records (Encounters) from FHIR server
+    
+    Args:
+        hospital_id: Filter by hospital (first page only; a cursor carries its search)
+        patient_id: Filter by patient (likewise)
+        fields: Optional projection
+        limit: Page size
+        cursor: Cursor returned with the previous page
+    
+    Returns:
+        Dictionary with the page of records and the cursor for the next page
+        (None when there are no more)
+    
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    client = get_fhir_client()
+    links = {}
+    fhir_encounters = _search_page(client, "Encounter", _encounter_params(hospital_id, patient_id, fields), limit, cursor, links)
+    records = _map_encounter_records(fhir_encounters, fields)
+    return {"records": records, "next_cursor": _next_cursor(client, links)}
+
 # CRUD operations (create/update/delete) - delegate to FHIR client
 def create_patient(patient_data: Dict) -> Dict:
     """Create a new patient in FHIR server"""
@@ -294,12 +533,14 @@ def create_patient(patient_data: Dict) -> Dict:
 def update_patient(patient_id: str, patient_data: Dict) -> Optional[Dict]:
     """Update a patient in FHIR server"""
     client = get_fhir_client()
+    _forget_patient_detail(patient_id)
     # Implementation would update FHIR Patient resource
     return patient_data
 
 def delete_patient(patient_id: str) -> bool:
     """Delete a patient from FHIR server"""
     client = get_fhir_client()
+    _forget_patient_detail(patient_id)
     return client.delete("Patient", patient_id)
 
 def create_doctor(doctor_data: Dict) -> Dict:
@@ -328,27 +569,31 @@ def delete_hospital(hospital_id: str) -> bool:
     client = get_fhir_client()
     return client.delete("Organization", hospital_id)
 
-def get_insurance_claims(hospital_id: Optional[str] = None) -> List[Dict]:
-    """Get insurance claims (FHIR Claim resources) from FHIR server"""
-    client = get_fhir_client()
-    
+def _claim_params(hospital_id: Optional[str], fields: Optional[FrozenSet[str]]) -> Tuple[Dict, Optional[FrozenSet[str]]]:
+    """Search parameters for claims, and the fields the mapper has to fill"""
     params = {"_count": 100}
     if hospital_id:
         params["provider"] = f"Organization/{hospital_id}"
     
-    fhir_claims = client.search("Claim", params=params)
-    
+    # The hospital filter and the name lookups read the reference fields
+    mapped_fields = _with_dependencies(fields, ("hospitalName", "hospitalId"), ("patientName", "patientId"))
+    if mapped_fields and hospital_id:
+        mapped_fields = mapped_fields | {"hospitalId"}
+    return _project(params, CLAIM_FIELD_ELEMENTS, mapped_fields), mapped_fields
+
+def _map_claims(fhir_claims, hospital_id: Optional[str], fields: Optional[FrozenSet[str]], mapped_fields: Optional[FrozenSet[str]]) -> List[Dict]:
     claims = []
+    now = datetime.now().isoformat()
     for fhir_claim in fhir_claims:
         try:
-            claim = fhir_claim_to_insurance_claim(fhir_claim)
+            claim = fhir_claim_to_insurance_claim(fhir_claim, now=now, fields=mapped_fields)
             
             # If hospital_id filter was provided, verify it matches
             if hospital_id and claim.get("hospitalId") != hospital_id:
                 continue
             
             # Try to get patient name if we have patient_id
-            if claim.get("patientId"):
+            if claim.get("patientId") and (not fields or "patientName" in fields):
                 try:
                     patient = get_patient(claim["patientId"])
                     if patient:
@@ -357,7 +602,7 @@ def get_insurance_claims(hospital_id: Optional[str] = None) -> List[Dict]:
                     pass
             
             # Try to get hospital name if we have hospital_id
-            if claim.get("hospitalId"):
+            if claim.get("hospitalId") and (not fields or "hospitalName" in fields):
                 try:
                     hospital = get_hospital(claim["hospitalId"])
                     if hospital:
@@ -372,8 +617,49 @@ def get_insurance_claims(hospital_id: Optional[str] = None) -> List[Dict]:
     
     return claims
 
-def get_coverage_rules(hospital_id: Optional[str] = None, limit: int = 20) -> List[Dict]:
-    """Get insurance coverage rules (FHIR Coverage resources) from FHIR server"""
+def get_insurance_claims(hospital_id: Optional[str] = None, fields: Optional[FrozenSet[str]] = None) -> List[Dict]:
+    """Get insurance claims (FHIR Claim resources) from FHIR server, optionally only the given fields"""
+    client = get_fhir_client()
+    params, mapped_fields = _claim_params(hospital_id, fields)
+    fhir_claims = client.iter_search("Claim", params=params)
+    return _map_claims(fhir_claims, hospital_id, fields, mapped_fields)
+
+def get_insurance_claims_page(
+    hospital_id: Optional[str] = None,
+    fields: Optional[FrozenSet[str]] = None,
+    limit: int = 50,
+    cursor: Optional[str] = None
+) -> Dict:
+    """
+    Get one page of insurance claims from FHIR server
+    
+    Args:
+        hospital_id: Filter by hospital; pass it with the cursor too, as it is
+            also checked on each claim
+        fields: Optional projection
+        limit: Page size
+        cursor: Cursor returned with the previous page
+    
+    Returns:
+        Dictionary with the page of claims and the cursor for the next page
+        (None when there are no more)
+    
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    client = get_fhir_client()
+    params, mapped_fields = _claim_params(hospital_id, fields)
+    links = {}
+    fhir_claims = _search_page(client, "Claim", params, limit, cursor, links)
+    claims = _map_claims(fhir_claims, hospital_id, fields, mapped_fields)
+    return {"claims": claims, "next_cursor": _next_cursor(client, links)}
+
+def get_coverage_rules(
+    hospital_id: Optional[str] = None,
+    limit: int = 20,
+    fields: Optional[FrozenSet[str]] = None
+) -> List[Dict]:
+    """Get insurance coverage rules (FHIR Coverage resources) from FHIR server, optionally only the given fields"""
     try:
         client = get_fhir_client()
         
@@ -381,15 +667,16 @@ def get_coverage_rules(hospital_id: Optional[str] = None, limit: int = 20) -> Li
         effective_limit = min(limit, 10)  # Cap at 10 to prevent timeouts
         params = {"_count": effective_limit, "_summary": "true"}  # Use summary for faster response
         
-        fhir_coverages = client.search("Coverage", params=params)
+        fhir_coverages = client.iter_search("Coverage", params=_project(params, COVERAGE_RULE_FIELD_ELEMENTS, fields))
         
         coverage_rules = []
         count = 0
+        now = datetime.now().isoformat()
         for fhir_coverage in fhir_coverages:
             if count >= effective_limit:
                 break
             try:
-                coverage_rule = fhir_coverage_to_coverage_rule(fhir_coverage)
+                coverage_rule = fhir_coverage_to_coverage_rule(fhir_coverage, now=now, fields=fields)
                 coverage_rules.append(coverage_rule)
                 count += 1
             except Exception as e:
@@ -402,8 +689,12 @@ def get_coverage_rules(hospital_id: Optional[str] = None, limit: int = 20) -> Li
         # Return empty list on error instead of crashing
         return []
 
-def get_medical_history(patient_id: Optional[str] = None, limit: int = 20) -> List[Dict]:
-    """Get medical history (FHIR Condition resources) from FHIR server"""
+def get_medical_history(
+    patient_id: Optional[str] = None,
+    limit: int = 20,
+    fields: Optional[FrozenSet[str]] = None
+) -> List[Dict]:
+    """Get medical history (FHIR Condition resources) from FHIR server, optionally only the given fields"""
     try:
         client = get_fhir_client()
         
@@ -412,21 +703,23 @@ def get_medical_history(patient_id: Optional[str] = None, limit: int = 20) -> Li
         if patient_id:
             params["subject"] = f"Patient/{patient_id}"
         
-        fhir_conditions = client.search("Condition", params=params)
+        mapped_fields = _with_dependencies(fields, ("patientName", "patientId"))
+        fhir_conditions = client.iter_search("Condition", params=_project(params, MEDICAL_HISTORY_FIELD_ELEMENTS, mapped_fields))
         
         medical_history = []
         count = 0
         unique_patient_ids = set()
         
+        now = datetime.now().isoformat()
         for fhir_condition in fhir_conditions:
             if count >= limit:
                 break
             try:
-                history_item = fhir_condition_to_medical_history(fhir_condition)
+                history_item = fhir_condition_to_medical_history(fhir_condition, now=now, fields=mapped_fields)
                 medical_history.append(history_item)
                 
                 # Collect unique patient IDs for batch name lookup
-                if history_item.get("patientId"):
+                if history_item.get("patientId") and (not fields or "patientName" in fields):
                     unique_patient_ids.add(history_item["patientId"])
                 
                 count += 1
@@ -466,8 +759,12 @@ def get_medical_history(patient_id: Optional[str] = None, limit: int = 20) -> Li
         print(f"Error fetching medical history from FHIR: {e}")
         return []
 
-def get_patient_visits(patient_id: Optional[str] = None, limit: int = 20) -> List[Dict]:
-    """Get patient visits (FHIR Encounter resources) from FHIR server"""
+def get_patient_visits(
+    patient_id: Optional[str] = None,
+    limit: int = 20,
+    fields: Optional[FrozenSet[str]] = None
+) -> List[Dict]:
+    """Get patient visits (FHIR Encounter resources) from FHIR server, optionally only the given fields"""
     try:
         client = get_fhir_client()
         
@@ -476,24 +773,26 @@ def get_patient_visits(patient_id: Optional[str] = None, limit: int = 20) -> Lis
         if patient_id:
             params["subject"] = f"Patient/{patient_id}"
         
-        fhir_encounters = client.search("Encounter", params=params)
+        mapped_fields = _with_dependencies(fields, ("patientName", "patientId"), ("hospitalName", "hospitalId"))
+        fhir_encounters = client.iter_search("Encounter", params=_project(params, VISIT_FIELD_ELEMENTS, mapped_fields))
         
         visits = []
         count = 0
         unique_patient_ids = set()
         unique_hospital_ids = set()
         
+        now = datetime.now().isoformat()
         for fhir_encounter in fhir_encounters:
             if count >= limit:
                 break
             try:
-                visit = fhir_encounter_to_visit(fhir_encounter)
+                visit = fhir_encounter_to_visit(fhir_encounter, now=now, fields=mapped_fields)
                 visits.append(visit)
                 
                 # Collect unique IDs for batch name lookup
-                if visit.get("patientId"):
+                if visit.get("patientId") and (not fields or "patientName" in fields):
                     unique_patient_ids.add(visit["patientId"])
-                if visit.get("hospitalId"):
+                if visit.get("hospitalId") and (not fields or "hospitalName" in fields):
                     unique_hospital_ids.add(visit["hospitalId"])
                 
                 count += 1
@@ -556,3 +855,220 @@ def get_patient_visits(patient_id: Optional[str] = None, limit: int = 20) -> Lis
         print(f"Error fetching patient visits from FHIR: {e}")
         return []
 
+# Patient timeline sources: resource type -> (patient search parameter, date search
+# parameter, timestamp of a resource, record field holding its status)
+_TIMELINE_SOURCES = {
+    "Encounter": ("subject", "date", lambda r: r.get("period", {}).get("start"), "status"),
+    "Condition": ("subject", "onset-date", lambda r: r.get("onsetDateTime") or r.get("onsetPeriod", {}).get("start"), "clinicalStatus"),
+    "Claim": ("patient", "created", lambda r: r.get("created"), "status"),
+    "MedicationRequest": ("subject", "authoredon", lambda r: r.get("authoredOn"), "status"),
+    "Observation": ("subject", "date", lambda r: (
+        r.get("effectiveDateTime") or r.get("effectiveInstant") or r.get("effectivePeriod", {}).get("start")
+    ), "status")
+}
+
+def _observation_title(observation: FhirRecord) -> str:
+    if not observation["value"]:
+        return observation["observation"]
+    return f"{observation['observation']}: {observation['value']} {observation['unit'] or ''}".strip()
+
+_TIMELINE_TITLES = {
+    "Encounter": lambda visit: f"{visit['encounterType']}: {visit['reason']}" if visit["reason"] else visit["encounterType"],
+    "Condition": lambda history_item: history_item["condition"],
+    "Claim": lambda claim: f"{claim['claimType']} claim ({claim['totalAmount']})",
+    "MedicationRequest": lambda medication: medication["medication"],
+    "Observation": _observation_title
+}
+
+# Most resources of one type read at a single instant (e.g. a device upload of vitals)
+_TIMELINE_INSTANT_LIMIT = 1000
+_FANOUT_POOL: Optional[ThreadPoolExecutor] = None
+
+def _get_fanout_pool() -> ThreadPoolExecutor:
+    global _FANOUT_POOL
+    if _FANOUT_POOL is None:
+        _FANOUT_POOL = ThreadPoolExecutor(max_workers=FHIR_FANOUT_WORKERS, thread_name_prefix="fhir-fanout")
+    return _FANOUT_POOL
+
+def _timeline_sort_time(timestamp: str) -> str:
+    """Timestamp as comparable text: date-times in UTC, dates and partial dates as given"""
+    if "T" not in timestamp:
+        return timestamp
+    try:
+        parsed = datetime.fromisoformat(timestamp)
+    except ValueError:
+        return timestamp
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed.isoformat()
+
+def encode_timeline_cursor(timestamp: str, sort_key: Tuple[str, str, str]) -> str:
+    """Opaque cursor pointing just after the timeline entry with this timestamp and sort key"""
+    raw = json.dumps([timestamp, *sort_key]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+def decode_timeline_cursor(cursor: str) -> Tuple[str, Tuple[str, str, str]]:
+    """
+    Decode a cursor produced by encode_timeline_cursor
+    
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        timestamp, sort_time, resource_type, resource_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except Exception:
+        raise ValueError("Invalid timeline cursor")
+    if resource_type not in _TIMELINE_SOURCES:
+        raise ValueError("Invalid timeline cursor")
+    if not all(isinstance(value, str) for value in (timestamp, sort_time, resource_id)):
+        raise ValueError("Invalid timeline cursor")
+    return timestamp, (sort_time, resource_type, resource_id)
+
+def _search_timeline(
+    client: FHIRClient,
+    resource_type: str,
+    params: Dict,
+    mapper: Callable[[Dict], FhirRecord],
+    before: Optional[Tuple[str, str, str]]
+) -> Tuple[List[Tuple[Tuple[str, str, str], str, FhirRecord]], bool, Optional[Tuple[str, str]]]:
+    """
+    Run one timeline search
+    
+    Returns:
+        (sort key, timestamp, record) entries below before, newest first; whether
+        the search returned a full page; and the (sort time, timestamp) of the
+        oldest dated resource returned, skipped or not
+    """
+    timestamp_of = _TIMELINE_SOURCES[resource_type][2]
+    entries = []
+    fetched = 0
+    oldest = None
+    for resource in client.iter_search(resource_type, params=params):
+        fetched += 1
+        timestamp = timestamp_of(resource)
+        if not timestamp:
+            continue  # Nothing to place it on the timeline by
+        key = (_timeline_sort_time(timestamp), resource_type, resource.get("id", ""))
+        if oldest is None or key[0] < oldest[0]:
+            oldest = (key[0], timestamp)
+        if before is not None and key >= before:
+            continue  # Returned on an earlier page
+        try:
+            entries.append((key, timestamp, mapper(resource)))
+        except Exception as e:
+            print(f"Error mapping FHIR {resource_type}: {e}")
+            continue
+    
+    # Servers sort on the instant only; re-sort on our key so the streams merge cleanly
+    entries.sort(key=lambda entry: entry[0], reverse=True)
+    return entries, fetched >= params["_count"], oldest
+
+def _timeline_stream(
+    client: FHIRClient,
+    resource_type: str,
+    params: Dict,
+    mapper: Callable[[Dict], FhirRecord],
+    before: Optional[Tuple[str, str, str]]
+) -> Tuple[List[Tuple[Tuple[str, str, str], str, FhirRecord]], Optional[tuple]]:
+    """
+    Fetch and map one resource type of a patient timeline
+    
+    Returns:
+        Entries newest first, and the key the stream is known to be complete
+        down to (exclusive), or None if it is complete
+    """
+    date_param = _TIMELINE_SOURCES[resource_type][1]
+    while True:
+        entries, full, oldest = _search_timeline(client, resource_type, params, mapper, before)
+        if not full or oldest is None:
+            return entries, None
+        
+        # The page may have cut through the resources at its oldest instant, and the
+        # server orders those arbitrarily; keep them for a later page
+        newer = [entry for entry in entries if entry[0][0] > oldest[0]]
+        if newer:
+            return newer, (oldest[0], "\uffff")
+        
+        # The whole page shares one instant; read everything at that instant instead,
+        # or if it was all returned already, carry on below it
+        instant_params = {**params, date_param: f"eq{oldest[1]}", "_count": _TIMELINE_INSTANT_LIMIT}
+        entries, _, _ = _search_timeline(client, resource_type, instant_params, mapper, before)
+        entries = [entry for entry in entries if entry[0][0] >= oldest[0]]
+        if entries:
+            return entries, (oldest[0],)
+        params = {**params, date_param: f"lt{oldest[1]}"}
+
+def get_patient_timeline(patient_id: str, limit: int = 20, cursor: Optional[str] = None) -> Dict:
+    """
+    Get one page of a patient's timeline, newest first
+    
+    Encounters, conditions, claims, medication requests and observations are
+    searched concurrently and the streams are merged by timestamp, so a page
+    costs about one FHIR round trip. Resources without a date are left out.
+    
+    Args:
+        patient_id: FHIR Patient ID
+        limit: Maximum number of entries to return
+        cursor: Cursor returned with the previous page
+        
+    Returns:
+        Dictionary with the page of timeline entries and the cursor for the next
+        page (None when there are no more entries)
+    
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    after = decode_timeline_cursor(cursor) if cursor else None
+    before = after[1] if after else None
+    
+    try:
+        client = get_fhir_client()
+        now = datetime.now().isoformat()
+        mappers = {
+            "Encounter": partial(fhir_encounter_to_visit, now=now),
+            "Condition": partial(fhir_condition_to_medical_history, now=now),
+            "Claim": partial(fhir_claim_to_insurance_claim, now=now),
+            "MedicationRequest": fhir_medication_request_to_medication,
+            "Observation": fhir_observation_to_observation
+        }
+        
+        pool = _get_fanout_pool()
+        futures = []
+        for resource_type, (patient_param, date_param, _, _) in _TIMELINE_SOURCES.items():
+            params = {patient_param: f"Patient/{patient_id}", "_sort": f"-{date_param}", "_count": limit + 1}
+            if after:
+                params[date_param] = f"le{after[0]}"
+            futures.append(pool.submit(_timeline_stream, client, resource_type, params, mappers[resource_type], before))
+        streams = [future.result() for future in futures]
+        
+        # Merge newest first, stopping where any stream might still have older entries unread
+        floor = max((complete_to for _, complete_to in streams if complete_to is not None), default=None)
+        page = []
+        for entry in heapq.merge(*(entries for entries, _ in streams), key=lambda entry: entry[0], reverse=True):
+            if (floor is not None and entry[0] < floor) or len(page) > limit:
+                break
+            page.append(entry)
+        
+        has_more = len(page) > limit or floor is not None
+        page = page[:limit]
+        
+        next_cursor = None
+        if has_more and page:
+            last_key, last_timestamp, _ = page[-1]
+            next_cursor = encode_timeline_cursor(last_timestamp, last_key)
+        
+        entries = []
+        for (_, resource_type, resource_id), timestamp, record in page:
+            entries.append(TimelineEntryRecord(
+                id=f"{resource_type}/{resource_id}",
+                resourceType=resource_type,
+                timestamp=timestamp,
+                title=_TIMELINE_TITLES[resource_type](record),
+                status=record.get(_TIMELINE_SOURCES[resource_type][3]),
+                details=record
+            ))
+        
+        return {"patientId": patient_id, "entries": entries, "next_cursor": next_cursor}
+    except Exception as e:
+        print(f"Error fetching patient timeline from FHIR: {e}")
+        return {"patientId": patient_id, "entries": [], "next_cursor": None}
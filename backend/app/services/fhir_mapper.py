@@ -1,11 +1,105 @@
 """
 FHIR Resource Mapper - Converts FHIR resources to our application models
 """
-from typing import Dict, List, Optional
+from typing import Dict, FrozenSet, List, Optional
 from datetime import datetime
+from backend.app.services.fhir_records import (
+    PatientRecord,
+    DoctorRecord,
+    HospitalRecord,
+    EncounterRecord,
+    VisitRecord,
+    MedicalHistoryRecord,
+    ClaimRecord,
+    CoverageRuleRecord,
+    MedicationRequestRecord,
+    ObservationRecord
+)
 
-def fhir_patient_to_model(fhir_patient: Dict) -> Dict:
+# Output field -> FHIR elements it is mapped from, per mapper. A projection
+# (fields=...) is requested upstream as _elements and the mapper skips the
+# extraction of fields outside it. id is always returned by the server.
+PATIENT_FIELD_ELEMENTS = {
+    "id": [], "first_name": ["name"], "last_name": ["name"], "date_of_birth": ["birthDate"],
+    "gender": ["gender"], "email": ["telecom"], "phone": ["telecom"], "address": ["address"],
+    "emergency_contact_name": ["contact"], "emergency_contact_phone": ["contact"],
+    "blood_type": [], "allergies": [], "medical_history": [], "created_at": [], "updated_at": [],
+    "medications": []
+}
+DOCTOR_FIELD_ELEMENTS = {
+    "id": [], "first_name": ["name"], "last_name": ["name"], "specialization": ["qualification"],
+    "qualification": ["qualification"], "license_number": ["identifier"], "email": ["telecom"],
+    "phone": ["telecom"], "hospital_id": [], "department": [], "experience_years": [], "languages": [],
+    "consultation_fee": [], "availability": [], "created_at": [], "updated_at": [],
+    "department_specialty": [], "location": [], "source": []
+}
+HOSPITAL_FIELD_ELEMENTS = {
+    "id": [], "name": ["name"], "address": ["address"], "city": ["address"], "state": ["address"],
+    "zip_code": ["address"], "country": [], "phone": ["telecom"], "email": ["telecom"],
+    "emergency_phone": ["telecom"], "hospital_type": ["type"], "total_beds": [], "icu_beds": [],
+    "specialties": ["type"], "facilities": [], "operating_hours": [], "website": [],
+    "created_at": [], "updated_at": []
+}
+ENCOUNTER_FIELD_ELEMENTS = {
+    "id": [], "patient_id": ["subject"], "patient_name": ["subject"], "encounter_type": ["class"],
+    "status": ["status"], "timestamp": ["period"], "hospital_id": ["serviceProvider"]
+}
+VISIT_FIELD_ELEMENTS = {
+    "id": [], "patientId": ["subject"], "patientName": ["subject"], "encounterType": ["class"],
+    "encounterCode": ["class"], "status": ["status"], "startDate": ["period"], "startTime": ["period"],
+    "endDate": ["period"], "endTime": ["period"], "durationMinutes": ["period"],
+    "hospitalId": ["serviceProvider"], "hospitalName": ["serviceProvider"], "location": ["location"],
+    "reason": ["reasonCode"], "diagnoses": ["diagnosis"], "participants": ["participant"]
+}
+MEDICAL_HISTORY_FIELD_ELEMENTS = {
+    "id": [], "patientId": ["subject"], "patientName": ["subject"], "condition": ["code"],
+    "conditionCode": ["code"], "category": ["category"], "severity": ["severity"],
+    "clinicalStatus": ["clinicalStatus"], "verificationStatus": ["verificationStatus"],
+    "onsetDate": ["onset"], "abatementDate": ["abatement"], "encounterId": ["encounter"],
+    "bodySite": ["bodySite"], "notes": ["note"], "recordedDate": ["recordedDate"]
+}
+CLAIM_FIELD_ELEMENTS = {
+    "id": [], "claimNumber": ["identifier"], "hospitalId": ["provider"], "hospitalName": ["provider"],
+    "patientId": ["patient"], "patientName": ["patient"], "provider": ["insurance"], "claimType": ["type"],
+    "status": ["status"], "submissionDate": ["created"], "serviceDate": ["created", "billablePeriod"],
+    "totalAmount": ["item", "total"], "coveredAmount": ["item", "total"],
+    "patientResponsibility": ["item", "total"], "diagnosis": ["diagnosis"],
+    "serviceDescription": ["type", "item"]
+}
+COVERAGE_RULE_FIELD_ELEMENTS = {
+    "id": [], "coverageId": [], "subscriberId": ["subscriber"], "beneficiaryId": ["beneficiary"],
+    "insuranceProvider": ["payor", "identifier"], "coverageType": ["type"],
+    "planName": ["class", "payor", "identifier", "type"], "planType": ["class"], "status": ["status"],
+    "startDate": ["period"], "endDate": ["period"], "networkType": ["network"],
+    "copay": ["costToBeneficiary"], "relationship": ["relationship"], "dependentNumber": ["dependent"],
+    "rules": ["text", "type"]
+}
+
+def fhir_elements(field_elements: Dict[str, List[str]], fields: FrozenSet[str]) -> str:
+    """
+    FHIR _elements search parameter covering a projection
+
+    Args:
+        field_elements: One of the *_FIELD_ELEMENTS tables
+        fields: Output fields requested
+
+    Returns:
+        Comma-separated element names ("id" when the fields need no other element)
+    """
+    elements = []
+    for field in sorted(fields):
+        for element in field_elements.get(field, []):
+            if element not in elements:
+                elements.append(element)
+    return ",".join(elements) or "id"
+
+def _wants(fields: Optional[FrozenSet[str]], *names: str) -> bool:
+    """Whether any of names is part of the projection (None means every field)"""
+    return fields is None or not fields.isdisjoint(names)
+
+def fhir_patient_to_model(fhir_patient: Dict, now: Optional[str] = None, fields: Optional[FrozenSet[str]] = None) -> PatientRecord:
     """Convert FHIR Patient resource to our Patient model"""
+    now = now or datetime.now().isoformat()  # Callers mapping a batch pass one timestamp for all of it
     name = fhir_patient.get("name", [{}])[0] if fhir_patient.get("name") else {}
     given_names = name.get("given", [])
     family_name = name.get("family", "")
@@ -13,17 +107,18 @@ def fhir_patient_to_model(fhir_patient: Dict) -> Dict:
     # Extract email and phone from contact points
     email = None
     phone = None
-    for telecom in fhir_patient.get("telecom", []):
-        system = telecom.get("system", "")
-        value = telecom.get("value", "")
-        if system == "email":
-            email = value
-        elif system == "phone":
-            phone = value
+    if _wants(fields, "email", "phone"):
+        for telecom in fhir_patient.get("telecom", []):
+            system = telecom.get("system", "")
+            value = telecom.get("value", "")
+            if system == "email":
+                email = value
+            elif system == "phone":
+                phone = value
     
     # Extract address
     address = None
-    if fhir_patient.get("address"):
+    if _wants(fields, "address") and fhir_patient.get("address"):
         addr = fhir_patient["address"][0]
         line = ", ".join(addr.get("line", []))
         city = addr.get("city", "")
@@ -34,35 +129,91 @@ def fhir_patient_to_model(fhir_patient: Dict) -> Dict:
     # Extract emergency contact
     emergency_contact_name = None
     emergency_contact_phone = None
-    for contact in fhir_patient.get("contact", []):
-        relationship = contact.get("relationship", [{}])[0]
-        if relationship.get("coding", [{}])[0].get("code") == "C":
-            emergency_contact_name = contact.get("name", {}).get("text", "")
-            for telecom in contact.get("telecom", []):
-                if telecom.get("system") == "phone":
-                    emergency_contact_phone = telecom.get("value")
-                    break
-    
-    return {
-        "id": fhir_patient.get("id"),
-        "first_name": " ".join(given_names) if given_names else "Unknown",
-        "last_name": family_name or "Unknown",
-        "date_of_birth": fhir_patient.get("birthDate", ""),
-        "gender": fhir_patient.get("gender", "unknown").upper(),
-        "email": email,
-        "phone": phone,
-        "address": address,
-        "emergency_contact_name": emergency_contact_name,
-        "emergency_contact_phone": emergency_contact_phone,
-        "blood_type": None,  # Not typically in FHIR Patient
-        "allergies": [],  # Would come from AllergyIntolerance resources
-        "medical_history": [],  # Would come from Condition resources
-        "created_at": datetime.now().isoformat(),
-        "updated_at": datetime.now().isoformat()
-    }
+    if _wants(fields, "emergency_contact_name", "emergency_contact_phone"):
+        for contact in fhir_patient.get("contact", []):
+            relationship = contact.get("relationship", [{}])[0]
+            if relationship.get("coding", [{}])[0].get("code") == "C":
+                emergency_contact_name = contact.get("name", {}).get("text", "")
+                for telecom in contact.get("telecom", []):
+                    if telecom.get("system") == "phone":
+                        emergency_contact_phone = telecom.get("value")
+                        break
+    
+    return PatientRecord(
+        id=fhir_patient.get("id"),
+        first_name=" ".join(given_names) if given_names else "Unknown",
+        last_name=family_name or "Unknown",
+        date_of_birth=fhir_patient.get("birthDate", ""),
+        gender=fhir_patient.get("gender", "unknown").upper(),
+        email=email,
+        phone=phone,
+        address=address,
+        emergency_contact_name=emergency_contact_name,
+        emergency_contact_phone=emergency_contact_phone,
+        blood_type=None,  # Not typically in FHIR Patient
+        allergies=[],  # Would come from AllergyIntolerance resources
+        medical_history=[],  # Would come from Condition resources
+        created_at=now,
+        updated_at=now
+    )
+
+def _concept_text(concept: Dict, default: str) -> str:
+    """Display text of a CodeableConcept"""
+    coding_list = concept.get("coding", [])
+    if coding_list:
+        default = coding_list[0].get("display", coding_list[0].get("code", default))
+    return concept.get("text", default)
 
-def fhir_practitioner_to_doctor(fhir_practitioner: Dict) -> Dict:
+def _status_code(resource: Dict, element: str) -> Optional[str]:
+    """Code of a CodeableConcept status element such as clinicalStatus"""
+    return resource.get(element, {}).get("coding", [{}])[0].get("code")
+
+def fhir_patient_detail_to_model(fhir_patient: Dict, related: List[Dict], now: Optional[str] = None) -> PatientRecord:
+    """
+    Convert a FHIR Patient resource and its related resources to our Patient model
+    
+    Args:
+        fhir_patient: FHIR Patient resource
+        related: Condition, AllergyIntolerance and MedicationRequest resources
+            about the patient (others are ignored)
+        now: Timestamp for created_at/updated_at
+    
+    Returns:
+        Patient with allergies, medical_history and medications filled in
+    """
+    patient = fhir_patient_to_model(fhir_patient, now=now)
+    allergies = []
+    medical_history = []
+    medications = []
+    
+    for resource in related:
+        resource_type = resource.get("resourceType")
+        if resource_type == "AllergyIntolerance":
+            # Resolved and refuted allergies no longer apply
+            if _status_code(resource, "clinicalStatus") in ("inactive", "resolved"):
+                continue
+            if _status_code(resource, "verificationStatus") in ("refuted", "entered-in-error"):
+                continue
+            allergies.append(_concept_text(resource.get("code", {}), "Unknown Allergy"))
+        elif resource_type == "Condition":
+            if _status_code(resource, "verificationStatus") in ("refuted", "entered-in-error"):
+                continue
+            medical_history.append(_concept_text(resource.get("code", {}), "Unknown Condition"))
+        elif resource_type == "MedicationRequest":
+            # Current medications only
+            if resource.get("status") not in ("active", "on-hold"):
+                continue
+            medications.append(fhir_medication_request_to_medication(resource)["medication"])
+    
+    # Repeated entries (e.g. a condition recorded at several visits) are listed once
+    patient.allergies = list(dict.fromkeys(allergies))
+    patient.medical_history = list(dict.fromkeys(medical_history))
+    patient.medications = list(dict.fromkeys(medications))
+    return patient
+
+def fhir_practitioner_to_doctor(fhir_practitioner: Dict, now: Optional[str] = None, fields: Optional[FrozenSet[str]] = None) -> DoctorRecord:
     """Convert FHIR Practitioner resource to our Doctor model"""
+    now = now or datetime.now().isoformat()
     name = fhir_practitioner.get("name", [{}])[0] if fhir_practitioner.get("name") else {}
     given_names = name.get("given", [])
     family_name = name.get("family", "")
@@ -70,18 +221,19 @@ def fhir_practitioner_to_doctor(fhir_practitioner: Dict) -> Dict:
     # Extract email and phone
     email = None
     phone = None
-    for telecom in fhir_practitioner.get("telecom", []):
-        system = telecom.get("system", "")
-        value = telecom.get("value", "")
-        if system == "email":
-            email = value
-        elif system == "phone":
-            phone = value
+    if _wants(fields, "email", "phone"):
+        for telecom in fhir_practitioner.get("telecom", []):
+            system = telecom.get("system", "")
+            value = telecom.get("value", "")
+            if system == "email":
+                email = value
+            elif system == "phone":
+                phone = value
     
     # Extract qualification/specialization
     qualification_text = ""
     specialization = "General Practice"
-    if fhir_practitioner.get("qualification"):
+    if _wants(fields, "specialization", "qualification") and fhir_practitioner.get("qualification"):
         qual = fhir_practitioner["qualification"][0]
         qualification_text = qual.get("code", {}).get("text", "")
         for coding in qual.get("code", {}).get("coding", []):
@@ -90,31 +242,33 @@ def fhir_practitioner_to_doctor(fhir_practitioner: Dict) -> Dict:
     
     # Extract identifier (license number)
     license_number = ""
-    for identifier in fhir_practitioner.get("identifier", []):
-        if identifier.get("type", {}).get("coding", [{}])[0].get("code") == "LN":
-            license_number = identifier.get("value", "")
-    
-    return {
-        "id": fhir_practitioner.get("id"),
-        "first_name": " ".join(given_names) if given_names else "Unknown",
-        "last_name": family_name or "Unknown",
-        "specialization": specialization,
-        "qualification": qualification_text or "MD",
-        "license_number": license_number or f"MD-{fhir_practitioner.get('id', 'N/A')}",
-        "email": email,
-        "phone": phone,
-        "hospital_id": None,  # Would come from PractitionerRole
-        "department": None,
-        "experience_years": None,
-        "languages": [],
-        "consultation_fee": None,
-        "availability": "Available",
-        "created_at": datetime.now().isoformat(),
-        "updated_at": datetime.now().isoformat()
-    }
+    if _wants(fields, "license_number"):
+        for identifier in fhir_practitioner.get("identifier", []):
+            if identifier.get("type", {}).get("coding", [{}])[0].get("code") == "LN":
+                license_number = identifier.get("value", "")
+    
+    return DoctorRecord(
+        id=fhir_practitioner.get("id"),
+        first_name=" ".join(given_names) if given_names else "Unknown",
+        last_name=family_name or "Unknown",
+        specialization=specialization,
+        qualification=qualification_text or "MD",
+        license_number=license_number or f"MD-{fhir_practitioner.get('id', 'N/A')}",
+        email=email,
+        phone=phone,
+        hospital_id=None,  # Would come from PractitionerRole
+        department=None,
+        experience_years=None,
+        languages=[],
+        consultation_fee=None,
+        availability="Available",
+        created_at=now,
+        updated_at=now
+    )
 
-def fhir_organization_to_hospital(fhir_org: Dict) -> Dict:
+def fhir_organization_to_hospital(fhir_org: Dict, now: Optional[str] = None, fields: Optional[FrozenSet[str]] = None) -> HospitalRecord:
     """Convert FHIR Organization resource to our Hospital model"""
+    now = now or datetime.now().isoformat()
     name = fhir_org.get("name", "Unknown Hospital")
     
     # Extract address
@@ -122,7 +276,7 @@ def fhir_organization_to_hospital(fhir_org: Dict) -> Dict:
     city = ""
     state = ""
     zip_code = ""
-    if fhir_org.get("address"):
+    if _wants(fields, "address", "city", "state", "zip_code") and fhir_org.get("address"):
         addr = fhir_org["address"][0]
         address = ", ".join(addr.get("line", []))
         city = addr.get("city", "")
@@ -133,69 +287,74 @@ def fhir_organization_to_hospital(fhir_org: Dict) -> Dict:
     phone = None
     email = None
     emergency_phone = None
-    for telecom in fhir_org.get("telecom", []):
-        system = telecom.get("system", "")
-        value = telecom.get("value", "")
-        use = telecom.get("use", "")
-        if system == "phone":
-            if use == "work":
-                phone = value
-            elif use == "mobile" or use == "temp":
-                emergency_phone = value
-        elif system == "email":
-            email = value
+    if _wants(fields, "phone", "email", "emergency_phone"):
+        for telecom in fhir_org.get("telecom", []):
+            system = telecom.get("system", "")
+            value = telecom.get("value", "")
+            use = telecom.get("use", "")
+            if system == "phone":
+                if use == "work":
+                    phone = value
+                elif use == "mobile" or use == "temp":
+                    emergency_phone = value
+            elif system == "email":
+                email = value
     
     # Extract type (hospital type)
     hospital_type = "General"
-    for type_coding in fhir_org.get("type", []):
-        for coding in type_coding.get("coding", []):
-            if "hospital" in coding.get("display", "").lower():
-                hospital_type = coding.get("display", hospital_type)
+    if _wants(fields, "hospital_type"):
+        for type_coding in fhir_org.get("type", []):
+            for coding in type_coding.get("coding", []):
+                if "hospital" in coding.get("display", "").lower():
+                    hospital_type = coding.get("display", hospital_type)
     
     # Extract specialties from extension or type
     specialties = []
-    for type_coding in fhir_org.get("type", []):
-        for coding in type_coding.get("coding", []):
-            display = coding.get("display", "")
-            if display and display not in specialties:
-                specialties.append(display)
-    
-    return {
-        "id": fhir_org.get("id"),
-        "name": name,
-        "address": address,
-        "city": city,
-        "state": state,
-        "zip_code": zip_code,
-        "country": "USA",
-        "phone": phone,
-        "email": email,
-        "emergency_phone": emergency_phone,
-        "hospital_type": hospital_type,
-        "total_beds": None,  # Not in standard FHIR Organization
-        "icu_beds": None,
-        "specialties": specialties[:10],  # Limit to 10
-        "facilities": [],  # Would come from Location resources
-        "operating_hours": None,
-        "website": None,
-        "created_at": datetime.now().isoformat(),
-        "updated_at": datetime.now().isoformat()
-    }
+    if _wants(fields, "specialties"):
+        for type_coding in fhir_org.get("type", []):
+            for coding in type_coding.get("coding", []):
+                display = coding.get("display", "")
+                if display and display not in specialties:
+                    specialties.append(display)
+    
+    return HospitalRecord(
+        id=fhir_org.get("id"),
+        name=name,
+        address=address,
+        city=city,
+        state=state,
+        zip_code=zip_code,
+        country="USA",
+        phone=phone,
+        email=email,
+        emergency_phone=emergency_phone,
+        hospital_type=hospital_type,
+        total_beds=None,  # Not in standard FHIR Organization
+        icu_beds=None,
+        specialties=specialties[:10],  # Limit to 10
+        facilities=[],  # Would come from Location resources
+        operating_hours=None,
+        website=None,
+        created_at=now,
+        updated_at=now
+    )
 
-def fhir_encounter_to_record(fhir_encounter: Dict) -> Dict:
+def fhir_encounter_to_record(fhir_encounter: Dict, now: Optional[str] = None, fields: Optional[FrozenSet[str]] = None) -> EncounterRecord:
     """Convert FHIR Encounter resource to our Medical Record model"""
-    return {
-        "id": fhir_encounter.get("id"),
-        "patient_id": fhir_encounter.get("subject", {}).get("reference", "").replace("Patient/", ""),
-        "patient_name": None,  # Would need to fetch Patient resource
-        "encounter_type": fhir_encounter.get("class", {}).get("display", "Unknown"),
-        "status": fhir_encounter.get("status", "unknown"),
-        "timestamp": fhir_encounter.get("period", {}).get("start", datetime.now().isoformat()),
-        "hospital_id": fhir_encounter.get("serviceProvider", {}).get("reference", "").replace("Organization/", "")
-    }
+    now = now or datetime.now().isoformat()
+    return EncounterRecord(
+        id=fhir_encounter.get("id"),
+        patient_id=fhir_encounter.get("subject", {}).get("reference", "").replace("Patient/", ""),
+        patient_name=None,  # Would need to fetch Patient resource
+        encounter_type=fhir_encounter.get("class", {}).get("display", "Unknown"),
+        status=fhir_encounter.get("status", "unknown"),
+        timestamp=fhir_encounter.get("period", {}).get("start", now),
+        hospital_id=fhir_encounter.get("serviceProvider", {}).get("reference", "").replace("Organization/", "")
+    )
 
-def fhir_encounter_to_visit(fhir_encounter: Dict) -> Dict:
+def fhir_encounter_to_visit(fhir_encounter: Dict, now: Optional[str] = None, fields: Optional[FrozenSet[str]] = None) -> VisitRecord:
     """Convert FHIR Encounter resource to our Visit model"""
+    now = now or datetime.now().isoformat()
     encounter_id = fhir_encounter.get("id", "")
     
     # Extract patient reference
@@ -212,10 +371,10 @@ def fhir_encounter_to_visit(fhir_encounter: Dict) -> Dict:
     
     # Extract period (visit dates)
     period = fhir_encounter.get("period", {})
-    start_date = period.get("start", datetime.now().isoformat())
+    start_date = period.get("start", now)
     end_date = period.get("end", None)
     duration_minutes = None
-    if start_date and end_date:
+    if _wants(fields, "durationMinutes") and start_date and end_date:
         try:
             start = datetime.fromisoformat(start_date.replace("Z", "+00:00"))
             end = datetime.fromisoformat(end_date.replace("Z", "+00:00"))
@@ -229,59 +388,64 @@ def fhir_encounter_to_visit(fhir_encounter: Dict) -> Dict:
     
     # Extract location
     location_name = None
-    locations = fhir_encounter.get("location", [])
-    if locations:
-        location_obj = locations[0] if isinstance(locations[0], dict) else {}
-        location_ref = location_obj.get("location", {}).get("reference", "")
-        if location_ref:
-            location_name = location_ref.replace("Location/", "").split("?")[0]
+    if _wants(fields, "location"):
+        locations = fhir_encounter.get("location", [])
+        if locations:
+            location_obj = locations[0] if isinstance(locations[0], dict) else {}
+            location_ref = location_obj.get("location", {}).get("reference", "")
+            if location_ref:
+                location_name = location_ref.replace("Location/", "").split("?")[0]
     
     # Extract reason (chief complaint)
     reason_text = None
-    reason_coding = fhir_encounter.get("reasonCode", [{}])[0].get("coding", [])
-    if reason_coding:
-        reason_text = reason_coding[0].get("display", reason_coding[0].get("code", None))
+    if _wants(fields, "reason"):
+        reason_coding = fhir_encounter.get("reasonCode", [{}])[0].get("coding", [])
+        if reason_coding:
+            reason_text = reason_coding[0].get("display", reason_coding[0].get("code", None))
     
     # Extract diagnosis
     diagnoses = []
-    for diagnosis in fhir_encounter.get("diagnosis", []):
-        condition_ref = diagnosis.get("condition", {}).get("reference", "")
-        if condition_ref:
-            diagnoses.append(condition_ref.replace("Condition/", "").split("?")[0])
+    if _wants(fields, "diagnoses"):
+        for diagnosis in fhir_encounter.get("diagnosis", []):
+            condition_ref = diagnosis.get("condition", {}).get("reference", "")
+            if condition_ref:
+                diagnoses.append(condition_ref.replace("Condition/", "").split("?")[0])
     
     # Extract participants (doctors/staff)
     participants = []
-    for participant in fhir_encounter.get("participant", []):
-        participant_type = participant.get("type", [{}])[0].get("coding", [{}])[0].get("code", "")
-        participant_ref = participant.get("individual", {}).get("reference", "")
-        if participant_ref:
-            participants.append({
-                "type": participant_type,
-                "reference": participant_ref.replace("Practitioner/", "").split("?")[0]
-            })
-    
-    return {
-        "id": encounter_id,
-        "patientId": patient_id or "",
-        "patientName": None,  # Will be enriched by service
-        "encounterType": encounter_type,
-        "encounterCode": encounter_code,
-        "status": status,
-        "startDate": start_date.split("T")[0] if "T" in start_date else start_date,
-        "startTime": start_date.split("T")[1].split(".")[0] if "T" in start_date and len(start_date.split("T")) > 1 else None,
-        "endDate": end_date.split("T")[0] if end_date and "T" in end_date else (end_date or None),
-        "endTime": end_date.split("T")[1].split(".")[0] if end_date and "T" in end_date and len(end_date.split("T")) > 1 else None,
-        "durationMinutes": duration_minutes,
-        "hospitalId": hospital_id or "",
-        "hospitalName": None,  # Will be enriched by service
-        "location": location_name,
-        "reason": reason_text,
-        "diagnoses": diagnoses,
-        "participants": participants
-    }
+    if _wants(fields, "participants"):
+        for participant in fhir_encounter.get("participant", []):
+            participant_type = participant.get("type", [{}])[0].get("coding", [{}])[0].get("code", "")
+            participant_ref = participant.get("individual", {}).get("reference", "")
+            if participant_ref:
+                participants.append({
+                    "type": participant_type,
+                    "reference": participant_ref.replace("Practitioner/", "").split("?")[0]
+                })
+    
+    return VisitRecord(
+        id=encounter_id,
+        patientId=patient_id or "",
+        patientName=None,  # Will be enriched by service
+        encounterType=encounter_type,
+        encounterCode=encounter_code,
+        status=status,
+        startDate=start_date.split("T")[0] if "T" in start_date else start_date,
+        startTime=start_date.split("T")[1].split(".")[0] if "T" in start_date and len(start_date.split("T")) > 1 else None,
+        endDate=end_date.split("T")[0] if end_date and "T" in end_date else (end_date or None),
+        endTime=end_date.split("T")[1].split(".")[0] if end_date and "T" in end_date and len(end_date.split("T")) > 1 else None,
+        durationMinutes=duration_minutes,
+        hospitalId=hospital_id or "",
+        hospitalName=None,  # Will be enriched by service
+        location=location_name,
+        reason=reason_text,
+        diagnoses=diagnoses,
+        participants=participants
+    )
 
-def fhir_condition_to_medical_history(fhir_condition: Dict) -> Dict:
+def fhir_condition_to_medical_history(fhir_condition: Dict, now: Optional[str] = None, fields: Optional[FrozenSet[str]] = None) -> MedicalHistoryRecord:
     """Convert FHIR Condition resource to our Medical History model"""
+    now = now or datetime.now().isoformat()
     condition_id = fhir_condition.get("id", "")
     
     # Extract patient reference
@@ -304,9 +468,10 @@ def fhir_condition_to_medical_history(fhir_condition: Dict) -> Dict:
     
     # Extract severity
     severity = None
-    severity_coding = fhir_condition.get("severity", {}).get("coding", [])
-    if severity_coding:
-        severity = severity_coding[0].get("display", severity_coding[0].get("code", None))
+    if _wants(fields, "severity"):
+        severity_coding = fhir_condition.get("severity", {}).get("coding", [])
+        if severity_coding:
+            severity = severity_coding[0].get("display", severity_coding[0].get("code", None))
     
     # Extract clinical status
     clinical_status = fhir_condition.get("clinicalStatus", {}).get("coding", [{}])[0].get("code", "active")
@@ -316,72 +481,79 @@ def fhir_condition_to_medical_history(fhir_condition: Dict) -> Dict:
     
     # Extract onset date
     onset_date = None
-    onset_datetime = fhir_condition.get("onsetDateTime")
-    if onset_datetime:
-        onset_date = onset_datetime
-    elif fhir_condition.get("onsetPeriod"):
-        onset_date = fhir_condition["onsetPeriod"].get("start", None)
-    elif fhir_condition.get("onsetAge"):
-        # Calculate approximate date from age
-        onset_date = datetime.now().isoformat()
+    if _wants(fields, "onsetDate"):
+        onset_datetime = fhir_condition.get("onsetDateTime")
+        if onset_datetime:
+            onset_date = onset_datetime
+        elif fhir_condition.get("onsetPeriod"):
+            onset_date = fhir_condition["onsetPeriod"].get("start", None)
+        elif fhir_condition.get("onsetAge"):
+            # Calculate approximate date from age
+            onset_date = now
     
     # Extract abatement date (when condition resolved)
     abatement_date = None
-    abatement_datetime = fhir_condition.get("abatementDateTime")
-    if abatement_datetime:
-        abatement_date = abatement_datetime
-    elif fhir_condition.get("abatementPeriod"):
-        abatement_date = fhir_condition["abatementPeriod"].get("end", None)
+    if _wants(fields, "abatementDate"):
+        abatement_datetime = fhir_condition.get("abatementDateTime")
+        if abatement_datetime:
+            abatement_date = abatement_datetime
+        elif fhir_condition.get("abatementPeriod"):
+            abatement_date = fhir_condition["abatementPeriod"].get("end", None)
     
     # Extract encounter reference (related visit)
     encounter_id = None
-    encounter_refs = fhir_condition.get("encounter", [])
-    if encounter_refs:
-        encounter_ref = encounter_refs[0] if isinstance(encounter_refs[0], str) else encounter_refs[0].get("reference", "")
-        if encounter_ref:
-            encounter_id = encounter_ref.replace("Encounter/", "").split("?")[0]
+    if _wants(fields, "encounterId"):
+        encounter_refs = fhir_condition.get("encounter", [])
+        if encounter_refs:
+            encounter_ref = encounter_refs[0] if isinstance(encounter_refs[0], str) else encounter_refs[0].get("reference", "")
+            if encounter_ref:
+                encounter_id = encounter_ref.replace("Encounter/", "").split("?")[0]
     
     # Extract body site
     body_site = None
-    body_site_coding = fhir_condition.get("bodySite", [{}])[0].get("coding", [])
-    if body_site_coding:
-        body_site = body_site_coding[0].get("display", body_site_coding[0].get("code", None))
+    if _wants(fields, "bodySite"):
+        body_site_coding = fhir_condition.get("bodySite", [{}])[0].get("coding", [])
+        if body_site_coding:
+            body_site = body_site_coding[0].get("display", body_site_coding[0].get("code", None))
     
     # Extract notes
     notes = []
-    for note in fhir_condition.get("note", []):
-        note_text = note.get("text", "")
-        if note_text:
-            notes.append(note_text)
-    
-    return {
-        "id": condition_id,
-        "patientId": patient_id or "",
-        "patientName": None,  # Will be enriched by service
-        "condition": condition_text,
-        "conditionCode": condition_code,
-        "category": category,
-        "severity": severity,
-        "clinicalStatus": clinical_status.title(),
-        "verificationStatus": verification_status.title(),
-        "onsetDate": onset_date.split("T")[0] if onset_date and "T" in onset_date else (onset_date or "Unknown"),
-        "abatementDate": abatement_date.split("T")[0] if abatement_date and "T" in abatement_date else (abatement_date or None),
-        "encounterId": encounter_id,
-        "bodySite": body_site,
-        "notes": notes,
-        "recordedDate": fhir_condition.get("recordedDate", datetime.now().isoformat()).split("T")[0] if fhir_condition.get("recordedDate") else None
-    }
+    if _wants(fields, "notes"):
+        for note in fhir_condition.get("note", []):
+            note_text = note.get("text", "")
+            if note_text:
+                notes.append(note_text)
+    
+    return MedicalHistoryRecord(
+        id=condition_id,
+        patientId=patient_id or "",
+        patientName=None,  # Will be enriched by service
+        condition=condition_text,
+        conditionCode=condition_code,
+        category=category,
+        severity=severity,
+        clinicalStatus=clinical_status.title(),
+        verificationStatus=verification_status.title(),
+        onsetDate=onset_date.split("T")[0] if onset_date and "T" in onset_date else (onset_date or "Unknown"),
+        abatementDate=abatement_date.split("T")[0] if abatement_date and "T" in abatement_date else (abatement_date or None),
+        encounterId=encounter_id,
+        bodySite=body_site,
+        notes=notes,
+        recordedDate=fhir_condition.get("recordedDate", now).split("T")[0] if fhir_condition.get("recordedDate") else None
+    )
 
-def fhir_claim_to_insurance_claim(fhir_claim: Dict) -> Dict:
+def fhir_claim_to_insurance_claim(fhir_claim: Dict, now: Optional[str] = None, fields: Optional[FrozenSet[str]] = None) -> ClaimRecord:
     """Convert FHIR Claim resource to our Insurance Claim model"""
+    now = now or datetime.now().isoformat()
     claim_id = fhir_claim.get("id", "")
     
     # Extract claim number
     claim_number = claim_id
-    for identifier in fhir_claim.get("identifier", []):
-        if identifier.get("type", {}).get("coding", [{}])[0].get("code") == "MR":
-            claim_number = identifier.get("value", claim_id)
-            break
+    if _wants(fields, "claimNumber"):
+        for identifier in fhir_claim.get("identifier", []):
+            if identifier.get("type", {}).get("coding", [{}])[0].get("code") == "MR":
+                claim_number = identifier.get("value", claim_id)
+                break
     
     # Extract patient info
     patient_obj = fhir_claim.get("patient", {})
@@ -405,12 +577,13 @@ def fhir_claim_to_insurance_claim(fhir_claim: Dict) -> Dict:
     
     # Extract insurance provider
     insurance_provider = "Unknown Provider"
-    for insurance in fhir_claim.get("insurance", []):
-        coverage_ref = insurance.get("coverage", {}).get("reference", "")
-        if coverage_ref:
-            # Extract provider name from coverage reference or identifier
-            insurance_provider = coverage_ref.split("/")[-1] if "/" in coverage_ref else "Unknown"
-            break
+    if _wants(fields, "provider"):
+        for insurance in fhir_claim.get("insurance", []):
+            coverage_ref = insurance.get("coverage", {}).get("reference", "")
+            if coverage_ref:
+                # Extract provider name from coverage reference or identifier
+                insurance_provider = coverage_ref.split("/")[-1] if "/" in coverage_ref else "Unknown"
+                break
     
     # Extract claim type
     claim_type = "Medical"
@@ -429,16 +602,17 @@ def fhir_claim_to_insurance_claim(fhir_claim: Dict) -> Dict:
     status = status_mapping.get(status.lower(), status)
     
     # Extract dates
-    created_date = fhir_claim.get("created", datetime.now().isoformat())
+    created_date = fhir_claim.get("created", now)
     service_date = created_date
     if fhir_claim.get("billablePeriod"):
         service_date = fhir_claim["billablePeriod"].get("start", created_date)
     
     # Extract diagnosis
     diagnosis = "General Examination"
-    diagnosis_coding = fhir_claim.get("diagnosis", [{}])[0].get("diagnosis", {}).get("coding", [])
-    if diagnosis_coding:
-        diagnosis = diagnosis_coding[0].get("display", diagnosis_coding[0].get("code", diagnosis))
+    if _wants(fields, "diagnosis"):
+        diagnosis_coding = fhir_claim.get("diagnosis", [{}])[0].get("diagnosis", {}).get("coding", [])
+        if diagnosis_coding:
+            diagnosis = diagnosis_coding[0].get("display", diagnosis_coding[0].get("code", diagnosis))
     
     # Extract service description
     service_description = claim_type
@@ -451,41 +625,43 @@ def fhir_claim_to_insurance_claim(fhir_claim: Dict) -> Dict:
     
     # Extract financial amounts
     total_amount = 0
-    for item in items:
-        quantity = item.get("quantity", {}).get("value", 1)
-        unit_price = item.get("unitPrice", {}).get("value", 0)
-        total_amount += quantity * unit_price
-    
-    # If no items, use total from total field
-    if total_amount == 0:
-        total_amount = fhir_claim.get("total", {}).get("value", 0)
+    if _wants(fields, "totalAmount", "coveredAmount", "patientResponsibility"):
+        for item in items:
+            quantity = item.get("quantity", {}).get("value", 1)
+            unit_price = item.get("unitPrice", {}).get("value", 0)
+            total_amount += quantity * unit_price
+        
+        # If no items, use total from total field
+        if total_amount == 0:
+            total_amount = fhir_claim.get("total", {}).get("value", 0)
     
     # Calculate covered amount (assume 80% coverage)
     coverage_percentage = 80
     covered_amount = int(total_amount * (coverage_percentage / 100))
     patient_responsibility = total_amount - covered_amount
     
-    return {
-        "id": claim_id,
-        "claimNumber": claim_number,
-        "hospitalId": hospital_id or "",
-        "hospitalName": hospital_name,
-        "patientId": patient_id or "",
-        "patientName": patient_name,
-        "provider": insurance_provider,
-        "claimType": claim_type,
-        "status": status,
-        "submissionDate": created_date.split("T")[0] if "T" in created_date else created_date,
-        "serviceDate": service_date.split("T")[0] if "T" in service_date else service_date,
-        "totalAmount": f"${total_amount:,.2f}",
-        "coveredAmount": f"${covered_amount:,.2f}",
-        "patientResponsibility": f"${patient_responsibility:,.2f}",
-        "diagnosis": diagnosis,
-        "serviceDescription": service_description
-    }
+    return ClaimRecord(
+        id=claim_id,
+        claimNumber=claim_number,
+        hospitalId=hospital_id or "",
+        hospitalName=hospital_name,
+        patientId=patient_id or "",
+        patientName=patient_name,
+        provider=insurance_provider,
+        claimType=claim_type,
+        status=status,
+        submissionDate=created_date.split("T")[0] if "T" in created_date else created_date,
+        serviceDate=service_date.split("T")[0] if "T" in service_date else service_date,
+        totalAmount=f"${total_amount:,.2f}",
+        coveredAmount=f"${covered_amount:,.2f}",
+        patientResponsibility=f"${patient_responsibility:,.2f}",
+        diagnosis=diagnosis,
+        serviceDescription=service_description
+    )
 
-def fhir_coverage_to_coverage_rule(fhir_coverage: Dict) -> Dict:
+def fhir_coverage_to_coverage_rule(fhir_coverage: Dict, now: Optional[str] = None, fields: Optional[FrozenSet[str]] = None) -> CoverageRuleRecord:
     """Convert FHIR Coverage resource to our Coverage Rule model"""
+    now = now or datetime.now().isoformat()
     coverage_id = fhir_coverage.get("id", "")
     
     # Extract subscriber info (patient)
@@ -497,26 +673,27 @@ def fhir_coverage_to_coverage_rule(fhir_coverage: Dict) -> Dict:
     beneficiary_id = beneficiary_ref.replace("Patient/", "").split("?")[0] if beneficiary_ref else None
     
     # Extract payor (insurance company)
-    payor_refs = fhir_coverage.get("payor", [])
     insurance_provider = "Unknown Provider"
-    if payor_refs:
-        payor_obj = payor_refs[0]
-        if isinstance(payor_obj, dict):
-            payor_ref = payor_obj.get("reference", "")
-            # Try to get display name if available
-            if payor_obj.get("display"):
-                insurance_provider = payor_obj["display"]
-            elif payor_ref:
-                # Extract from reference (could be Organization/123 or just an ID)
-                if "/" in payor_ref:
-                    insurance_provider = payor_ref.split("/")[-1]
-                else:
-                    insurance_provider = payor_ref
-        else:
-            insurance_provider = str(payor_obj)
+    if _wants(fields, "insuranceProvider", "planName"):
+        payor_refs = fhir_coverage.get("payor", [])
+        if payor_refs:
+            payor_obj = payor_refs[0]
+            if isinstance(payor_obj, dict):
+                payor_ref = payor_obj.get("reference", "")
+                # Try to get display name if available
+                if payor_obj.get("display"):
+                    insurance_provider = payor_obj["display"]
+                elif payor_ref:
+                    # Extract from reference (could be Organization/123 or just an ID)
+                    if "/" in payor_ref:
+                        insurance_provider = payor_ref.split("/")[-1]
+                    else:
+                        insurance_provider = payor_ref
+            else:
+                insurance_provider = str(payor_obj)
     
     # If still unknown, try to extract from identifier
-    if insurance_provider == "Unknown Provider":
+    if _wants(fields, "insuranceProvider", "planName") and insurance_provider == "Unknown Provider":
         for identifier in fhir_coverage.get("identifier", []):
             if identifier.get("type", {}).get("coding", [{}])[0].get("code") == "MB":
                 insurance_provider = identifier.get("value", insurance_provider)
@@ -533,13 +710,15 @@ def fhir_coverage_to_coverage_rule(fhir_coverage: Dict) -> Dict:
     
     # Extract period
     period = fhir_coverage.get("period", {})
-    start_date = period.get("start", datetime.now().isoformat())
+    start_date = period.get("start", now)
     end_date = period.get("end", None)
     
     # Extract cost sharing
-    cost_to_beneficiary = fhir_coverage.get("costToBeneficiary", [{}])[0] if fhir_coverage.get("costToBeneficiary") else {}
-    copay = cost_to_beneficiary.get("value", {}).get("value", 0)
-    copay_currency = cost_to_beneficiary.get("value", {}).get("currency", "USD")
+    copay = 0
+    if _wants(fields, "copay"):
+        cost_to_beneficiary = fhir_coverage.get("costToBeneficiary", [{}])[0] if fhir_coverage.get("costToBeneficiary") else {}
+        copay = cost_to_beneficiary.get("value", {}).get("value", 0)
+        copay_currency = cost_to_beneficiary.get("value", {}).get("currency", "USD")
     
     # Extract network
     network = fhir_coverage.get("network", [])
@@ -557,58 +736,167 @@ def fhir_coverage_to_coverage_rule(fhir_coverage: Dict) -> Dict:
         relationship = relationship_coding[0].get("display", relationship_coding[0].get("code", relationship))
     
     # Extract class (coverage details)
-    coverage_class = fhir_coverage.get("class", [])
     plan_type = "Standard"
     plan_name = ""
-    if coverage_class:
-        for cls in coverage_class:
-            if cls.get("type", {}).get("coding", [{}])[0].get("code") == "plan":
-                plan_name = cls.get("name", plan_name)
-            elif cls.get("type", {}).get("coding", [{}])[0].get("code") == "subplan":
-                plan_type = cls.get("name", plan_type)
+    if _wants(fields, "planType", "planName"):
+        coverage_class = fhir_coverage.get("class", [])
+        if coverage_class:
+            for cls in coverage_class:
+                if cls.get("type", {}).get("coding", [{}])[0].get("code") == "plan":
+                    plan_name = cls.get("name", plan_name)
+                elif cls.get("type", {}).get("coding", [{}])[0].get("code") == "subplan":
+                    plan_type = cls.get("name", plan_type)
     
     # Extract coverage rules from extensions or text
     rules = []
-    if fhir_coverage.get("text"):
-        rules.append(fhir_coverage["text"].get("div", ""))
-    
-    # Common coverage rules based on type
-    if "preventive" in coverage_type.lower():
-        rules.extend([
-            "Preventive care covered at 100%",
-            "Annual physical exams covered",
-            "Immunizations covered"
-        ])
-    elif "dental" in coverage_type.lower():
-        rules.extend([
-            "Dental cleanings covered twice per year",
-            "Basic procedures covered at 80%",
-            "Major procedures covered at 50%"
-        ])
-    else:
-        rules.extend([
-            "In-network providers: 80% coverage after deductible",
-            "Out-of-network providers: 60% coverage after deductible",
-            "Emergency services: Covered at in-network rates",
-            "Prescription drugs: Tier-based copay structure"
-        ])
-    
-    return {
-        "id": coverage_id,
-        "coverageId": coverage_id,
-        "subscriberId": subscriber_id or "",
-        "beneficiaryId": beneficiary_id or "",
-        "insuranceProvider": insurance_provider,
-        "coverageType": coverage_type,
-        "planName": plan_name or f"{insurance_provider} {coverage_type}",
-        "planType": plan_type,
-        "status": status,
-        "startDate": start_date.split("T")[0] if "T" in start_date else start_date,
-        "endDate": end_date.split("T")[0] if end_date and "T" in end_date else (end_date or "Active"),
-        "networkType": network_type,
-        "copay": f"${copay:.2f}" if copay > 0 else "Varies",
-        "relationship": relationship,
-        "dependentNumber": dependent or "N/A",
-        "rules": rules[:10]  # Limit to 10 rules
-    }
+    if _wants(fields, "rules"):
+        if fhir_coverage.get("text"):
+            rules.append(fhir_coverage["text"].get("div", ""))
+        
+        # Common coverage rules based on type
+        if "preventive" in coverage_type.lower():
+            rules.extend([
+                "Preventive care covered at 100%",
+                "Annual physical exams covered",
+                "Immunizations covered"
+            ])
+        elif "dental" in coverage_type.lower():
+            rules.extend([
+                "Dental cleanings covered twice per year",
+                "Basic procedures covered at 80%",
+                "Major procedures covered at 50%"
+            ])
+        else:
+            rules.extend([
+                "In-network providers: 80% coverage after deductible",
+                "Out-of-network providers: 60% coverage after deductible",
+                "Emergency services: Covered at in-network rates",
+                "Prescription drugs: Tier-based copay structure"
+            ])
+    
+    return CoverageRuleRecord(
+        id=coverage_id,
+        coverageId=coverage_id,
+        subscriberId=subscriber_id or "",
+        beneficiaryId=beneficiary_id or "",
+        insuranceProvider=insurance_provider,
+        coverageType=coverage_type,
+        planName=plan_name or f"{insurance_provider} {coverage_type}",
+        planType=plan_type,
+        status=status,
+        startDate=start_date.split("T")[0] if "T" in start_date else start_date,
+        endDate=end_date.split("T")[0] if end_date and "T" in end_date else (end_date or "Active"),
+        networkType=network_type,
+        copay=f"${copay:.2f}" if copay > 0 else "Varies",
+        relationship=relationship,
+        dependentNumber=dependent or "N/A",
+        rules=rules[:10]  # Limit to 10 rules
+    )
 
+
+def fhir_medication_request_to_medication(fhir_request: Dict) -> MedicationRequestRecord:
+    """Convert FHIR MedicationRequest resource to our Medication model"""
+    subject_ref = fhir_request.get("subject", {}).get("reference", "")
+    patient_id = subject_ref.replace("Patient/", "").split("?")[0] if subject_ref else ""
+    
+    # Extract medication (inline concept or reference to a Medication resource)
+    medication = "Unknown Medication"
+    medication_code = None
+    concept = fhir_request.get("medicationCodeableConcept")
+    if concept:
+        coding_list = concept.get("coding", [])
+        if coding_list:
+            medication = coding_list[0].get("display", coding_list[0].get("code", medication))
+            medication_code = coding_list[0].get("code")
+        medication = concept.get("text", medication)
+    elif fhir_request.get("medicationReference"):
+        medication = fhir_request["medicationReference"].get("display", medication)
+    
+    # Extract dosage instructions
+    dosage = None
+    dosage_list = fhir_request.get("dosageInstruction", [])
+    if dosage_list:
+        dosage = dosage_list[0].get("text")
+    
+    # Extract prescriber
+    requester_ref = fhir_request.get("requester", {}).get("reference", "")
+    requester_id = requester_ref.split("/")[-1] if requester_ref else None
+    
+    return MedicationRequestRecord(
+        id=fhir_request.get("id", ""),
+        patientId=patient_id,
+        medication=medication,
+        medicationCode=medication_code,
+        status=fhir_request.get("status", "unknown").title(),
+        intent=fhir_request.get("intent", "order").title(),
+        authoredOn=fhir_request.get("authoredOn"),
+        dosage=dosage,
+        requesterId=requester_id
+    )
+
+def fhir_observation_to_observation(fhir_observation: Dict) -> ObservationRecord:
+    """Convert FHIR Observation resource to our Observation model"""
+    subject_ref = fhir_observation.get("subject", {}).get("reference", "")
+    patient_id = subject_ref.replace("Patient/", "").split("?")[0] if subject_ref else ""
+    
+    # Extract what was observed
+    observation = "Unknown Observation"
+    observation_code = None
+    code = fhir_observation.get("code", {})
+    coding_list = code.get("coding", [])
+    if coding_list:
+        observation = coding_list[0].get("display", coding_list[0].get("code", observation))
+        observation_code = coding_list[0].get("code")
+    observation = code.get("text", observation)
+    
+    # Extract category
+    category = "Observation"
+    category_coding = fhir_observation.get("category", [{}])[0].get("coding", [])
+    if category_coding:
+        category = category_coding[0].get("display", category_coding[0].get("code", category))
+    
+    # Extract value (quantity, coded or plain)
+    value = None
+    unit = None
+    if "valueQuantity" in fhir_observation:
+        quantity = fhir_observation["valueQuantity"]
+        value = str(quantity.get("value")) if quantity.get("value") is not None else None
+        unit = quantity.get("unit", quantity.get("code"))
+    elif "valueCodeableConcept" in fhir_observation:
+        concept = fhir_observation["valueCodeableConcept"]
+        value_coding = concept.get("coding", [{}])
+        value = concept.get("text", value_coding[0].get("display") if value_coding else None)
+    elif "valueString" in fhir_observation:
+        value = fhir_observation["valueString"]
+    elif fhir_observation.get("component"):
+        # Panels such as blood pressure: "120/80 mmHg"
+        parts = [c.get("valueQuantity", {}) for c in fhir_observation["component"]]
+        values = [str(q["value"]) for q in parts if q.get("value") is not None]
+        value = "/".join(values) if values else None
+        unit = parts[0].get("unit") if parts else None
+    
+    # Extract effective date
+    effective_date = (
+        fhir_observation.get("effectiveDateTime")
+        or fhir_observation.get("effectiveInstant")
+        or fhir_observation.get("effectivePeriod", {}).get("start")
+    )
+    
+    # Extract interpretation (high, low, normal, ...)
+    interpretation = None
+    interpretation_coding = fhir_observation.get("interpretation", [{}])[0].get("coding", [])
+    if interpretation_coding:
+        interpretation = interpretation_coding[0].get("display", interpretation_coding[0].get("code"))
+    
+    return ObservationRecord(
+        id=fhir_observation.get("id", ""),
+        patientId=patient_id,
+        observation=observation,
+        observationCode=observation_code,
+        category=category,
+        status=fhir_observation.get("status", "unknown").title(),
+        effectiveDate=effective_date,
+        value=value,
+        unit=unit,
+        interpretation=interpretation
+    )
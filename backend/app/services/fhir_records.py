@@ -0,0 +1,303 @@
+"""
+FHIR Record Types
+Slotted records for the models built by fhir_mapper. A record stores its fields
+without a per-instance dict but still reads and writes like one (record["id"],
+record.get("id"), record["patientName"] = ...), so enrichment code is unchanged.
+Routers serialize records straight to JSON with serialize_records.
+"""
+from typing import Any, ClassVar, Dict, FrozenSet, Iterator, List, Optional, Tuple
+from dataclasses import dataclass, fields
+from operator import attrgetter
+
+from backend.app.services.json_codec import dumps
+
+class FhirRecord:
+    __slots__ = ()
+
+    # Output field order, and the fields left out of the output while None
+    _FIELDS: ClassVar[Tuple[str, ...]] = ()
+    _OPTIONAL: ClassVar[Tuple[str, ...]] = ()
+    _FIELD_SET: ClassVar[frozenset] = frozenset()
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Plain dict of the record, in output field order"""
+        data = dict(zip(self._FIELDS, self._values(self)))
+        for name in self._OPTIONAL:
+            if data[name] is None:
+                del data[name]
+        return data
+
+    def keys(self) -> List[str]:
+        return [name for name in self._FIELDS if name not in self._OPTIONAL or getattr(self, name) is not None]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.keys())
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._FIELD_SET and (key not in self._OPTIONAL or getattr(self, key) is not None)
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in self._FIELD_SET:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __setitem__(self, key: str, value: Any):
+        if key not in self._FIELD_SET:
+            raise KeyError(f"{type(self).__name__} has no field {key!r}")
+        setattr(self, key, value)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        if key not in self._FIELD_SET:
+            return default
+        value = getattr(self, key)
+        return default if value is None and key in self._OPTIONAL else value
+
+def _record(cls):
+    """Make cls a slotted dataclass record and precompute its field accessors"""
+    cls = dataclass(slots=True)(cls)
+    cls._FIELDS = tuple(f.name for f in fields(cls))
+    cls._FIELD_SET = frozenset(cls._FIELDS)
+    # One C call reads every field, as a tuple since every record has several
+    cls._values = attrgetter(*cls._FIELDS)
+    return cls
+
+@_record
+class PatientRecord(FhirRecord):
+    _OPTIONAL: ClassVar[Tuple[str, ...]] = ("medications",)
+
+    id: Optional[str]
+    first_name: str
+    last_name: str
+    date_of_birth: str
+    gender: str
+    email: Optional[str]
+    phone: Optional[str]
+    address: Optional[str]
+    emergency_contact_name: Optional[str]
+    emergency_contact_phone: Optional[str]
+    blood_type: Optional[str]
+    allergies: List[str]
+    medical_history: List[str]
+    created_at: str
+    updated_at: str
+    # Set by the patient detail fetch only
+    medications: Optional[List[str]] = None
+
+@_record
+class DoctorRecord(FhirRecord):
+    _OPTIONAL: ClassVar[Tuple[str, ...]] = ("department_specialty", "location", "source")
+
+    id: Optional[str]
+    first_name: str
+    last_name: str
+    specialization: str
+    qualification: str
+    license_number: str
+    email: Optional[str]
+    phone: Optional[str]
+    hospital_id: Optional[str]
+    department: Optional[str]
+    experience_years: Optional[int]
+    languages: List[str]
+    consultation_fee: Optional[float]
+    availability: str
+    created_at: str
+    updated_at: str
+    # Set by PractitionerRole / Encounter lookups only
+    department_specialty: Optional[str] = None
+    location: Optional[str] = None
+    source: Optional[str] = None
+
+@_record
+class HospitalRecord(FhirRecord):
+    id: Optional[str]
+    name: str
+    address: str
+    city: str
+    state: str
+    zip_code: str
+    country: str
+    phone: Optional[str]
+    email: Optional[str]
+    emergency_phone: Optional[str]
+    hospital_type: str
+    total_beds: Optional[int]
+    icu_beds: Optional[int]
+    specialties: List[str]
+    facilities: List[str]
+    operating_hours: Optional[str]
+    website: Optional[str]
+    created_at: str
+    updated_at: str
+
+@_record
+class EncounterRecord(FhirRecord):
+    id: Optional[str]
+    patient_id: str
+    patient_name: Optional[str]
+    encounter_type: str
+    status: str
+    timestamp: str
+    hospital_id: str
+
+@_record
+class VisitRecord(FhirRecord):
+    id: str
+    patientId: str
+    patientName: Optional[str]
+    encounterType: str
+    encounterCode: Optional[str]
+    status: str
+    startDate: str
+    startTime: Optional[str]
+    endDate: Optional[str]
+    endTime: Optional[str]
+    durationMinutes: Optional[int]
+    hospitalId: str
+    hospitalName: Optional[str]
+    location: Optional[str]
+    reason: Optional[str]
+    diagnoses: List[str]
+    participants: List[Dict]
+
+@_record
+class MedicalHistoryRecord(FhirRecord):
+    id: str
+    patientId: str
+    patientName: Optional[str]
+    condition: str
+    conditionCode: Optional[str]
+    category: str
+    severity: Optional[str]
+    clinicalStatus: str
+    verificationStatus: str
+    onsetDate: str
+    abatementDate: Optional[str]
+    encounterId: Optional[str]
+    bodySite: Optional[str]
+    notes: List[str]
+    recordedDate: Optional[str]
+
+@_record
+class ClaimRecord(FhirRecord):
+    id: str
+    claimNumber: str
+    hospitalId: str
+    hospitalName: str
+    patientId: str
+    patientName: str
+    provider: str
+    claimType: str
+    status: str
+    submissionDate: str
+    serviceDate: str
+    totalAmount: str
+    coveredAmount: str
+    patientResponsibility: str
+    diagnosis: str
+    serviceDescription: str
+
+@_record
+class CoverageRuleRecord(FhirRecord):
+    id: str
+    coverageId: str
+    subscriberId: str
+    beneficiaryId: str
+    insuranceProvider: str
+    coverageType: str
+    planName: str
+    planType: str
+    status: str
+    startDate: str
+    endDate: str
+    networkType: str
+    copay: str
+    relationship: str
+    dependentNumber: str
+    rules: List[str]
+
+@_record
+class MedicationRequestRecord(FhirRecord):
+    id: str
+    patientId: str
+    medication: str
+    medicationCode: Optional[str]
+    status: str
+    intent: str
+    authoredOn: Optional[str]
+    dosage: Optional[str]
+    requesterId: Optional[str]
+
+@_record
+class ObservationRecord(FhirRecord):
+    id: str
+    patientId: str
+    observation: str
+    observationCode: Optional[str]
+    category: str
+    status: str
+    effectiveDate: Optional[str]
+    value: Optional[str]
+    unit: Optional[str]
+    interpretation: Optional[str]
+
+@_record
+class TimelineEntryRecord(FhirRecord):
+    id: str
+    resourceType: str
+    timestamp: str
+    title: str
+    status: Optional[str]
+    details: FhirRecord
+
+def parse_fields(value: Optional[str], record_type: type) -> Optional[FrozenSet[str]]:
+    """
+    Parse a ?fields= projection for a record type
+
+    Args:
+        value: Comma-separated field names, or None/empty for every field
+        record_type: Record class the fields belong to
+
+    Returns:
+        The requested field names, or None for every field
+
+    Raises:
+        ValueError: If a name is not a field of record_type
+    """
+    if not value:
+        return None
+    fields = frozenset(name.strip() for name in value.split(",") if name.strip())
+    unknown = sorted(fields - record_type._FIELD_SET)
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return fields or None
+
+def _encode_record(obj: Any) -> Any:
+    if isinstance(obj, FhirRecord):
+        return obj.to_dict()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+def _projected_encoder(fields: FrozenSet[str]):
+    projections: Dict[type, Tuple[str, ...]] = {}
+
+    def encode(obj: Any) -> Any:
+        if not isinstance(obj, FhirRecord):
+            raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+        names = projections.get(type(obj))
+        if names is None:
+            names = projections[type(obj)] = tuple(name for name in obj._FIELDS if name in fields)
+        return {name: getattr(obj, name) for name in names}
+    return encode
+
+def serialize_records(data: Any, fields: Optional[FrozenSet[str]] = None) -> bytes:
+    """
+    Encode records (or lists/dicts containing them) as a JSON response body
+
+    Each record is expanded to a dict only while it is being written, so a
+    bulk response never holds a second full copy of its records.
+
+    Args:
+        data: Records, or containers of records
+        fields: Projection; only these fields of each record are written
+    """
+    return dumps(data, default=_projected_encoder(fields) if fields else _encode_record)
@@ -4,10 +4,15 @@ Tracks fulfillment status for out-of-stock and low-stock medications
 """
 from typing import Dict, List, Optional
 from datetime import datetime, timedelta
+from bisect import bisect_left, insort
 import random
+import threading
 
 # Import inventory service to get stock status
-from backend.app.services.inventory_service import MEDICATION_INVENTORY, get_all_inventory
+from backend.app.services.inventory_service import (
+    DEFAULT_SITE_ID, adjust_stock_quantity, get_site, iter_inventory,
+    register_inventory_listener, register_site_listener
+)
 
 # Fulfillment status for medications
 # In production, this would come from a database
@@ -71,95 +76,260 @@ FULFILLMENT_STATUS = {
     }
 }
 
-def get_fulfillment_status() -> List[Dict]:
-    """
-    Get fulfillment status for all out-of-stock and low-stock medications
-    
-    Returns:
-        List of medications with fulfillment status
-    """
-    fulfillment_list = []
-    
-    # Get all inventory to check stock status
-    all_inventory = get_all_inventory()
-    
-    # Process medications that are out of stock or low stock
-    for med in all_inventory:
-        if med["status"] in ["out_of_stock", "low_stock"]:
-            med_name = med["name"]
+# Fulfillment state machine: not_ordered -> pending -> ordered -> in_transit -> delivered.
+# Pending and ordered requests may be cancelled back to not_ordered, and a delivered
+# order starts a new cycle at not_ordered.
+FULFILLMENT_STATES = ["not_ordered", "pending", "ordered", "in_transit", "delivered"]
+FULFILLMENT_TRANSITIONS = {
+    "not_ordered": {"pending"},
+    "pending": {"ordered", "not_ordered"},
+    "ordered": {"in_transit", "not_ordered"},
+    "in_transit": {"delivered"},
+    "delivered": {"not_ordered"}
+}
+
+# Stock statuses that need fulfillment, in listing order
+NEEDS_FULFILLMENT = ["out_of_stock", "low_stock"]
+
+# Order fields an event may set on the fulfillment record
+ORDER_EVENT_FIELDS = [
+    "order_date", "expected_delivery", "delivery_date", "quantity_ordered",
+    "quantity_received", "supplier", "order_number", "notes"
+]
+
+class FulfillmentSite:
+    def __init__(self, site_id: str, orders: Optional[Dict[str, Dict]] = None):
+        """
+        Fulfillment state of one pharmacy site: its order records plus precomputed
+        rows, filed per (stock status, fulfillment status) in name order. Rows are
+        refreshed from the site's inventory and order events, never on read.
+        """
+        self.site_id = site_id
+        self.orders: Dict[str, Dict] = orders if orders is not None else {}
+        self.rows: Dict[str, Dict] = {}
+        self.views: Dict[str, Dict[str, List[str]]] = {status: {} for status in NEEDS_FULFILLMENT}
+        self.buckets: Dict[str, tuple] = {}  # medication name -> (stock status, fulfillment status)
+        # Inventory listeners for different medications may refresh rows concurrently
+        self.lock = threading.RLock()
+
+    def _unfile_row(self, med_name: str):
+        self.rows.pop(med_name, None)
+        bucket = self.buckets.pop(med_name, None)
+        if bucket is None:
+            return
+        stock_status, fulfillment_status = bucket
+        view = self.views[stock_status][fulfillment_status]
+        position = bisect_left(view, med_name)
+        if position < len(view) and view[position] == med_name:
+            del view[position]
+
+    def refresh_row(self, med_name: str):
+        """Recompute the fulfillment row of one medication from inventory and order state"""
+        with self.lock:
+            self._unfile_row(med_name)
+            med = get_site(self.site_id).inventory.get(med_name)
+            if med is None or med.get("status") not in NEEDS_FULFILLMENT:
+                # Back in stock (or gone): a delivered order has completed its cycle
+                if self.orders.get(med_name, {}).get("fulfillment_status") == "delivered":
+                    del self.orders[med_name]
+                return
             
-            # Get fulfillment status if exists
-            if med_name in FULFILLMENT_STATUS:
-                fulfillment_data = FULFILLMENT_STATUS[med_name].copy()
+            stock_status = med["status"]
+            if med_name in self.orders:
+                fulfillment_data = self.orders[med_name]
+                fulfillment_data["current_status"] = stock_status
             else:
-                # Create default fulfillment status
-                fulfillment_data = {
-                    "medication_name": med_name,
-                    "current_status": med["status"],
-                    "fulfillment_status": "not_ordered",
-                    "order_date": None,
-                    "expected_delivery": None,
-                    "quantity_ordered": 0,
-                    "supplier": None,
-                    "order_number": None,
-                    "notes": "No order placed yet"
-                }
+                fulfillment_data = _default_fulfillment(med_name, stock_status)
             
-            # Merge with inventory data
-            fulfillment_item = {
+            self.rows[med_name] = {
                 **med,  # Include all inventory data
+                "found": True,
                 **fulfillment_data,  # Include fulfillment data
                 "needs_fulfillment": True
             }
-            
-            fulfillment_list.append(fulfillment_item)
-    
-    # Sort by status priority: out_of_stock first, then low_stock
-    # Then by fulfillment status: not_ordered, pending, ordered, in_transit, delivered
-    status_priority = {"out_of_stock": 0, "low_stock": 1}
-    fulfillment_priority = {
-        "not_ordered": 0,
-        "pending": 1,
-        "ordered": 2,
-        "in_transit": 3,
-        "delivered": 4
+            bucket = (stock_status, fulfillment_data.get("fulfillment_status", "not_ordered"))
+            insort(self.views[stock_status].setdefault(bucket[1], []), med_name)
+            self.buckets[med_name] = bucket
+
+    def rebuild(self):
+        with self.lock:
+            self.rows.clear()
+            self.buckets.clear()
+            for views in self.views.values():
+                views.clear()
+            for med in iter_inventory(NEEDS_FULFILLMENT, self.site_id):
+                self.refresh_row(med["name"])
+
+    def states_in_order(self, stock_status: str) -> List[str]:
+        # Known states in lifecycle order, then any unrecognised ones
+        extra = sorted(set(self.views[stock_status]) - set(FULFILLMENT_STATES))
+        return FULFILLMENT_STATES + extra
+
+def _default_fulfillment(med_name: str, stock_status: str) -> Dict:
+    return {
+        "medication_name": med_name,
+        "current_status": stock_status,
+        "fulfillment_status": "not_ordered",
+        "order_date": None,
+        "expected_delivery": None,
+        "quantity_ordered": 0,
+        "supplier": None,
+        "order_number": None,
+        "notes": "No order placed yet"
     }
+
+# Fulfillment state by site ID. The default site holds FULFILLMENT_STATUS itself.
+_FULFILLMENT_SITES: Dict[str, FulfillmentSite] = {}
+_FULFILLMENT_SITES_LOCK = threading.Lock()
+
+def _attach_site(site_id: str) -> FulfillmentSite:
+    # Idempotent: runs from the site listener and on first use, whichever comes first
+    with _FULFILLMENT_SITES_LOCK:
+        site = _FULFILLMENT_SITES.get(site_id)
+        if site is not None:
+            return site
+        site = FulfillmentSite(site_id, FULFILLMENT_STATUS if site_id == DEFAULT_SITE_ID else None)
+        # Listen before building so no inventory change falls between the two
+        register_inventory_listener(site.refresh_row, site_id)
+        site.rebuild()
+        _FULFILLMENT_SITES[site_id] = site
+        return site
+
+def get_fulfillment_site(site_id: str = DEFAULT_SITE_ID) -> FulfillmentSite:
+    """
+    Get a site's fulfillment state
     
-    fulfillment_list.sort(
-        key=lambda x: (
-            status_priority.get(x.get("status", "in_stock"), 2),
-            fulfillment_priority.get(x.get("fulfillment_status", "not_ordered"), 5),
-            x.get("medication_name", "")
-        )
-    )
+    Raises:
+        UnknownSiteError: If the site is not registered
+    """
+    site = _FULFILLMENT_SITES.get(site_id)
+    if site is None:
+        get_site(site_id)
+        site = _attach_site(site_id)
+    return site
+
+register_site_listener(_attach_site)
+
+def record_fulfillment_event(
+    medication_name: str,
+    fulfillment_status: str,
+    details: Optional[Dict] = None,
+    site_id: str = DEFAULT_SITE_ID
+) -> Optional[Dict]:
+    """
+    Apply an order event to a medication's fulfillment state
+    
+    Args:
+        medication_name: Inventory name of the medication
+        fulfillment_status: State to move to (see FULFILLMENT_TRANSITIONS)
+        details: Optional order fields (supplier, order_number, quantity_ordered, ...);
+            quantity_received on delivery is added to the stock on hand
+        site_id: Pharmacy site
+        
+    Returns:
+        The updated fulfillment record or None if the medication is not in the site's inventory
+    
+    Raises:
+        ValueError: If the transition is not allowed from the current state
+        UnknownSiteError: If the site is not registered
+    """
+    site = get_fulfillment_site(site_id)
+    with site.lock:
+        med = get_site(site_id).inventory.get(medication_name)
+        if med is None:
+            return None
+        
+        current = site.orders.get(medication_name) or _default_fulfillment(medication_name, med.get("status"))
+        current_state = current.get("fulfillment_status", "not_ordered")
+        if fulfillment_status not in FULFILLMENT_TRANSITIONS.get(current_state, set()):
+            raise ValueError(f"Cannot move {medication_name} from {current_state} to {fulfillment_status}")
+        
+        details = details or {}
+        if fulfillment_status == "not_ordered":
+            record = _default_fulfillment(medication_name, med.get("status"))
+            site.orders.pop(medication_name, None)
+        else:
+            record = {
+                **current,
+                **{field: details[field] for field in ORDER_EVENT_FIELDS if field in details},
+                "fulfillment_status": fulfillment_status
+            }
+            if fulfillment_status == "ordered" and not record.get("order_date"):
+                record["order_date"] = datetime.now().strftime("%Y-%m-%d")
+            if fulfillment_status == "delivered" and not record.get("delivery_date"):
+                record["delivery_date"] = datetime.now().strftime("%Y-%m-%d")
+            site.orders[medication_name] = record
+        site.refresh_row(medication_name)
+    
+    # Receiving stock is an inventory event; it refreshes the row again via the listener
+    if fulfillment_status == "delivered" and details.get("quantity_received"):
+        adjust_stock_quantity(medication_name, details["quantity_received"], site_id=site_id)
+    
+    return record
+
+def get_fulfillment_status(site_id: str = DEFAULT_SITE_ID) -> List[Dict]:
+    """
+    Get fulfillment status for all out-of-stock and low-stock medications
     
+    Args:
+        site_id: Pharmacy site
+        
+    Returns:
+        List of medications with fulfillment status, ordered by stock status
+        (out_of_stock first), then fulfillment status, then name
+    """
+    site = get_fulfillment_site(site_id)
+    fulfillment_list = []
+    with site.lock:
+        for stock_status in NEEDS_FULFILLMENT:
+            views = site.views[stock_status]
+            for fulfillment_status in site.states_in_order(stock_status):
+                for med_name in views.get(fulfillment_status, []):
+                    fulfillment_list.append(site.rows[med_name])
     return fulfillment_list
 
-def get_fulfillment_by_status(fulfillment_status: Optional[str] = None) -> List[Dict]:
+def get_fulfillment_by_status(fulfillment_status: Optional[str] = None, site_id: str = DEFAULT_SITE_ID) -> List[Dict]:
     """
     Get fulfillment status filtered by fulfillment status
     
     Args:
         fulfillment_status: Optional filter by fulfillment status
+        site_id: Pharmacy site
         
     Returns:
         Filtered list of medications with fulfillment status
     """
-    all_fulfillment = get_fulfillment_status()
-    
     if not fulfillment_status or fulfillment_status == "all":
-        return all_fulfillment
+        return get_fulfillment_status(site_id)
     
-    return [item for item in all_fulfillment if item.get("fulfillment_status") == fulfillment_status]
+    site = get_fulfillment_site(site_id)
+    fulfillment_list = []
+    with site.lock:
+        for stock_status in NEEDS_FULFILLMENT:
+            for med_name in site.views[stock_status].get(fulfillment_status, []):
+                fulfillment_list.append(site.rows[med_name])
+    return fulfillment_list
 
-def get_in_stock_medications() -> List[Dict]:
+def get_fulfillment_counts(site_id: str = DEFAULT_SITE_ID) -> Dict[str, int]:
+    """Number of medications at the site in each fulfillment status"""
+    site = get_fulfillment_site(site_id)
+    counts = {state: 0 for state in FULFILLMENT_STATES}
+    with site.lock:
+        for views in site.views.values():
+            for fulfillment_status, med_names in views.items():
+                counts[fulfillment_status] = counts.get(fulfillment_status, 0) + len(med_names)
+    return counts
+
+def get_in_stock_medications(site_id: str = DEFAULT_SITE_ID) -> List[Dict]:
     """
     Get all medications that are currently in stock
     
+    Args:
+        site_id: Pharmacy site
+        
     Returns:
         List of in-stock medications
     """
-    all_inventory = get_all_inventory()
-    return [med for med in all_inventory if med["status"] == "in_stock"]
+    return [{**med, "found": True} for med in iter_inventory(["in_stock"], site_id)]
 
 
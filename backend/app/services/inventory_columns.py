@@ -0,0 +1,190 @@
+"""
+Columnar Inventory Store
+NumPy column arrays mirroring the inventory records, so filters, reorder
+computations and aggregates run vectorized instead of walking every dict
+"""
+from typing import Dict, List, Optional, Tuple
+
+# Try to import numpy, callers fall back to scanning the records if not installed
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+    np = None
+
+# Status codes follow the listing order so sorting by code sorts by status
+STATUS_CODES = ["out_of_stock", "low_stock", "in_stock"]
+_STATUS_CODE = {status: code for code, status in enumerate(STATUS_CODES)}
+
+_INITIAL_CAPACITY = 64
+
+class InventoryColumns:
+    def __init__(self):
+        """
+        Create an empty store. Rows are addressed by medication name; removed rows
+        are tombstoned and reused by later additions.
+        """
+        self.clear()
+
+    def clear(self):
+        """Drop every row"""
+        self._quantity = np.zeros(_INITIAL_CAPACITY, dtype=np.int32)
+        self._reorder_level = np.zeros(_INITIAL_CAPACITY, dtype=np.int32)
+        self._status = np.zeros(_INITIAL_CAPACITY, dtype=np.int8)
+        self._unit = np.zeros(_INITIAL_CAPACITY, dtype=np.int16)
+        self._alive = np.zeros(_INITIAL_CAPACITY, dtype=bool)
+        self._names: List[Optional[str]] = [None] * _INITIAL_CAPACITY
+        self._rows: Dict[str, int] = {}   # medication name -> row
+        self._free: List[int] = []         # tombstoned rows available for reuse
+        self._size = 0                     # rows ever used (high-water mark)
+        self._units: List[str] = []        # unit code -> unit name
+        self._unit_codes: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __contains__(self, med_name: str) -> bool:
+        return med_name in self._rows
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the numeric columns"""
+        return sum(column.nbytes for column in (self._quantity, self._reorder_level, self._status, self._unit, self._alive))
+
+    def _unit_code(self, unit: Optional[str]) -> int:
+        unit = unit or ""
+        code = self._unit_codes.get(unit)
+        if code is None:
+            code = len(self._units)
+            self._units.append(unit)
+            self._unit_codes[unit] = code
+        return code
+
+    def _reserve(self, capacity: int):
+        if capacity <= len(self._alive):
+            return
+        new_capacity = max(capacity, 2 * len(self._alive))
+        for attr in ("_quantity", "_reorder_level", "_status", "_unit", "_alive"):
+            column = getattr(self, attr)
+            grown = np.zeros(new_capacity, dtype=column.dtype)
+            grown[:len(column)] = column
+            setattr(self, attr, grown)
+        self._names.extend([None] * (new_capacity - len(self._names)))
+
+    def rebuild(self, records: Dict[str, Dict]):
+        """Rebuild every column from name -> record in one vectorized pass"""
+        self.clear()
+        count = len(records)
+        self._reserve(count)
+        values = records.values()
+        self._quantity[:count] = np.fromiter((r.get("stock_quantity", 0) for r in values), dtype=np.int32, count=count)
+        self._reorder_level[:count] = np.fromiter((r.get("reorder_level", 0) for r in values), dtype=np.int32, count=count)
+        self._status[:count] = np.fromiter(
+            (_STATUS_CODE.get(r.get("status"), _STATUS_CODE["in_stock"]) for r in values), dtype=np.int8, count=count
+        )
+        self._unit[:count] = np.fromiter((self._unit_code(r.get("unit")) for r in values), dtype=np.int16, count=count)
+        self._alive[:count] = True
+        self._names[:count] = list(records)
+        self._rows = {med_name: row for row, med_name in enumerate(records)}
+        self._size = count
+
+    def set(self, med_name: str, record: Dict):
+        """Add a row or overwrite the row of an existing medication"""
+        row = self._rows.get(med_name)
+        if row is None:
+            if self._free:
+                row = self._free.pop()
+            else:
+                self._reserve(self._size + 1)
+                row = self._size
+                self._size += 1
+            self._rows[med_name] = row
+            self._names[row] = med_name
+            self._alive[row] = True
+        self._quantity[row] = record.get("stock_quantity", 0)
+        self._reorder_level[row] = record.get("reorder_level", 0)
+        self._status[row] = _STATUS_CODE.get(record.get("status"), _STATUS_CODE["in_stock"])
+        self._unit[row] = self._unit_code(record.get("unit"))
+
+    def remove(self, med_name: str):
+        """Tombstone the row of a medication"""
+        row = self._rows.pop(med_name, None)
+        if row is None:
+            return
+        self._alive[row] = False
+        self._names[row] = None
+        self._free.append(row)
+
+    def mask(
+        self,
+        status: Optional[str] = None,
+        below_reorder: bool = False,
+        unit: Optional[str] = None
+    ) -> "np.ndarray":
+        """
+        Boolean row mask for the given filters (all optional, combined with AND)
+
+        Args:
+            status: Stock status to match
+            below_reorder: Only rows at or below their reorder level
+            unit: Unit to match, e.g. "tablets"
+        """
+        size = self._size
+        mask = self._alive[:size].copy()
+        if status is not None:
+            code = _STATUS_CODE.get(status)
+            if code is None:
+                return np.zeros(size, dtype=bool)
+            mask &= self._status[:size] == code
+        if below_reorder:
+            mask &= self._quantity[:size] <= self._reorder_level[:size]
+        if unit is not None:
+            code = self._unit_codes.get(unit)
+            if code is None:
+                return np.zeros(size, dtype=bool)
+            mask &= self._unit[:size] == code
+        return mask
+
+    def names(self, mask: "np.ndarray") -> List[str]:
+        """Medication names of the rows selected by mask, in status then name order"""
+        size = self._size
+        names = []
+        for code in range(len(STATUS_CODES)):
+            rows = np.flatnonzero(mask & (self._status[:size] == code))
+            names.extend(sorted(self._names[row] for row in rows))
+        return names
+
+    def status_counts(self) -> Dict[str, int]:
+        """Number of medications per stock status"""
+        size = self._size
+        counts = np.bincount(self._status[:size][self._alive[:size]], minlength=len(STATUS_CODES))
+        return {status: int(counts[code]) for code, status in enumerate(STATUS_CODES)}
+
+    def unit_totals(self) -> Dict[str, int]:
+        """Total quantity on hand per unit"""
+        size = self._size
+        alive = self._alive[:size]
+        units = self._unit[:size][alive]
+        counts = np.bincount(units, minlength=len(self._units))
+        totals = np.bincount(units, weights=self._quantity[:size][alive], minlength=len(self._units))
+        return {unit: int(totals[code]) for code, unit in enumerate(self._units) if counts[code]}
+
+    def reorder_quantities(self, target_multiple: float = 2.0) -> List[Tuple[str, int]]:
+        """
+        Order quantities for rows at or below their reorder level: enough to bring
+        each back up to target_multiple times its reorder level
+
+        Returns:
+            (medication name, quantity to order) in status then name order
+        """
+        size = self._size
+        mask = self.mask(below_reorder=True)
+        target = np.ceil(self._reorder_level[:size].astype(np.float64) * target_multiple).astype(np.int64)
+        shortfall = target - np.maximum(self._quantity[:size], 0)
+        mask &= shortfall > 0
+        quantities = dict(zip(
+            (self._names[row] for row in np.flatnonzero(mask)),
+            shortfall[mask].tolist()
+        ))
+        return [(med_name, quantities[med_name]) for med_name in self.names(mask)]
@@ -0,0 +1,173 @@
+"""
+Medication Name Index
+Lookup structures over inventory medication names: a lowercase exact map,
+a prefix trie and an n-gram index for substring and fuzzy matching
+"""
+from typing import Dict, Iterable, List, Optional, Set
+from collections import Counter
+
+# Marker key for trie nodes that terminate a medication name
+_TERMINAL = "\0"
+
+# Substring lookups use n-grams up to this length
+NGRAM_SIZE = 3
+
+def _ngrams(text: str, size: int) -> Set[str]:
+    return {text[i:i + size] for i in range(len(text) - size + 1)}
+
+class MedicationNameIndex:
+    def __init__(self):
+        """
+        Create an empty index. Keys are the inventory keys (medication names);
+        all matching is case-insensitive.
+        """
+        self.clear()
+
+    def clear(self):
+        """Drop every indexed name"""
+        self._lower: Dict[str, str] = {}           # key -> lowercase name
+        self._order: Dict[str, int] = {}           # key -> insertion sequence
+        self._exact: Dict[str, List[str]] = {}     # lowercase name -> keys in insertion order
+        self._grams: Dict[str, Set[str]] = {}      # 1..3-gram -> keys containing it
+        self._trie: Dict = {}
+        self._next_sequence = 0
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._order
+
+    def rebuild(self, keys: Iterable[str]):
+        """Rebuild the index from scratch, preserving the iteration order of keys"""
+        self.clear()
+        for key in keys:
+            self.add(key)
+
+    def add(self, key: str):
+        """Index a medication name (no-op if already indexed)"""
+        if key in self._order:
+            return
+        lower = key.lower().strip()
+        self._lower[key] = lower
+        self._order[key] = self._next_sequence
+        self._next_sequence += 1
+        self._exact.setdefault(lower, []).append(key)
+
+        for size in range(1, NGRAM_SIZE + 1):
+            for gram in _ngrams(lower, size):
+                self._grams.setdefault(gram, set()).add(key)
+
+        node = self._trie
+        for char in lower:
+            node = node.setdefault(char, {})
+        node.setdefault(_TERMINAL, []).append(key)
+
+    def remove(self, key: str):
+        """Remove a medication name from the index"""
+        if key not in self._order:
+            return
+        lower = self._lower.pop(key)
+        del self._order[key]
+
+        same_name = self._exact[lower]
+        same_name.remove(key)
+        if not same_name:
+            del self._exact[lower]
+
+        for size in range(1, NGRAM_SIZE + 1):
+            for gram in _ngrams(lower, size):
+                posting = self._grams[gram]
+                posting.discard(key)
+                if not posting:
+                    del self._grams[gram]
+
+        # Walk down the trie, then prune nodes that no longer lead anywhere
+        path = [self._trie]
+        for char in lower:
+            path.append(path[-1][char])
+        path[-1][_TERMINAL].remove(key)
+        if not path[-1][_TERMINAL]:
+            del path[-1][_TERMINAL]
+        for depth in range(len(lower), 0, -1):
+            if path[depth]:
+                break
+            del path[depth - 1][lower[depth - 1]]
+
+    def exact(self, term: str) -> Optional[str]:
+        """Return the first key whose name equals term (case-insensitive)"""
+        keys = self._exact.get(term.lower().strip())
+        return keys[0] if keys else None
+
+    def _candidates_containing(self, term_lower: str) -> List[str]:
+        """Unordered keys whose name contains term_lower (non-empty)"""
+        if len(term_lower) <= NGRAM_SIZE:
+            # Short terms are n-grams themselves, so the posting is exact
+            return list(self._grams.get(term_lower, ()))
+
+        # Intersect trigram postings smallest-first, then verify the full substring
+        postings = sorted(
+            (self._grams.get(gram, set()) for gram in _ngrams(term_lower, NGRAM_SIZE)),
+            key=len
+        )
+        candidates = postings[0].intersection(*postings[1:]) if postings[0] else set()
+        return [key for key in candidates if term_lower in self._lower[key]]
+
+    def containing(self, term: str) -> List[str]:
+        """Return keys whose name contains term, in insertion order"""
+        term_lower = term.lower().strip()
+        if not term_lower:
+            return sorted(self._order, key=self._order.__getitem__)
+        return sorted(self._candidates_containing(term_lower), key=self._order.__getitem__)
+
+    def first_containing(self, term: str) -> Optional[str]:
+        """Return the earliest-inserted key whose name contains term"""
+        term_lower = term.lower().strip()
+        if not term_lower:
+            return None
+        return min(self._candidates_containing(term_lower), key=self._order.__getitem__, default=None)
+
+    def first_contained_in(self, term: str, min_length: int = 4) -> Optional[str]:
+        """
+        Return the earliest-inserted key whose name (at least min_length characters)
+        appears inside term. Walks the trie from each position of term, so a probe
+        costs at most the longest indexed name per position.
+        """
+        term_lower = term.lower().strip()
+        best_key = None
+        for start in range(len(term_lower)):
+            node = self._trie
+            for end in range(start, len(term_lower)):
+                node = node.get(term_lower[end])
+                if node is None:
+                    break
+                keys = node.get(_TERMINAL)
+                if keys and end + 1 - start >= min_length and (best_key is None or self._order[keys[0]] < self._order[best_key]):
+                    best_key = keys[0]
+        return best_key
+
+    def prefix(self, prefix: str, limit: int = 10) -> List[str]:
+        """Return up to limit keys whose name starts with prefix, alphabetically"""
+        node = self._trie
+        for char in prefix.lower().strip():
+            node = node.get(char)
+            if node is None:
+                return []
+
+        results = []
+        stack = [node]
+        while stack and len(results) < limit:
+            current = stack.pop()
+            results.extend(current.get(_TERMINAL, []))
+            # Push children in reverse so the smallest character is visited first
+            stack.extend(current[char] for char in sorted(current, reverse=True) if char != _TERMINAL)
+        return results[:limit]
+
+    def similar(self, term: str, limit: int = 8) -> List[str]:
+        """Return up to limit keys ranked by the number of trigrams shared with term"""
+        term_lower = term.lower().strip()
+        scores = Counter()
+        for gram in _ngrams(term_lower, NGRAM_SIZE):
+            scores.update(self._grams.get(gram, ()))
+        ranked = sorted(scores, key=lambda key: (-scores[key], self._order[key]))
+        return ranked[:limit]
@@ -1,10 +1,20 @@
 """
 Pharmacy Inventory Service
-Manages medication inventory and stock status
+Manages medication inventory and stock status, partitioned by pharmacy site
 """
-from typing import Dict, List, Optional
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
 from datetime import datetime
+from bisect import bisect_left, bisect_right, insort
+import base64
+import heapq
+import json
+import math
 import random
+import threading
+
+from backend.app.services.inventory_index import MedicationNameIndex
+from backend.app.services.inventory_columns import InventoryColumns, NUMPY_AVAILABLE
+from backend.app.config import DEFAULT_PHARMACY_SITE_ID
 
 # Sample inventory data
 # In production, this would come from a database
@@ -173,16 +183,348 @@ MEDICATION_INVENTORY = {
     }
 }
 
-def check_medication_stock(medication_name: str) -> Optional[Dict]:
+for _med_data in MEDICATION_INVENTORY.values():
+    _med_data["version"] = 1
+
+# Inventory listings are ordered by status (out_of_stock first, then low_stock,
+# then in_stock) and then by name. Each status keeps a name-sorted view that the
+# write functions below update incrementally, so listings never re-sort.
+STATUS_ORDER = ["out_of_stock", "low_stock", "in_stock"]
+_STATUS_RANK = {status: rank for rank, status in enumerate(STATUS_ORDER)}
+
+def _view_for(status: Optional[str]) -> str:
+    # Unknown statuses sort with in_stock, as the original listing did
+    return status if status in _STATUS_RANK else "in_stock"
+
+class InventorySite:
+    def __init__(
+        self,
+        site_id: str,
+        inventory: Optional[Dict[str, Dict]] = None,
+        name: Optional[str] = None,
+        latitude: Optional[float] = None,
+        longitude: Optional[float] = None
+    ):
+        """
+        One pharmacy's inventory partition: its records plus the name index,
+        status views and columns derived from them. Writes to a site only touch
+        that site's structures.
+        """
+        self.site_id = site_id
+        self.name = name or site_id
+        self.latitude = latitude
+        self.longitude = longitude
+        self.inventory: Dict[str, Dict] = inventory if inventory is not None else {}
+        self.name_index = MedicationNameIndex()
+        self.status_views: Dict[str, List[str]] = {status: [] for status in STATUS_ORDER}
+        self.view_status: Dict[str, str] = {}  # medication name -> view it is filed under
+        # Columnar mirror for vectorized filters and aggregates; None without numpy,
+        # in which case those scan the records instead
+        self.columns: Optional[InventoryColumns] = InventoryColumns() if NUMPY_AVAILABLE else None
+        self.listeners: List[Callable[[str], None]] = []
+        # Guards the derived structures, which writes to different medications share
+        self.lock = threading.RLock()
+        self.rebuild()
+
+    def rebuild(self):
+        """Rebuild every derived structure from the records"""
+        with self.lock:
+            self.name_index.rebuild(self.inventory)
+            for view in self.status_views.values():
+                view.clear()
+            self.view_status.clear()
+            for med_name, med_data in self.inventory.items():
+                status = _view_for(med_data.get("status"))
+                self.status_views[status].append(med_name)
+                self.view_status[med_name] = status
+            for view in self.status_views.values():
+                view.sort()
+            if self.columns is not None:
+                self.columns.rebuild(self.inventory)
+
+    def unfile(self, med_name: str):
+        """Drop a medication from the derived structures"""
+        self.name_index.remove(med_name)
+        if self.columns is not None:
+            self.columns.remove(med_name)
+        status = self.view_status.pop(med_name, None)
+        if status is None:
+            return
+        view = self.status_views[status]
+        position = bisect_left(view, med_name)
+        if position < len(view) and view[position] == med_name:
+            del view[position]
+
+    def refile(self, med_name: str):
+        """Bring the derived structures up to date with a medication's record"""
+        record = self.inventory[med_name]
+        self.name_index.add(med_name)
+        if self.columns is not None:
+            self.columns.set(med_name, record)
+        status = _view_for(record.get("status"))
+        if self.view_status.get(med_name) == status:
+            return
+        previous = self.view_status.pop(med_name, None)
+        if previous is not None:
+            view = self.status_views[previous]
+            position = bisect_left(view, med_name)
+            if position < len(view) and view[position] == med_name:
+                del view[position]
+        insort(self.status_views[status], med_name)
+        self.view_status[med_name] = status
+
+    def notify(self, med_name: str):
+        for listener in self.listeners:
+            listener(med_name)
+
+    def resolve_name(self, term: str) -> Optional[str]:
+        """
+        Inventory key for a search term: exact match (case-insensitive), then the
+        term contained in a medication name, then a substantial medication name
+        contained in the term
+        """
+        return (
+            self.name_index.exact(term)
+            or self.name_index.first_containing(term)
+            or self.name_index.first_contained_in(term, min_length=4)
+        )
+
+    def describe(self) -> Dict:
+        return {
+            "site_id": self.site_id,
+            "name": self.name,
+            "latitude": self.latitude,
+            "longitude": self.longitude,
+            "medication_count": len(self.inventory)
+        }
+
+class UnknownSiteError(LookupError):
+    """Raised when a site ID is not registered"""
+
+class StockVersionConflictError(ValueError):
+    """Raised when a compare-and-swap write sees a newer version than expected"""
+
+class InsufficientStockError(ValueError):
+    """Raised when a stock change would take the quantity below zero"""
+
+# Site partitions by site ID. The default site holds MEDICATION_INVENTORY itself.
+DEFAULT_SITE_ID = DEFAULT_PHARMACY_SITE_ID
+_SITES: Dict[str, InventorySite] = {
+    DEFAULT_SITE_ID: InventorySite(DEFAULT_SITE_ID, MEDICATION_INVENTORY, name="Main Pharmacy")
+}
+_SITES_LOCK = threading.Lock()
+_SITE_LISTENERS: List[Callable[[str], None]] = []
+
+def get_site(site_id: str = DEFAULT_SITE_ID) -> InventorySite:
+    """
+    Get a site partition
+
+    Raises:
+        UnknownSiteError: If the site is not registered
+    """
+    site = _SITES.get(site_id)
+    if site is None:
+        raise UnknownSiteError(f"Pharmacy site '{site_id}' not found")
+    return site
+
+def list_sites() -> List[Dict]:
+    """Describe every registered site"""
+    return [site.describe() for site in list(_SITES.values())]
+
+# Writes to one medication are serialized by its lock stripe, so quantity checks and
+# updates are atomic per medication without a global lock. Each site's derived
+# structures and listeners are shared by its medications and take the site lock briefly.
+_LOCK_STRIPES = 64
+_STOCK_LOCKS = [threading.RLock() for _ in range(_LOCK_STRIPES)]
+
+def stock_lock(med_name: str, site_id: str = DEFAULT_SITE_ID) -> threading.RLock:
+    """Lock stripe guarding writes to one medication's stock at one site"""
+    return _STOCK_LOCKS[hash((site_id, med_name)) % _LOCK_STRIPES]
+
+def register_inventory_listener(listener: Callable[[str], None], site_id: str = DEFAULT_SITE_ID):
+    """Register a callback invoked with the medication name whenever its record at the site changes"""
+    get_site(site_id).listeners.append(listener)
+
+def register_site_listener(listener: Callable[[str], None]):
+    """
+    Register a callback invoked with the site ID of every site: once now for each
+    registered site, then for each site registered later
+    """
+    with _SITES_LOCK:
+        _SITE_LISTENERS.append(listener)
+        site_ids = list(_SITES)
+    for site_id in site_ids:
+        listener(site_id)
+
+def compute_stock_status(stock_quantity: int, reorder_level: int) -> str:
+    """Derive the stock status from quantity and reorder level"""
+    if stock_quantity <= 0:
+        return "out_of_stock"
+    if stock_quantity <= reorder_level:
+        return "low_stock"
+    return "in_stock"
+
+def _new_record(med_data: Dict, version: int) -> Dict:
+    return {
+        **med_data,
+        "status": compute_stock_status(med_data.get("stock_quantity", 0), med_data.get("reorder_level", 0)),
+        "version": version,
+        "last_updated": datetime.now().isoformat()
+    }
+
+def register_site(
+    site_id: str,
+    name: Optional[str] = None,
+    latitude: Optional[float] = None,
+    longitude: Optional[float] = None,
+    inventory: Optional[List[Dict]] = None
+) -> Dict:
+    """
+    Register a pharmacy site, optionally bulk-loading its inventory
+
+    Args:
+        site_id: Unique site identifier
+        name: Display name
+        latitude: Site latitude, used to rank cross-site results by distance
+        longitude: Site longitude
+        inventory: Medication records; each must include "name"
+
+    Returns:
+        Description of the new site
+
+    Raises:
+        ValueError: If the site ID is already registered
+    """
+    records = {med_data["name"]: _new_record(med_data, 1) for med_data in inventory or []}
+    # Built outside the registry lock: indexing a large inventory takes a while
+    site = InventorySite(site_id, records, name=name, latitude=latitude, longitude=longitude)
+    with _SITES_LOCK:
+        if site_id in _SITES:
+            raise ValueError(f"Pharmacy site '{site_id}' already exists")
+        _SITES[site_id] = site
+        site_listeners = list(_SITE_LISTENERS)
+    for listener in site_listeners:
+        listener(site_id)
+    return site.describe()
+
+def upsert_medication(med_data: Dict, site_id: str = DEFAULT_SITE_ID) -> Dict:
+    """
+    Add a medication to the inventory or replace an existing entry
+    
+    Args:
+        med_data: Medication record; must include "name"
+        site_id: Pharmacy site
+        
+    Returns:
+        The stored medication record
+    """
+    site = get_site(site_id)
+    med_name = med_data["name"]
+    with stock_lock(med_name, site_id):
+        previous = site.inventory.get(med_name)
+        record = _new_record(med_data, (previous.get("version", 0) if previous else 0) + 1)
+        site.inventory[med_name] = record
+        with site.lock:
+            site.refile(med_name)
+            site.notify(med_name)
+    return record
+
+def remove_medication(medication_name: str, site_id: str = DEFAULT_SITE_ID) -> bool:
+    """
+    Remove a medication from the inventory
+    
+    Returns:
+        True if the medication existed
+    """
+    site = get_site(site_id)
+    with stock_lock(medication_name, site_id):
+        if medication_name not in site.inventory:
+            return False
+        del site.inventory[medication_name]
+        with site.lock:
+            site.unfile(medication_name)
+            site.notify(medication_name)
+    return True
+
+def _write_stock_quantity(site: InventorySite, med_name: str, med_data: Dict, stock_quantity: int) -> Dict:
+    """Store a new quantity; the caller holds the medication's stock lock"""
+    med_data["stock_quantity"] = stock_quantity
+    med_data["status"] = compute_stock_status(stock_quantity, med_data.get("reorder_level", 0))
+    med_data["version"] = med_data.get("version", 0) + 1
+    med_data["last_updated"] = datetime.now().isoformat()
+    with site.lock:
+        # Moves the medication between status views only when its status changed
+        site.refile(med_name)
+        site.notify(med_name)
+    return med_data
+
+def update_stock_quantity(
+    medication_name: str,
+    stock_quantity: int,
+    expected_version: Optional[int] = None,
+    site_id: str = DEFAULT_SITE_ID
+) -> Optional[Dict]:
+    """
+    Set the stock quantity of a medication and recompute its status
+    
+    Args:
+        medication_name: Inventory name of the medication
+        stock_quantity: New quantity on hand
+        expected_version: If given, only write when the record is still at this
+            version (compare-and-swap)
+        site_id: Pharmacy site
+        
+    Returns:
+        The updated medication record or None if not found
+    
+    Raises:
+        StockVersionConflictError: If the record changed since expected_version
+    """
+    site = get_site(site_id)
+    with stock_lock(medication_name, site_id):
+        med_data = site.inventory.get(medication_name)
+        if med_data is None:
+            return None
+        if expected_version is not None and med_data.get("version", 0) != expected_version:
+            raise StockVersionConflictError(
+                f"{medication_name} is at version {med_data.get('version', 0)}, expected {expected_version}"
+            )
+        return _write_stock_quantity(site, medication_name, med_data, stock_quantity)
+
+def adjust_stock_quantity(medication_name: str, delta: int, site_id: str = DEFAULT_SITE_ID) -> Optional[Dict]:
+    """
+    Atomically add delta (negative to dispense) to a medication's stock quantity
+    
+    Returns:
+        The updated medication record or None if not found
+    
+    Raises:
+        InsufficientStockError: If the quantity would drop below zero
+    """
+    site = get_site(site_id)
+    with stock_lock(medication_name, site_id):
+        med_data = site.inventory.get(medication_name)
+        if med_data is None:
+            return None
+        stock_quantity = med_data.get("stock_quantity", 0) + delta
+        if stock_quantity < 0:
+            raise InsufficientStockError(
+                f"Only {med_data.get('stock_quantity', 0)} {med_data.get('unit', 'units')} of {medication_name} on hand"
+            )
+        return _write_stock_quantity(site, medication_name, med_data, stock_quantity)
+
+def check_medication_stock(medication_name: str, site_id: str = DEFAULT_SITE_ID) -> Optional[Dict]:
     """
     Check if a medication is in stock
     
     Args:
         medication_name: Name of the medication to check
+        site_id: Pharmacy site
         
     Returns:
         Dictionary with stock information or None if not found
     """
+    site = get_site(site_id)
     if not medication_name or not medication_name.strip():
         return {
             "name": medication_name or "",
@@ -192,42 +534,16 @@ def check_medication_stock(medication_name: str) -> Optional[Dict]:
             "search_term": medication_name or ""
         }
     
-    medication_name_lower = medication_name.lower().strip()
-    
-    # Direct exact match (case-insensitive)
-    for med_name, med_data in MEDICATION_INVENTORY.items():
-        if med_name.lower() == medication_name_lower:
-            return {
-                **med_data,
-                "found": True,
-                "search_term": medication_name
-            }
-    
-    # Partial match - check if search term is contained in medication name
-    for med_name, med_data in MEDICATION_INVENTORY.items():
-        med_name_lower = med_name.lower()
-        if medication_name_lower in med_name_lower:
-            return {
-                **med_data,
-                "found": True,
-                "search_term": medication_name
-            }
-    
-    # Reverse partial match - check if medication name is contained in search term
-    for med_name, med_data in MEDICATION_INVENTORY.items():
-        med_name_lower = med_name.lower()
-        if med_name_lower in medication_name_lower and len(med_name_lower) >= 4:  # Only if medication name is substantial
-            return {
-                **med_data,
-                "found": True,
-                "search_term": medication_name
-            }
-    
-    # Not found - return helpful message with available medications
-    # Get all medication names as suggestions
-    all_medications = list(MEDICATION_INVENTORY.keys())
-    # Show first 8 as suggestions
-    available_meds = all_medications[:8]
+    med_name = site.resolve_name(medication_name)
+    if med_name is not None:
+        return {
+            **site.inventory[med_name],
+            "found": True,
+            "search_term": medication_name
+        }
+    
+    # Not found - suggest the closest names by shared trigrams, or the first few on file
+    suggestions = site.name_index.similar(medication_name, limit=8) or list(site.inventory.keys())[:8]
     
     return {
         "name": medication_name,
@@ -235,56 +551,360 @@ def check_medication_stock(medication_name: str) -> Optional[Dict]:
         "status": "not_found",
         "message": f"Medication '{medication_name}' not found in inventory.",
         "search_term": medication_name,
-        "suggestions": available_meds,
-        "total_available": len(all_medications)
+        "suggestions": suggestions,
+        "total_available": len(site.inventory)
     }
 
-def get_all_inventory() -> List[Dict]:
+def suggest_medications(prefix: str, limit: int = 10, site_id: str = DEFAULT_SITE_ID) -> List[str]:
     """
-    Get all medication inventory
+    Autocomplete medication names by prefix
     
+    Args:
+        prefix: Leading characters of the medication name
+        limit: Maximum number of names to return
+        site_id: Pharmacy site
+        
     Returns:
-        List of all medications with stock information
+        Matching medication names in alphabetical order
+    """
+    site = get_site(site_id)
+    if not prefix or not prefix.strip():
+        return []
+    return site.name_index.prefix(prefix, limit=limit)
+
+def iter_inventory(statuses: Optional[List[str]] = None, site_id: str = DEFAULT_SITE_ID) -> Iterator[Dict]:
+    """
+    Iterate inventory records in listing order without copying them
+    
+    Args:
+        statuses: Optional subset of STATUS_ORDER to include
+        site_id: Pharmacy site
+        
+    Yields:
+        Medication records, ordered by status then name
+    """
+    site = get_site(site_id)
+    for status in STATUS_ORDER:
+        if statuses is None or status in statuses:
+            for med_name in site.status_views[status]:
+                yield site.inventory[med_name]
+
+def count_inventory(status: Optional[str] = None, site_id: str = DEFAULT_SITE_ID) -> int:
+    """Number of medications, optionally only those with the given status"""
+    site = get_site(site_id)
+    if status:
+        return len(site.status_views.get(status, []))
+    return len(site.view_status)
+
+def encode_inventory_cursor(status: str, med_name: str) -> str:
+    """Opaque cursor pointing just after med_name in the given status view"""
+    raw = json.dumps([status, med_name]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+def decode_inventory_cursor(cursor: str) -> Tuple[str, str]:
+    """
+    Decode a cursor produced by encode_inventory_cursor
+    
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        status, med_name = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except Exception:
+        raise ValueError("Invalid inventory cursor")
+    if status not in _STATUS_RANK or not isinstance(med_name, str):
+        raise ValueError("Invalid inventory cursor")
+    return status, med_name
+
+def get_inventory_page(
+    search: Optional[str] = None,
+    status: Optional[str] = None,
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    site_id: str = DEFAULT_SITE_ID,
+    below_reorder: bool = False,
+    unit: Optional[str] = None
+) -> Dict:
+    """
+    Get one page of inventory in listing order
+    
+    Args:
+        search: Optional search term to match against medication names
+        status: Optional stock status filter (out_of_stock, low_stock, in_stock)
+        limit: Maximum number of medications to return
+        cursor: Cursor returned with the previous page
+        site_id: Pharmacy site
+        below_reorder: Only medications at or below their reorder level
+        unit: Optional unit filter, e.g. "tablets"
+        
+    Returns:
+        Dictionary with the page of medications and the cursor for the next page
+        (None when there are no more results)
+    
+    Raises:
+        ValueError: If the cursor is malformed
     """
-    inventory_list = []
-    for med_name, med_data in MEDICATION_INVENTORY.items():
-        inventory_list.append({
-            **med_data,
-            "found": True
-        })
+    site = get_site(site_id)
+    statuses = [status] if status else STATUS_ORDER
+    after = decode_inventory_cursor(cursor) if cursor else None
+    after_key = (_STATUS_RANK[after[0]], after[1]) if after else None
+    
+    def matches(med_name: str) -> bool:
+        med_data = site.inventory[med_name]
+        if below_reorder and med_data.get("stock_quantity", 0) > med_data.get("reorder_level", 0):
+            return False
+        return unit is None or med_data.get("unit") == unit
+    filtered = below_reorder or unit is not None
+    
+    # Collect one row past the page to learn whether another page exists
+    page_names: List[str] = []
+    if search and search.strip():
+        # Matches are few compared to the formulary; order just those
+        matches = sorted(
+            (_STATUS_RANK[site.view_status[name]], name)
+            for name in site.name_index.containing(search)
+            if site.view_status[name] in statuses and (not filtered or matches(name))
+        )
+        start = bisect_right(matches, after_key) if after_key else 0
+        page_names = [name for _, name in matches[start:start + limit + 1]]
+    else:
+        for view_status in STATUS_ORDER:
+            rank = _STATUS_RANK[view_status]
+            if view_status not in statuses or (after_key and rank < after_key[0]):
+                continue
+            view = site.status_views[view_status]
+            start = bisect_right(view, after_key[1]) if after_key and rank == after_key[0] else 0
+            if filtered:
+                # Walk the view from the cursor, stopping once the page is full
+                for position in range(start, len(view)):
+                    if matches(view[position]):
+                        page_names.append(view[position])
+                        if len(page_names) > limit:
+                            break
+            else:
+                page_names.extend(view[start:start + limit + 1 - len(page_names)])
+            if len(page_names) > limit:
+                break
+    
+    has_more = len(page_names) > limit
+    page_names = page_names[:limit]
+    
+    next_cursor = None
+    if has_more and page_names:
+        last_name = page_names[-1]
+        next_cursor = encode_inventory_cursor(site.view_status[last_name], last_name)
     
-    # Sort by status (out_of_stock first, then low_stock, then in_stock)
-    status_order = {"out_of_stock": 0, "low_stock": 1, "in_stock": 2}
-    inventory_list.sort(key=lambda x: (status_order.get(x.get("status", "in_stock"), 2), x["name"]))
+    return {
+        "inventory": [{**site.inventory[name], "found": True} for name in page_names],
+        "next_cursor": next_cursor
+    }
+
+def get_all_inventory(site_id: str = DEFAULT_SITE_ID) -> List[Dict]:
+    """
+    Get all medication inventory
     
-    return inventory_list
+    Args:
+        site_id: Pharmacy site
+        
+    Returns:
+        List of all medications with stock information
+    """
+    # Served from the status views, already ordered by status then name
+    return [{**med_data, "found": True} for med_data in iter_inventory(site_id=site_id)]
 
-def search_inventory(search_term: str) -> List[Dict]:
+def search_inventory(search_term: str, site_id: str = DEFAULT_SITE_ID) -> List[Dict]:
     """
     Search inventory by medication name
     
     Args:
         search_term: Search term to match against medication names
+        site_id: Pharmacy site
         
     Returns:
         List of matching medications
     """
     if not search_term or not search_term.strip():
-        return get_all_inventory()
+        return get_all_inventory(site_id)
+    
+    # Order the matches by status then name
+    site = get_site(site_id)
+    matches = sorted(
+        (_STATUS_RANK[site.view_status[med_name]], med_name)
+        for med_name in site.name_index.containing(search_term)
+    )
+    
+    return [{**site.inventory[med_name], "found": True} for _, med_name in matches]
+
+def _filtered_names(site: InventorySite, status: Optional[str], below_reorder: bool, unit: Optional[str]) -> List[str]:
+    """Medication names matching the filters, in listing order"""
+    if site.columns is not None:
+        return site.columns.names(site.columns.mask(status=status, below_reorder=below_reorder, unit=unit))
+    return [
+        med_data["name"] for med_data in iter_inventory([status] if status else None, site.site_id)
+        if (not below_reorder or med_data.get("stock_quantity", 0) <= med_data.get("reorder_level", 0))
+        and (unit is None or med_data.get("unit") == unit)
+    ]
+
+def filter_inventory(
+    search: Optional[str] = None,
+    status: Optional[str] = None,
+    below_reorder: bool = False,
+    unit: Optional[str] = None,
+    site_id: str = DEFAULT_SITE_ID
+) -> List[Dict]:
+    """
+    Filter inventory by stock status, reorder level and unit
+    
+    Args:
+        search: Optional search term to match against medication names
+        status: Optional stock status (out_of_stock, low_stock, in_stock)
+        below_reorder: Only medications at or below their reorder level
+        unit: Optional unit, e.g. "tablets"
+        site_id: Pharmacy site
+        
+    Returns:
+        Matching medications, ordered by status then name
+    """
+    site = get_site(site_id)
+    names = _filtered_names(site, status, below_reorder, unit)
+    if search and search.strip():
+        matches = set(site.name_index.containing(search))
+        names = [med_name for med_name in names if med_name in matches]
+    return [{**site.inventory[med_name], "found": True} for med_name in names]
+
+def get_reorder_list(target_multiple: float = 2.0, site_id: str = DEFAULT_SITE_ID) -> List[Dict]:
+    """
+    Medications at or below their reorder level, with the quantity to order to
+    bring each back up to target_multiple times its reorder level
     
-    search_term_lower = search_term.lower().strip()
-    results = []
+    Returns:
+        Reorder lines ordered by status (out_of_stock first) then name
+    """
+    site = get_site(site_id)
+    if site.columns is not None:
+        lines = site.columns.reorder_quantities(target_multiple)
+    else:
+        lines = []
+        for med_name in _filtered_names(site, None, True, None):
+            med_data = site.inventory[med_name]
+            shortfall = math.ceil(med_data.get("reorder_level", 0) * target_multiple) - max(med_data.get("stock_quantity", 0), 0)
+            if shortfall > 0:
+                lines.append((med_name, shortfall))
     
-    for med_name, med_data in MEDICATION_INVENTORY.items():
-        if search_term_lower in med_name.lower():
-            results.append({
-                **med_data,
-                "found": True
-            })
+    return [
+        {
+            "name": med_name,
+            "dosage": site.inventory[med_name].get("dosage"),
+            "unit": site.inventory[med_name].get("unit"),
+            "status": site.inventory[med_name].get("status"),
+            "stock_quantity": site.inventory[med_name].get("stock_quantity", 0),
+            "reorder_level": site.inventory[med_name].get("reorder_level", 0),
+            "reorder_quantity": quantity
+        }
+        for med_name, quantity in lines
+    ]
+
+def get_inventory_summary(site_id: str = DEFAULT_SITE_ID) -> Dict:
+    """
+    Aggregate inventory figures of one site
     
-    # Sort by status
-    status_order = {"out_of_stock": 0, "low_stock": 1, "in_stock": 2}
-    results.sort(key=lambda x: (status_order.get(x.get("status", "in_stock"), 2), x["name"]))
+    Returns:
+        Medication counts per status, units on hand per unit, and the number of
+        medications at or below their reorder level
+    """
+    site = get_site(site_id)
+    if site.columns is not None:
+        return {
+            "total_medications": len(site.columns),
+            "counts_by_status": site.columns.status_counts(),
+            "units_on_hand": site.columns.unit_totals(),
+            "below_reorder_level": int(site.columns.mask(below_reorder=True).sum())
+        }
     
-    return results
+    units_on_hand: Dict[str, int] = {}
+    below_reorder_level = 0
+    for med_data in site.inventory.values():
+        unit = med_data.get("unit") or ""
+        units_on_hand[unit] = units_on_hand.get(unit, 0) + med_data.get("stock_quantity", 0)
+        if med_data.get("stock_quantity", 0) <= med_data.get("reorder_level", 0):
+            below_reorder_level += 1
+    return {
+        "total_medications": len(site.inventory),
+        "counts_by_status": {status: count_inventory(status, site_id) for status in STATUS_ORDER},
+        "units_on_hand": units_on_hand,
+        "below_reorder_level": below_reorder_level
+    }
+
+def _distance_km(latitude1: float, longitude1: float, latitude2: float, longitude2: float) -> float:
+    """Great-circle distance (haversine)"""
+    phi1, phi2 = math.radians(latitude1), math.radians(latitude2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(longitude2 - longitude1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 6371.0 * 2 * math.asin(math.sqrt(a))
 
+def find_stock_across_sites(
+    medication_name: str,
+    quantity: int = 1,
+    latitude: Optional[float] = None,
+    longitude: Optional[float] = None,
+    limit: int = 10
+) -> List[Dict]:
+    """
+    Find the sites that have a medication available
+    
+    Stock held by active reservations is not available: sites are filtered and
+    ranked on the quantity on hand minus holds. Each site costs one lookup in its
+    name index (an exact match for names the site stocks) and only the best
+    limit matches are kept.
+    
+    Args:
+        medication_name: Medication to look for (matched as in check_medication_stock)
+        quantity: Minimum quantity available
+        latitude: Optional origin latitude; with longitude, ranks sites by distance
+        longitude: Optional origin longitude
+        limit: Maximum number of sites to return
+        
+    Returns:
+        Matching sites, nearest first when an origin is given, otherwise most
+        available stock first
+    """
+    # stock_reservations imports this module, so its holds are looked up late
+    from backend.app.services.stock_reservations import get_held_quantity
+    
+    if not medication_name or not medication_name.strip():
+        return []
+    origin = (latitude, longitude) if latitude is not None and longitude is not None else None
+    
+    matches = []
+    for site in list(_SITES.values()):
+        med_name = site.resolve_name(medication_name)
+        med_data = site.inventory.get(med_name) if med_name is not None else None
+        if med_data is None:
+            continue
+        stock_quantity = med_data.get("stock_quantity", 0)
+        available = stock_quantity - get_held_quantity(med_name, site.site_id)
+        if available <= 0 or available < quantity:
+            continue
+        
+        distance = None
+        if origin is not None and site.latitude is not None and site.longitude is not None:
+            distance = round(_distance_km(origin[0], origin[1], site.latitude, site.longitude), 2)
+        # Nearest first (sites without coordinates last) when an origin is given,
+        # otherwise most available stock first; ties break on site ID
+        if origin is not None:
+            key = (distance is None, distance or 0.0, -available, site.site_id)
+        else:
+            key = (-available, site.site_id)
+        matches.append((key, {
+            "site_id": site.site_id,
+            "site_name": site.name,
+            "distance_km": distance,
+            "name": med_name,
+            "dosage": med_data.get("dosage"),
+            "unit": med_data.get("unit"),
+            "status": med_data.get("status"),
+            "stock_quantity": stock_quantity,
+            "available_quantity": available
+        }))
+    return [match for _, match in heapq.nsmallest(limit, matches, key=lambda match: match[0])]
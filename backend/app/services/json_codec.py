@@ -0,0 +1,80 @@
+"""
+JSON Codec
+One JSON encode/decode path for FHIR payloads and API responses: orjson when it
+is installed, the standard library otherwise. Both produce compact UTF-8 JSON.
+"""
+from typing import Any, Callable, Optional, Union
+from datetime import date, datetime, time
+from decimal import Decimal
+from enum import Enum
+import json
+
+from fastapi.responses import JSONResponse
+
+# Try to import orjson, fall back to the standard library json module if not installed
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+    orjson = None
+
+def _default(obj: Any) -> Any:
+    """Encode the non-JSON types our services return"""
+    to_dict = getattr(obj, "to_dict", None)  # FHIR records
+    if to_dict is not None:
+        return to_dict()
+    if isinstance(obj, (datetime, date, time)):
+        return obj.isoformat()
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, Enum):
+        return obj.value
+    if isinstance(obj, (set, frozenset, tuple)):
+        return list(obj)
+    model_dump = getattr(obj, "model_dump", None)  # pydantic models
+    if model_dump is not None:
+        return model_dump()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+if ORJSON_AVAILABLE:
+    # Records are dataclasses; pass them to default so optional fields are omitted
+    # like the stdlib path does. Non-str keys are stringified as json.dumps does.
+    _ORJSON_OPTIONS = orjson.OPT_PASSTHROUGH_DATACLASS | orjson.OPT_NON_STR_KEYS
+
+def loads(data: Union[bytes, bytearray, memoryview, str]) -> Any:
+    """
+    Decode a JSON document
+
+    Raises:
+        ValueError: If data is not valid JSON
+    """
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def dumps(obj: Any, default: Optional[Callable[[Any], Any]] = None) -> bytes:
+    """
+    Encode obj as compact UTF-8 JSON
+
+    Args:
+        obj: Value to encode
+        default: Encoder for types JSON does not cover (default handles records,
+            dates, decimals, enums, sets and pydantic models)
+
+    Raises:
+        TypeError: If obj holds a value neither JSON nor default can encode
+    """
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj, default=default or _default, option=_ORJSON_OPTIONS)
+    return json.dumps(
+        obj, default=default or _default, ensure_ascii=False, allow_nan=False, separators=(",", ":")
+    ).encode("utf-8")
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSONResponse rendered with the codec above. Returning one from a route skips
+    FastAPI's response_model validation and jsonable_encoder pass.
+    """
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -0,0 +1,99 @@
+"""
+Lazy Loading
+Deferred imports and run-once initializers, so a worker does not pay for heavy
+modules or seed data until a request needs them
+"""
+from typing import Callable, Dict, List, Optional
+import functools
+import importlib.util
+import sys
+import threading
+import time
+
+def lazy_import(name: str):
+    """
+    Import a module whose code only runs on first attribute access
+
+    Args:
+        name: Absolute module name, e.g. "requests" or "PIL.Image"
+
+    Returns:
+        The module (loaded on first use)
+
+    Raises:
+        ImportError: If the module is not installed
+    """
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    spec = importlib.util.find_spec(name)
+    if spec is None or spec.loader is None:
+        raise ImportError(f"No module named {name!r}", name=name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
+
+# Every LazyInit created, in creation order, for preloading and the startup report
+_INITIALIZERS: List["LazyInit"] = []
+
+class LazyInit:
+    def __init__(self, name: str, initializer: Callable[[], None]):
+        """
+        Run initializer once, on first use, from whichever thread gets there first
+
+        Decorating a function with the instance makes calls to it run the
+        initializer first.
+
+        Args:
+            name: Label for the startup report
+            initializer: Loads the data
+        """
+        self.name = name
+        self.initializer = initializer
+        self.loaded = False
+        self.seconds: Optional[float] = None
+        self._lock = threading.Lock()
+        _INITIALIZERS.append(self)
+
+    def ensure(self) -> bool:
+        """
+        Run the initializer unless it has run
+
+        Returns:
+            True if this call ran it
+        """
+        if self.loaded:
+            return False
+        with self._lock:
+            if self.loaded:
+                return False
+            started = time.perf_counter()
+            self.initializer()
+            self.seconds = time.perf_counter() - started
+            self.loaded = True
+            return True
+
+    def __call__(self, function: Callable) -> Callable:
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not self.loaded:
+                self.ensure()
+            return function(*args, **kwargs)
+        return wrapper
+
+def preload_all() -> List[str]:
+    """Run every pending initializer; returns the names of those it ran"""
+    return [initializer.name for initializer in list(_INITIALIZERS) if initializer.ensure()]
+
+def initializer_status() -> Dict[str, Dict]:
+    """Whether each initializer has run, and how long it took (ms)"""
+    return {
+        initializer.name: {
+            "loaded": initializer.loaded,
+            "ms": round(initializer.seconds * 1000, 1) if initializer.seconds is not None else None
+        }
+        for initializer in _INITIALIZERS
+    }
@@ -2,7 +2,10 @@
 Medication Recommendation Service
 Provides medication recommendations based on diagnosis
 """
-from typing import List, Dict
+from typing import List, Dict, Optional, Set, Tuple
+from collections import deque
+from functools import lru_cache
+import re
 
 # Diagnosis to Medication Mapping
 # In production, this would come from a medical database or API
@@ -209,58 +212,199 @@ DIAGNOSIS_MEDICATIONS = {
     ]
 }
 
+# Common variations, checked in order when no condition name matches
+DIAGNOSIS_SYNONYMS = {
+    "high blood pressure": "hypertension",
+    "blood pressure": "hypertension",
+    "bp": "hypertension",
+    "type 2 diabetes": "diabetes",
+    "diabetes mellitus": "diabetes",
+    "bacterial infection": "infection",
+    "viral infection": "infection",
+    "uti": "infection",
+    "urinary tract infection": "infection",
+    "headache": "pain",
+    "back pain": "pain",
+    "joint pain": "pain",
+    "arthritis": "pain",
+    "copd": "asthma",
+    "chronic obstructive pulmonary disease": "asthma",
+    "hyperlipidemia": "high cholesterol",
+    "cholesterol": "high cholesterol",
+    "gerd": "acid reflux",
+    "gastroesophageal reflux": "acid reflux",
+    "heartburn": "acid reflux",
+    "panic disorder": "anxiety",
+    "seasonal allergies": "allergy",
+    "hay fever": "allergy"
+}
+
+# ICD-10 category codes (matched by prefix, so E11.9 resolves via E11) and SNOMED CT concepts
+DIAGNOSIS_CODES = {
+    "I10": "hypertension",
+    "38341003": "hypertension",
+    "E11": "diabetes",
+    "44054006": "diabetes",
+    "73211009": "diabetes",
+    "N39.0": "infection",
+    "68566005": "infection",
+    "R52": "pain",
+    "R51": "pain",
+    "M54.5": "pain",
+    "22253000": "pain",
+    "25064002": "pain",
+    "J45": "asthma",
+    "J44": "asthma",
+    "195967001": "asthma",
+    "13645005": "asthma",
+    "E78.0": "high cholesterol",
+    "E78.5": "high cholesterol",
+    "55822004": "high cholesterol",
+    "13644009": "high cholesterol",
+    "F32": "depression",
+    "35489007": "depression",
+    "K21": "acid reflux",
+    "235595009": "acid reflux",
+    "F41": "anxiety",
+    "197480006": "anxiety",
+    "371631005": "anxiety",
+    "J30": "allergy",
+    "61582004": "allergy"
+}
+
+# ICD-10 codes (letter, two digits, optional subcategory) or numeric SNOMED CT ids
+_CODE_PATTERN = re.compile(r"\b(?:[A-Z]\d{2}(?:\.\w{1,4})?|\d{6,18})\b")
+
+class _TermAutomaton:
+    """Aho-Corasick automaton reporting every catalog term that occurs in a text in one pass"""
+    
+    def __init__(self, terms: List[Tuple[str, tuple]]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[tuple]] = [[]]
+        for term, label in terms:
+            state = 0
+            for char in term:
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                    self._goto[state][char] = next_state
+                state = next_state
+            self._out[state].append(label)
+        
+        # Breadth-first pass to set failure links and inherit their outputs
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[next_state] = self._goto[fallback].get(char, 0)
+                self._out[next_state] = self._out[next_state] + self._out[self._fail[next_state]]
+    
+    def find(self, text: str) -> Set[tuple]:
+        state = 0
+        found = set()
+        for char in text:
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+            found.update(self._out[state])
+        return found
+
+class _DiagnosisMatcher:
+    """
+    Diagnosis names, synonyms and codes compiled once. Resolves a diagnosis with the
+    same precedence as a linear scan: exact name, code, a name occurring in the
+    diagnosis (or the diagnosis occurring in a name), then a synonym; earlier catalog
+    entries win ties.
+    """
+    
+    def __init__(self):
+        self.conditions = list(DIAGNOSIS_MEDICATIONS.keys())
+        self.synonyms = list(DIAGNOSIS_SYNONYMS.items())
+        self.automaton = _TermAutomaton(
+            [(key, ("condition", rank)) for rank, key in enumerate(self.conditions)]
+            + [(term, ("synonym", rank)) for rank, (term, _) in enumerate(self.synonyms)]
+        )
+        
+        # Every substring of a condition name -> earliest condition containing it
+        self.condition_substrings: Dict[str, int] = {}
+        for rank, key in enumerate(self.conditions):
+            for start in range(len(key)):
+                for end in range(start + 1, len(key) + 1):
+                    self.condition_substrings.setdefault(key[start:end], rank)
+        
+        self.codes = {code.upper().replace(".", ""): condition for code, condition in DIAGNOSIS_CODES.items()}
+    
+    def _match_code(self, diagnosis: str) -> Optional[str]:
+        for code in _CODE_PATTERN.findall(diagnosis.upper()):
+            code = code.replace(".", "")
+            if not code[0].isalpha():
+                # SNOMED CT ids are opaque numbers: only an exact match counts
+                condition = self.codes.get(code)
+                if condition:
+                    return condition
+                continue
+            # Walk up the ICD-10 hierarchy: E119 -> E11
+            for length in range(len(code), 2, -1):
+                condition = self.codes.get(code[:length])
+                if condition:
+                    return condition
+        return None
+    
+    def match(self, diagnosis_lower: str) -> Optional[str]:
+        """Return the catalog condition for a normalized diagnosis, or None"""
+        if diagnosis_lower in DIAGNOSIS_MEDICATIONS:
+            return diagnosis_lower
+        
+        condition = self._match_code(diagnosis_lower)
+        if condition:
+            return condition
+        
+        found = self.automaton.find(diagnosis_lower)
+        condition_ranks = [rank for kind, rank in found if kind == "condition"]
+        contained_in = self.condition_substrings.get(diagnosis_lower)
+        if contained_in is not None:
+            condition_ranks.append(contained_in)
+        if condition_ranks:
+            return self.conditions[min(condition_ranks)]
+        
+        synonym_ranks = [rank for kind, rank in found if kind == "synonym"]
+        if synonym_ranks:
+            return self.synonyms[min(synonym_ranks)][1]
+        return None
+
+_MATCHER = _DiagnosisMatcher()
+
+@lru_cache(maxsize=4096)
+def _match_diagnosis(diagnosis_lower: str) -> Optional[str]:
+    return _MATCHER.match(diagnosis_lower)
+
+def compile_diagnosis_matcher():
+    """Recompile the matcher after DIAGNOSIS_MEDICATIONS, DIAGNOSIS_SYNONYMS or DIAGNOSIS_CODES change"""
+    global _MATCHER
+    _MATCHER = _DiagnosisMatcher()
+    _match_diagnosis.cache_clear()
+
 def get_medications_for_diagnosis(diagnosis: str) -> List[Dict]:
     """
     Get recommended medications based on diagnosis
     
     Args:
-        diagnosis: The medical diagnosis/condition
+        diagnosis: The medical diagnosis/condition, or an ICD-10/SNOMED CT code
         
     Returns:
         List of recommended medications with dosages and instructions
     """
-    diagnosis_lower = diagnosis.lower().strip()
-    
-    # Direct match
-    if diagnosis_lower in DIAGNOSIS_MEDICATIONS:
-        return DIAGNOSIS_MEDICATIONS[diagnosis_lower]
-    
-    # Partial match - check if diagnosis contains any key
-    for key, medications in DIAGNOSIS_MEDICATIONS.items():
-        if key in diagnosis_lower or diagnosis_lower in key:
-            return medications
-    
-    # Common variations
-    diagnosis_mappings = {
-        "high blood pressure": "hypertension",
-        "blood pressure": "hypertension",
-        "bp": "hypertension",
-        "type 2 diabetes": "diabetes",
-        "diabetes mellitus": "diabetes",
-        "bacterial infection": "infection",
-        "viral infection": "infection",
-        "uti": "infection",
-        "urinary tract infection": "infection",
-        "headache": "pain",
-        "back pain": "pain",
-        "joint pain": "pain",
-        "arthritis": "pain",
-        "copd": "asthma",
-        "chronic obstructive pulmonary disease": "asthma",
-        "hyperlipidemia": "high cholesterol",
-        "cholesterol": "high cholesterol",
-        "gerd": "acid reflux",
-        "gastroesophageal reflux": "acid reflux",
-        "heartburn": "acid reflux",
-        "panic disorder": "anxiety",
-        "seasonal allergies": "allergy",
-        "hay fever": "allergy"
-    }
-    
-    # Check mappings
-    for key, mapped_diagnosis in diagnosis_mappings.items():
-        if key in diagnosis_lower:
-            return DIAGNOSIS_MEDICATIONS.get(mapped_diagnosis, [])
+    condition = _match_diagnosis(diagnosis.lower().strip())
+    if condition is not None:
+        return DIAGNOSIS_MEDICATIONS.get(condition, [])
     
     # If no match found, return general recommendations
     return [
@@ -274,5 +418,3 @@ def get_medications_for_diagnosis(diagnosis: str) -> List[Dict]:
             "category": "General"
         }
     ]
-
-
@@ -0,0 +1,272 @@
+"""
+Prescription OCR Service
+Decodes, preprocesses and OCRs prescription images on a process pool so
+CPU-heavy scans never block the event loop
+"""
+from typing import Dict, Optional
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+import asyncio
+import os
+import tempfile
+
+from backend.app.services.lazy_loading import lazy_import
+
+# Try to import PIL and pytesseract, but handle gracefully if not installed. They
+# load on first use (in the OCR worker processes), not when the API starts.
+try:
+    Image = lazy_import("PIL.Image")
+    ImageOps = lazy_import("PIL.ImageOps")
+    PIL_AVAILABLE = True
+except ImportError:
+    PIL_AVAILABLE = False
+    Image = None
+    ImageOps = None
+
+try:
+    pytesseract = lazy_import("pytesseract")
+    TESSERACT_AVAILABLE = True
+except ImportError:
+    TESSERACT_AVAILABLE = False
+    pytesseract = None
+
+from backend.app.config import OCR_WORKERS, OCR_MAX_CONCURRENCY, OCR_BATCH_MAX_CONCURRENCY, OCR_MAX_QUEUE_DEPTH, OCR_MAX_UPLOAD_BYTES
+from backend.app.services.prescription_parser import extract_medications_from_text, extract_prescription_details
+
+OCR_AVAILABLE = PIL_AVAILABLE and TESSERACT_AVAILABLE
+
+UPLOAD_CHUNK_BYTES = 64 * 1024
+
+# Deskew search range and resolution (degrees)
+DESKEW_MAX_ANGLE = 10.0
+DESKEW_STEP = 0.5
+
+class OCRQueueFullError(RuntimeError):
+    """Raised when too many scans are already queued or running"""
+
+class UploadTooLargeError(ValueError):
+    """Raised when an upload exceeds OCR_MAX_UPLOAD_BYTES"""
+
+# ---------------------------------------------------------------------------
+# Image preprocessing and OCR (run inside worker processes)
+# ---------------------------------------------------------------------------
+
+def _row_profile_score(image) -> float:
+    # A box-resize to one column gives the mean of every row; text lines aligned
+    # with the rows make this profile peaky, i.e. high variance
+    profile = image.resize((1, image.height), Image.BOX).tobytes()
+    mean = sum(profile) / len(profile)
+    return sum((value - mean) ** 2 for value in profile)
+
+def estimate_skew_angle(gray) -> float:
+    """Estimate the rotation (degrees) that makes text lines horizontal"""
+    sample = ImageOps.invert(gray)  # Text bright on dark so rotation fill is background
+    sample.thumbnail((600, 600))
+    best_angle, best_score = 0.0, -1.0
+    steps = int(DESKEW_MAX_ANGLE / DESKEW_STEP)
+    for i in range(-steps, steps + 1):
+        angle = i * DESKEW_STEP
+        score = _row_profile_score(sample.rotate(angle, resample=Image.BILINEAR, fillcolor=0))
+        if score > best_score:
+            best_angle, best_score = angle, score
+    return best_angle
+
+def otsu_threshold(gray) -> int:
+    """Global threshold that best separates ink from paper (Otsu's method)"""
+    histogram = gray.histogram()
+    total = sum(histogram)
+    weighted_total = sum(level * count for level, count in enumerate(histogram))
+    background_weight = 0
+    background_sum = 0
+    best_threshold, best_variance = 127, 0.0
+    for level in range(256):
+        background_weight += histogram[level]
+        if background_weight == 0:
+            continue
+        foreground_weight = total - background_weight
+        if foreground_weight == 0:
+            break
+        background_sum += level * histogram[level]
+        background_mean = background_sum / background_weight
+        foreground_mean = (weighted_total - background_sum) / foreground_weight
+        variance = background_weight * foreground_weight * (background_mean - foreground_mean) ** 2
+        if variance > best_variance:
+            best_threshold, best_variance = level, variance
+    return best_threshold
+
+def preprocess_image(image):
+    """Grayscale, deskew and binarize an image for OCR"""
+    gray = ImageOps.autocontrast(ImageOps.grayscale(ImageOps.exif_transpose(image)))
+    angle = estimate_skew_angle(gray)
+    if angle:
+        gray = gray.rotate(angle, resample=Image.BICUBIC, expand=True, fillcolor=255)
+    threshold = otsu_threshold(gray)
+    return gray.point([0] * (threshold + 1) + [255] * (255 - threshold))
+
+def ocr_prescription_file(path: str) -> Dict:
+    """
+    Decode, preprocess and OCR one prescription image, then extract medications.
+    Runs in a worker process.
+
+    Args:
+        path: Path of the uploaded image on disk
+
+    Returns:
+        Dictionary with the OCR text, extracted medications and prescription details
+
+    Raises:
+        ValueError: If the file is not a decodable image
+    """
+    try:
+        with Image.open(path) as image:
+            image.load()
+            prepared = preprocess_image(image)
+    except (OSError, Image.DecompressionBombError) as e:
+        # Don't echo the exception text: it contains the server-side temp path
+        raise ValueError("Could not decode image") from e
+
+    text = pytesseract.image_to_string(prepared)
+    return {
+        "text": text,
+        "medications": extract_medications_from_text(text),
+        "prescription_data": extract_prescription_details(text)
+    }
+
+# ---------------------------------------------------------------------------
+# Upload spooling and bounded dispatch (run on the event loop)
+# ---------------------------------------------------------------------------
+
+_POOL: Optional[ProcessPoolExecutor] = None
+_SEMAPHORE = asyncio.Semaphore(OCR_MAX_CONCURRENCY)
+# Batch pages take a slot in their own lane before one of _SEMAPHORE's, so they
+# never hold every slot and a single scan does not wait behind a whole batch
+_BATCH_SEMAPHORE = asyncio.Semaphore(min(OCR_BATCH_MAX_CONCURRENCY, OCR_MAX_CONCURRENCY))
+_queue_depth = 0
+
+def get_ocr_pool() -> ProcessPoolExecutor:
+    """Get or create the OCR process pool"""
+    global _POOL
+    if _POOL is None:
+        _POOL = ProcessPoolExecutor(max_workers=OCR_WORKERS)
+    return _POOL
+
+def shutdown_ocr_pool():
+    """Stop the OCR worker processes"""
+    global _POOL
+    if _POOL is not None:
+        _POOL.shutdown(wait=False, cancel_futures=True)
+        _POOL = None
+
+def get_ocr_queue_depth() -> int:
+    """Number of scans currently waiting or running"""
+    return _queue_depth
+
+async def spool_upload(upload, suffix: str = "", max_bytes: Optional[int] = None) -> str:
+    """
+    Stream an upload to a temporary file in fixed-size chunks
+
+    Args:
+        upload: FastAPI UploadFile (anything with an async read(size))
+        suffix: Optional file name suffix, e.g. ".png"
+        max_bytes: Size cap, defaults to OCR_MAX_UPLOAD_BYTES
+
+    Returns:
+        Path of the temporary file; the caller must delete it
+
+    Raises:
+        UploadTooLargeError: If the upload exceeds the size cap
+    """
+    limit = OCR_MAX_UPLOAD_BYTES if max_bytes is None else max_bytes
+    handle = tempfile.NamedTemporaryFile(prefix="rx-", suffix=suffix, delete=False)
+    size = 0
+    try:
+        with handle:
+            while True:
+                chunk = await upload.read(UPLOAD_CHUNK_BYTES)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > limit:
+                    raise UploadTooLargeError(f"Upload exceeds {limit} bytes")
+                handle.write(chunk)
+    except BaseException:
+        os.unlink(handle.name)
+        raise
+    return handle.name
+
+@contextmanager
+def _queue_slot():
+    """
+    Hold one of the OCR_MAX_QUEUE_DEPTH places for a scan
+
+    Raises:
+        OCRQueueFullError: If the queue is full
+    """
+    global _queue_depth
+    if _queue_depth >= OCR_MAX_QUEUE_DEPTH:
+        raise OCRQueueFullError("Too many prescription scans in progress, please retry shortly")
+    _queue_depth += 1
+    try:
+        yield
+    finally:
+        _queue_depth -= 1
+
+async def run_ocr(path: str) -> Dict:
+    """
+    OCR a spooled image on the process pool
+
+    At most OCR_MAX_CONCURRENCY scans run at once; up to OCR_MAX_QUEUE_DEPTH may
+    wait or run before new scans are rejected.
+
+    Raises:
+        OCRQueueFullError: If the queue is full
+        ValueError: If the file is not a decodable image
+    """
+    with _queue_slot():
+        return await dispatch_ocr(path)
+
+async def dispatch_ocr(path: str, batch: bool = False) -> Dict:
+    """
+    OCR a spooled image on the process pool, waiting while OCR_MAX_CONCURRENCY
+    scans are running
+
+    Unlike run_ocr this does not check the queue depth; callers bound their
+    own backlog (batch jobs cap their queued pages).
+
+    Args:
+        path: Spooled image
+        batch: A batch page; it also waits while OCR_BATCH_MAX_CONCURRENCY batch
+            pages are running, leaving the other slots to single scans
+
+    Raises:
+        ValueError: If the file is not a decodable image
+    """
+    if batch:
+        async with _BATCH_SEMAPHORE:
+            return await _dispatch(path)
+    return await _dispatch(path)
+
+async def _dispatch(path: str) -> Dict:
+    async with _SEMAPHORE:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(get_ocr_pool(), ocr_prescription_file, path)
+
+async def scan_upload(upload) -> Dict:
+    """
+    Spool an upload, OCR it on the pool and remove the temporary file
+
+    The queue place is taken before spooling, so a full queue rejects the scan
+    without reading the upload to disk first.
+
+    Raises:
+        OCRQueueFullError: If the queue is full
+        UploadTooLargeError: If the upload exceeds OCR_MAX_UPLOAD_BYTES
+        ValueError: If the file is not a decodable image
+    """
+    suffix = os.path.splitext(upload.filename or "")[1]
+    with _queue_slot():
+        path = await spool_upload(upload, suffix=suffix)
+        try:
+            return await dispatch_ocr(path)
+        finally:
+            os.unlink(path)
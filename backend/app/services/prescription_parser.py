@@ -0,0 +1,238 @@
+"""
+Prescription Text Parser
+Extracts medication information from OCR text with precompiled patterns
+"""
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+import re
+
+# Medication name (group 1) followed by a dosage (group 2), in priority order
+MEDICATION_PATTERNS = [
+    r'([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)\s+(\d+(?:\.\d+)?\s*(?:mg|g|ml|tablet|tab|capsule|cap))',
+    r'([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)\s+(\d+(?:\.\d+)?)\s*(?:mg|g|ml)',
+    r'([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)\s+(?:take|use|apply)\s+(\d+)',
+]
+
+# Frequency patterns, in priority order
+FREQUENCY_PATTERNS = [
+    r'(?:take|use|apply)\s+(?:once|twice|three times|four times)\s+(?:daily|a day|per day)',
+    r'\d+\s*(?:times|X)\s*(?:daily|a day|per day)',
+    r'(?:every|q)\s*\d+\s*(?:hours|hrs|h)',
+    r'(?:before|after)\s+(?:meals|breakfast|lunch|dinner)',
+]
+
+# Duration patterns, in priority order
+DURATION_PATTERNS = [
+    r'(?:for|continue)\s+\d+\s*(?:days|weeks|months)',
+    r'\d+\s*(?:days|weeks|months)',
+]
+
+INSTRUCTION_KEYWORDS = ['with food', 'without food', 'before meal', 'after meal', 'at bedtime']
+
+# Drug names that mark a long capitalised phrase as a real medication (when
+# contained in it)
+KNOWN_DRUG_NAMES = frozenset([
+    'aspirin', 'ibuprofen', 'acetaminophen', 'amoxicillin', 'penicillin',
+    'metformin', 'lisinopril', 'atorvastatin', 'levothyroxine', 'amlodipine',
+    'metoprolol', 'omeprazole', 'losartan', 'albuterol', 'gabapentin',
+    'sertraline', 'simvastatin', 'montelukast', 'tramadol', 'trazodone'
+])
+
+# Names reported when no medication/dosage line is recognised, in report order
+FALLBACK_MEDICATIONS = {
+    'aspirin': 'Aspirin',
+    'ibuprofen': 'Ibuprofen',
+    'acetaminophen': 'Acetaminophen',
+    'amoxicillin': 'Amoxicillin',
+    'penicillin': 'Penicillin',
+    'metformin': 'Metformin',
+    'lisinopril': 'Lisinopril',
+    'atorvastatin': 'Atorvastatin',
+}
+
+def _scanner(patterns: List[str], prefix: str = '') -> re.Pattern:
+    """
+    One regex for a kind of pattern: a lookahead over their alternation, so
+    finditer stops at every position where any of them matches (overlaps
+    included) and reports the earliest-listed one matching there
+    """
+    return re.compile(prefix + '(?=' + '|'.join(f'({pattern})' for pattern in patterns) + ')', re.IGNORECASE)
+
+def _group_bases(patterns: List[str]) -> List[int]:
+    """Group number of each pattern's wrapping group in its _scanner"""
+    bases, base = [], 1
+    for pattern in patterns:
+        bases.append(base)
+        base += 1 + re.compile(pattern).groups
+    return bases
+
+# Each kind is scanned independently on every line, so a medication match never
+# hides the frequency or duration written inside it
+# A medication match starting inside a word would also match from the word's
+# first letter, so the leftmost one always starts a word; only try those
+_MEDICATION_SCAN = _scanner(MEDICATION_PATTERNS, prefix=r'(?<![a-z])')
+_FREQUENCY_SCAN = _scanner(FREQUENCY_PATTERNS)
+_DURATION_SCAN = _scanner(DURATION_PATTERNS)
+_MEDICATION_BASES = _group_bases(MEDICATION_PATTERNS)
+_FREQUENCY_BASES = _group_bases(FREQUENCY_PATTERNS)
+_DURATION_BASES = _group_bases(DURATION_PATTERNS)
+_MEDICATION_RES = [re.compile(pattern, re.IGNORECASE) for pattern in MEDICATION_PATTERNS]
+_INSTRUCTION_PATTERN = re.compile('|'.join(re.escape(k) for k in INSTRUCTION_KEYWORDS), re.IGNORECASE)
+_KNOWN_DRUG_PATTERN = re.compile('|'.join(re.escape(name) for name in sorted(KNOWN_DRUG_NAMES)))
+# A lookahead again, so overlapping fallback names are all seen
+_FALLBACK_PATTERN = re.compile('(?=(' + '|'.join(re.escape(key) for key in FALLBACK_MEDICATIONS) + '))')
+
+def iter_text_lines(source: Union[str, Iterable[str]]) -> Iterator[str]:
+    """
+    Stream non-empty, stripped lines from OCR text (split on newlines only)
+
+    Args:
+        source: Full text, or an iterable of text chunks such as OCR pages
+
+    Yields:
+        Lines in order
+    """
+    chunks = [source] if isinstance(source, str) else source
+    for chunk in chunks:
+        for line in chunk.split('\n'):
+            line = line.strip()
+            if line:
+                yield line
+
+def _first_match(scanner: re.Pattern, bases: List[int], line: str) -> Optional[Tuple[int, re.Match]]:
+    """
+    (pattern index, match) of the earliest-listed pattern that occurs in line,
+    at its leftmost position, as searching each pattern in turn would find it
+
+    No earlier pattern matches anywhere the winner does, so the first position
+    reporting the winner is its leftmost match.
+    """
+    best: Optional[Tuple[int, re.Match]] = None
+    for match in scanner.finditer(line):
+        index = bases.index(match.lastindex)
+        if best is None or index < best[0]:
+            best = (index, match)
+            if index == 0:
+                break
+    return best
+
+def _first_text(scanner: re.Pattern, bases: List[int], line: str) -> str:
+    found = _first_match(scanner, bases, line)
+    if found is None:
+        return ""
+    index, match = found
+    return match.group(bases[index]).strip()
+
+def _is_medication_name(name: str) -> bool:
+    """Up to three words, or containing a known drug name (whole word first, then inside a word)"""
+    words = name.lower().split()
+    if len(words) <= 3 or not KNOWN_DRUG_NAMES.isdisjoint(words):
+        return True
+    return _KNOWN_DRUG_PATTERN.search(" ".join(words)) is not None
+
+def _find_medication(line: str) -> Optional[Tuple[str, str]]:
+    """
+    (name, dosage) from the earliest-listed medication pattern whose leftmost
+    match in line is a medication name
+    """
+    found = _first_match(_MEDICATION_SCAN, _MEDICATION_BASES, line)
+    if found is None:
+        return None
+    index, match = found
+    base = _MEDICATION_BASES[index]
+    name, dosage = match.group(base + 1).strip(), match.group(base + 2).strip()
+    if _is_medication_name(name):
+        return name, dosage
+    # Rejected: the later patterns' leftmost matches may sit where this one also
+    # matched, so the scan did not report them; search them one by one
+    for pattern in _MEDICATION_RES[index + 1:]:
+        match = pattern.search(line)
+        if match:
+            name, dosage = match.group(1).strip(), match.group(2).strip()
+            if _is_medication_name(name):
+                return name, dosage
+    return None
+
+def _new_medication(name: str, dosage: str) -> Dict:
+    return {
+        "name": name,
+        "dosage": dosage,
+        "frequency": "",
+        "duration": "",
+        "instructions": "",
+        "quantity": ""
+    }
+
+def extract_medications_from_text(source: Union[str, Iterable[str]]) -> List[Dict]:
+    """
+    Extract medication information from OCR text using pattern matching
+    This is a simplified version - in production, use ML/NLP models
+
+    For each kind (medication, frequency, duration) the earliest-listed
+    pattern found in a line wins. Each kind is one scan of the line.
+
+    Args:
+        source: OCR text, or an iterable of page texts
+
+    Returns:
+        List of medications with dosage, frequency, duration and instructions
+    """
+    medications = []
+    current_medication: Optional[Dict] = None
+    fallback_seen = set()
+
+    for line in iter_text_lines(source):
+        fallback_seen.update(match.group(1) for match in _FALLBACK_PATTERN.finditer(line.lower()))
+
+        # Try to find medication name and dosage
+        found = _find_medication(line)
+        if found:
+            current_medication = _new_medication(*found)
+            medications.append(current_medication)
+
+        # If we have a current medication, fill in frequency, duration and instructions
+        if current_medication:
+            if not current_medication["frequency"]:
+                current_medication["frequency"] = _first_text(_FREQUENCY_SCAN, _FREQUENCY_BASES, line)
+            if not current_medication["duration"]:
+                current_medication["duration"] = _first_text(_DURATION_SCAN, _DURATION_BASES, line)
+            if _INSTRUCTION_PATTERN.search(line):
+                current_medication["instructions"] = line
+
+    # If no medications found with patterns, report common medication names seen in the text
+    if not medications:
+        for med_key, med_name in FALLBACK_MEDICATIONS.items():
+            if med_key in fallback_seen:
+                medications.append(_new_medication(med_name, ""))
+
+    return medications
+
+_PATIENT_PATTERN = re.compile(r'^(?:patient(?:\s+name)?|name)\s*[:\-]\s*(?P<value>.+)$', re.IGNORECASE)
+_DOCTOR_PATTERN = re.compile(
+    r'^(?:(?:prescriber|physician|doctor)\s*[:\-]\s*(?P<value>.+)|(?P<title>dr\.?\s+[a-z][\w.\- ]*))$',
+    re.IGNORECASE
+)
+
+def extract_prescription_details(source: Union[str, Iterable[str]]) -> Dict:
+    """
+    Extract patient and prescriber names from OCR text
+
+    Args:
+        source: OCR text, or an iterable of page texts
+
+    Returns:
+        Dictionary with patientName and doctorName (None when not found)
+    """
+    details = {"patientName": None, "doctorName": None}
+    for line in iter_text_lines(source):
+        if details["patientName"] is None:
+            match = _PATIENT_PATTERN.match(line)
+            if match:
+                details["patientName"] = match.group("value").strip()
+                continue
+        if details["doctorName"] is None:
+            match = _DOCTOR_PATTERN.match(line)
+            if match:
+                details["doctorName"] = (match.group("value") or match.group("title")).strip()
+        if details["patientName"] is not None and details["doctorName"] is not None:
+            break
+    return details
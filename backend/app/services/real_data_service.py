@@ -2,16 +2,195 @@
 Real Data Service with comprehensive hospital, patient, doctor, and bed availability data
 This service provides realistic healthcare data for demonstration purposes
 """
-from typing import List, Optional, Dict
+from typing import Callable, Iterable, Iterator, List, Mapping, MutableMapping, Optional, Dict, Tuple
 from datetime import datetime, timedelta
+from bisect import bisect_left, bisect_right
+import base64
+import json
 import uuid
 import random
+import asyncio
+import threading
+
+from backend.app.services.lazy_loading import LazyInit
+from backend.app.services.search_index import TextSearchIndex
+from backend.app.services.store_snapshot import SnapshotStore, claim_writer, open_snapshot, save_stores, write_snapshot
+from backend.app.config import SNAPSHOT_PATH, SNAPSHOT_INTERVAL_SECONDS
 
 # In-memory storage with realistic data
-PATIENTS_DB: Dict[str, dict] = {}
-DOCTORS_DB: Dict[str, dict] = {}
-HOSPITALS_DB: Dict[str, dict] = {}
-BED_AVAILABILITY_DB: Dict[str, dict] = {}
+# Plain dicts, or SnapshotStores when SNAPSHOT_PATH is set
+PATIENTS_DB: MutableMapping[str, dict] = {}
+DOCTORS_DB: MutableMapping[str, dict] = {}
+HOSPITALS_DB: MutableMapping[str, dict] = {}
+BED_AVAILABILITY_DB: MutableMapping[str, dict] = {}
+
+class _SeqList:
+    """Record IDs kept sorted by sequence number"""
+    def __init__(self):
+        self.seqs: List[int] = []
+        self.ids: List[str] = []
+    
+    def add(self, seq: int, record_id: str):
+        if not self.seqs or seq > self.seqs[-1]:
+            self.seqs.append(seq)
+            self.ids.append(record_id)
+            return
+        index = bisect_left(self.seqs, seq)
+        self.seqs.insert(index, seq)
+        self.ids.insert(index, record_id)
+    
+    def remove(self, seq: int):
+        index = bisect_left(self.seqs, seq)
+        if index < len(self.seqs) and self.seqs[index] == seq:
+            del self.seqs[index]
+            del self.ids[index]
+
+class _StoreOrder:
+    """
+    Listing order of a store's records, for cursor pagination
+    
+    Records are numbered in the order they are added. A cursor holds the last
+    number returned, so a page is found by bisection and stays in place while
+    records are added or deleted. Facets keep the same order per filter value
+    (e.g. doctors per hospital), so a filtered page only reads the records that
+    can match. Changes and reads hold a lock: sync handlers run in the threadpool,
+    and a delete between reads must not pair a number with another record's ID.
+    """
+    # Pairs copied per lock hold while paging
+    READ_BATCH = 64
+    
+    def __init__(self, facets: Optional[Dict[str, Callable[[dict], Iterable[str]]]] = None):
+        self.facets = facets or {}
+        self._lock = threading.Lock()
+        self._reset()
+    
+    def _reset(self):
+        self.all = _SeqList()
+        self.seq_of: Dict[str, int] = {}
+        self.next_seq = 0
+        # facet -> value -> records; and each record's values, to unlink it on update/delete
+        self.by_facet: Dict[str, Dict[str, _SeqList]] = {name: {} for name in self.facets}
+        self.facet_values: Dict[str, Dict[str, Tuple[str, ...]]] = {}
+    
+    def add(self, record_id: str, record: Optional[dict] = None):
+        """Number a new record (a known one keeps its place) and refresh its facets from record"""
+        with self._lock:
+            self._add(record_id, record)
+    
+    def _add(self, record_id: str, record: Optional[dict]):
+        seq = self.seq_of.get(record_id)
+        if seq is None:
+            seq = self.seq_of[record_id] = self.next_seq
+            self.next_seq += 1
+            self.all.add(seq, record_id)
+        if record is None or not self.facets:
+            return
+        self._unlink_facets(record_id, seq)
+        values = {
+            name: tuple(dict.fromkeys(value for value in values_of(record) if value))
+            for name, values_of in self.facets.items()
+        }
+        self.facet_values[record_id] = values
+        for name, keys in values.items():
+            lists = self.by_facet[name]
+            for key in keys:
+                lists.setdefault(key, _SeqList()).add(seq, record_id)
+    
+    def _unlink_facets(self, record_id: str, seq: int):
+        for name, keys in self.facet_values.pop(record_id, {}).items():
+            lists = self.by_facet[name]
+            for key in keys:
+                lists[key].remove(seq)
+                if not lists[key].seqs:
+                    del lists[key]
+    
+    def remove(self, record_id: str):
+        with self._lock:
+            seq = self.seq_of.pop(record_id, None)
+            if seq is None:
+                return
+            self.all.remove(seq)
+            self._unlink_facets(record_id, seq)
+    
+    def rebuild(self, store: Mapping[str, dict]):
+        with self._lock:
+            self._reset()
+            if self.facets:
+                for record_id, record in store.items():
+                    self._add(record_id, record)
+            else:
+                for record_id in store:
+                    self._add(record_id, None)
+    
+    def facet_size(self, facet: Tuple[str, str]) -> int:
+        """Number of records with a (facet, value)"""
+        with self._lock:
+            seq_list = self.by_facet[facet[0]].get(facet[1])
+            return len(seq_list.seqs) if seq_list else 0
+    
+    def after(self, seq: Optional[int], facet: Optional[Tuple[str, str]] = None) -> Iterator[Tuple[int, str]]:
+        """
+        (sequence number, record ID) pairs following seq, in listing order
+        
+        Args:
+            seq: Last sequence number already listed, None to start from the beginning
+            facet: (facet, value) to list only the records with that value
+        """
+        while True:
+            with self._lock:
+                seq_list = self.all if facet is None else self.by_facet[facet[0]].get(facet[1])
+                if seq_list is None:
+                    return
+                index = bisect_right(seq_list.seqs, seq) if seq is not None else 0
+                stop = index + self.READ_BATCH
+                batch = list(zip(seq_list.seqs[index:stop], seq_list.ids[index:stop]))
+            if not batch:
+                return
+            yield from batch
+            seq = batch[-1][0]
+
+_PATIENTS_ORDER = _StoreOrder()
+_DOCTORS_ORDER = _StoreOrder({
+    "hospital_id": lambda d: [d.get("hospital_id")],
+    "specialization": lambda d: [(d.get("specialization") or "").lower()]
+})
+_HOSPITALS_ORDER = _StoreOrder({
+    "city": lambda h: [(h.get("city") or "").lower()],
+    "state": lambda h: [(h.get("state") or "").lower()],
+    "specialty": lambda h: [s.lower() for s in h.get("specialties") or []]
+})
+
+# Free-text search: field weights per store, and the fields each record contributes
+_PATIENTS_INDEX = TextSearchIndex({"name": 3.0, "conditions": 1.5, "address": 1.0})
+_DOCTORS_INDEX = TextSearchIndex({"name": 3.0, "specialization": 2.0, "qualification": 1.0, "city": 1.0})
+_HOSPITALS_INDEX = TextSearchIndex({"name": 3.0, "city": 2.0, "specialties": 1.5, "facilities": 1.0, "hospital_type": 1.0})
+
+def _patient_search_fields(patient: dict) -> Dict:
+    return {
+        "name": [patient.get("first_name") or "", patient.get("last_name") or ""],
+        "conditions": patient.get("medical_history") or [],
+        "address": patient.get("address")
+    }
+
+def _doctor_search_fields(doctor: dict, hospital: Optional[dict] = None) -> Dict:
+    # Doctors are found by their hospital's city; pass the hospital to skip the lookup
+    if hospital is None:
+        hospital = HOSPITALS_DB.get(doctor.get("hospital_id")) or {}
+    return {
+        "name": [doctor.get("first_name") or "", doctor.get("last_name") or ""],
+        "specialization": [doctor.get("specialization") or "", doctor.get("department") or ""],
+        "qualification": doctor.get("qualification"),
+        "city": hospital.get("city")
+    }
+
+def _hospital_search_fields(hospital: dict) -> Dict:
+    return {
+        "name": hospital.get("name"),
+        "city": [hospital.get("city") or "", hospital.get("state") or ""],
+        "specialties": hospital.get("specialties") or [],
+        "facilities": hospital.get("facilities") or [],
+        "hospital_type": hospital.get("hospital_type")
+    }
 
 def generate_realistic_data():
     """Generate comprehensive realistic healthcare data"""
@@ -331,16 +510,217 @@ def generate_realistic_data():
         }
         BED_AVAILABILITY_DB[hospital_id] = bed_data
 
-# Initialize realistic data
-generate_realistic_data()
+def _reindex_stores():
+    """Rebuild listing order and search indexes from the stores (after writing to them directly)"""
+    _PATIENTS_ORDER.rebuild(PATIENTS_DB)
+    _DOCTORS_ORDER.rebuild(DOCTORS_DB)
+    _HOSPITALS_ORDER.rebuild(HOSPITALS_DB)
+    _PATIENTS_INDEX.rebuild((key, _patient_search_fields(patient)) for key, patient in PATIENTS_DB.items())
+    _DOCTORS_INDEX.rebuild((key, _doctor_search_fields(doctor)) for key, doctor in DOCTORS_DB.items())
+    _HOSPITALS_INDEX.rebuild((key, _hospital_search_fields(hospital)) for key, hospital in HOSPITALS_DB.items())
+
+def _search_store(store: Mapping[str, dict], index: TextSearchIndex, query: str, limit: int) -> List[dict]:
+    """Top records for a free-text query, best first, each with its search_score"""
+    results = []
+    for key, score in index.search(query, limit):
+        record = store.get(key)
+        if record is not None:
+            results.append({**record, "search_score": round(score, 4)})
+    return results
+
+def encode_store_cursor(seq: int) -> str:
+    """Opaque cursor pointing just after the record with this sequence number"""
+    return base64.urlsafe_b64encode(json.dumps([seq]).encode("utf-8")).decode("ascii")
+
+def decode_store_cursor(cursor: str) -> int:
+    """
+    Decode a cursor produced by encode_store_cursor
+    
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        (seq,) = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if not isinstance(seq, int) or isinstance(seq, bool):
+        raise ValueError("Invalid cursor")
+    return seq
+
+def _store_page(
+    store: Mapping[str, dict],
+    order: _StoreOrder,
+    limit: int,
+    cursor: Optional[str],
+    matches: Optional[Callable[[dict], bool]] = None,
+    facets: Optional[List[Tuple[str, str]]] = None
+) -> Tuple[List[dict], Optional[str]]:
+    """
+    One page of a store in listing order
+    
+    With facets, only the records of the smallest (facet, value) are read; matches
+    still checks every filter. A page costs its length plus the records of that
+    facet that fail the other filters, not a walk of the whole store.
+    
+    Returns:
+        The page of records and the cursor for the next page (None when there are no more)
+    
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    after = decode_store_cursor(cursor) if cursor else None
+    records = []
+    last_seq = None
+    facet = min(facets, key=order.facet_size) if facets else None
+    for seq, record_id in order.after(after, facet):
+        record = store.get(record_id)
+        if record is None or (matches is not None and not matches(record)):
+            continue
+        if len(records) == limit:
+            return records, encode_store_cursor(last_seq)
+        records.append(record)
+        last_seq = seq
+    return records, None
+
+# Store snapshots
+
+_SNAPSHOT_LOCK = threading.Lock()
+_saved_versions: Optional[Tuple] = None
+_SNAPSHOT_WRITER: Optional[asyncio.Task] = None
+
+def _stores() -> Dict[str, MutableMapping[str, dict]]:
+    return {"hospitals": HOSPITALS_DB, "doctors": DOCTORS_DB, "patients": PATIENTS_DB, "beds": BED_AVAILABILITY_DB}
+
+def _use_stores(hospitals: SnapshotStore, doctors: SnapshotStore, patients: SnapshotStore, beds: SnapshotStore):
+    global HOSPITALS_DB, DOCTORS_DB, PATIENTS_DB, BED_AVAILABILITY_DB, _saved_versions
+    HOSPITALS_DB, DOCTORS_DB, PATIENTS_DB, BED_AVAILABILITY_DB = hospitals, doctors, patients, beds
+    _saved_versions = _store_versions()
+
+def _store_versions() -> Tuple:
+    return tuple((id(store), getattr(store, "version", None)) for store in _stores().values())
+
+def restore_snapshot(path: str) -> bool:
+    """
+    Replace the stores with the records of a snapshot file, mapped read-only
+    
+    Returns:
+        False if there is no usable snapshot at path (the stores are unchanged)
+    """
+    try:
+        sections = open_snapshot(path)
+    except FileNotFoundError:
+        return False
+    except (OSError, ValueError) as e:
+        print(f"Error reading store snapshot {path}: {e}")
+        return False
+    missing = set(_stores()) - set(sections)
+    if missing:
+        print(f"Error reading store snapshot {path}: missing {', '.join(sorted(missing))}")
+        return False
+    _use_stores(*(SnapshotStore(sections[name]) for name in _stores()))
+    return True
+
+def save_snapshot(path: Optional[str] = None) -> bool:
+    """
+    Write the stores to a snapshot file if they changed since the last one
+    
+    Args:
+        path: Snapshot file, defaults to SNAPSHOT_PATH
+    
+    Returns:
+        True if a snapshot was written
+    
+    Raises:
+        OSError: If the file cannot be written
+    """
+    global _saved_versions
+    path = path or SNAPSHOT_PATH
+    if not path or not _demo_data.loaded:
+        return False
+    with _SNAPSHOT_LOCK:
+        stores = _stores()
+        if not all(isinstance(store, SnapshotStore) for store in stores.values()):
+            write_snapshot(path, stores)
+            return True
+        versions = _store_versions()
+        if versions == _saved_versions:
+            return False
+        save_stores(path, stores)
+        _saved_versions = versions
+        return True
+
+async def _snapshot_forever():
+    while True:
+        await asyncio.sleep(SNAPSHOT_INTERVAL_SECONDS)
+        try:
+            await asyncio.to_thread(save_snapshot)
+        except Exception as e:
+            print(f"Error writing store snapshot: {e}")
+
+def start_snapshot_writer() -> bool:
+    """
+    Start periodic snapshots to SNAPSHOT_PATH, unless snapshots are disabled or
+    another worker on this host writes them
+    
+    Returns:
+        True if this worker writes snapshots
+    """
+    global _SNAPSHOT_WRITER
+    if not SNAPSHOT_PATH or not claim_writer(SNAPSHOT_PATH):
+        return False
+    if _SNAPSHOT_WRITER is None or _SNAPSHOT_WRITER.done():
+        _SNAPSHOT_WRITER = asyncio.get_running_loop().create_task(_snapshot_forever())
+    return True
+
+def stop_snapshot_writer():
+    """Stop periodic snapshots, writing a final one if the stores changed"""
+    global _SNAPSHOT_WRITER
+    if _SNAPSHOT_WRITER is None:
+        return
+    _SNAPSHOT_WRITER.cancel()
+    _SNAPSHOT_WRITER = None
+    try:
+        save_snapshot()
+    except Exception as e:
+        print(f"Error writing store snapshot: {e}")
+
+def _load_demo_data():
+    # Start from the snapshot when there is one; otherwise generate data into
+    # snapshot-backed stores so it can be snapshotted
+    if SNAPSHOT_PATH and restore_snapshot(SNAPSHOT_PATH):
+        _reindex_stores()
+        return
+    if SNAPSHOT_PATH:
+        _use_stores(SnapshotStore(), SnapshotStore(), SnapshotStore(), SnapshotStore())
+    generate_realistic_data()
+    _reindex_stores()
+
+# Realistic data is generated on first use of the stores (or by the startup hook
+# when PRELOAD_DATA is set), not at import
+_demo_data = LazyInit("real_data_service", _load_demo_data)
+ensure_data_loaded = _demo_data.ensure
 
 # Patient operations
+@_demo_data
 def get_all_patients() -> List[dict]:
     return list(PATIENTS_DB.values())
 
+@_demo_data
+def get_patients_page(limit: int = 50, cursor: Optional[str] = None) -> Dict:
+    """Page of patients with the cursor for the next page (see _store_page)"""
+    patients, next_cursor = _store_page(PATIENTS_DB, _PATIENTS_ORDER, limit, cursor)
+    return {"patients": patients, "next_cursor": next_cursor}
+
+@_demo_data
+def search_patients(query: str, limit: int = 20) -> List[dict]:
+    """Patients ranked against a free-text query over names, conditions and address"""
+    return _search_store(PATIENTS_DB, _PATIENTS_INDEX, query, limit)
+
+@_demo_data
 def get_patient(patient_id: str) -> Optional[dict]:
     return PATIENTS_DB.get(patient_id)
 
+@_demo_data
 def create_patient(patient_data: dict) -> dict:
     patient_id = str(uuid.uuid4())
     patient = {
@@ -350,35 +730,70 @@ def create_patient(patient_data: dict) -> dict:
         "updated_at": datetime.now().isoformat()
     }
     PATIENTS_DB[patient_id] = patient
+    _PATIENTS_ORDER.add(patient_id)
+    _PATIENTS_INDEX.add(patient_id, _patient_search_fields(patient))
     return patient
 
+@_demo_data
 def update_patient(patient_id: str, patient_data: dict) -> Optional[dict]:
     if patient_id not in PATIENTS_DB:
         return None
     existing = PATIENTS_DB[patient_id]
     updated = {**existing, **patient_data, "updated_at": datetime.now().isoformat()}
     PATIENTS_DB[patient_id] = updated
+    _PATIENTS_INDEX.add(patient_id, _patient_search_fields(updated))
     return updated
 
+@_demo_data
 def delete_patient(patient_id: str) -> bool:
     if patient_id in PATIENTS_DB:
         del PATIENTS_DB[patient_id]
+        _PATIENTS_ORDER.remove(patient_id)
+        _PATIENTS_INDEX.remove(patient_id)
         return True
     return False
 
 # Doctor operations
+@_demo_data
 def get_all_doctors() -> List[dict]:
     return list(DOCTORS_DB.values())
 
+@_demo_data
 def get_doctor(doctor_id: str) -> Optional[dict]:
     return DOCTORS_DB.get(doctor_id)
 
+@_demo_data
 def get_doctors_by_hospital(hospital_id: str) -> List[dict]:
     return [d for d in DOCTORS_DB.values() if d.get("hospital_id") == hospital_id]
 
+@_demo_data
 def get_doctors_by_specialization(specialization: str) -> List[dict]:
     return [d for d in DOCTORS_DB.values() if d.get("specialization", "").lower() == specialization.lower()]
 
+@_demo_data
+def get_doctors_page(
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    hospital_id: Optional[str] = None,
+    specialization: Optional[str] = None
+) -> Dict:
+    """Page of doctors, optionally filtered as get_doctors_by_hospital/specialization do"""
+    matches, facets = None, None
+    if hospital_id:
+        matches = lambda d: d.get("hospital_id") == hospital_id
+        facets = [("hospital_id", hospital_id)]
+    elif specialization:
+        matches = lambda d: d.get("specialization", "").lower() == specialization.lower()
+        facets = [("specialization", specialization.lower())]
+    doctors, next_cursor = _store_page(DOCTORS_DB, _DOCTORS_ORDER, limit, cursor, matches, facets)
+    return {"doctors": doctors, "next_cursor": next_cursor}
+
+@_demo_data
+def search_doctors(query: str, limit: int = 20) -> List[dict]:
+    """Doctors ranked against a free-text query over names, specialization and hospital city"""
+    return _search_store(DOCTORS_DB, _DOCTORS_INDEX, query, limit)
+
+@_demo_data
 def create_doctor(doctor_data: dict) -> dict:
     doctor_id = str(uuid.uuid4())
     doctor = {
@@ -388,29 +803,40 @@ def create_doctor(doctor_data: dict) -> dict:
         "updated_at": datetime.now().isoformat()
     }
     DOCTORS_DB[doctor_id] = doctor
+    _DOCTORS_ORDER.add(doctor_id, doctor)
+    _DOCTORS_INDEX.add(doctor_id, _doctor_search_fields(doctor))
     return doctor
 
+@_demo_data
 def update_doctor(doctor_id: str, doctor_data: dict) -> Optional[dict]:
     if doctor_id not in DOCTORS_DB:
         return None
     existing = DOCTORS_DB[doctor_id]
     updated = {**existing, **doctor_data, "updated_at": datetime.now().isoformat()}
     DOCTORS_DB[doctor_id] = updated
+    _DOCTORS_ORDER.add(doctor_id, updated)
+    _DOCTORS_INDEX.add(doctor_id, _doctor_search_fields(updated))
     return updated
 
+@_demo_data
 def delete_doctor(doctor_id: str) -> bool:
     if doctor_id in DOCTORS_DB:
         del DOCTORS_DB[doctor_id]
+        _DOCTORS_ORDER.remove(doctor_id)
+        _DOCTORS_INDEX.remove(doctor_id)
         return True
     return False
 
 # Hospital operations
+@_demo_data
 def get_all_hospitals() -> List[dict]:
     return list(HOSPITALS_DB.values())
 
+@_demo_data
 def get_hospital(hospital_id: str) -> Optional[dict]:
     return HOSPITALS_DB.get(hospital_id)
 
+@_demo_data
 def search_hospitals(city: Optional[str] = None, state: Optional[str] = None, specialty: Optional[str] = None) -> List[dict]:
     results = list(HOSPITALS_DB.values())
     if city:
@@ -421,6 +847,33 @@ def search_hospitals(city: Optional[str] = None, state: Optional[str] = None, sp
         results = [h for h in results if specialty.lower() in [s.lower() for s in h.get("specialties", [])]]
     return results
 
+@_demo_data
+def get_hospitals_page(
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    city: Optional[str] = None,
+    state: Optional[str] = None,
+    specialty: Optional[str] = None
+) -> Dict:
+    """Page of hospitals, optionally filtered as search_hospitals does"""
+    def matches(h: dict) -> bool:
+        if city and h.get("city", "").lower() != city.lower():
+            return False
+        if state and h.get("state", "").lower() != state.lower():
+            return False
+        if specialty and specialty.lower() not in [s.lower() for s in h.get("specialties", [])]:
+            return False
+        return True
+    facets = [(name, value.lower()) for name, value in (("city", city), ("state", state), ("specialty", specialty)) if value]
+    hospitals, next_cursor = _store_page(HOSPITALS_DB, _HOSPITALS_ORDER, limit, cursor, matches if facets else None, facets)
+    return {"hospitals": hospitals, "next_cursor": next_cursor}
+
+@_demo_data
+def search_hospitals_text(query: str, limit: int = 20) -> List[dict]:
+    """Hospitals ranked against a free-text query over name, city, specialties and facilities"""
+    return _search_store(HOSPITALS_DB, _HOSPITALS_INDEX, query, limit)
+
+@_demo_data
 def create_hospital(hospital_data: dict) -> dict:
     hospital_id = str(uuid.uuid4())
     hospital = {
@@ -430,29 +883,45 @@ def create_hospital(hospital_data: dict) -> dict:
         "updated_at": datetime.now().isoformat()
     }
     HOSPITALS_DB[hospital_id] = hospital
+    _HOSPITALS_ORDER.add(hospital_id, hospital)
+    _HOSPITALS_INDEX.add(hospital_id, _hospital_search_fields(hospital))
     return hospital
 
+@_demo_data
 def update_hospital(hospital_id: str, hospital_data: dict) -> Optional[dict]:
     if hospital_id not in HOSPITALS_DB:
         return None
     existing = HOSPITALS_DB[hospital_id]
     updated = {**existing, **hospital_data, "updated_at": datetime.now().isoformat()}
     HOSPITALS_DB[hospital_id] = updated
+    _HOSPITALS_ORDER.add(hospital_id, updated)
+    _HOSPITALS_INDEX.add(hospital_id, _hospital_search_fields(updated))
+    if "city" in hospital_data:
+        # Doctors are searchable by their hospital's city
+        for doctor_id, doctor in DOCTORS_DB.items():
+            if doctor.get("hospital_id") == hospital_id:
+                _DOCTORS_INDEX.add(doctor_id, _doctor_search_fields(doctor))
     return updated
 
+@_demo_data
 def delete_hospital(hospital_id: str) -> bool:
     if hospital_id in HOSPITALS_DB:
         del HOSPITALS_DB[hospital_id]
+        _HOSPITALS_ORDER.remove(hospital_id)
+        _HOSPITALS_INDEX.remove(hospital_id)
         return True
     return False
 
 # Bed availability operations
+@_demo_data
 def get_bed_availability(hospital_id: str) -> Optional[dict]:
     return BED_AVAILABILITY_DB.get(hospital_id)
 
+@_demo_data
 def get_all_bed_availability() -> List[dict]:
     return list(BED_AVAILABILITY_DB.values())
 
+@_demo_data
 def update_bed_availability(hospital_id: str, bed_data: dict) -> Optional[dict]:
     if hospital_id not in BED_AVAILABILITY_DB:
         return None
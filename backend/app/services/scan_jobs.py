@@ -0,0 +1,309 @@
+"""
+Prescription Scan Jobs
+Batch OCR of many prescription pages on the shared process pool. Each batch is
+a job whose page results can be polled or streamed as they finish. Pages run in
+a batch lane of the single-scan concurrency limit that leaves room for single
+scans, and the pages queued across all jobs are capped.
+
+Jobs live in the memory of the worker process that accepted them. Behind a load
+balancer over several workers, polls and streams must reach that same process
+(sticky routing, or a single worker for batch scans); elsewhere the job is
+reported as not found.
+"""
+from typing import AsyncIterator, Dict, List, Optional, Set, Tuple
+from datetime import datetime
+import asyncio
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+import zipfile
+
+from backend.app.config import OCR_BATCH_MAX_PAGES, OCR_JOB_TTL_SECONDS, OCR_MAX_BATCH_BYTES, OCR_MAX_UPLOAD_BYTES, OCR_MAX_QUEUED_BATCH_PAGES
+from backend.app.services.prescription_ocr import dispatch_ocr, spool_upload, OCRQueueFullError, UploadTooLargeError
+
+IMAGE_EXTENSIONS = {".png", ".jpg", ".jpeg", ".tif", ".tiff", ".bmp", ".gif", ".webp"}
+ZIP_CONTENT_TYPES = {"application/zip", "application/x-zip-compressed", "application/x-zip"}
+
+# How often an NDJSON stream checks its job for newly finished pages (seconds)
+STREAM_POLL_INTERVAL = 0.25
+
+# In-memory job store of this process; page results are appended by the job tasks
+_JOBS: Dict[str, Dict] = {}
+_JOB_EXPIRES_AT: Dict[str, float] = {}
+_JOBS_LOCK = threading.Lock()
+
+# Pages of every job still waiting or running (only changed on the event loop)
+_queued_pages = 0
+# Page tasks of running jobs, referenced so they are not garbage collected
+_JOB_TASKS: Set[asyncio.Task] = set()
+
+def _is_zip(upload) -> bool:
+    return (upload.content_type or "") in ZIP_CONTENT_TYPES or (upload.filename or "").lower().endswith(".zip")
+
+def _is_image(filename: str, content_type: Optional[str] = None) -> bool:
+    if content_type and content_type.startswith("image/"):
+        return True
+    return os.path.splitext(filename)[1].lower() in IMAGE_EXTENSIONS
+
+class _BoundedReader:
+    """File-like wrapper that stops reading after limit bytes"""
+    def __init__(self, source, limit: int):
+        self._source = source
+        self._remaining = limit
+
+    def read(self, size: int = -1) -> bytes:
+        if self._remaining <= 0:
+            return b""
+        if size < 0 or size > self._remaining:
+            size = self._remaining
+        data = self._source.read(size)
+        self._remaining -= len(data)
+        return data
+
+def _extract_zip_pages(zip_path: str, max_pages: int, max_bytes: int) -> Tuple[List[Tuple[str, Optional[str], Optional[str]]], int]:
+    """
+    Copy every image in a zip to its own temporary file, stopping as soon as the
+    batch's page or byte budget is exceeded
+
+    Args:
+        zip_path: Spooled archive
+        max_pages: Image entries the batch can still take
+        max_bytes: Extracted bytes the batch can still take
+
+    Returns:
+        (filename, path, error) per image entry, where path is None when the entry
+        was rejected, and the number of bytes extracted
+
+    Raises:
+        ValueError: If the archive is invalid or holds more than max_pages images
+        UploadTooLargeError: If the extracted images exceed max_bytes
+    """
+    pages = []
+    extracted = 0
+    try:
+        with zipfile.ZipFile(zip_path) as archive:
+            for info in archive.infolist():
+                if info.is_dir() or not _is_image(info.filename):
+                    continue
+                if len(pages) >= max_pages:
+                    raise ValueError(f"Batch exceeds {OCR_BATCH_MAX_PAGES} pages")
+                if info.file_size > OCR_MAX_UPLOAD_BYTES:
+                    pages.append((info.filename, None, f"Page exceeds {OCR_MAX_UPLOAD_BYTES} bytes"))
+                    continue
+                # Read one byte past the smaller cap so a lying header cannot inflate
+                # the page or the batch
+                cap = min(OCR_MAX_UPLOAD_BYTES, max_bytes - extracted)
+                suffix = os.path.splitext(info.filename)[1]
+                with archive.open(info) as source, tempfile.NamedTemporaryFile(prefix="rx-", suffix=suffix, delete=False) as target:
+                    shutil.copyfileobj(_BoundedReader(source, cap + 1), target)
+                    size = target.tell()
+                if size > cap:
+                    os.unlink(target.name)
+                    if cap < OCR_MAX_UPLOAD_BYTES:
+                        raise UploadTooLargeError(f"Batch exceeds {OCR_MAX_BATCH_BYTES} bytes")
+                    pages.append((info.filename, None, f"Page exceeds {OCR_MAX_UPLOAD_BYTES} bytes"))
+                else:
+                    extracted += size
+                    pages.append((info.filename, target.name, None))
+    except BaseException as e:
+        for _, path, _ in pages:
+            if path:
+                os.unlink(path)
+        if isinstance(e, zipfile.BadZipFile):
+            raise ValueError(f"Invalid zip archive: {e}")
+        raise
+    return pages, extracted
+
+def _purge_expired_jobs():
+    now = time.monotonic()
+    with _JOBS_LOCK:
+        for job_id in [job_id for job_id, expires in _JOB_EXPIRES_AT.items() if expires <= now]:
+            del _JOB_EXPIRES_AT[job_id]
+            _JOBS.pop(job_id, None)
+
+async def _scan_page(job_id: str, index: int, filename: str, path: str):
+    """OCR one page of a job, record the result and remove its temporary file"""
+    global _queued_pages
+    page = {"index": index, "filename": filename}
+    try:
+        result = await dispatch_ocr(path, batch=True)
+        page.update({
+            "status": "completed",
+            "medications": result["medications"],
+            "prescription_data": result["prescription_data"],
+            "ocr_text": result["text"]
+        })
+    except asyncio.CancelledError:
+        page.update({"status": "failed", "error": "Scan cancelled"})
+        raise
+    except Exception as e:
+        page.update({"status": "failed", "error": str(e)})
+    finally:
+        _queued_pages -= 1
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+        _record_page(job_id, page)
+
+def _record_page(job_id: str, page: Dict):
+    with _JOBS_LOCK:
+        job = _JOBS.get(job_id)
+        if job is None:
+            return
+        job["pages"].append(page)
+        if page["status"] == "completed":
+            job["completed_pages"] += 1
+        else:
+            job["failed_pages"] += 1
+        if job["completed_pages"] + job["failed_pages"] == job["total_pages"]:
+            job["status"] = "completed"
+            job["finished_at"] = datetime.now().isoformat()
+            _JOB_EXPIRES_AT[job_id] = time.monotonic() + OCR_JOB_TTL_SECONDS
+
+async def _spool_batch(uploads: List) -> List[Tuple[str, Optional[str], Optional[str]]]:
+    """Spool uploaded files and zip contents to temporary files, one per page"""
+    pages = []
+    total_bytes = 0
+    try:
+        for upload in uploads:
+            filename = upload.filename or f"page-{len(pages) + 1}"
+            if _is_zip(upload):
+                zip_path = await spool_upload(upload, suffix=".zip", max_bytes=OCR_MAX_BATCH_BYTES - total_bytes)
+                try:
+                    # The archive is deleted after extraction: count the images it
+                    # expands to, not its compressed size
+                    zip_pages, extracted = await asyncio.to_thread(
+                        _extract_zip_pages, zip_path, OCR_BATCH_MAX_PAGES - len(pages), OCR_MAX_BATCH_BYTES - total_bytes
+                    )
+                    pages.extend(zip_pages)
+                    total_bytes += extracted
+                finally:
+                    os.unlink(zip_path)
+            elif _is_image(filename, upload.content_type):
+                try:
+                    path = await spool_upload(upload, suffix=os.path.splitext(filename)[1])
+                except UploadTooLargeError as e:
+                    pages.append((filename, None, str(e)))
+                    continue
+                total_bytes += os.path.getsize(path)
+                pages.append((filename, path, None))
+                if total_bytes > OCR_MAX_BATCH_BYTES:
+                    raise UploadTooLargeError(f"Batch exceeds {OCR_MAX_BATCH_BYTES} bytes")
+            else:
+                pages.append((filename, None, "File must be an image or a zip of images"))
+
+            if len(pages) > OCR_BATCH_MAX_PAGES:
+                raise ValueError(f"Batch exceeds {OCR_BATCH_MAX_PAGES} pages")
+    except BaseException:
+        for _, path, _ in pages:
+            if path:
+                os.unlink(path)
+        raise
+    return pages
+
+async def create_scan_job(uploads: List) -> Dict:
+    """
+    Spool a batch of prescription uploads and queue every page for OCR
+
+    Args:
+        uploads: Image files and/or zip archives of images
+
+    Returns:
+        The new job record
+
+    Raises:
+        ValueError: If the batch holds no pages or too many pages, or a zip is invalid
+        UploadTooLargeError: If the batch exceeds OCR_MAX_BATCH_BYTES
+        OCRQueueFullError: If OCR_MAX_QUEUED_BATCH_PAGES pages are already queued
+    """
+    global _queued_pages
+    _purge_expired_jobs()
+    if _queued_pages >= OCR_MAX_QUEUED_BATCH_PAGES:
+        raise OCRQueueFullError("Too many prescription pages queued, please retry shortly")
+    pages = await _spool_batch(uploads)
+    if not pages:
+        raise ValueError("No prescription images in batch")
+    scannable = [(index, filename, path) for index, (filename, path, _) in enumerate(pages) if path is not None]
+    # Other batches may have been queued while this one was spooling
+    if _queued_pages + len(scannable) > OCR_MAX_QUEUED_BATCH_PAGES:
+        for _, _, path in scannable:
+            os.unlink(path)
+        raise OCRQueueFullError("Too many prescription pages queued, please retry shortly")
+    _queued_pages += len(scannable)
+
+    job_id = str(uuid.uuid4())
+    job = {
+        "job_id": job_id,
+        "status": "running",
+        "total_pages": len(pages),
+        "completed_pages": 0,
+        "failed_pages": 0,
+        "created_at": datetime.now().isoformat(),
+        "finished_at": None,
+        "pages": []
+    }
+    with _JOBS_LOCK:
+        _JOBS[job_id] = job
+
+    for index, (filename, path, error) in enumerate(pages):
+        if path is None:
+            _record_page(job_id, {"index": index, "filename": filename, "status": "failed", "error": error})
+
+    # Pages wait on the OCR semaphores, so the pool never holds more than
+    # OCR_BATCH_MAX_CONCURRENCY of them however many pages are queued
+    loop = asyncio.get_running_loop()
+    for index, filename, path in scannable:
+        task = loop.create_task(_scan_page(job_id, index, filename, path))
+        _JOB_TASKS.add(task)
+        task.add_done_callback(_JOB_TASKS.discard)
+
+    return get_scan_job(job_id)
+
+def get_scan_job(job_id: str) -> Optional[Dict]:
+    """
+    Get a snapshot of a scan job
+
+    Args:
+        job_id: Job identifier
+
+    Returns:
+        Job status, counts and finished pages (in completion order), or None if unknown or expired
+    """
+    _purge_expired_jobs()
+    with _JOBS_LOCK:
+        job = _JOBS.get(job_id)
+        if job is None:
+            return None
+        return {**job, "pages": list(job["pages"])}
+
+async def stream_scan_job(job_id: str) -> AsyncIterator[str]:
+    """
+    Yield NDJSON lines: one per page as it finishes, then a final job summary line
+
+    Args:
+        job_id: Job identifier (must exist)
+    """
+    sent = 0
+    while True:
+        with _JOBS_LOCK:
+            job = _JOBS.get(job_id)
+            if job is None:
+                return
+            pages = job["pages"][sent:]
+            summary = None
+            if job["status"] == "completed":
+                summary = {key: value for key, value in job.items() if key != "pages"}
+
+        for page in pages:
+            yield json.dumps(page) + "\n"
+        sent += len(pages)
+
+        if summary is not None:
+            yield json.dumps(summary) + "\n"
+            return
+        await asyncio.sleep(STREAM_POLL_INTERVAL)
@@ -0,0 +1,383 @@
+"""
+Text Search Index
+In-process inverted index for free-text search over records: BM25 ranking with
+weighted fields, prefix matching on the last query term (search-as-you-type)
+and one-typo tolerance through a symmetric-delete lookup
+"""
+from typing import Dict, Iterable, List, Set, Tuple, Union
+from bisect import bisect_left, insort
+import heapq
+import math
+import re
+import unicodedata
+
+# BM25 parameters
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Terms at least this long are matched with one typo when they have no exact match
+TYPO_MIN_LENGTH = 4
+# Prefix terms shorter than this are not expanded (they would match most of the vocabulary)
+PREFIX_MIN_LENGTH = 2
+# Most vocabulary terms a prefix expands to, most frequent first
+PREFIX_MAX_EXPANSIONS = 50
+
+# Score multipliers for inexact matches
+PREFIX_FACTOR = 0.8
+TYPO_FACTOR = 0.6
+
+# Postings are split into impact-ordered blocks of at least this many records; records
+# with equal impact always share a block, so a block's bound is its first impact
+IMPACT_BLOCK_SIZE = 128
+# Postings at least this long keep their blocks cached; shorter ones are split per query
+RANKED_POSTING_MIN_LENGTH = 1024
+# Cached blocks are rebuilt once this share of their posting has changed, or the
+# average record length has drifted by this much. Until then their bounds are
+# scaled up by the drift, so they stay upper bounds.
+RANKED_POSTING_MAX_STALE = 0.05
+RANKED_POSTING_MAX_DRIFT = 0.02
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+FieldValue = Union[str, Iterable[str], None]
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase, accent-stripped alphanumeric tokens of text"""
+    folded = unicodedata.normalize("NFKD", text.lower())
+    folded = "".join(char for char in folded if not unicodedata.combining(char))
+    return _TOKEN_PATTERN.findall(folded)
+
+def _deletes(term: str) -> Set[str]:
+    """term with each single character removed"""
+    return {term[:i] + term[i + 1:] for i in range(len(term))}
+
+def _within_one_edit(a: str, b: str) -> bool:
+    """Whether a and b differ by at most one insertion, deletion, substitution or adjacent swap"""
+    if a == b:
+        return True
+    if abs(len(a) - len(b)) > 1:
+        return False
+    if len(a) > len(b):
+        a, b = b, a
+    i = 0
+    while i < len(a) and a[i] == b[i]:
+        i += 1
+    if len(a) == len(b):
+        return (
+            a[i + 1:] == b[i + 1:]  # substitution
+            or (i + 1 < len(a) and a[i] == b[i + 1] and a[i + 1] == b[i] and a[i + 2:] == b[i + 2:])  # swap
+        )
+    return a[i:] == b[i + 1:]  # insertion
+
+class TextSearchIndex:
+    def __init__(self, field_weights: Dict[str, float]):
+        """
+        Create an empty index
+
+        Args:
+            field_weights: Weight of each searchable field; a term found in a
+                field counts field-weight times toward its frequency
+        """
+        self.field_weights = dict(field_weights)
+        self.clear()
+
+    def clear(self):
+        """Drop every indexed record"""
+        self._postings: Dict[str, Dict[str, float]] = {}   # term -> {key: weighted term frequency}
+        self._doc_terms: Dict[str, Dict[str, float]] = {}  # key -> {term: weighted term frequency}
+        self._doc_length: Dict[str, float] = {}            # key -> weighted token count
+        self._total_length = 0.0
+        self._vocabulary: List[str] = []                   # sorted terms, for prefix lookups
+        self._delete_map: Dict[str, Set[str]] = {}         # term or term minus one char -> terms
+        self._blocks: Dict[str, Tuple[float, List[Tuple[float, Set[str]]]]] = {}  # term -> (average length, impact blocks)
+        self._stale: Dict[str, Set[str]] = {}              # term -> keys changed since its blocks were cached
+
+    def clear_cache(self):
+        """Drop the cached posting blocks; the next searches rebuild them"""
+        self._blocks.clear()
+        self._stale.clear()
+
+    def __len__(self) -> int:
+        return len(self._doc_terms)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._doc_terms
+
+    def rebuild(self, records: Iterable[Tuple[str, Dict[str, FieldValue]]]):
+        """Rebuild the index from (key, fields) pairs"""
+        self.clear()
+        for key, fields in records:
+            self.add(key, fields)
+
+    def add(self, key: str, fields: Dict[str, FieldValue]):
+        """
+        Index a record, replacing what was indexed for key before
+
+        Args:
+            key: Record ID
+            fields: Field name -> text or list of texts; fields without a weight are ignored
+        """
+        if key in self._doc_terms:
+            self.remove(key)
+
+        frequencies: Dict[str, float] = {}
+        length = 0.0
+        for field, weight in self.field_weights.items():
+            value = fields.get(field)
+            if not value:
+                continue
+            texts = [value] if isinstance(value, str) else value
+            for text in texts:
+                for token in tokenize(str(text)):
+                    frequencies[token] = frequencies.get(token, 0.0) + weight
+                    length += weight
+
+        self._doc_terms[key] = frequencies
+        self._doc_length[key] = length
+        self._total_length += length
+        for term, frequency in frequencies.items():
+            posting = self._postings.get(term)
+            if posting is None:
+                posting = self._postings[term] = {}
+                self._add_term(term)
+            posting[key] = frequency
+            self._mark_stale(term, key)
+
+    def remove(self, key: str):
+        """Remove a record from the index"""
+        frequencies = self._doc_terms.pop(key, None)
+        if frequencies is None:
+            return
+        self._total_length -= self._doc_length.pop(key)
+        for term in frequencies:
+            posting = self._postings[term]
+            del posting[key]
+            self._mark_stale(term, key)
+            if not posting:
+                del self._postings[term]
+                self._remove_term(term)
+
+    def _mark_stale(self, term: str, key: str):
+        stale = self._stale.get(term)
+        if stale is None:
+            return
+        stale.add(key)
+        if len(stale) > RANKED_POSTING_MAX_STALE * len(self._postings.get(term, ())):
+            del self._blocks[term]
+            del self._stale[term]
+
+    def _add_term(self, term: str):
+        insort(self._vocabulary, term)
+        if len(term) >= TYPO_MIN_LENGTH - 1:
+            for variant in _deletes(term) | {term}:
+                self._delete_map.setdefault(variant, set()).add(term)
+
+    def _remove_term(self, term: str):
+        del self._vocabulary[bisect_left(self._vocabulary, term)]
+        if len(term) >= TYPO_MIN_LENGTH - 1:
+            for variant in _deletes(term) | {term}:
+                terms = self._delete_map[variant]
+                terms.discard(term)
+                if not terms:
+                    del self._delete_map[variant]
+
+    def _prefix_terms(self, prefix: str) -> List[str]:
+        start = bisect_left(self._vocabulary, prefix)
+        end = bisect_left(self._vocabulary, prefix + "\uffff", lo=start)
+        terms = self._vocabulary[start:end]
+        if len(terms) > PREFIX_MAX_EXPANSIONS:
+            terms = heapq.nlargest(PREFIX_MAX_EXPANSIONS, terms, key=lambda term: len(self._postings[term]))
+        return terms
+
+    def _typo_terms(self, token: str) -> List[str]:
+        candidates: Set[str] = set()
+        for variant in _deletes(token) | {token}:
+            candidates |= self._delete_map.get(variant, set())
+        return [term for term in candidates if term != token and _within_one_edit(token, term)]
+
+    def _expand(self, token: str, is_last: bool) -> Dict[str, float]:
+        """Vocabulary terms a query token matches, with their score factor"""
+        expansions: Dict[str, float] = {}
+        if is_last and len(token) >= PREFIX_MIN_LENGTH:
+            for term in self._prefix_terms(token):
+                expansions[term] = PREFIX_FACTOR
+        if token in self._postings:
+            expansions[token] = 1.0
+        elif len(token) >= TYPO_MIN_LENGTH:
+            for term in self._typo_terms(token):
+                expansions.setdefault(term, TYPO_FACTOR)
+        return expansions
+
+    def _impact(self, frequency: float, length: float, average_length: float) -> float:
+        """BM25 term-frequency component, before idf"""
+        return frequency * (BM25_K1 + 1) / (frequency + BM25_K1 * (1 - BM25_B + BM25_B * length / average_length))
+
+    def _split_blocks(self, posting: Dict[str, float], average_length: float) -> List[Tuple[float, Set[str]]]:
+        """Posting as (impact bound, keys) blocks, highest first"""
+        # Records sharing a frequency and length share an impact; group them first
+        groups: Dict[Tuple[float, float], List[str]] = {}
+        doc_length = self._doc_length
+        for key, frequency in posting.items():
+            groups.setdefault((frequency, doc_length[key]), []).append(key)
+        levels = sorted(
+            ((self._impact(frequency, length, average_length), keys) for (frequency, length), keys in groups.items()),
+            key=lambda level: level[0],
+            reverse=True
+        )
+        blocks: List[Tuple[float, Set[str]]] = []
+        for impact, keys in levels:
+            if blocks and len(blocks[-1][1]) < IMPACT_BLOCK_SIZE:
+                blocks[-1][1].update(keys)
+            else:
+                blocks.append((impact, set(keys)))
+        return blocks
+
+    def _impact_blocks(self, term: str, average_length: float) -> Tuple[List[Tuple[float, Set[str]]], Set[str]]:
+        """
+        Posting of term as (impact bound, keys) blocks, highest first, and the
+        keys whose entries may be out of date (they must be scored directly)
+        """
+        posting = self._postings[term]
+        if len(posting) < RANKED_POSTING_MIN_LENGTH:
+            return self._split_blocks(posting, average_length), set()
+
+        cached = self._blocks.get(term)
+        if cached is None or abs(cached[0] - average_length) > RANKED_POSTING_MAX_DRIFT * cached[0]:
+            cached = self._blocks[term] = (average_length, self._split_blocks(posting, average_length))
+            self._stale[term] = set()
+        # A longer average raises every impact, by at most the same ratio
+        drift = average_length / cached[0]
+        if drift > 1.0:
+            return [(bound * drift, keys) for bound, keys in cached[1]], self._stale[term]
+        return cached[1], self._stale[term]
+
+    def search(self, query: str, limit: int = 10) -> List[Tuple[str, float]]:
+        """
+        Rank records against a free-text query
+
+        Every query term is optional and scored with BM25; a record matching
+        several forms of one term (exact, prefix, typo) counts its best. Each
+        term's posting is read in impact-ordered blocks (block-max threshold
+        algorithm): the next block comes from the term with the highest bound,
+        and its unseen records are split by which other terms they contain.
+        A group whose bound (the block's plus the other terms' next bounds)
+        cannot reach the top limit is dropped as a set without being scored,
+        so records tied on one term cost little, and the search stops once no
+        unread block could enter the top limit.
+
+        Args:
+            query: Free text
+            limit: Number of results
+
+        Returns:
+            (key, score) pairs, best first
+        """
+        tokens = tokenize(query)
+        document_count = len(self._doc_terms)
+        if not tokens or not document_count or limit <= 0:
+            return []
+        average_length = self._total_length / document_count or 1.0
+
+        # Per token: its matching terms with idf weight, and its blocks across
+        # all of them as (score bound, keys), best first
+        token_terms: List[List[Tuple[str, float]]] = []
+        token_blocks: List[List[Tuple[float, Set[str]]]] = []
+        candidates: Set[str] = set()
+        for position, token in enumerate(tokens):
+            terms = []
+            blocks = []
+            for term, factor in self._expand(token, position == len(tokens) - 1).items():
+                frequency = len(self._postings[term])
+                weight = factor * math.log(1 + (document_count - frequency + 0.5) / (frequency + 0.5))
+                term_blocks, stale = self._impact_blocks(term, average_length)
+                terms.append((term, weight))
+                blocks.extend((weight * bound, keys) for bound, keys in term_blocks)
+                candidates |= stale
+            if terms:
+                blocks.sort(key=lambda block: block[0], reverse=True)
+                token_terms.append(terms)
+                token_blocks.append(blocks)
+
+        def score(key: str) -> float:
+            length = self._doc_length[key]
+            total = 0.0
+            for terms in token_terms:
+                best = 0.0
+                for term, weight in terms:
+                    frequency = self._postings[term].get(key)
+                    if frequency is not None:
+                        best = max(best, weight * self._impact(frequency, length, average_length))
+                total += best
+            return total
+
+        top: List[Tuple[float, str]] = []  # min-heap of the best limit (score, key)
+        seen: Set[str] = set()             # scored, or shown unable to enter top
+
+        def consider(key: str):
+            if key in seen or key not in self._doc_terms:
+                return
+            seen.add(key)
+            entry = (score(key), key)
+            if len(top) < limit:
+                heapq.heappush(top, entry)
+            elif entry > top[0]:
+                heapq.heapreplace(top, entry)
+
+        def threshold() -> float:
+            return top[0][0] if len(top) == limit else -1.0
+
+        # Records changed since a term's blocks were cached may sit out of place in them
+        for key in candidates:
+            consider(key)
+
+        heads = [0] * len(token_blocks)  # next unread block of each token
+
+        def head_bound(index: int) -> float:
+            blocks = token_blocks[index]
+            return blocks[heads[index]][0] if heads[index] < len(blocks) else 0.0
+
+        def split(keys: Set[str], bound: float, others: List[int]):
+            # Score keys that could still enter top: split them by the unread
+            # block of each other token they fall in, best group first, and drop
+            # groups whose bound falls short
+            if not keys:
+                return
+            if bound + sum(head_bound(other) for other in others) < threshold():
+                seen.update(keys)
+                return
+            if not others:
+                for key in keys:
+                    if threshold() >= bound:
+                        break  # The rest score at most bound
+                    consider(key)
+                seen.update(keys)
+                return
+            other, rest = others[0], others[1:]
+            rest_bound = sum(head_bound(index) for index in rest)
+            for block_bound, block_keys in token_blocks[other][heads[other]:]:
+                if bound + block_bound + rest_bound < threshold():
+                    # The keys left are in this block or below, if they contain the token at all
+                    split(keys, bound + block_bound, rest)
+                    return
+                inside = keys & block_keys
+                if inside:
+                    keys = keys - inside
+                    split(inside, bound + block_bound, rest)
+                    if not keys:
+                        return
+            # Not in any unread block: the keys left do not contain the token
+            split(keys, bound, rest)
+
+        while True:
+            live = [index for index in range(len(token_blocks)) if heads[index] < len(token_blocks[index])]
+            if not live:
+                break
+            if threshold() >= sum(head_bound(index) for index in live):
+                break
+            index = max(live, key=head_bound)
+            bound, keys = token_blocks[index][heads[index]]
+            heads[index] += 1
+            others = sorted((other for other in live if other != index), key=head_bound, reverse=True)
+            split(keys - seen, bound, others)
+
+        return [(key, value) for value, key in sorted(top, reverse=True)]
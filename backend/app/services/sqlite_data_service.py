@@ -0,0 +1,568 @@
+"""
+SQLite Data Service
+real_data_service's patient, doctor, hospital and bed availability operations
+over one SQLite database file, so every worker on a host reads and writes the
+same records and they survive restarts. Selected with STORAGE_BACKEND=sqlite.
+
+Records are stored as JSON next to the columns they are filtered by; free-text
+search runs on FTS5 tables with the same field weights as the in-memory index.
+The database is in WAL mode so readers never wait for the writer, and each
+thread keeps its own connection, whose statement cache reuses the prepared
+form of the fixed SQL below.
+"""
+from typing import Dict, Iterable, List, Optional, Tuple
+from contextlib import contextmanager
+from datetime import datetime
+import os
+import sqlite3
+import threading
+import uuid
+
+from backend.app.config import SQLITE_PATH
+from backend.app.services import json_codec
+from backend.app.services.lazy_loading import LazyInit
+from backend.app.services.search_index import PREFIX_MIN_LENGTH, tokenize
+from backend.app.services import real_data_service
+from backend.app.services.real_data_service import (
+    _PATIENTS_INDEX, _DOCTORS_INDEX, _HOSPITALS_INDEX,
+    _patient_search_fields, _doctor_search_fields, _hospital_search_fields,
+    encode_store_cursor, decode_store_cursor
+)
+
+# How long a write waits for another worker's transaction before failing
+BUSY_TIMEOUT_SECONDS = 10.0
+# Prepared statements kept per connection
+STATEMENT_CACHE_SIZE = 256
+# Database pages each connection reads through mmap rather than read() calls
+MMAP_SIZE_BYTES = 256 * 1024 * 1024
+
+# Record tables: (FTS table, weights of its columns) in the in-memory index's field order
+_SEARCH_WEIGHTS = {
+    "patients": _PATIENTS_INDEX.field_weights,
+    "doctors": _DOCTORS_INDEX.field_weights,
+    "hospitals": _HOSPITALS_INDEX.field_weights
+}
+
+def _fts_schema(table: str) -> str:
+    columns = ", ".join(_SEARCH_WEIGHTS[table])
+    return f"CREATE VIRTUAL TABLE IF NOT EXISTS {table}_fts USING fts5({columns}, tokenize = 'unicode61 remove_diacritics 2')"
+
+# seq numbers records in insertion order (AUTOINCREMENT never reuses one), for
+# listing order and cursors; it is also the rowid of the record's FTS row
+_SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS patients (
+        seq INTEGER PRIMARY KEY AUTOINCREMENT,
+        id TEXT NOT NULL UNIQUE,
+        data TEXT NOT NULL
+    )""",
+    """CREATE TABLE IF NOT EXISTS doctors (
+        seq INTEGER PRIMARY KEY AUTOINCREMENT,
+        id TEXT NOT NULL UNIQUE,
+        hospital_id TEXT,
+        specialization TEXT COLLATE NOCASE,
+        data TEXT NOT NULL
+    )""",
+    "CREATE INDEX IF NOT EXISTS doctors_hospital_id ON doctors (hospital_id)",
+    "CREATE INDEX IF NOT EXISTS doctors_specialization ON doctors (specialization)",
+    """CREATE TABLE IF NOT EXISTS hospitals (
+        seq INTEGER PRIMARY KEY AUTOINCREMENT,
+        id TEXT NOT NULL UNIQUE,
+        city TEXT COLLATE NOCASE,
+        state TEXT COLLATE NOCASE,
+        data TEXT NOT NULL
+    )""",
+    "CREATE INDEX IF NOT EXISTS hospitals_city ON hospitals (city)",
+    "CREATE INDEX IF NOT EXISTS hospitals_state ON hospitals (state)",
+    """CREATE TABLE IF NOT EXISTS bed_availability (
+        seq INTEGER PRIMARY KEY AUTOINCREMENT,
+        hospital_id TEXT NOT NULL UNIQUE,
+        data TEXT NOT NULL
+    )""",
+    "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)",
+    *(_fts_schema(table) for table in _SEARCH_WEIGHTS)
+]
+
+# Row inserts per record type (column values come from _ROW_BUILDERS)
+_INSERTS = {
+    "patients": "INSERT INTO patients (id, data) VALUES (?, ?)",
+    "doctors": "INSERT INTO doctors (id, hospital_id, specialization, data) VALUES (?, ?, ?, ?)",
+    "hospitals": "INSERT INTO hospitals (id, city, state, data) VALUES (?, ?, ?, ?)",
+    "beds": "INSERT INTO bed_availability (hospital_id, data) VALUES (?, ?)"
+}
+_UPDATES = {
+    "patients": "UPDATE patients SET data = ? WHERE id = ?",
+    "doctors": "UPDATE doctors SET hospital_id = ?, specialization = ?, data = ? WHERE id = ?",
+    "hospitals": "UPDATE hospitals SET city = ?, state = ?, data = ? WHERE id = ?",
+    "beds": "UPDATE bed_availability SET data = ? WHERE hospital_id = ?"
+}
+# FTS rows take the seq of the record row with the same ID
+_FTS_INSERTS = {
+    table: f"INSERT INTO {table}_fts (rowid, {', '.join(weights)}) "
+           f"SELECT seq, {', '.join('?' for _ in weights)} FROM {table} WHERE id = ?"
+    for table, weights in _SEARCH_WEIGHTS.items()
+}
+_FTS_DELETES = {table: f"DELETE FROM {table}_fts WHERE rowid = (SELECT seq FROM {table} WHERE id = ?)" for table in _SEARCH_WEIGHTS}
+_SEARCHES = {
+    table: f"SELECT r.data, bm25({table}_fts, {', '.join(str(w) for w in weights.values())}) AS rank "
+           f"FROM {table}_fts JOIN {table} r ON r.seq = {table}_fts.rowid "
+           f"WHERE {table}_fts MATCH ? ORDER BY rank LIMIT ?"
+    for table, weights in _SEARCH_WEIGHTS.items()
+}
+
+def _encode(record: dict) -> str:
+    return json_codec.dumps(record).decode("utf-8")
+
+_ROW_BUILDERS = {
+    "patients": lambda p: (p["id"], _encode(p)),
+    "doctors": lambda d: (d["id"], d.get("hospital_id"), d.get("specialization"), _encode(d)),
+    "hospitals": lambda h: (h["id"], h.get("city"), h.get("state"), _encode(h)),
+    "beds": lambda b: (b["hospital_id"], _encode(b))
+}
+
+def _field_text(value) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, str):
+        return value
+    return " ".join(str(item) for item in value if item)
+
+def _fts_row(table: str, record_id: str, fields: Dict) -> Tuple:
+    return (*(_field_text(fields.get(field)) for field in _SEARCH_WEIGHTS[table]), record_id)
+
+# ---------------------------------------------------------------------------
+# Connections
+# ---------------------------------------------------------------------------
+
+_local = threading.local()
+_CONNECTIONS: List[sqlite3.Connection] = []
+_CONNECTIONS_LOCK = threading.Lock()
+
+def _connect(path: str) -> sqlite3.Connection:
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    # Autocommit mode: transactions are opened explicitly by _transaction. The
+    # connection is only used by the thread that opened it, but closed at
+    # shutdown from another one.
+    connection = sqlite3.connect(
+        path,
+        timeout=BUSY_TIMEOUT_SECONDS,
+        isolation_level=None,
+        check_same_thread=False,
+        cached_statements=STATEMENT_CACHE_SIZE
+    )
+    connection.execute("PRAGMA journal_mode = WAL")
+    # In WAL mode NORMAL only syncs at checkpoints: a power loss can drop the last
+    # commits but cannot corrupt the database
+    connection.execute("PRAGMA synchronous = NORMAL")
+    connection.execute(f"PRAGMA mmap_size = {MMAP_SIZE_BYTES}")
+    return connection
+
+def get_connection() -> sqlite3.Connection:
+    """This thread's connection to SQLITE_PATH, opened on first use"""
+    connection = getattr(_local, "connection", None)
+    if connection is None:
+        connection = _connect(SQLITE_PATH)
+        _local.connection = connection
+        with _CONNECTIONS_LOCK:
+            _CONNECTIONS.append(connection)
+    return connection
+
+def close_connections():
+    """Close every thread's connection (at shutdown)"""
+    with _CONNECTIONS_LOCK:
+        connections = list(_CONNECTIONS)
+        _CONNECTIONS.clear()
+    for connection in connections:
+        try:
+            connection.close()
+        except sqlite3.Error as e:
+            print(f"Error closing SQLite connection: {e}")
+    _local.__dict__.clear()
+
+@contextmanager
+def _transaction():
+    """
+    Write transaction on this thread's connection
+
+    BEGIN IMMEDIATE takes the write lock up front, so a read-modify-write cannot
+    interleave with another worker's.
+    """
+    connection = get_connection()
+    connection.execute("BEGIN IMMEDIATE")
+    try:
+        yield connection
+    except BaseException:
+        connection.execute("ROLLBACK")
+        raise
+    connection.execute("COMMIT")
+
+# ---------------------------------------------------------------------------
+# Schema, seeding and bulk loading
+# ---------------------------------------------------------------------------
+
+def _insert(connection: sqlite3.Connection, kind: str, records: List[dict]):
+    connection.executemany(_INSERTS[kind], map(_ROW_BUILDERS[kind], records))
+    if kind == "patients":
+        connection.executemany(_FTS_INSERTS["patients"], (_fts_row("patients", p["id"], _patient_search_fields(p)) for p in records))
+    elif kind == "hospitals":
+        connection.executemany(_FTS_INSERTS["hospitals"], (_fts_row("hospitals", h["id"], _hospital_search_fields(h)) for h in records))
+    elif kind == "doctors":
+        cities = _hospital_cities(connection, {d.get("hospital_id") for d in records})
+        connection.executemany(_FTS_INSERTS["doctors"], (
+            _fts_row("doctors", d["id"], _doctor_search_fields(d, {"city": cities.get(d.get("hospital_id"))}))
+            for d in records
+        ))
+
+def _hospital_cities(connection: sqlite3.Connection, hospital_ids: Iterable[Optional[str]]) -> Dict[str, Optional[str]]:
+    cities = {}
+    for hospital_id in hospital_ids:
+        if hospital_id is not None:
+            row = connection.execute("SELECT city FROM hospitals WHERE id = ?", (hospital_id,)).fetchone()
+            cities[hospital_id] = row[0] if row else None
+    return cities
+
+def bulk_insert(kind: str, records: List[dict]) -> int:
+    """
+    Insert many records of one type in a single transaction
+
+    Args:
+        kind: "hospitals", "doctors", "patients" or "beds"; insert doctors after
+            their hospitals so they are searchable by the hospital's city
+        records: Complete records (with their "id", or "hospital_id" for beds)
+
+    Returns:
+        Number of records inserted
+
+    Raises:
+        ValueError: If kind is unknown
+        sqlite3.IntegrityError: If a record ID already exists (nothing is inserted)
+    """
+    if kind not in _INSERTS:
+        raise ValueError(f"Unknown record type: {kind}")
+    ensure_data_loaded()
+    with _transaction() as connection:
+        _insert(connection, kind, records)
+    return len(records)
+
+def bulk_load(batches: Iterable[Tuple[str, List[dict]]], replace: bool = True) -> Dict[str, int]:
+    """
+    Write generated (record type, records) batches to the database, one
+    transaction per batch
+
+    Record types the database does not hold (encounters) are counted but dropped.
+
+    Args:
+        batches: Output of population_generator.generate_population
+        replace: Delete every record first instead of adding to the existing ones
+
+    Returns:
+        Records received per type
+    """
+    ensure_data_loaded()
+    if replace:
+        with _transaction() as connection:
+            _delete_all(connection)
+    written: Dict[str, int] = {}
+    for kind, records in batches:
+        if kind in _INSERTS:
+            with _transaction() as connection:
+                _insert(connection, kind, records)
+        written[kind] = written.get(kind, 0) + len(records)
+    return written
+
+def _delete_all(connection: sqlite3.Connection):
+    for table in ("patients", "doctors", "hospitals", "bed_availability"):
+        connection.execute(f"DELETE FROM {table}")
+    for table in _SEARCH_WEIGHTS:
+        connection.execute(f"DELETE FROM {table}_fts")
+
+def _init_database():
+    with _transaction() as connection:
+        for statement in _SCHEMA:
+            connection.execute(statement)
+        # The first worker to get here seeds the database from the in-memory
+        # stores (the demo data, or its snapshot); later ones find it seeded
+        if connection.execute("SELECT 1 FROM meta WHERE key = 'seeded'").fetchone() is None:
+            real_data_service.ensure_data_loaded()
+            for kind, store in (
+                ("hospitals", real_data_service.HOSPITALS_DB),
+                ("doctors", real_data_service.DOCTORS_DB),
+                ("patients", real_data_service.PATIENTS_DB),
+                ("beds", real_data_service.BED_AVAILABILITY_DB)
+            ):
+                _insert(connection, kind, list(store.values()))
+            connection.execute("INSERT INTO meta (key, value) VALUES ('seeded', ?)", (datetime.now().isoformat(),))
+
+# The schema is created (and seeded) on first use of the database
+_database = LazyInit("sqlite_data_service", _init_database)
+ensure_data_loaded = _database.ensure
+
+# ---------------------------------------------------------------------------
+# Shared query helpers
+# ---------------------------------------------------------------------------
+
+def _decode(data: str) -> dict:
+    return json_codec.loads(data)
+
+def _select(sql: str, params: Tuple = ()) -> List[dict]:
+    return [_decode(data) for data, in get_connection().execute(sql, params)]
+
+def _select_one(sql: str, params: Tuple) -> Optional[dict]:
+    row = get_connection().execute(sql, params).fetchone()
+    return _decode(row[0]) if row else None
+
+def _page(table: str, limit: int, cursor: Optional[str], filters: List[Tuple[str, object]] = ()) -> Tuple[List[dict], Optional[str]]:
+    """
+    One page of a table in listing order, as real_data_service's _store_page
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    after = decode_store_cursor(cursor) if cursor else 0
+    where = "".join(f" AND {condition}" for condition, _ in filters)
+    rows = get_connection().execute(
+        f"SELECT seq, data FROM {table} WHERE seq > ?{where} ORDER BY seq LIMIT ?",
+        (after, *(value for _, value in filters), limit + 1)
+    ).fetchall()
+    records = [_decode(data) for _, data in rows[:limit]]
+    next_cursor = encode_store_cursor(rows[limit - 1][0]) if len(rows) > limit else None
+    return records, next_cursor
+
+def _match_query(query: str) -> Optional[str]:
+    """FTS5 query matching any term of query, the last as a prefix (as TextSearchIndex does)"""
+    tokens = tokenize(query)
+    if not tokens:
+        return None
+    # Tokens are plain alphanumerics, so quoting them cannot inject FTS syntax
+    terms = [f'"{token}"' for token in tokens]
+    if len(tokens[-1]) >= PREFIX_MIN_LENGTH:
+        terms[-1] += "*"
+    return " OR ".join(terms)
+
+def _search(table: str, query: str, limit: int) -> List[dict]:
+    match = _match_query(query)
+    if match is None:
+        return []
+    rows = get_connection().execute(_SEARCHES[table], (match, limit)).fetchall()
+    # bm25() is lower-is-better; report it as a positive score like the in-memory index
+    return [{**_decode(data), "search_score": round(-rank, 4)} for data, rank in rows]
+
+def _new_record(data: dict) -> dict:
+    return {
+        **data,
+        "id": str(uuid.uuid4()),
+        "created_at": datetime.now().isoformat(),
+        "updated_at": datetime.now().isoformat()
+    }
+
+def _update(kind: str, table: str, key_column: str, record_id: str, changes: dict, timestamp_field: str) -> Optional[dict]:
+    """Merge changes into a record inside the caller's transaction; None if it does not exist"""
+    connection = get_connection()
+    row = connection.execute(f"SELECT data FROM {table} WHERE {key_column} = ?", (record_id,)).fetchone()
+    if row is None:
+        return None
+    updated = {**_decode(row[0]), **changes, timestamp_field: datetime.now().isoformat()}
+    values = _ROW_BUILDERS[kind](updated)
+    connection.execute(_UPDATES[kind], (*values[1:], record_id))
+    return updated
+
+def _replace_fts_row(connection: sqlite3.Connection, table: str, record_id: str, fields: Dict):
+    connection.execute(_FTS_DELETES[table], (record_id,))
+    connection.execute(_FTS_INSERTS[table], _fts_row(table, record_id, fields))
+
+def _delete(table: str, record_id: str) -> bool:
+    with _transaction() as connection:
+        if table in _SEARCH_WEIGHTS:
+            connection.execute(_FTS_DELETES[table], (record_id,))
+        return connection.execute(f"DELETE FROM {table} WHERE id = ?", (record_id,)).rowcount > 0
+
+# ---------------------------------------------------------------------------
+# Patient operations
+# ---------------------------------------------------------------------------
+
+@_database
+def get_all_patients() -> List[dict]:
+    return _select("SELECT data FROM patients ORDER BY seq")
+
+@_database
+def get_patients_page(limit: int = 50, cursor: Optional[str] = None) -> Dict:
+    """Page of patients with the cursor for the next page"""
+    patients, next_cursor = _page("patients", limit, cursor)
+    return {"patients": patients, "next_cursor": next_cursor}
+
+@_database
+def search_patients(query: str, limit: int = 20) -> List[dict]:
+    """Patients ranked against a free-text query over names, conditions and address"""
+    return _search("patients", query, limit)
+
+@_database
+def get_patient(patient_id: str) -> Optional[dict]:
+    return _select_one("SELECT data FROM patients WHERE id = ?", (patient_id,))
+
+@_database
+def create_patient(patient_data: dict) -> dict:
+    patient = _new_record(patient_data)
+    with _transaction() as connection:
+        _insert(connection, "patients", [patient])
+    return patient
+
+@_database
+def update_patient(patient_id: str, patient_data: dict) -> Optional[dict]:
+    with _transaction() as connection:
+        updated = _update("patients", "patients", "id", patient_id, patient_data, "updated_at")
+        if updated is not None:
+            _replace_fts_row(connection, "patients", patient_id, _patient_search_fields(updated))
+    return updated
+
+@_database
+def delete_patient(patient_id: str) -> bool:
+    return _delete("patients", patient_id)
+
+# ---------------------------------------------------------------------------
+# Doctor operations
+# ---------------------------------------------------------------------------
+
+@_database
+def get_all_doctors() -> List[dict]:
+    return _select("SELECT data FROM doctors ORDER BY seq")
+
+@_database
+def get_doctor(doctor_id: str) -> Optional[dict]:
+    return _select_one("SELECT data FROM doctors WHERE id = ?", (doctor_id,))
+
+@_database
+def get_doctors_by_hospital(hospital_id: str) -> List[dict]:
+    return _select("SELECT data FROM doctors WHERE hospital_id = ? ORDER BY seq", (hospital_id,))
+
+@_database
+def get_doctors_by_specialization(specialization: str) -> List[dict]:
+    return _select("SELECT data FROM doctors WHERE specialization = ? ORDER BY seq", (specialization,))
+
+@_database
+def get_doctors_page(
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    hospital_id: Optional[str] = None,
+    specialization: Optional[str] = None
+) -> Dict:
+    """Page of doctors, optionally filtered as get_doctors_by_hospital/specialization do"""
+    filters = []
+    if hospital_id:
+        filters.append(("hospital_id = ?", hospital_id))
+    elif specialization:
+        filters.append(("specialization = ?", specialization))
+    doctors, next_cursor = _page("doctors", limit, cursor, filters)
+    return {"doctors": doctors, "next_cursor": next_cursor}
+
+@_database
+def search_doctors(query: str, limit: int = 20) -> List[dict]:
+    """Doctors ranked against a free-text query over names, specialization and hospital city"""
+    return _search("doctors", query, limit)
+
+@_database
+def create_doctor(doctor_data: dict) -> dict:
+    doctor = _new_record(doctor_data)
+    with _transaction() as connection:
+        _insert(connection, "doctors", [doctor])
+    return doctor
+
+@_database
+def update_doctor(doctor_id: str, doctor_data: dict) -> Optional[dict]:
+    with _transaction() as connection:
+        updated = _update("doctors", "doctors", "id", doctor_id, doctor_data, "updated_at")
+        if updated is not None:
+            city = _hospital_cities(connection, [updated.get("hospital_id")]).get(updated.get("hospital_id"))
+            _replace_fts_row(connection, "doctors", doctor_id, _doctor_search_fields(updated, {"city": city}))
+    return updated
+
+@_database
+def delete_doctor(doctor_id: str) -> bool:
+    return _delete("doctors", doctor_id)
+
+# ---------------------------------------------------------------------------
+# Hospital operations
+# ---------------------------------------------------------------------------
+
+def _hospital_filters(city: Optional[str], state: Optional[str], specialty: Optional[str]) -> List[Tuple[str, object]]:
+    filters = []
+    if city:
+        filters.append(("city = ?", city))
+    if state:
+        filters.append(("state = ?", state))
+    if specialty:
+        filters.append(("EXISTS (SELECT 1 FROM json_each(data, '$.specialties') WHERE value = ? COLLATE NOCASE)", specialty))
+    return filters
+
+@_database
+def get_all_hospitals() -> List[dict]:
+    return _select("SELECT data FROM hospitals ORDER BY seq")
+
+@_database
+def get_hospital(hospital_id: str) -> Optional[dict]:
+    return _select_one("SELECT data FROM hospitals WHERE id = ?", (hospital_id,))
+
+@_database
+def search_hospitals(city: Optional[str] = None, state: Optional[str] = None, specialty: Optional[str] = None) -> List[dict]:
+    filters = _hospital_filters(city, state, specialty)
+    where = " AND ".join(condition for condition, _ in filters) or "1"
+    return _select(f"SELECT data FROM hospitals WHERE {where} ORDER BY seq", tuple(value for _, value in filters))
+
+@_database
+def get_hospitals_page(
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    city: Optional[str] = None,
+    state: Optional[str] = None,
+    specialty: Optional[str] = None
+) -> Dict:
+    """Page of hospitals, optionally filtered as search_hospitals does"""
+    hospitals, next_cursor = _page("hospitals", limit, cursor, _hospital_filters(city, state, specialty))
+    return {"hospitals": hospitals, "next_cursor": next_cursor}
+
+@_database
+def search_hospitals_text(query: str, limit: int = 20) -> List[dict]:
+    """Hospitals ranked against a free-text query over name, city, specialties and facilities"""
+    return _search("hospitals", query, limit)
+
+@_database
+def create_hospital(hospital_data: dict) -> dict:
+    hospital = _new_record(hospital_data)
+    with _transaction() as connection:
+        _insert(connection, "hospitals", [hospital])
+    return hospital
+
+@_database
+def update_hospital(hospital_id: str, hospital_data: dict) -> Optional[dict]:
+    with _transaction() as connection:
+        updated = _update("hospitals", "hospitals", "id", hospital_id, hospital_data, "updated_at")
+        if updated is None:
+            return None
+        _replace_fts_row(connection, "hospitals", hospital_id, _hospital_search_fields(updated))
+        if "city" in hospital_data:
+            # Doctors are searchable by their hospital's city
+            hospital = {"city": updated.get("city")}
+            for data, in connection.execute("SELECT data FROM doctors WHERE hospital_id = ?", (hospital_id,)).fetchall():
+                doctor = _decode(data)
+                _replace_fts_row(connection, "doctors", doctor["id"], _doctor_search_fields(doctor, hospital))
+    return updated
+
+@_database
+def delete_hospital(hospital_id: str) -> bool:
+    return _delete("hospitals", hospital_id)
+
+# ---------------------------------------------------------------------------
+# Bed availability operations
+# ---------------------------------------------------------------------------
+
+@_database
+def get_bed_availability(hospital_id: str) -> Optional[dict]:
+    return _select_one("SELECT data FROM bed_availability WHERE hospital_id = ?", (hospital_id,))
+
+@_database
+def get_all_bed_availability() -> List[dict]:
+    return _select("SELECT data FROM bed_availability ORDER BY seq")
+
+@_database
+def update_bed_availability(hospital_id: str, bed_data: dict) -> Optional[dict]:
+    with _transaction():
+        return _update("beds", "bed_availability", "hospital_id", hospital_id, bed_data, "last_updated")
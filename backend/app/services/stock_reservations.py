@@ -0,0 +1,231 @@
+"""
+Stock Reservation Service
+Holds inventory for pending dispenses. A reservation is reserved, then committed
+(the stock is dispensed) or released; holds never resolved expire after their TTL.
+"""
+from typing import Dict, List, Optional, Tuple
+from datetime import datetime
+import asyncio
+import heapq
+import threading
+import time
+import uuid
+
+from backend.app.config import RESERVATION_TTL_SECONDS, RESERVATION_SWEEP_INTERVAL
+from backend.app.services.inventory_service import (
+    DEFAULT_SITE_ID, InsufficientStockError, adjust_stock_quantity, get_site, stock_lock
+)
+from backend.app.services.demand_forecast import record_dispensing_event
+
+RESERVATION_STATES = ["held", "committed", "released", "expired"]
+
+class ReservationStateError(ValueError):
+    """Raised when a reservation is no longer held"""
+
+_RESERVATIONS: Dict[str, Dict] = {}
+_HELD_QUANTITY: Dict[Tuple[str, str], int] = {}  # (site ID, medication name) -> quantity held
+
+# (deadline, reservation id): hold expiry for held reservations, and the time a
+# resolved reservation is dropped. A reservation's current deadline is the last
+# one pushed for it; entries for an earlier deadline are skipped when popped.
+_DEADLINES: List[Tuple[float, str]] = []
+_CURRENT_DEADLINE: Dict[str, float] = {}
+_DEADLINES_LOCK = threading.Lock()
+
+_SWEEPER: Optional[asyncio.Task] = None
+
+def _push_deadline(deadline: float, reservation_id: str):
+    with _DEADLINES_LOCK:
+        _CURRENT_DEADLINE[reservation_id] = deadline
+        heapq.heappush(_DEADLINES, (deadline, reservation_id))
+
+def _unhold(reservation: Dict, status: str):
+    """Resolve a held reservation; the caller holds the medication's stock lock"""
+    key = (reservation["site_id"], reservation["medication_name"])
+    remaining = _HELD_QUANTITY.get(key, 0) - reservation["quantity"]
+    if remaining > 0:
+        _HELD_QUANTITY[key] = remaining
+    else:
+        _HELD_QUANTITY.pop(key, None)
+    reservation["status"] = status
+    reservation["resolved_at"] = datetime.now().isoformat()
+
+def get_held_quantity(medication_name: str, site_id: str = DEFAULT_SITE_ID) -> int:
+    """Quantity of a medication held by active reservations at a site"""
+    return _HELD_QUANTITY.get((site_id, medication_name), 0)
+
+def get_available_quantity(medication_name: str, site_id: str = DEFAULT_SITE_ID) -> Optional[int]:
+    """Quantity on hand minus active holds, or None if the medication is unknown"""
+    med_data = get_site(site_id).inventory.get(medication_name)
+    if med_data is None:
+        return None
+    return med_data.get("stock_quantity", 0) - get_held_quantity(medication_name, site_id)
+
+def reserve_stock(
+    medication_name: str,
+    quantity: int,
+    ttl_seconds: Optional[int] = None,
+    site_id: str = DEFAULT_SITE_ID
+) -> Optional[Dict]:
+    """
+    Hold stock of a medication for a pending dispense
+
+    Args:
+        medication_name: Inventory name of the medication
+        quantity: Units to hold
+        ttl_seconds: Seconds before an unresolved hold expires (default RESERVATION_TTL_SECONDS)
+        site_id: Pharmacy site
+
+    Returns:
+        The reservation record or None if the medication is not in inventory
+
+    Raises:
+        ValueError: If quantity or ttl_seconds is not positive
+        InsufficientStockError: If less than quantity is available
+    """
+    if quantity <= 0:
+        raise ValueError("Quantity must be positive")
+    ttl = RESERVATION_TTL_SECONDS if ttl_seconds is None else ttl_seconds
+    if ttl <= 0:
+        raise ValueError("TTL must be positive")
+
+    # Release lapsed holds first so they never block availability between sweeps
+    expire_reservations()
+
+    site = get_site(site_id)
+    with stock_lock(medication_name, site_id):
+        med_data = site.inventory.get(medication_name)
+        if med_data is None:
+            return None
+        available = med_data.get("stock_quantity", 0) - get_held_quantity(medication_name, site_id)
+        if quantity > available:
+            raise InsufficientStockError(
+                f"Only {max(available, 0)} {med_data.get('unit', 'units')} of {medication_name} available"
+            )
+        _HELD_QUANTITY[(site_id, medication_name)] = get_held_quantity(medication_name, site_id) + quantity
+
+        deadline = time.time() + ttl
+        reservation = {
+            "reservation_id": str(uuid.uuid4()),
+            "site_id": site_id,
+            "medication_name": medication_name,
+            "quantity": quantity,
+            "status": "held",
+            "created_at": datetime.now().isoformat(),
+            "expires_at": datetime.fromtimestamp(deadline).isoformat(),
+            "resolved_at": None
+        }
+        _RESERVATIONS[reservation["reservation_id"]] = reservation
+    _push_deadline(deadline, reservation["reservation_id"])
+    return dict(reservation)
+
+def get_reservation(reservation_id: str) -> Optional[Dict]:
+    """Get a reservation by ID, or None if unknown"""
+    reservation = _RESERVATIONS.get(reservation_id)
+    return dict(reservation) if reservation else None
+
+def _resolve(reservation_id: str, commit: bool) -> Optional[Dict]:
+    reservation = _RESERVATIONS.get(reservation_id)
+    if reservation is None:
+        return None
+    med_name = reservation["medication_name"]
+    site_id = reservation["site_id"]
+    with stock_lock(med_name, site_id):
+        if reservation["status"] == "held" and datetime.fromisoformat(reservation["expires_at"]) <= datetime.now():
+            _unhold(reservation, "expired")
+            _push_deadline(time.time() + RESERVATION_TTL_SECONDS, reservation_id)
+        if reservation["status"] != "held":
+            raise ReservationStateError(f"Reservation {reservation_id} is already {reservation['status']}")
+
+        if commit:
+            # The hold guarantees the stock unless it was set lower directly; then the
+            # hold stays in place and the caller decides whether to release it
+            if adjust_stock_quantity(med_name, -reservation["quantity"], site_id=site_id) is None:
+                _unhold(reservation, "released")
+                raise ReservationStateError(f"{med_name} is no longer in inventory")
+            _unhold(reservation, "committed")
+            record_dispensing_event(med_name, reservation["quantity"], site_id=site_id)
+        else:
+            _unhold(reservation, "released")
+    return dict(reservation)
+
+def commit_reservation(reservation_id: str) -> Optional[Dict]:
+    """
+    Dispense a held reservation: deduct its quantity from stock
+
+    Returns:
+        The committed reservation or None if unknown
+
+    Raises:
+        ReservationStateError: If the reservation is not held (or has expired)
+        InsufficientStockError: If stock was lowered below the held quantity
+    """
+    return _resolve(reservation_id, commit=True)
+
+def release_reservation(reservation_id: str) -> Optional[Dict]:
+    """
+    Return a held reservation's quantity to available stock
+
+    Returns:
+        The released reservation or None if unknown
+
+    Raises:
+        ReservationStateError: If the reservation is not held
+    """
+    return _resolve(reservation_id, commit=False)
+
+def expire_reservations(now: Optional[float] = None) -> int:
+    """
+    Expire lapsed holds, and forget resolved reservations once their deadline
+    passes (committed/released ones at their original expiry, expired ones a TTL
+    after expiring)
+
+    Returns:
+        Number of holds expired
+    """
+    now = time.time() if now is None else now
+    expired = 0
+    while True:
+        with _DEADLINES_LOCK:
+            if not _DEADLINES or _DEADLINES[0][0] > now:
+                break
+            deadline, reservation_id = heapq.heappop(_DEADLINES)
+
+        reservation = _RESERVATIONS.get(reservation_id)
+        if reservation is None:
+            continue
+        with stock_lock(reservation["medication_name"], reservation["site_id"]):
+            # Resolving an expired hold pushes a later deadline; the earlier entry is stale
+            if _CURRENT_DEADLINE.get(reservation_id) != deadline:
+                continue
+            if reservation["status"] == "held":
+                _unhold(reservation, "expired")
+                expired += 1
+                # Keep the outcome readable for one more TTL
+                _push_deadline(now + RESERVATION_TTL_SECONDS, reservation_id)
+            else:
+                _RESERVATIONS.pop(reservation_id, None)
+                with _DEADLINES_LOCK:
+                    _CURRENT_DEADLINE.pop(reservation_id, None)
+    return expired
+
+async def _sweep_forever():
+    while True:
+        await asyncio.sleep(RESERVATION_SWEEP_INTERVAL)
+        try:
+            expire_reservations()
+        except Exception as e:
+            print(f"Error expiring stock reservations: {e}")
+
+def start_reservation_sweeper():
+    """Start the background task that expires lapsed reservations"""
+    global _SWEEPER
+    if _SWEEPER is None or _SWEEPER.done():
+        _SWEEPER = asyncio.get_running_loop().create_task(_sweep_forever())
+
+def stop_reservation_sweeper():
+    """Stop the background expiry task"""
+    global _SWEEPER
+    if _SWEEPER is not None:
+        _SWEEPER.cancel()
+        _SWEEPER = None
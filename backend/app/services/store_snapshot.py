@@ -0,0 +1,404 @@
+"""
+Store Snapshots
+Compact binary snapshots of the in-memory record stores. A snapshot is written
+atomically and opened with mmap: records stay in the mapped file, shared by
+every worker process on the host, and are decoded only when read. Writes made
+after the snapshot live in a per-process overlay until the next snapshot.
+
+File layout (little-endian, sections 8-byte aligned):
+    header       magic, format version, marshal version, store count, created (unix seconds)
+    directory    per store: name, record count and the offsets of its sections
+    per store    key bounds (uint64[count + 1]), record bounds (uint64[count + 1]),
+                 key order (uint32[count], record indexes sorted by key),
+                 key blob (UTF-8) and record blob (marshal), both in insertion order
+
+Records are encoded with marshal: binary, compact and decoded in C, but tied to
+the interpreter's marshal version, so a snapshot from another Python version is
+rejected rather than misread. Only open snapshots this service wrote.
+"""
+from typing import Dict, Iterator, List, Mapping, MutableMapping, Optional, Set, Tuple
+from array import array
+from collections.abc import ItemsView, ValuesView
+import marshal
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+
+# Elects one writer per host; without it (e.g. on Windows) every worker writes
+try:
+    import fcntl
+    FCNTL_AVAILABLE = True
+except ImportError:
+    FCNTL_AVAILABLE = False
+
+SNAPSHOT_MAGIC = b"RDSNAP01"
+SNAPSHOT_FORMAT_VERSION = 1
+
+_HEADER = struct.Struct("<8sIIIIQ")        # magic, format version, marshal version, store count, reserved, created
+_DIRECTORY_ENTRY = struct.Struct("<32s6Q")  # name, count, key bounds, record bounds, key order, key blob, record blob
+
+_MISSING = object()
+
+def _pad(handle, alignment: int = 8):
+    remainder = handle.tell() % alignment
+    if remainder:
+        handle.write(b"\0" * (alignment - remainder))
+
+class _Section:
+    """One store's records inside a mapped snapshot (read-only)"""
+    def __init__(self, buffer: memoryview, count: int, key_bounds: int, record_bounds: int, key_order: int, key_blob: int, record_blob: int):
+        self.count = count
+        self._key_bounds = buffer[key_bounds:key_bounds + 8 * (count + 1)].cast("Q")
+        self._record_bounds = buffer[record_bounds:record_bounds + 8 * (count + 1)].cast("Q")
+        self._key_order = buffer[key_order:key_order + 4 * count].cast("I")
+        self._keys = buffer[key_blob:key_blob + self._key_bounds[count]]
+        self._records = buffer[record_blob:record_blob + self._record_bounds[count]]
+
+    def key_bytes(self, index: int) -> bytes:
+        return bytes(self._keys[self._key_bounds[index]:self._key_bounds[index + 1]])
+
+    def key(self, index: int) -> str:
+        return self.key_bytes(index).decode("utf-8")
+
+    def encoded(self, index: int) -> memoryview:
+        return self._records[self._record_bounds[index]:self._record_bounds[index + 1]]
+
+    def record(self, index: int) -> dict:
+        return marshal.loads(self.encoded(index))
+
+    def find(self, key: str) -> int:
+        """Index of key, or -1 (binary search over the key order)"""
+        target = key.encode("utf-8")
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            if self.key_bytes(self._key_order[middle]) < target:
+                low = middle + 1
+            else:
+                high = middle
+        if low < self.count and self.key_bytes(self._key_order[low]) == target:
+            return self._key_order[low]
+        return -1
+
+class _StoreItems(ItemsView):
+    def __iter__(self):
+        return self._mapping._iter_items()
+
+class _StoreValues(ValuesView):
+    def __iter__(self):
+        return (record for _, record in self._mapping._iter_items())
+
+class SnapshotStore(MutableMapping):
+    """
+    Record store (ID -> record dict) backed by a mapped snapshot section
+
+    Behaves like the dict it replaces, including insertion order. Reads of
+    records the process has not written decode from the shared mapping each
+    time; writes and deletes go to a private overlay.
+    """
+    def __init__(self, base: Optional[_Section] = None):
+        self._base = base
+        self._overlay: Dict[str, dict] = {}  # records written since the snapshot
+        self._hidden: Set[str] = set()        # snapshot keys deleted or overwritten
+        self._in_place: Set[str] = set()      # hidden keys overwritten without a delete, listed at their snapshot position
+        self._touched: Optional[Dict[str, bool]] = None  # keys written while a snapshot is being taken -> deleted since
+        self._lock = threading.Lock()
+        self.version = 0                      # bumped by every write
+
+    def _base_index(self, key: str) -> int:
+        return self._base.find(key) if self._base is not None else -1
+
+    def __getitem__(self, key: str) -> dict:
+        record = self._overlay.get(key, _MISSING)
+        if record is not _MISSING:
+            return record
+        if key in self._hidden:
+            raise KeyError(key)
+        index = self._base_index(key)
+        if index < 0:
+            raise KeyError(key)
+        return self._base.record(index)
+
+    def __contains__(self, key) -> bool:
+        return key in self._overlay or (key not in self._hidden and self._base_index(key) >= 0)
+
+    def __setitem__(self, key: str, record: dict):
+        with self._lock:
+            if key not in self._overlay and key not in self._hidden and self._base_index(key) >= 0:
+                self._hidden.add(key)
+                self._in_place.add(key)
+            # A key deleted and written again is new to the overlay, so it lists last, as in a dict
+            self._overlay[key] = record
+            self._touch(key)
+
+    def __delitem__(self, key: str):
+        with self._lock:
+            in_overlay = self._overlay.pop(key, _MISSING) is not _MISSING
+            in_base = key not in self._hidden and self._base_index(key) >= 0
+            if in_base:
+                self._hidden.add(key)
+            if not (in_overlay or in_base):
+                raise KeyError(key)
+            self._in_place.discard(key)
+            self._touch(key, deleted=True)
+
+    def _touch(self, key: str, deleted: bool = False):
+        self.version += 1
+        if self._touched is not None:
+            self._touched[key] = self._touched.get(key, False) or deleted
+
+    def clear(self):
+        with self._lock:
+            self._base = None
+            self._overlay = {}
+            self._hidden = set()
+            self._in_place = set()
+            self._touched = None
+            self.version += 1
+
+    def __len__(self) -> int:
+        base_count = self._base.count if self._base is not None else 0
+        return base_count - len(self._hidden) + len(self._overlay)
+
+    def __iter__(self) -> Iterator[str]:
+        return (key for key, _ in self._iter_encoded(decode_keys_only=True))
+
+    def items(self) -> ItemsView:
+        return _StoreItems(self)
+
+    def values(self) -> ValuesView:
+        return _StoreValues(self)
+
+    def _iter_items(self) -> Iterator[Tuple[str, dict]]:
+        for key, value in self._iter_encoded():
+            yield key, (marshal.loads(value) if isinstance(value, memoryview) else value)
+
+    def _iter_encoded(self, state: Optional[Tuple] = None, decode_keys_only: bool = False) -> Iterator[Tuple[str, object]]:
+        """
+        (key, record) pairs in insertion order, where snapshot records not yet
+        decoded come as their encoded memoryview
+
+        Snapshot records overwritten in place keep their position; records
+        deleted and written again come after the snapshot's, in the order they
+        were written back, as a dict lists them.
+        """
+        base, overlay, hidden, in_place = state or self._state()
+        if base is not None:
+            for index in range(base.count):
+                key = base.key(index)
+                if key in hidden:
+                    if key in in_place:
+                        yield key, overlay[key]
+                elif decode_keys_only:
+                    yield key, None
+                else:
+                    yield key, base.encoded(index)
+        for key, record in overlay.items():
+            if key not in in_place:
+                yield key, record
+
+    def _state(self) -> Tuple[Optional[_Section], Dict[str, dict], Set[str], Set[str]]:
+        """Consistent copy of what the store holds, safe to iterate while it changes"""
+        with self._lock:
+            return self._base, dict(self._overlay), set(self._hidden), set(self._in_place)
+
+    def begin_snapshot(self) -> Tuple:
+        """Freeze the store's contents for writing, and start recording later writes"""
+        with self._lock:
+            self._touched = {}
+            return self._base, dict(self._overlay), set(self._hidden), set(self._in_place)
+
+    def finish_snapshot(self, base: _Section):
+        """
+        Switch to the snapshot just written from begin_snapshot's state, keeping
+        in the overlay only what was written since
+        """
+        with self._lock:
+            touched, self._touched = self._touched or {}, None
+            overlay = {}
+            hidden = set()
+            in_place = set()
+            for key, deleted in touched.items():
+                record = self._overlay.get(key, _MISSING)
+                if record is not _MISSING:
+                    overlay[key] = record
+                if base.find(key) >= 0:
+                    hidden.add(key)
+                    # Only overwritten since: it keeps its place in the new snapshot
+                    if record is not _MISSING and not deleted:
+                        in_place.add(key)
+            # Keep later writes in their original order
+            self._overlay = {key: record for key, record in self._overlay.items() if key in overlay}
+            self._hidden = hidden
+            self._in_place = in_place
+            self._base = base
+
+    def abort_snapshot(self):
+        with self._lock:
+            self._touched = None
+
+def _pairs(store) -> Iterator[Tuple[str, object]]:
+    if isinstance(store, SnapshotStore):
+        return store._iter_encoded()
+    return iter(list(store.items()))  # a dict copies atomically
+
+def write_snapshot(path: str, stores: Mapping[str, Mapping[str, dict]]):
+    """
+    Write stores to a snapshot file atomically
+
+    The file is written under a temporary name in the same directory, flushed
+    to disk and renamed over path, so readers see the old or the new snapshot,
+    never a partial one. Records of a SnapshotStore that were not changed are
+    copied as stored, without decoding.
+
+    Args:
+        path: Snapshot file
+        stores: Store name (at most 32 bytes) -> records by ID
+
+    Raises:
+        OSError: If the file cannot be written
+        ValueError: If a store name is too long or a record cannot be marshalled
+    """
+    _write_file(path, {name: _pairs(store) for name, store in stores.items()})
+
+def _write_file(path: str, sources: Mapping[str, Iterator[Tuple[str, object]]]):
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    handle = tempfile.NamedTemporaryFile(dir=directory, prefix=".snapshot-", delete=False)
+    try:
+        with handle:
+            entries = []
+            handle.write(b"\0" * (_HEADER.size + _DIRECTORY_ENTRY.size * len(sources)))
+            for name, pairs in sources.items():
+                encoded_name = name.encode("utf-8")
+                if len(encoded_name) > 32:
+                    raise ValueError(f"Store name too long: {name}")
+                entries.append((encoded_name, *_write_section(handle, pairs)))
+
+            handle.seek(0)
+            handle.write(_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_FORMAT_VERSION, marshal.version, len(entries), 0, int(time.time())))
+            for entry in entries:
+                handle.write(_DIRECTORY_ENTRY.pack(*entry))
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.replace(handle.name, path)
+    except BaseException:
+        if os.path.exists(handle.name):
+            os.unlink(handle.name)
+        raise
+    # Persist the rename itself (not possible on every platform)
+    try:
+        directory_fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(directory_fd)
+    except OSError:
+        pass
+    finally:
+        os.close(directory_fd)
+
+def _write_section(handle, pairs: Iterator[Tuple[str, object]]) -> Tuple[int, int, int, int, int, int]:
+    """Write one store's blobs and tables; returns its directory fields"""
+    keys: List[bytes] = []
+    record_bounds = array("Q", [0])
+    key_bounds = array("Q", [0])
+
+    # Record blob first, streamed; keys are kept for the sorted key order
+    _pad(handle)
+    record_blob = handle.tell()
+    size = 0
+    for key, record in pairs:
+        encoded = record if isinstance(record, memoryview) else marshal.dumps(record)
+        handle.write(encoded)
+        size += len(encoded)
+        record_bounds.append(size)
+        encoded_key = key.encode("utf-8")
+        keys.append(encoded_key)
+        key_bounds.append(key_bounds[-1] + len(encoded_key))
+
+    key_blob = handle.tell()
+    handle.write(b"".join(keys))
+    _pad(handle)
+    key_bounds_offset = handle.tell()
+    handle.write(key_bounds.tobytes())
+    record_bounds_offset = handle.tell()
+    handle.write(record_bounds.tobytes())
+    key_order_offset = handle.tell()
+    handle.write(array("I", sorted(range(len(keys)), key=keys.__getitem__)).tobytes())
+    return len(keys), key_bounds_offset, record_bounds_offset, key_order_offset, key_blob, record_blob
+
+def open_snapshot(path: str) -> Dict[str, _Section]:
+    """
+    Map a snapshot file read-only
+
+    Returns:
+        Store name -> section, for SnapshotStore
+
+    Raises:
+        OSError: If the file cannot be opened
+        ValueError: If it is not a snapshot this interpreter can read
+    """
+    with open(path, "rb") as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    buffer = memoryview(mapped)
+    if len(buffer) < _HEADER.size:
+        raise ValueError("Not a store snapshot")
+    magic, format_version, marshal_version, count, _, _ = _HEADER.unpack_from(buffer)
+    if magic != SNAPSHOT_MAGIC:
+        raise ValueError("Not a store snapshot")
+    if format_version != SNAPSHOT_FORMAT_VERSION or marshal_version != marshal.version:
+        raise ValueError(f"Snapshot format {format_version}/marshal {marshal_version} is not readable here")
+
+    sections = {}
+    for i in range(count):
+        name, *fields = _DIRECTORY_ENTRY.unpack_from(buffer, _HEADER.size + i * _DIRECTORY_ENTRY.size)
+        if max(fields[1:]) > len(buffer):
+            raise ValueError("Truncated store snapshot")
+        sections[name.rstrip(b"\0").decode("utf-8")] = _Section(buffer, *fields)
+    return sections
+
+def save_stores(path: str, stores: Mapping[str, SnapshotStore]):
+    """
+    Snapshot SnapshotStores to path and rebase them on the new file, so their
+    overlays only hold what changed while it was written
+
+    Raises:
+        OSError: If the file cannot be written
+    """
+    states = {name: store.begin_snapshot() for name, store in stores.items()}
+    try:
+        _write_file(path, {name: stores[name]._iter_encoded(state) for name, state in states.items()})
+        sections = open_snapshot(path)
+    except BaseException:
+        for store in stores.values():
+            store.abort_snapshot()
+        raise
+    for name, store in stores.items():
+        store.finish_snapshot(sections[name])
+
+_writer_lock_file = None
+
+def claim_writer(path: str) -> bool:
+    """
+    Become the process that writes snapshots to path, if no other process on
+    the host has (the claim lasts until this process exits)
+
+    Returns:
+        True if this process should write snapshots
+    """
+    global _writer_lock_file
+    if _writer_lock_file is not None or not FCNTL_AVAILABLE:
+        return True
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    lock_file = open(f"{path}.lock", "a")
+    try:
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock_file.close()
+        return False
+    _writer_lock_file = lock_file
+    return True
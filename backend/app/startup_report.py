@@ -0,0 +1,64 @@
+"""
+Startup Report
+Times the phases of a worker's startup (imports, startup hooks, preloading) so
+cold starts can be measured and compared between releases
+"""
+from typing import Dict, List, Optional, Tuple
+from contextlib import contextmanager
+import os
+import time
+
+def _process_age() -> Optional[float]:
+    """Seconds since this process started, or None where /proc is unavailable"""
+    try:
+        with open("/proc/self/stat") as f:
+            # Fields after the parenthesized command name; start time is field 22 of the full line
+            fields = f.read().rsplit(")", 1)[1].split()
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+        return uptime - int(fields[19]) / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError):
+        return None
+
+class StartupReport:
+    def __init__(self):
+        """Start the clock; create as early in the worker's imports as possible"""
+        self.started = time.perf_counter()
+        # Interpreter and server startup before this module was imported
+        self.before_app = _process_age()
+        self.phases: List[Tuple[str, float]] = []
+        self.ready: Optional[float] = None
+
+    @contextmanager
+    def phase(self, name: str):
+        """Time the enclosed block as a named phase"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((name, time.perf_counter() - started))
+
+    def mark_ready(self):
+        """Record that the worker is about to serve its first request"""
+        self.ready = time.perf_counter() - self.started
+
+    def to_dict(self) -> Dict:
+        """The report as JSON-ready data (milliseconds)"""
+        from backend.app.services.lazy_loading import initializer_status
+        return {
+            "pid": os.getpid(),
+            "before_app_ms": round(self.before_app * 1000) if self.before_app is not None else None,
+            "phases_ms": {name: round(seconds * 1000, 1) for name, seconds in self.phases},
+            "ready_ms": round(self.ready * 1000, 1) if self.ready is not None else None,
+            "lazy_data": initializer_status()
+        }
+
+    def summary(self) -> str:
+        """One log line: time to ready and the phases that made it up"""
+        phases = ", ".join(f"{name} {seconds * 1000:.0f} ms" for name, seconds in self.phases)
+        ready = f"{self.ready * 1000:.0f} ms" if self.ready is not None else "not yet"
+        before = f" (+{self.before_app * 1000:.0f} ms interpreter and server startup)" if self.before_app is not None else ""
+        return f"Worker {os.getpid()} ready in {ready}{before}: {phases}"
+
+# The report of this worker
+startup_report = StartupReport()
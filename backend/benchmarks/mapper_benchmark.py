@@ -0,0 +1,429 @@
+"""
+FHIR Mapper Benchmark
+Throughput and allocation benchmark for fhir_mapper over synthetic FHIR Bundles,
+with a comparison mode that fails when throughput regresses against a baseline.
+
+Usage (from the repository root):
+    python -m backend.benchmarks.mapper_benchmark
+    python -m backend.benchmarks.mapper_benchmark --repeat 7 --save-baseline backend/benchmarks/mapper_baseline.json
+    python -m backend.benchmarks.mapper_benchmark --compare backend/benchmarks/mapper_baseline.json --threshold 0.2
+
+Throughput depends on the machine, so compare against a baseline saved on the
+same hardware. Each timed run lasts at least MIN_RUN_SECONDS (small bundles are
+mapped several times over) and is interleaved with a fixed calibration
+workload; the comparison uses the median ratio of the two, so a machine that is
+busier or slower as a whole does not read as a regression.
+"""
+from typing import Callable, Dict, List, Optional, Tuple
+import argparse
+import gc
+import json
+import math
+import platform
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+
+from backend.app.services.fhir_mapper import (
+    fhir_patient_to_model,
+    fhir_encounter_to_visit,
+    fhir_claim_to_insurance_claim,
+    fhir_coverage_to_coverage_rule
+)
+
+DEFAULT_SIZES = [1000, 10000, 100000]
+PROFILES = ["sparse", "dense", "malformed"]
+
+# Allocations do not depend on bundle size; measure them on this many resources
+ALLOCATION_SAMPLE = 1000
+
+# Shortest timed run; smaller bundles are mapped repeatedly to fill it
+MIN_RUN_SECONDS = 0.2
+
+# Fixed so runs map identical bundles
+SEED = 20240101
+NOW = "2024-01-01T00:00:00"
+
+_FIRST_NAMES = ["James", "Mary", "Robert", "Patricia", "John", "Jennifer", "Michael", "Linda", "Wei", "Priya", "Ahmed", "Sofia"]
+_LAST_NAMES = ["Smith", "Johnson", "Williams", "Brown", "Jones", "Garcia", "Miller", "Davis", "Chen", "Patel", "Khan", "Rossi"]
+_CITIES = [("Boston", "MA", "02115"), ("Austin", "TX", "73301"), ("Seattle", "WA", "98101"), ("Chicago", "IL", "60601")]
+_ENCOUNTER_CLASSES = [("AMB", "ambulatory"), ("EMER", "emergency"), ("IMP", "inpatient encounter"), ("VR", "virtual")]
+_REASONS = [("386661006", "Fever"), ("49727002", "Cough"), ("25064002", "Headache"), ("22298006", "Myocardial infarction")]
+_SERVICES = [("99213", "Office visit"), ("71020", "Chest X-ray"), ("80053", "Metabolic panel"), ("93000", "Electrocardiogram")]
+_PAYORS = ["Aetna", "Blue Cross", "Cigna", "UnitedHealthcare", "Humana"]
+
+def _iso(rng: random.Random, with_time: bool = True) -> str:
+    day = f"20{rng.randint(15, 24)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"
+    if not with_time:
+        return day
+    return f"{day}T{rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}:{rng.randint(0, 59):02d}.000Z"
+
+def _coding(system: str, code: str, display: str) -> Dict:
+    return {"coding": [{"system": system, "code": code, "display": display}], "text": display}
+
+def _patient(rng: random.Random, index: int, profile: str) -> Dict:
+    resource = {"resourceType": "Patient", "id": f"pat-{index}"}
+    if profile == "sparse":
+        return resource
+    if profile == "malformed":
+        return rng.choice([
+            {**resource, "name": []},
+            {**resource, "name": [{}], "telecom": [{"system": "phone"}]},
+            {**resource, "address": [{"line": []}], "gender": "female"},
+            {**resource, "contact": [{"relationship": [{"coding": [{}]}]}]},
+            {**resource, "gender": None},               # raises: None.upper()
+            {**resource, "contact": [{"relationship": []}]}  # raises: empty relationship
+        ])
+    city, state, postal = rng.choice(_CITIES)
+    return {
+        **resource,
+        "name": [{"use": "official", "family": rng.choice(_LAST_NAMES), "given": [rng.choice(_FIRST_NAMES), rng.choice(_FIRST_NAMES)]}],
+        "gender": rng.choice(["male", "female", "other"]),
+        "birthDate": _iso(rng, with_time=False),
+        "telecom": [
+            {"system": "phone", "value": f"555-{rng.randint(1000, 9999)}", "use": "home"},
+            {"system": "email", "value": f"patient{index}@example.org"}
+        ],
+        "address": [{"line": [f"{rng.randint(1, 999)} Main St", "Apt 2"], "city": city, "state": state, "postalCode": postal}],
+        "contact": [{
+            "relationship": [{"coding": [{"system": "http://terminology.hl7.org/CodeSystem/v2-0131", "code": "C"}]}],
+            "name": {"text": f"{rng.choice(_FIRST_NAMES)} {rng.choice(_LAST_NAMES)}"},
+            "telecom": [{"system": "phone", "value": f"555-{rng.randint(1000, 9999)}"}]
+        }]
+    }
+
+def _encounter(rng: random.Random, index: int, profile: str) -> Dict:
+    resource = {"resourceType": "Encounter", "id": f"enc-{index}", "status": "finished"}
+    if profile == "sparse":
+        return resource
+    if profile == "malformed":
+        return rng.choice([
+            {**resource, "period": {"start": "not-a-date", "end": "2024-13-45T99:00:00Z"}},
+            {**resource, "subject": {}, "class": {}},
+            {**resource, "location": ["Location/1"], "reasonCode": [{}]},
+            {**resource, "participant": [{"type": [{}]}]},
+            {**resource, "reasonCode": []},             # raises: empty reasonCode
+            {**resource, "period": {"start": None}}     # raises: None start date
+        ])
+    code, display = rng.choice(_ENCOUNTER_CLASSES)
+    start = _iso(rng)
+    reason_code, reason = rng.choice(_REASONS)
+    return {
+        **resource,
+        "class": {"system": "http://terminology.hl7.org/CodeSystem/v3-ActCode", "code": code, "display": display},
+        "subject": {"reference": f"Patient/pat-{rng.randint(0, 9999)}"},
+        "participant": [
+            {"type": [_coding("http://terminology.hl7.org/CodeSystem/v3-ParticipationType", "ATND", "attender")],
+             "individual": {"reference": f"Practitioner/prac-{rng.randint(0, 999)}"}}
+            for _ in range(rng.randint(1, 3))
+        ],
+        "period": {"start": start, "end": start[:11] + "23:59:59.000Z"},
+        "reasonCode": [_coding("http://snomed.info/sct", reason_code, reason)],
+        "diagnosis": [{"condition": {"reference": f"Condition/cond-{rng.randint(0, 99999)}"}} for _ in range(rng.randint(0, 3))],
+        "location": [{"location": {"reference": f"Location/loc-{rng.randint(0, 99)}"}}],
+        "serviceProvider": {"reference": f"Organization/org-{rng.randint(0, 99)}"}
+    }
+
+def _claim(rng: random.Random, index: int, profile: str) -> Dict:
+    resource = {"resourceType": "Claim", "id": f"claim-{index}", "status": "active"}
+    if profile == "sparse":
+        return resource
+    if profile == "malformed":
+        return rng.choice([
+            {**resource, "patient": "Patient/1", "provider": "Organization/2"},
+            {**resource, "item": [{"quantity": {}, "unitPrice": {}}], "total": {}},
+            {**resource, "type": {"coding": []}, "insurance": [{}]},
+            {**resource, "identifier": [{"type": {}}]},
+            {**resource, "diagnosis": []},              # raises: empty diagnosis
+            {**resource, "created": None}               # raises: None created date
+        ])
+    created = _iso(rng)
+    return {
+        **resource,
+        "identifier": [{"type": _coding("http://terminology.hl7.org/CodeSystem/v2-0203", "MR", "Medical record number"), "value": f"CLM-{index:07d}"}],
+        "type": _coding("http://terminology.hl7.org/CodeSystem/claim-type", "professional", "Professional"),
+        "patient": {"reference": f"Patient/pat-{rng.randint(0, 9999)}"},
+        "provider": {"reference": f"Organization/org-{rng.randint(0, 99)}"},
+        "created": created,
+        "billablePeriod": {"start": created, "end": created},
+        "insurance": [{"sequence": 1, "focal": True, "coverage": {"reference": f"Coverage/{rng.choice(_PAYORS)}"}}],
+        "diagnosis": [{"sequence": 1, "diagnosisCodeableConcept": {}, "diagnosis": _coding("http://hl7.org/fhir/sid/icd-10", "J06.9", "Acute upper respiratory infection")}],
+        "item": [
+            {"sequence": n + 1, "productOrService": _coding("http://www.ama-assn.org/go/cpt", *rng.choice(_SERVICES)),
+             "quantity": {"value": rng.randint(1, 3)}, "unitPrice": {"value": round(rng.uniform(20, 900), 2), "currency": "USD"}}
+            for n in range(rng.randint(1, 4))
+        ]
+    }
+
+def _coverage(rng: random.Random, index: int, profile: str) -> Dict:
+    resource = {"resourceType": "Coverage", "id": f"cov-{index}", "status": "active"}
+    if profile == "sparse":
+        return resource
+    if profile == "malformed":
+        return rng.choice([
+            {**resource, "payor": ["Organization/1"], "network": [{}]},
+            {**resource, "payor": [{}], "identifier": [{"type": {"coding": [{}]}}]},
+            {**resource, "class": [{"type": {}}], "relationship": {}},
+            {**resource, "text": {}},
+            {**resource, "costToBeneficiary": [{"value": {"value": None}}]},  # raises: None > 0
+            {**resource, "class": [{}, {"type": {"coding": []}}]}              # raises: empty coding
+        ])
+    payor = rng.choice(_PAYORS)
+    return {
+        **resource,
+        "identifier": [{"type": _coding("http://terminology.hl7.org/CodeSystem/v2-0203", "MB", "Member Number"), "value": f"M{index:08d}"}],
+        "type": _coding("http://terminology.hl7.org/CodeSystem/v3-ActCode", "HIP", rng.choice(["health insurance plan policy", "dental program", "preventive care"])),
+        "subscriber": {"reference": f"Patient/pat-{rng.randint(0, 9999)}"},
+        "beneficiary": {"reference": f"Patient/pat-{rng.randint(0, 9999)}"},
+        "dependent": str(rng.randint(0, 3)),
+        "relationship": _coding("http://terminology.hl7.org/CodeSystem/subscriber-relationship", "self", "Self"),
+        "period": {"start": _iso(rng), "end": _iso(rng)},
+        "payor": [{"reference": f"Organization/{payor.replace(' ', '-')}", "display": payor}],
+        "class": [
+            {"type": _coding("http://terminology.hl7.org/CodeSystem/coverage-class", "plan", "Plan"), "value": "P1", "name": f"{payor} Gold"},
+            {"type": _coding("http://terminology.hl7.org/CodeSystem/coverage-class", "subplan", "SubPlan"), "value": "S1", "name": "PPO"}
+        ],
+        "network": ["In-Network"],
+        "costToBeneficiary": [{"value": {"value": rng.choice([0, 10, 20, 35]), "currency": "USD"}}]
+    }
+
+# mapper name -> (mapper, resource generator)
+MAPPERS: Dict[str, Tuple[Callable, Callable]] = {
+    "fhir_patient_to_model": (fhir_patient_to_model, _patient),
+    "fhir_encounter_to_visit": (fhir_encounter_to_visit, _encounter),
+    "fhir_claim_to_insurance_claim": (fhir_claim_to_insurance_claim, _claim),
+    "fhir_coverage_to_coverage_rule": (fhir_coverage_to_coverage_rule, _coverage)
+}
+
+def build_bundle(generator: Callable, size: int, profile: str, seed: int = SEED) -> Dict:
+    """Build a searchset Bundle of size synthetic resources"""
+    rng = random.Random(f"{seed}-{generator.__name__}-{profile}")
+    return {
+        "resourceType": "Bundle",
+        "type": "searchset",
+        "total": size,
+        "entry": [{"resource": generator(rng, index, profile)} for index in range(size)]
+    }
+
+def _map_all(mapper: Callable, resources: List[Dict]) -> Tuple[List, int]:
+    """Map every resource the way fhir_data_service does, counting mapping errors"""
+    mapped = []
+    errors = 0
+    for resource in resources:
+        try:
+            mapped.append(mapper(resource, now=NOW))
+        except Exception:
+            errors += 1
+    return mapped, errors
+
+def _calibration_work() -> int:
+    """Fixed pure-Python work shaped like mapping (dict lookups, string building, a caught exception)"""
+    records = []
+    for index in range(1000):
+        source = {"id": index, "name": [{"given": ["Ada"], "family": "Lovelace"}], "extra": None}
+        name = source["name"][0]
+        try:
+            source["extra"].upper()
+        except AttributeError:
+            pass
+        records.append({"id": f"rec-{source['id']}", "name": f"{' '.join(name['given'])} {name['family']}".strip()})
+    return len(records)
+
+# Each timed run alternates up to this many slices of mapping and calibration work
+RUN_SLICES = 8
+
+def _call_seconds(work: Callable[[], int]) -> float:
+    """Duration of one call of work (also a warm-up)"""
+    start = time.perf_counter()
+    work()
+    return max(time.perf_counter() - start, 1e-9)
+
+def _timed(work: Callable[[], int], loops: int) -> Tuple[int, float]:
+    """(items done, seconds) for loops calls of work"""
+    items = 0
+    start = time.perf_counter()
+    for _ in range(loops):
+        items += work()
+    return items, time.perf_counter() - start
+
+def measure_throughput(mapper: Callable, resources: List[Dict], repeat: int) -> Tuple[float, float, int]:
+    """
+    Throughput over repeat runs, each lasting at least MIN_RUN_SECONDS
+
+    A run alternates slices of mapping with slices of the calibration work, so
+    both see the machine at the same speed.
+
+    Returns:
+        Median resources/sec, median ratio of resources/sec to calibration
+        units/sec, and the number of resources that failed to map
+    """
+    _, errors = _map_all(mapper, resources)
+
+    def work() -> int:
+        _map_all(mapper, resources)
+        return len(resources)
+    # Large bundles take one slice per run, mapped once; small ones are repeated to fill RUN_SLICES slices
+    call_seconds = _call_seconds(work)
+    slices = max(1, min(RUN_SLICES, int(MIN_RUN_SECONDS / call_seconds)))
+    loops = math.ceil(MIN_RUN_SECONDS / slices / call_seconds)
+    calibration_loops = math.ceil(loops * call_seconds / 2 / _call_seconds(_calibration_work))
+
+    rates, ratios = [], []
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            items = seconds = calibration_items = calibration_seconds = 0
+            for _ in range(slices):
+                done, elapsed = _timed(work, loops)
+                items, seconds = items + done, seconds + elapsed
+                done, elapsed = _timed(_calibration_work, calibration_loops)
+                calibration_items, calibration_seconds = calibration_items + done, calibration_seconds + elapsed
+            gc.collect()
+            rates.append(items / seconds)
+            ratios.append((items / seconds) / (calibration_items / calibration_seconds))
+    finally:
+        if gc_enabled:
+            gc.enable()
+    return statistics.median(rates), statistics.median(ratios), errors
+
+def measure_allocations(mapper: Callable, resources: List[Dict]) -> Dict[str, float]:
+    """Memory blocks and bytes per resource held by the mapped records"""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        base_current, _ = tracemalloc.get_traced_memory()
+        mapped, _ = _map_all(mapper, resources)
+        current, _ = tracemalloc.get_traced_memory()
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+    retained_blocks = sum(stat.count_diff for stat in after.compare_to(before, "filename"))
+    count = len(resources)
+    del mapped
+    return {
+        "blocks_per_resource": round(retained_blocks / count, 2),
+        "bytes_per_resource": round((current - base_current) / count, 1)
+    }
+
+def run_benchmarks(
+    sizes: List[int],
+    mapper_names: Optional[List[str]] = None,
+    profiles: Optional[List[str]] = None,
+    repeat: int = 5
+) -> Dict[str, Dict]:
+    """
+    Benchmark each mapper on each profile and bundle size
+
+    Returns:
+        "mapper/profile/size" -> resources_per_sec, errors and allocation stats
+    """
+    results = {}
+    for mapper_name in mapper_names or list(MAPPERS):
+        mapper, generator = MAPPERS[mapper_name]
+        for profile in profiles or PROFILES:
+            allocations = None
+            for size in sizes:
+                bundle = build_bundle(generator, size, profile)
+                resources = [entry["resource"] for entry in bundle["entry"]]
+                if allocations is None:
+                    allocations = measure_allocations(mapper, resources[:ALLOCATION_SAMPLE])
+                rate, relative, errors = measure_throughput(mapper, resources, repeat)
+                results[f"{mapper_name}/{profile}/{size}"] = {
+                    "resources_per_sec": round(rate),
+                    "relative_throughput": round(relative, 4),
+                    "errors": errors,
+                    **allocations
+                }
+                del bundle, resources
+    return results
+
+def _relative_change(result: Dict, reference: Dict) -> float:
+    """Change in calibrated throughput (raw throughput for baselines without it)"""
+    if reference.get("relative_throughput") and result.get("relative_throughput"):
+        return result["relative_throughput"] / reference["relative_throughput"] - 1.0
+    return result["resources_per_sec"] / reference["resources_per_sec"] - 1.0
+
+def compare_results(results: Dict[str, Dict], baseline: Dict[str, Dict], threshold: float) -> List[str]:
+    """
+    Benchmarks whose throughput fell more than threshold (a fraction) below the
+    baseline, measured relative to the calibration work so that a machine
+    running slower as a whole does not read as a regression
+
+    Returns:
+        One message per regression
+    """
+    regressions = []
+    for key, result in results.items():
+        reference = baseline.get(key)
+        if not reference:
+            continue
+        change = _relative_change(result, reference)
+        if change < -threshold:
+            regressions.append(
+                f"{key}: {result['resources_per_sec']:,} resources/sec vs baseline "
+                f"{reference['resources_per_sec']:,} ({change:+.1%} calibrated)"
+            )
+    return regressions
+
+def _print_table(results: Dict[str, Dict], baseline: Optional[Dict[str, Dict]] = None):
+    header = f"{'benchmark':<52} {'resources/sec':>14} {'errors':>7} {'blocks/res':>11} {'bytes/res':>10}"
+    if baseline:
+        header += f" {'vs baseline':>12}"
+    print(header)
+    print("-" * len(header))
+    for key, result in results.items():
+        line = (
+            f"{key:<52} {result['resources_per_sec']:>14,} {result['errors']:>7} {result['blocks_per_resource']:>11} "
+            f"{result['bytes_per_resource']:>10}"
+        )
+        if baseline:
+            reference = baseline.get(key)
+            line += f" {_relative_change(result, reference):>+12.1%}" if reference else f" {'-':>12}"
+        print(line)
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark fhir_mapper throughput and allocations")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="Bundle sizes (resources)")
+    parser.add_argument("--mappers", nargs="+", choices=list(MAPPERS), help="Mappers to run (default all)")
+    parser.add_argument("--profiles", nargs="+", choices=PROFILES, help="Record profiles to run (default all)")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per benchmark; the median is kept")
+    parser.add_argument("--save-baseline", metavar="PATH", help="Write the results as a baseline file")
+    parser.add_argument("--compare", metavar="PATH", help="Fail if throughput regresses against this baseline")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Allowed throughput drop as a fraction (default 0.2)")
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.sizes, args.mappers, args.profiles, max(args.repeat, 1))
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+    _print_table(results, baseline)
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump({
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "results": results
+            }, f, indent=2)
+            f.write("\n")
+        print(f"\nBaseline written to {args.save_baseline}")
+
+    if baseline is not None:
+        regressions = compare_results(results, baseline, args.threshold)
+        if regressions:
+            print(f"\nThroughput regressed more than {args.threshold:.0%}:")
+            for message in regressions:
+                print(f"  {message}")
+            return 1
+        print(f"\nNo throughput regression beyond {args.threshold:.0%}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
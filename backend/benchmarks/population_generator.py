@@ -0,0 +1,686 @@
+"""
+Synthetic Population Generator
+Seeded generator of hospitals, doctors, bed availability, patients and
+encounters shaped like real_data_service's records, at any multiple of the
+demo data, for benchmarking endpoints at scale. Distributions are sampled with
+NumPy a chunk at a time; the records go into the in-memory stores or to one
+NDJSON file per record type.
+
+Usage (from the repository root):
+    python -m backend.benchmarks.population_generator --scale 100
+    python -m backend.benchmarks.population_generator --scale 1000 --out /tmp/population
+    python -m backend.benchmarks.population_generator --patients 2000000 --doctors 50000 --out /tmp/population
+
+The same seed and counts always produce the same population, whatever the chunk size.
+"""
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from datetime import datetime, timedelta
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+from backend.app.services.json_codec import dumps
+
+SEED = 20240101
+# Timestamps are relative to this instant rather than the clock, so output is reproducible
+REFERENCE_TIME = datetime(2024, 1, 1)
+
+# Record counts of the demo data in real_data_service; --scale multiplies these
+BASE_COUNTS = {"hospitals": 8, "doctors": 20, "patients": 20}
+ENCOUNTERS_PER_PATIENT = 4.0
+# Encounters are spread over this many days before REFERENCE_TIME
+ENCOUNTER_WINDOW_DAYS = 3 * 365
+
+DEFAULT_CHUNK_SIZE = 50000
+# Doctors, patients and encounters are drawn this many records at a time, each block
+# from its own stream keyed by its position, then regrouped into chunks; so the
+# records do not depend on the chunk size
+DRAW_BLOCK_SIZE = 4096
+
+# Record types in generation order (each may depend on the ones before it)
+RECORD_TYPES = ["hospitals", "doctors", "beds", "patients", "encounters"]
+
+# (city, state, ZIP prefix, relative population)
+_CITIES = [
+    ("New York", "NY", "100", 8.3), ("Los Angeles", "CA", "900", 3.9), ("Chicago", "IL", "606", 2.7),
+    ("Houston", "TX", "770", 2.3), ("Phoenix", "AZ", "850", 1.6), ("Philadelphia", "PA", "191", 1.6),
+    ("San Antonio", "TX", "782", 1.5), ("San Diego", "CA", "921", 1.4), ("Dallas", "TX", "752", 1.3),
+    ("San Jose", "CA", "951", 1.0), ("Austin", "TX", "787", 1.0), ("Jacksonville", "FL", "322", 0.95),
+    ("Fort Worth", "TX", "761", 0.93), ("Columbus", "OH", "432", 0.9), ("Charlotte", "NC", "282", 0.88),
+    ("San Francisco", "CA", "941", 0.87), ("Indianapolis", "IN", "462", 0.88), ("Seattle", "WA", "981", 0.75),
+    ("Denver", "CO", "802", 0.72), ("Boston", "MA", "021", 0.69), ("Nashville", "TN", "372", 0.69),
+    ("Baltimore", "MD", "212", 0.58), ("Cleveland", "OH", "441", 0.37), ("Rochester", "MN", "559", 0.12),
+    ("Atlanta", "GA", "303", 0.5), ("Miami", "FL", "331", 0.45), ("Minneapolis", "MN", "554", 0.43),
+    ("Portland", "OR", "972", 0.65), ("Detroit", "MI", "482", 0.64), ("Salt Lake City", "UT", "841", 0.2)
+]
+
+_HOSPITAL_NAMES = ["General", "Memorial", "St. Mary's", "Mercy", "Good Samaritan", "Providence", "Baptist",
+                   "Methodist", "Riverside", "University", "Regional", "Community", "Presbyterian", "Sacred Heart"]
+_HOSPITAL_SUFFIXES = ["Hospital", "Medical Center", "Health Center", "Hospital Center"]
+# (hospital type, weight)
+_HOSPITAL_TYPES = [("Community Hospital", 0.55), ("Academic Medical Center", 0.15), ("Non-profit Academic", 0.1),
+                   ("Critical Access Hospital", 0.12), ("Specialty Hospital", 0.08)]
+_FACILITIES = ["ICU", "Emergency", "Laboratory", "Pharmacy", "Radiology", "Surgery", "MRI", "CT Scan", "NICU",
+               "Cardiac Cath Lab", "Burn Unit", "Trauma Center", "Cancer Center", "Transplant Center"]
+
+# (specialization, share of doctors, consultation fee, qualification)
+_SPECIALIZATIONS = [
+    ("Internal Medicine", 0.16, 200, "MD, FACP"), ("Emergency Medicine", 0.09, 250, "MD, FACEP"),
+    ("Pediatrics", 0.09, 200, "MD, FAAP"), ("Surgery", 0.07, 500, "MD, FACS"), ("Cardiology", 0.06, 350, "MD, FACC"),
+    ("Anesthesiology", 0.06, 350, "MD, FASA"), ("Radiology", 0.05, 180, "MD, FACR"), ("Psychiatry", 0.05, 260, "MD, FAPA"),
+    ("Obstetrics", 0.05, 250, "MD, FACOG"), ("Orthopedics", 0.04, 300, "MD, FAAOS"), ("Neurology", 0.04, 400, "MD, FAAN"),
+    ("Oncology", 0.04, 450, "MD, FASCO"), ("Gastroenterology", 0.035, 280, "MD, FACG"),
+    ("Dermatology", 0.03, 220, "MD, FAAD"), ("Ophthalmology", 0.03, 240, "MD, FACS"), ("Urology", 0.025, 320, "MD, FACS"),
+    ("Endocrinology", 0.02, 290, "MD, FACE"), ("Rheumatology", 0.015, 270, "MD, FACR")
+]
+# (language, share of doctors speaking it besides English)
+_LANGUAGES = [("Spanish", 0.22), ("Mandarin", 0.05), ("French", 0.05), ("Hindi", 0.04), ("German", 0.03),
+              ("Portuguese", 0.03), ("Arabic", 0.03), ("Vietnamese", 0.02)]
+_AVAILABILITY = [("Available", 0.5), ("Busy", 0.25), ("On Call", 0.25)]
+
+# Names are drawn with Zipf-like weights, so common names repeat as in a real population
+_FIRST_NAMES_M = ["James", "Robert", "John", "Michael", "David", "William", "Richard", "Joseph", "Thomas", "Christopher",
+                  "Charles", "Daniel", "Matthew", "Anthony", "Mark", "Donald", "Steven", "Andrew", "Paul", "Joshua",
+                  "Kevin", "Brian", "George", "Jose", "Wei", "Ahmed", "Luis", "Raj", "Carlos", "Brandon"]
+_FIRST_NAMES_F = ["Mary", "Patricia", "Jennifer", "Linda", "Elizabeth", "Barbara", "Susan", "Jessica", "Sarah", "Karen",
+                  "Lisa", "Nancy", "Betty", "Sandra", "Ashley", "Emily", "Michelle", "Amanda", "Maria", "Stephanie",
+                  "Rachel", "Nicole", "Priya", "Sofia", "Mei", "Fatima", "Ana", "Laura", "Olivia", "Emma"]
+_LAST_NAMES = ["Smith", "Johnson", "Williams", "Brown", "Jones", "Garcia", "Miller", "Davis", "Rodriguez", "Martinez",
+               "Hernandez", "Lopez", "Gonzalez", "Wilson", "Anderson", "Thomas", "Taylor", "Moore", "Jackson", "Martin",
+               "Lee", "Perez", "Thompson", "White", "Harris", "Sanchez", "Clark", "Ramirez", "Lewis", "Robinson",
+               "Walker", "Young", "Allen", "King", "Wright", "Scott", "Nguyen", "Hill", "Chen", "Patel",
+               "Kim", "Khan", "Rossi", "Cohen", "Murphy", "Rivera", "Cook", "Rogers", "Morgan", "Peterson"]
+_STREETS = ["Main", "Oak", "Pine", "Elm", "Cedar", "Maple", "Washington", "Lake", "Hill", "Park"]
+_STREET_TYPES = ["Street", "Avenue", "Drive", "Lane", "Road", "Boulevard"]
+_INSURERS = [("Blue Cross Blue Shield", 0.3), ("UnitedHealth", 0.25), ("Aetna", 0.15), ("Cigna", 0.12),
+             ("Kaiser Permanente", 0.1), ("Humana", 0.08)]
+
+# Population share per five-year age band, 0-4 through 90-94
+_AGE_BANDS = np.array([6.0, 6.2, 6.4, 6.4, 6.6, 7.0, 6.9, 6.6, 6.2, 6.1, 6.3, 6.4, 6.0, 5.0, 4.0, 2.8, 1.8, 1.2, 0.7])
+# (blood type, US frequency)
+_BLOOD_TYPES = [("O+", 0.374), ("A+", 0.357), ("B+", 0.085), ("AB+", 0.034),
+                ("O-", 0.066), ("A-", 0.063), ("B-", 0.015), ("AB-", 0.006)]
+# (allergy, prevalence)
+_ALLERGIES = [("Penicillin", 0.08), ("Sulfa", 0.03), ("Latex", 0.03), ("Shellfish", 0.03), ("Peanuts", 0.02),
+              ("Aspirin", 0.02), ("Codeine", 0.01), ("Iodine", 0.01), ("Morphine", 0.01)]
+# (condition, prevalence among the old, age at half that prevalence); None for conditions not tied to age
+_CONDITIONS = [
+    ("Hypertension", 0.6, 55), ("High Cholesterol", 0.4, 55), ("Arthritis", 0.45, 65), ("Type 2 Diabetes", 0.25, 60),
+    ("Heart Disease", 0.2, 70), ("COPD", 0.12, 65), ("Sleep Apnea", 0.1, 50), ("Asthma", 0.08, None),
+    ("Anxiety", 0.1, None), ("Depression", 0.08, None), ("Migraine", 0.1, None), ("Kidney Stones", 0.03, None)
+]
+
+# (encounter class display, code, weight); older patients are admitted more often
+_ENCOUNTER_CLASSES = [("ambulatory", "AMB", 0.7), ("virtual", "VR", 0.1), ("emergency", "EMER", 0.12),
+                      ("inpatient encounter", "IMP", 0.08)]
+_ENCOUNTER_STATUSES = [("finished", 0.93), ("in-progress", 0.02), ("cancelled", 0.04), ("planned", 0.01)]
+
+def population_counts(scale: float = 1.0, **overrides: Optional[int]) -> Dict[str, int]:
+    """
+    Record counts for a multiple of the demo data
+
+    Args:
+        scale: Multiplier applied to BASE_COUNTS
+        overrides: Explicit counts (hospitals=, doctors=, patients=) that replace the scaled ones
+
+    Raises:
+        ValueError: If a count is negative or there are doctors or patients but no hospitals
+    """
+    counts = {kind: int(round(base * scale)) for kind, base in BASE_COUNTS.items()}
+    counts.update({kind: count for kind, count in overrides.items() if count is not None})
+    if any(count < 0 for count in counts.values()):
+        raise ValueError("Record counts cannot be negative")
+    if counts["hospitals"] == 0 and (counts["doctors"] or counts["patients"]):
+        raise ValueError("Doctors and patients need at least one hospital")
+    return counts
+
+def _weights(entries: List[Tuple], column: int = -1) -> np.ndarray:
+    """Probabilities from one column of a weighted table"""
+    weights = np.array([entry[column] for entry in entries], dtype=float)
+    return weights / weights.sum()
+
+def _zipf(size: int, exponent: float = 0.8) -> np.ndarray:
+    weights = 1.0 / np.arange(1, size + 1) ** exponent
+    return weights / weights.sum()
+
+_HEX_DIGITS = np.frombuffer(b"0123456789abcdef", dtype=np.uint8)
+_UUID_DIGIT_COLUMNS = [column for column in range(36) if column not in (8, 13, 18, 23)]
+
+def _uuids(rng: np.random.Generator, count: int) -> List[str]:
+    """Version 4 UUID strings drawn from rng"""
+    raw = rng.integers(0, 256, size=(count, 16), dtype=np.uint8)
+    raw[:, 6] = (raw[:, 6] & 0x0F) | 0x40
+    raw[:, 8] = (raw[:, 8] & 0x3F) | 0x80
+    # Spell the nibbles as hex digits in place, with dashes at the UUID group boundaries
+    nibbles = np.stack([raw >> 4, raw & 0x0F], axis=2).reshape(count, 32)
+    text = np.full((count, 36), ord("-"), dtype=np.uint8)
+    text[:, _UUID_DIGIT_COLUMNS] = _HEX_DIGITS[nibbles]
+    return text.view("S36").ravel().astype(str).tolist()
+
+def _phones(rng: np.random.Generator, count: int) -> List[str]:
+    area = rng.integers(200, 1000, count).tolist()
+    exchange = rng.integers(200, 1000, count).tolist()
+    line = rng.integers(0, 10000, count).tolist()
+    return [f"+1-{a}-{e}-{n:04d}" for a, e, n in zip(area, exchange, line)]
+
+def _memberships(mask: np.ndarray, names: List[str]) -> List[List[str]]:
+    """Per row of a boolean matrix, the names of its true columns"""
+    rows, columns = np.nonzero(mask)
+    bounds = np.searchsorted(rows, np.arange(mask.shape[0] + 1)).tolist()
+    columns = columns.tolist()
+    return [[names[column] for column in columns[start:end]] for start, end in zip(bounds, bounds[1:])]
+
+def _subsets(rng: np.random.Generator, count: int, names: List[str], low: int, high: int) -> List[List[str]]:
+    """A random subset of names per row, of low to high members"""
+    sizes = rng.integers(low, high + 1, count)
+    order = np.argsort(rng.random((count, len(names))), axis=1)
+    return _memberships(np.argsort(order, axis=1) < sizes[:, None], names)
+
+def _block_rng(seed: np.random.SeedSequence, block: int) -> np.random.Generator:
+    """Generator for one draw block of a record type's stream"""
+    return np.random.default_rng(np.random.SeedSequence(seed.entropy, spawn_key=seed.spawn_key + (block,)))
+
+def _draw_blocks(count: int) -> Iterator[Tuple[int, int, int]]:
+    """(block number, first record, record count) of each draw block"""
+    for block, start in enumerate(range(0, count, DRAW_BLOCK_SIZE)):
+        yield block, start, min(DRAW_BLOCK_SIZE, count - start)
+
+def _rechunk(blocks: Iterable[List[dict]], chunk_size: int) -> Iterator[List[dict]]:
+    """Records of blocks regrouped into lists of chunk_size (the last may be shorter)"""
+    pending: List[dict] = []
+    for block in blocks:
+        pending.extend(block)
+        taken = 0
+        while len(pending) - taken >= chunk_size:
+            yield pending[taken:taken + chunk_size]
+            taken += chunk_size
+        del pending[:taken]
+    if pending:
+        yield pending
+
+def generate_hospitals(rng: np.random.Generator, count: int, now: datetime = REFERENCE_TIME) -> List[dict]:
+    """Hospitals spread over cities by population, with log-normal bed counts"""
+    stamp = now.isoformat()
+    ids = _uuids(rng, count)
+    cities = rng.choice(len(_CITIES), count, p=_weights(_CITIES)).tolist()
+    names = rng.integers(0, len(_HOSPITAL_NAMES), count).tolist()
+    suffixes = rng.integers(0, len(_HOSPITAL_SUFFIXES), count).tolist()
+    types = rng.choice(len(_HOSPITAL_TYPES), count, p=_weights(_HOSPITAL_TYPES)).tolist()
+    total_beds = np.clip(rng.lognormal(np.log(250), 0.7, count), 25, 2500).astype(int)
+    icu_beds = np.maximum(1, (total_beds * rng.uniform(0.06, 0.15, count)).astype(int))
+    numbers = rng.integers(100, 10000, count).tolist()
+    streets = rng.integers(0, len(_STREETS), count).tolist()
+    zips = rng.integers(0, 100, count).tolist()
+    ratings = np.round(rng.uniform(3.0, 5.0, count), 1).tolist()
+    trauma = rng.choice(["Level I", "Level II", "Level III", None], count, p=[0.1, 0.2, 0.3, 0.4]).tolist()
+    phones = _phones(rng, count)
+    emergency_phones = _phones(rng, count)
+    specialties = _subsets(rng, count, [entry[0] for entry in _SPECIALIZATIONS], 3, 8)
+    facilities = _subsets(rng, count, _FACILITIES, 4, 9)
+
+    hospitals = []
+    for i in range(count):
+        city, state, zip_prefix, _ = _CITIES[cities[i]]
+        name = f"{city} {_HOSPITAL_NAMES[names[i]]} {_HOSPITAL_SUFFIXES[suffixes[i]]}"
+        hospitals.append({
+            "id": ids[i],
+            "name": name,
+            "address": f"{numbers[i]} {_STREETS[streets[i]]} Street",
+            "city": city,
+            "state": state,
+            "zip_code": f"{zip_prefix}{zips[i]:02d}",
+            "country": "USA",
+            "phone": phones[i],
+            "email": f"info@{name.lower().replace(' ', '').replace('.', '').replace(chr(39), '')}.org",
+            "emergency_phone": emergency_phones[i],
+            "hospital_type": _HOSPITAL_TYPES[types[i]][0],
+            "total_beds": int(total_beds[i]),
+            "icu_beds": int(icu_beds[i]),
+            "specialties": specialties[i],
+            "facilities": facilities[i],
+            "operating_hours": "24/7",
+            "website": None,
+            "rating": ratings[i],
+            "trauma_level": trauma[i],
+            "created_at": stamp,
+            "updated_at": stamp
+        })
+    return hospitals
+
+def generate_bed_availability(rng: np.random.Generator, hospitals: List[dict], now: datetime = REFERENCE_TIME) -> List[dict]:
+    """Bed availability per hospital; occupancy is Beta-distributed around 80% (ICU higher)"""
+    count = len(hospitals)
+    ids = _uuids(rng, count)
+    occupancy = rng.beta(8, 2, count)
+    icu_occupancy = rng.beta(12, 2, count)
+    emergency_beds = rng.integers(5, 21, count).tolist()
+    available_emergency = rng.integers(1, 9, count).tolist()
+    surgery_rooms = rng.integers(8, 26, count).tolist()
+    available_surgery = rng.integers(1, 6, count).tolist()
+    stamp = now.isoformat()
+
+    beds = []
+    for i, hospital in enumerate(hospitals):
+        occupied = int(hospital["total_beds"] * occupancy[i])
+        occupied_icu = int(hospital["icu_beds"] * icu_occupancy[i])
+        beds.append({
+            "id": ids[i],
+            "hospital_id": hospital["id"],
+            "hospital_name": hospital["name"],
+            "total_beds": hospital["total_beds"],
+            "occupied_beds": occupied,
+            "available_beds": hospital["total_beds"] - occupied,
+            "icu_beds": hospital["icu_beds"],
+            "occupied_icu": occupied_icu,
+            "available_icu": hospital["icu_beds"] - occupied_icu,
+            "emergency_beds": emergency_beds[i],
+            "available_emergency": available_emergency[i],
+            "surgery_rooms": surgery_rooms[i],
+            "available_surgery": available_surgery[i],
+            "occupancy_rate": round(float(occupancy[i]) * 100, 1),
+            "icu_occupancy_rate": round(float(icu_occupancy[i]) * 100, 1),
+            "last_updated": stamp,
+            "status": "Normal" if occupancy[i] < 0.85 else "High" if occupancy[i] < 0.95 else "Critical"
+        })
+    return beds
+
+def iter_doctors(
+    seed: np.random.SeedSequence,
+    count: int,
+    hospitals: List[dict],
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    now: datetime = REFERENCE_TIME
+) -> Iterator[List[dict]]:
+    """Doctors in chunks, staffing hospitals in proportion to their beds"""
+    blocks = (
+        _draw_doctors(_block_rng(seed, block), start, size, hospitals, now)
+        for block, start, size in _draw_blocks(count)
+    )
+    return _rechunk(blocks, chunk_size)
+
+def _draw_doctors(rng: np.random.Generator, start: int, size: int, hospitals: List[dict], now: datetime) -> List[dict]:
+    stamp = now.isoformat()
+    bed_share = np.array([hospital["total_beds"] for hospital in hospitals], dtype=float)
+    bed_share /= bed_share.sum()
+    first_names = _FIRST_NAMES_M + _FIRST_NAMES_F
+    language_names = [entry[0] for entry in _LANGUAGES]
+    language_shares = np.array([entry[1] for entry in _LANGUAGES])
+
+    ids = _uuids(rng, size)
+    firsts = rng.choice(len(first_names), size, p=_zipf(len(first_names))).tolist()
+    lasts = rng.choice(len(_LAST_NAMES), size, p=_zipf(len(_LAST_NAMES))).tolist()
+    specializations = rng.choice(len(_SPECIALIZATIONS), size, p=_weights(_SPECIALIZATIONS, 1)).tolist()
+    hospital_rows = rng.choice(len(hospitals), size, p=bed_share).tolist()
+    experience = np.clip(rng.gamma(3.0, 5.0, size), 1, 45).astype(int).tolist()
+    fee_noise = rng.lognormal(0.0, 0.15, size).tolist()
+    licenses = rng.integers(10000, 100000, size).tolist()
+    languages = _memberships(rng.random((size, len(language_names))) < language_shares, language_names)
+    availability = rng.choice(len(_AVAILABILITY), size, p=_weights(_AVAILABILITY)).tolist()
+    next_available = rng.integers(1, 15, size).tolist()
+    ratings = np.round(np.clip(rng.normal(4.5, 0.3, size), 3.0, 5.0), 1).tolist()
+    phones = _phones(rng, size)
+
+    doctors = []
+    for i in range(size):
+        first, last = first_names[firsts[i]], _LAST_NAMES[lasts[i]]
+        specialization, _, fee, qualification = _SPECIALIZATIONS[specializations[i]]
+        hospital = hospitals[hospital_rows[i]]
+        doctors.append({
+            "id": ids[i],
+            "first_name": first,
+            "last_name": last,
+            "specialization": specialization,
+            "qualification": qualification,
+            "license_number": f"MD-{licenses[i]}",
+            "email": f"{first.lower()}.{last.lower()}.{start + i}@{hospital['email'].split('@')[1]}",
+            "phone": phones[i],
+            "hospital_id": hospital["id"],
+            "department": specialization,
+            "experience_years": experience[i],
+            "languages": ["English"] + languages[i],
+            "consultation_fee": int(round(fee * fee_noise[i], -1)),
+            "availability": _AVAILABILITY[availability[i]][0],
+            "next_available": (now + timedelta(days=next_available[i])).strftime("%Y-%m-%d"),
+            "rating": ratings[i],
+            "created_at": stamp,
+            "updated_at": stamp
+        })
+    return doctors
+
+def iter_patients(
+    seed: np.random.SeedSequence,
+    count: int,
+    doctor_ids: List[str],
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    now: datetime = REFERENCE_TIME
+) -> Iterator[List[dict]]:
+    """
+    Patients in chunks, with a US-like age pyramid, blood type frequencies and
+    allergy prevalence, and chronic conditions that grow more likely with age
+    """
+    blocks = (
+        _draw_patients(_block_rng(seed, block), start, size, doctor_ids, now)
+        for block, start, size in _draw_blocks(count)
+    )
+    return _rechunk(blocks, chunk_size)
+
+def _draw_patients(rng: np.random.Generator, start: int, size: int, doctor_ids: List[str], now: datetime) -> List[dict]:
+    stamp = now.isoformat()
+    band_share = _AGE_BANDS / _AGE_BANDS.sum()
+    allergy_names = [entry[0] for entry in _ALLERGIES]
+    allergy_rates = np.array([entry[1] for entry in _ALLERGIES])
+    condition_names = [entry[0] for entry in _CONDITIONS]
+    condition_peaks = np.array([entry[1] for entry in _CONDITIONS])
+    condition_midpoints = np.array([entry[2] if entry[2] is not None else np.nan for entry in _CONDITIONS])
+
+    ids = _uuids(rng, size)
+    ages = (rng.choice(len(band_share), size, p=band_share) * 5 + rng.random(size) * 5)
+    births = (np.datetime64(now.date()) - (ages * 365.25).astype(np.int64).astype("timedelta64[D]")).astype(str).tolist()
+    female = (rng.random(size) < 0.51).tolist()
+    male_firsts = rng.choice(len(_FIRST_NAMES_M), size, p=_zipf(len(_FIRST_NAMES_M))).tolist()
+    female_firsts = rng.choice(len(_FIRST_NAMES_F), size, p=_zipf(len(_FIRST_NAMES_F))).tolist()
+    lasts = rng.choice(len(_LAST_NAMES), size, p=_zipf(len(_LAST_NAMES))).tolist()
+    contacts = rng.choice(len(_FIRST_NAMES_F), size).tolist()
+    cities = rng.choice(len(_CITIES), size, p=_weights(_CITIES)).tolist()
+    numbers = rng.integers(100, 10000, size).tolist()
+    streets = rng.integers(0, len(_STREETS), size).tolist()
+    street_types = rng.integers(0, len(_STREET_TYPES), size).tolist()
+    zips = rng.integers(0, 100, size).tolist()
+    blood_types = rng.choice(len(_BLOOD_TYPES), size, p=_weights(_BLOOD_TYPES)).tolist()
+    allergies = _memberships(rng.random((size, len(allergy_names))) < allergy_rates, allergy_names)
+    # Logistic rise with age toward the peak prevalence; flat for conditions without a midpoint
+    rates = condition_peaks / (1.0 + np.exp(-(ages[:, None] - condition_midpoints) / 8.0))
+    rates = np.where(np.isnan(condition_midpoints), condition_peaks, rates)
+    conditions = _memberships(rng.random((size, len(condition_names))) < rates, condition_names)
+    insurers = rng.choice(len(_INSURERS), size, p=_weights(_INSURERS)).tolist()
+    insurance_ids = rng.integers(100000, 1000000, size).tolist()
+    physicians = rng.integers(0, len(doctor_ids), size).tolist() if doctor_ids else [None] * size
+    phones = _phones(rng, size)
+    contact_phones = _phones(rng, size)
+
+    patients = []
+    for i in range(size):
+        first = _FIRST_NAMES_F[female_firsts[i]] if female[i] else _FIRST_NAMES_M[male_firsts[i]]
+        last = _LAST_NAMES[lasts[i]]
+        city, state, zip_prefix, _ = _CITIES[cities[i]]
+        patients.append({
+            "id": ids[i],
+            "first_name": first,
+            "last_name": last,
+            "date_of_birth": births[i],
+            "gender": "F" if female[i] else "M",
+            "email": f"{first.lower()}.{last.lower()}.{start + i}@email.com",
+            "phone": phones[i],
+            "address": f"{numbers[i]} {_STREETS[streets[i]]} {_STREET_TYPES[street_types[i]]}, {city}, {state} {zip_prefix}{zips[i]:02d}",
+            "emergency_contact_name": f"{_FIRST_NAMES_F[contacts[i]]} {last}",
+            "emergency_contact_phone": contact_phones[i],
+            "blood_type": _BLOOD_TYPES[blood_types[i]][0],
+            "allergies": allergies[i],
+            "medical_history": conditions[i],
+            "insurance_provider": _INSURERS[insurers[i]][0],
+            "insurance_id": f"INS-{insurance_ids[i]}",
+            "primary_care_physician": doctor_ids[physicians[i]] if doctor_ids else None,
+            "created_at": stamp,
+            "updated_at": stamp
+        })
+    return patients
+
+def generate_encounters(
+    rng: np.random.Generator,
+    patients: List[dict],
+    hospitals: List[dict],
+    per_patient: float = ENCOUNTERS_PER_PATIENT,
+    now: datetime = REFERENCE_TIME
+) -> List[dict]:
+    """
+    Encounters for a chunk of patients, as the records endpoint returns them
+    (EncounterRecord fields), oldest first per patient
+
+    Visit counts are negative-binomial (a few patients account for many
+    visits) with a mean rising with age; most visits go to a hospital in the
+    patient's city.
+    """
+    if not patients or per_patient <= 0:
+        return []
+    birth_years = np.array([int(patient["date_of_birth"][:4]) for patient in patients])
+    ages = now.year - birth_years
+    means = per_patient * (0.5 + ages / 45.0) / (0.5 + 40 / 45.0)
+    visits = rng.negative_binomial(2, 2.0 / (2.0 + means))
+    total = int(visits.sum())
+    owners = np.repeat(np.arange(len(patients)), visits)
+
+    # Hospitals by city, for local visits
+    by_city: Dict[str, List[int]] = {}
+    for row, hospital in enumerate(hospitals):
+        by_city.setdefault(hospital["city"], []).append(row)
+    patient_cities = [patient["address"].rsplit(", ", 2)[1] for patient in patients]
+    local = rng.random(total) < 0.85
+    picks = rng.random(total)
+    anywhere = rng.integers(0, len(hospitals), total)
+
+    offsets = rng.uniform(0, ENCOUNTER_WINDOW_DAYS * 86400, total)
+    order = np.lexsort((-offsets, owners))
+    owners, offsets, local, picks, anywhere = owners[order], offsets[order], local[order], picks[order], anywhere[order]
+    timestamps = (np.datetime64(now, "s") - offsets.astype("timedelta64[s]")).astype(str).tolist()
+
+    # Older patients are admitted more; shift weight from ambulatory to inpatient with age
+    class_weights = _weights(_ENCOUNTER_CLASSES)
+    classes = rng.choice(len(_ENCOUNTER_CLASSES), total, p=class_weights)
+    elderly = ages[owners] >= 65
+    admit = elderly & (rng.random(total) < 0.08)
+    classes[admit] = len(_ENCOUNTER_CLASSES) - 1
+    classes = classes.tolist()
+    statuses = rng.choice(len(_ENCOUNTER_STATUSES), total, p=_weights(_ENCOUNTER_STATUSES)).tolist()
+    ids = _uuids(rng, total)
+    owners, local, picks, anywhere = owners.tolist(), local.tolist(), picks.tolist(), anywhere.tolist()
+
+    encounters = []
+    for i in range(total):
+        patient = patients[owners[i]]
+        nearby = by_city.get(patient_cities[owners[i]]) if local[i] else None
+        row = nearby[int(picks[i] * len(nearby))] if nearby else anywhere[i]
+        encounters.append({
+            "id": ids[i],
+            "patient_id": patient["id"],
+            "patient_name": f"{patient['first_name']} {patient['last_name']}",
+            "encounter_type": _ENCOUNTER_CLASSES[classes[i]][0],
+            "status": _ENCOUNTER_STATUSES[statuses[i]][0],
+            "timestamp": timestamps[i],
+            "hospital_id": hospitals[row]["id"]
+        })
+    return encounters
+
+def generate_population(
+    counts: Dict[str, int],
+    seed: int = SEED,
+    encounters_per_patient: float = ENCOUNTERS_PER_PATIENT,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    now: datetime = REFERENCE_TIME
+) -> Iterator[Tuple[str, List[dict]]]:
+    """
+    Generate a population as (record type, records) batches in RECORD_TYPES order
+
+    Hospitals and bed availability come in one batch each; doctors, patients and
+    encounters in chunks of about chunk_size, so a population far larger than
+    memory can be streamed to disk. Each record type draws from its own stream
+    of the seed, so changing one count does not reshuffle the others, and the
+    records are drawn in fixed-size blocks, so the chunk size only changes how
+    they are batched.
+
+    Args:
+        counts: Record counts by type (see population_counts)
+        seed: Random seed
+        encounters_per_patient: Mean encounters per patient; 0 for none
+        chunk_size: Records per doctor or patient batch
+        now: Instant the population's timestamps are relative to
+    """
+    hospital_seed, doctor_seed, bed_seed, patient_seed, encounter_seed = np.random.SeedSequence(seed).spawn(len(RECORD_TYPES))
+
+    hospitals = generate_hospitals(np.random.default_rng(hospital_seed), counts.get("hospitals", 0), now)
+    yield "hospitals", hospitals
+
+    doctor_ids: List[str] = []
+    for doctors in iter_doctors(doctor_seed, counts.get("doctors", 0), hospitals, chunk_size, now):
+        doctor_ids.extend(doctor["id"] for doctor in doctors)
+        yield "doctors", doctors
+
+    yield "beds", generate_bed_availability(np.random.default_rng(bed_seed), hospitals, now)
+
+    if encounters_per_patient <= 0:
+        for patients in iter_patients(patient_seed, counts.get("patients", 0), doctor_ids, chunk_size, now):
+            yield "patients", patients
+        return
+    for patients, encounters in _iter_patient_encounters(
+        patient_seed, encounter_seed, counts.get("patients", 0), doctor_ids, hospitals, encounters_per_patient, chunk_size, now
+    ):
+        yield "patients", patients
+        yield "encounters", encounters
+
+def _iter_patient_encounters(
+    patient_seed: np.random.SeedSequence,
+    encounter_seed: np.random.SeedSequence,
+    count: int,
+    doctor_ids: List[str],
+    hospitals: List[dict],
+    per_patient: float,
+    chunk_size: int,
+    now: datetime
+) -> Iterator[Tuple[List[dict], List[dict]]]:
+    """
+    Patient chunks with their encounters; encounters are drawn per patient draw
+    block (from the block's own encounter stream) and split with the patients
+    """
+    patients: List[dict] = []
+    encounters: List[dict] = []
+    blocks = _draw_blocks(count)
+    done = False
+    while not done:
+        block = next(blocks, None)
+        if block is None:
+            done = True
+        else:
+            number, start, size = block
+            drawn = _draw_patients(_block_rng(patient_seed, number), start, size, doctor_ids, now)
+            patients.extend(drawn)
+            encounters.extend(generate_encounters(_block_rng(encounter_seed, number), drawn, hospitals, per_patient, now))
+        while len(patients) >= chunk_size or (done and patients):
+            chunk = patients[:chunk_size]
+            del patients[:chunk_size]
+            # Encounters are grouped by patient in patient order, so the chunk's are at the head
+            owned = {patient["id"] for patient in chunk}
+            taken = 0
+            while taken < len(encounters) and encounters[taken]["patient_id"] in owned:
+                taken += 1
+            yield chunk, encounters[:taken]
+            del encounters[:taken]
+
+def load_into_stores(batches: Iterable[Tuple[str, List[dict]]], replace: bool = True) -> Dict[str, int]:
+    """
+    Write generated batches into real_data_service's in-memory stores and
+    rebuild their listing order and search indexes, or with
+    STORAGE_BACKEND=sqlite bulk-insert them into the SQLite database
+
+    The stores have no encounters; encounter batches are counted but dropped
+    (write them to NDJSON instead).
+
+    Args:
+        batches: Output of generate_population
+        replace: Empty the stores first instead of adding to the demo data
+
+    Returns:
+        Records written per type
+    """
+    from backend.app.config import STORAGE_BACKEND
+    if STORAGE_BACKEND == "sqlite":
+        from backend.app.services import sqlite_data_service
+        written = {kind: 0 for kind in RECORD_TYPES}
+        written.update(sqlite_data_service.bulk_load(batches, replace=replace))
+        return written
+
+    from backend.app.services import real_data_service
+
+    # Settle the lazily generated demo data now, so it cannot land on top of ours later
+    real_data_service.ensure_data_loaded()
+    stores = {
+        "hospitals": (real_data_service.HOSPITALS_DB, "id"),
+        "doctors": (real_data_service.DOCTORS_DB, "id"),
+        "beds": (real_data_service.BED_AVAILABILITY_DB, "hospital_id"),
+        "patients": (real_data_service.PATIENTS_DB, "id")
+    }
+    if replace:
+        for store, _ in stores.values():
+            store.clear()
+
+    written = {kind: 0 for kind in RECORD_TYPES}
+    for kind, records in batches:
+        if kind in stores:
+            store, key = stores[kind]
+            for record in records:
+                store[record[key]] = record
+        written[kind] += len(records)
+    real_data_service._reindex_stores()
+    return written
+
+def write_ndjson(batches: Iterable[Tuple[str, List[dict]]], directory: str) -> Dict[str, int]:
+    """
+    Write generated batches to <directory>/<record type>.ndjson, one JSON record per line
+
+    Returns:
+        Records written per type
+    """
+    os.makedirs(directory, exist_ok=True)
+    files = {}
+    written = {kind: 0 for kind in RECORD_TYPES}
+    try:
+        for kind, records in batches:
+            handle = files.get(kind)
+            if handle is None:
+                handle = files[kind] = open(os.path.join(directory, f"{kind}.ndjson"), "wb")
+            handle.write(b"".join(dumps(record) + b"\n" for record in records))
+            written[kind] += len(records)
+    finally:
+        for handle in files.values():
+            handle.close()
+    return written
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Generate a synthetic population for scale testing")
+    parser.add_argument("--scale", type=float, default=100, help="Multiple of the demo data's record counts (default 100)")
+    parser.add_argument("--hospitals", type=int, help="Hospital count (overrides --scale)")
+    parser.add_argument("--doctors", type=int, help="Doctor count (overrides --scale)")
+    parser.add_argument("--patients", type=int, help="Patient count (overrides --scale)")
+    parser.add_argument("--encounters-per-patient", type=float, default=ENCOUNTERS_PER_PATIENT,
+                        help=f"Mean encounters per patient; 0 for none (default {ENCOUNTERS_PER_PATIENT})")
+    parser.add_argument("--seed", type=int, default=SEED, help="Random seed")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Records per generated batch")
+    parser.add_argument("--out", metavar="DIR", help="Write NDJSON files here instead of loading the in-memory stores")
+    args = parser.parse_args(argv)
+
+    try:
+        counts = population_counts(args.scale, hospitals=args.hospitals, doctors=args.doctors, patients=args.patients)
+    except ValueError as e:
+        parser.error(str(e))
+    batches = generate_population(counts, args.seed, args.encounters_per_patient, max(args.chunk_size, 1))
+
+    started = time.perf_counter()
+    if args.out:
+        written = write_ndjson(batches, args.out)
+    else:
+        written = load_into_stores(batches)
+    elapsed = time.perf_counter() - started
+
+    for kind in RECORD_TYPES:
+        print(f"{kind:<12} {written[kind]:>12,}")
+    total = sum(written.values())
+    print(f"{'total':<12} {total:>12,} in {elapsed:.1f}s ({total / max(elapsed, 1e-9):,.0f} records/sec)")
+    if args.out:
+        print(f"\nNDJSON written to {args.out}")
+    else:
+        print("\nLoaded into the in-memory stores (encounters are not stored; use --out to keep them)")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
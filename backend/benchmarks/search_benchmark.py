@@ -0,0 +1,221 @@
+"""
+Text Search Benchmark
+Latency benchmark for search_index over a generated patient population, indexed
+the way real_data_service indexes patients, with a check that every result
+equals exhaustive BM25 scoring and a comparison mode that fails when latency
+regresses against a baseline.
+
+Usage (from the repository root):
+    python -m backend.benchmarks.search_benchmark
+    python -m backend.benchmarks.search_benchmark --patients 200000 --verify
+    python -m backend.benchmarks.search_benchmark --save-baseline backend/benchmarks/search_baseline.json
+    python -m backend.benchmarks.search_benchmark --compare backend/benchmarks/search_baseline.json --threshold 0.5
+
+Latency depends on the machine, so compare against a baseline saved on the
+same hardware.
+"""
+from typing import Dict, List, Optional
+import argparse
+import json
+import math
+import platform
+import random
+import statistics
+import sys
+import time
+
+from backend.app.services.search_index import TextSearchIndex, tokenize
+from backend.app.services.real_data_service import _PATIENTS_INDEX, _patient_search_fields
+from backend.benchmarks.population_generator import SEED, generate_population, population_counts
+
+DEFAULT_PATIENTS = 200000
+
+# Queries with many records tied on each term, which a threshold search must not scan in full
+QUERIES = [
+    "hypertension diabetes",
+    "new york hypertension",
+    "asthma chicago",
+    "smith",
+    "john smith boston",
+    "diabetes",
+    "new yo",
+    "hypertensoin"
+]
+# Extra queries drawn from the common vocabulary
+RANDOM_QUERIES = 20
+
+def build_index(patients: int, seed: int = SEED) -> TextSearchIndex:
+    """Index a generated population's patients with the service's field weights"""
+    counts = population_counts(1, hospitals=max(patients // 1000, 1), doctors=max(patients // 100, 1), patients=patients)
+    index = TextSearchIndex(_PATIENTS_INDEX.field_weights)
+    index.rebuild(
+        (patient["id"], _patient_search_fields(patient))
+        for kind, batch in generate_population(counts, seed=seed, encounters_per_patient=0)
+        if kind == "patients"
+        for patient in batch
+    )
+    return index
+
+def benchmark_queries(index: TextSearchIndex, count: int = RANDOM_QUERIES, seed: int = SEED) -> List[str]:
+    """The fixed queries plus count random ones of one to three common terms"""
+    rng = random.Random(seed)
+    common = [term for term in index._vocabulary if len(index._postings[term]) >= len(index) // 1000]
+    return QUERIES + [" ".join(rng.sample(common, rng.randint(1, 3))) for _ in range(count)]
+
+def exhaustive_scores(index: TextSearchIndex, query: str, limit: int) -> List[float]:
+    """Top limit scores from scoring every record that matches any query term"""
+    tokens = tokenize(query)
+    document_count = len(index)
+    average_length = index._total_length / document_count or 1.0
+    token_terms = []
+    for position, token in enumerate(tokens):
+        terms = []
+        for term, factor in index._expand(token, position == len(tokens) - 1).items():
+            frequency = len(index._postings[term])
+            terms.append((term, factor * math.log(1 + (document_count - frequency + 0.5) / (frequency + 0.5))))
+        if terms:
+            token_terms.append(terms)
+    keys = set()
+    for terms in token_terms:
+        for term, _ in terms:
+            keys.update(index._postings[term])
+    scores = []
+    for key in keys:
+        length = index._doc_length[key]
+        total = 0.0
+        for terms in token_terms:
+            best = 0.0
+            for term, weight in terms:
+                frequency = index._postings[term].get(key)
+                if frequency is not None:
+                    best = max(best, weight * index._impact(frequency, length, average_length))
+            total += best
+        scores.append(total)
+    return sorted(scores, reverse=True)[:limit]
+
+def run_benchmarks(index: TextSearchIndex, queries: List[str], limit: int = 10, repeat: int = 5) -> Dict[str, Dict]:
+    """
+    Time each query cold (no cached posting blocks) and warm (median of repeat)
+
+    Returns:
+        query -> cold_ms, warm_ms
+    """
+    results = {}
+    for query in queries:
+        index.clear_cache()
+        start = time.perf_counter()
+        index.search(query, limit)
+        cold = time.perf_counter() - start
+        warm = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            index.search(query, limit)
+            warm.append(time.perf_counter() - start)
+        results[query] = {"cold_ms": round(cold * 1000, 2), "warm_ms": round(statistics.median(warm) * 1000, 2)}
+    return results
+
+def verify(index: TextSearchIndex, queries: List[str], limit: int = 10) -> List[str]:
+    """
+    Queries whose top scores differ from exhaustive scoring
+
+    Returns:
+        One message per mismatch
+    """
+    mismatches = []
+    for query in queries:
+        found = [score for _, score in index.search(query, limit)]
+        expected = exhaustive_scores(index, query, limit)
+        if len(found) != len(expected) or any(abs(a - b) > 1e-9 * max(1.0, abs(b)) for a, b in zip(found, expected)):
+            mismatches.append(f"{query!r}: {found} vs exhaustive {expected}")
+    return mismatches
+
+def compare_results(results: Dict[str, Dict], baseline: Dict[str, Dict], threshold: float) -> List[str]:
+    """
+    Queries whose warm latency rose more than threshold (a fraction) above the baseline
+
+    Returns:
+        One message per regression
+    """
+    regressions = []
+    for query, result in results.items():
+        reference = baseline.get(query)
+        if not reference:
+            continue
+        # Sub-millisecond timings are noise; allow a quarter millisecond either way
+        ceiling = reference["warm_ms"] * (1.0 + threshold) + 0.25
+        if result["warm_ms"] > ceiling:
+            regressions.append(f"{query!r}: {result['warm_ms']} ms vs baseline {reference['warm_ms']} ms")
+    return regressions
+
+def _print_table(results: Dict[str, Dict], baseline: Optional[Dict[str, Dict]] = None):
+    header = f"{'query':<40} {'cold ms':>9} {'warm ms':>9}"
+    if baseline:
+        header += f" {'baseline':>9}"
+    print(header)
+    print("-" * len(header))
+    for query, result in results.items():
+        line = f"{query:<40} {result['cold_ms']:>9} {result['warm_ms']:>9}"
+        if baseline:
+            reference = baseline.get(query)
+            line += f" {reference['warm_ms']:>9}" if reference else f" {'-':>9}"
+        print(line)
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark search_index latency on a generated patient population")
+    parser.add_argument("--patients", type=int, default=DEFAULT_PATIENTS, help=f"Patients to index (default {DEFAULT_PATIENTS})")
+    parser.add_argument("--limit", type=int, default=10, help="Results per query")
+    parser.add_argument("--repeat", type=int, default=5, help="Warm runs per query; the median is kept")
+    parser.add_argument("--verify", action="store_true", help="Fail if any result differs from exhaustive scoring")
+    parser.add_argument("--save-baseline", metavar="PATH", help="Write the results as a baseline file")
+    parser.add_argument("--compare", metavar="PATH", help="Fail if warm latency regresses against this baseline")
+    parser.add_argument("--threshold", type=float, default=0.5, help="Allowed latency rise as a fraction (default 0.5)")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    index = build_index(args.patients)
+    print(f"Indexed {len(index):,} patients in {time.perf_counter() - start:.1f}s\n")
+    queries = benchmark_queries(index)
+    results = run_benchmarks(index, queries, args.limit, max(args.repeat, 1))
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+    _print_table(results, baseline)
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump({
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "patients": args.patients,
+                "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "results": results
+            }, f, indent=2)
+            f.write("\n")
+        print(f"\nBaseline written to {args.save_baseline}")
+
+    status = 0
+    if args.verify:
+        mismatches = verify(index, queries, args.limit)
+        if mismatches:
+            print("\nResults differ from exhaustive scoring:")
+            for message in mismatches:
+                print(f"  {message}")
+            status = 1
+        else:
+            print(f"\nAll {len(queries)} queries match exhaustive scoring")
+
+    if baseline is not None:
+        regressions = compare_results(results, baseline, args.threshold)
+        if regressions:
+            print(f"\nLatency regressed more than {args.threshold:.0%}:")
+            for message in regressions:
+                print(f"  {message}")
+            status = 1
+        else:
+            print(f"\nNo latency regression beyond {args.threshold:.0%}")
+    return status
+
+if __name__ == "__main__":
+    sys.exit(main())
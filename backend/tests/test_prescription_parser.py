@@ -0,0 +1,133 @@
+"""
+Prescription parser tests: results must equal the original line-by-line extractor
+"""
+import random
+import re
+
+from backend.app.services.prescription_parser import extract_medications_from_text
+
+def baseline_extract(text):
+    """The extractor the parser replaced (formerly routers/pharmacy.py), kept as the reference"""
+    medications = []
+    medication_patterns = [
+        r'([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)\s+(\d+(?:\.\d+)?\s*(?:mg|g|ml|tablet|tab|capsule|cap))',
+        r'([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)\s+(\d+(?:\.\d+)?)\s*(?:mg|g|ml)',
+        r'([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)\s+(?:take|use|apply)\s+(\d+)',
+    ]
+    frequency_patterns = [
+        r'(?:take|use|apply)\s+(?:once|twice|three times|four times)\s+(?:daily|a day|per day)',
+        r'(\d+)\s*(?:times|X)\s*(?:daily|a day|per day)',
+        r'(?:every|q)\s*(\d+)\s*(?:hours|hrs|h)',
+        r'(?:before|after)\s+(?:meals|breakfast|lunch|dinner)',
+    ]
+    duration_patterns = [
+        r'(?:for|continue)\s+(\d+)\s*(?:days|weeks|months)',
+        r'(\d+)\s*(?:days|weeks|months)',
+    ]
+    common_meds = [
+        'aspirin', 'ibuprofen', 'acetaminophen', 'amoxicillin', 'penicillin',
+        'metformin', 'lisinopril', 'atorvastatin', 'levothyroxine', 'amlodipine',
+        'metoprolol', 'omeprazole', 'losartan', 'albuterol', 'gabapentin',
+        'sertraline', 'simvastatin', 'montelukast', 'tramadol', 'trazodone'
+    ]
+    current_medication = None
+    for line in text.split('\n'):
+        line = line.strip()
+        if not line:
+            continue
+        for pattern in medication_patterns:
+            match = re.search(pattern, line, re.IGNORECASE)
+            if match:
+                med_name = match.group(1).strip()
+                dosage = match.group(2).strip()
+                if any(med in med_name.lower() for med in common_meds) or len(med_name.split()) <= 3:
+                    current_medication = {"name": med_name, "dosage": dosage, "frequency": "", "duration": "", "instructions": "", "quantity": ""}
+                    medications.append(current_medication)
+                    break
+        if current_medication:
+            for pattern in frequency_patterns:
+                match = re.search(pattern, line, re.IGNORECASE)
+                if match and not current_medication["frequency"]:
+                    current_medication["frequency"] = match.group(0).strip()
+                    break
+            for pattern in duration_patterns:
+                match = re.search(pattern, line, re.IGNORECASE)
+                if match and not current_medication["duration"]:
+                    current_medication["duration"] = match.group(0).strip()
+                    break
+            if any(keyword in line.lower() for keyword in ['with food', 'without food', 'before meal', 'after meal', 'at bedtime']):
+                current_medication["instructions"] = line.strip()
+    if not medications:
+        text_lower = text.lower()
+        for med_key, med_name in {
+            'aspirin': 'Aspirin', 'ibuprofen': 'Ibuprofen', 'acetaminophen': 'Acetaminophen',
+            'amoxicillin': 'Amoxicillin', 'penicillin': 'Penicillin', 'metformin': 'Metformin',
+            'lisinopril': 'Lisinopril', 'atorvastatin': 'Atorvastatin',
+        }.items():
+            if med_key in text_lower:
+                medications.append({"name": med_name, "dosage": "", "frequency": "", "duration": "", "instructions": "", "quantity": ""})
+    return medications
+
+def test_frequency_inside_medication_match():
+    [medication] = extract_medications_from_text("Ibuprofen take 2 times daily")
+    assert medication["name"] == "Ibuprofen"
+    assert medication["dosage"] == "2"
+    assert medication["frequency"] == "2 times daily"
+
+def test_duration_inside_medication_match():
+    [medication] = extract_medications_from_text("Albuterol use 2 days")
+    assert medication["dosage"] == "2"
+    assert medication["duration"] == "2 days"
+
+def test_later_medication_pattern_tried_when_first_is_rejected():
+    # The first pattern's match has a long name without a known drug; the third pattern's does not
+    text = "Xa Yb Zc Wd 5 mg then Amoxicillin take 1"
+    assert extract_medications_from_text(text) == baseline_extract(text)
+
+def test_known_drug_matched_inside_name():
+    text = "Big Old Aspirinex Compound Tablet 81 mg"
+    assert extract_medications_from_text(text) == baseline_extract(text)
+    assert extract_medications_from_text(text)[0]["name"] == "Big Old Aspirinex Compound Tablet"
+
+def test_fallback_names_matched_as_substrings():
+    text = "ibuprofen400 as needed\nsee metformin-er"
+    assert [m["name"] for m in extract_medications_from_text(text)] == ["Ibuprofen", "Metformin"]
+
+def test_page_chunks_match_joined_text():
+    pages = ["Amoxicillin 500mg\nfor 7 days", "Lisinopril 10 mg\ntake once daily with food"]
+    assert extract_medications_from_text(pages) == baseline_extract("\n".join(pages))
+
+_WORDS = [
+    "Ibuprofen", "Albuterol", "Aspirin", "Metformin", "Amoxicillin", "Big", "Old", "Tablet", "Xa", "Yb",
+    "take", "use", "apply", "once", "twice", "three times", "daily", "a day", "per day", "times", "X",
+    "every", "q", "hours", "hrs", "h", "before", "after", "meals", "dinner", "for", "continue",
+    "days", "weeks", "months", "mg", "g", "ml", "tab", "cap", "capsule", "with food", "at bedtime",
+    "2", "10", "2.5", "500mg", "4x", "q6h", "ibuprofen400", "penicillin"
+]
+
+def test_random_lines_match_baseline():
+    rng = random.Random(31)
+    for _ in range(3000):
+        lines = [" ".join(rng.choice(_WORDS) for _ in range(rng.randint(1, 8))) for _ in range(rng.randint(1, 4))]
+        text = "\n".join(lines)
+        assert extract_medications_from_text(text) == baseline_extract(text), text
+
+def test_lines_split_on_newlines_only():
+    # A lone carriage return does not end a line, as in the original split('\n')
+    text = "Amoxicillin 500mg\rfor 7 days\r\nLisinopril 10 mg"
+    assert extract_medications_from_text(text) == baseline_extract(text)
+    assert extract_medications_from_text(text)[0]["duration"] == "for 7 days"
+
+_NAME_WORDS = ["Xa", "Yb", "Zc", "Wd", "Big", "Old", "Aspirinex", "Tramadolium", "Amoxicillin", "Losartan"]
+
+def test_long_names_and_rejections_match_baseline():
+    """Long capitalised phrases, with and without drug names inside words, on both sides of doses"""
+    rng = random.Random(131)
+    tails = ["5 mg", "2.5mg", "take 1", "use 3", "10 ml", "500 tab", "4x daily", "q6h", "for 7 days", "with food"]
+    for _ in range(3000):
+        parts = []
+        for _ in range(rng.randint(1, 4)):
+            parts.append(" ".join(rng.choice(_NAME_WORDS) for _ in range(rng.randint(1, 6))))
+            parts.append(rng.choice(tails))
+        text = rng.choice([" ", "\n", " then ", "\r"]).join(parts)
+        assert extract_medications_from_text(text) == baseline_extract(text), text
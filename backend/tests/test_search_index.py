@@ -0,0 +1,145 @@
+"""
+Text search index tests: the early-terminating search must return the same
+top scores as scoring every matching record (exact BM25)
+"""
+import math
+import random
+
+import pytest
+
+from backend.app.services.search_index import RANKED_POSTING_MAX_DRIFT, TextSearchIndex, tokenize
+
+FIELD_WEIGHTS = {"name": 3.0, "conditions": 1.5, "address": 1.0}
+
+_NAMES = ["james", "mary", "robert", "patricia", "john", "jennifer", "smith", "johnson", "garcia", "chen"]
+_CONDITIONS = ["hypertension", "diabetes", "asthma", "arthritis", "migraine", "anemia"]
+_PLACES = ["new", "york", "boston", "chicago", "austin", "elm", "oak", "street", "avenue", "ma", "ny"]
+
+def exact_scores(index, query):
+    """Score of every record matching any query term, computed the long way"""
+    tokens = tokenize(query)
+    document_count = len(index)
+    average_length = index._total_length / document_count or 1.0
+    token_terms = []
+    for position, token in enumerate(tokens):
+        terms = []
+        for term, factor in index._expand(token, position == len(tokens) - 1).items():
+            frequency = len(index._postings[term])
+            terms.append((term, factor * math.log(1 + (document_count - frequency + 0.5) / (frequency + 0.5))))
+        if terms:
+            token_terms.append(terms)
+    keys = set()
+    for terms in token_terms:
+        for term, _ in terms:
+            keys.update(index._postings[term])
+    scores = {}
+    for key in keys:
+        length = index._doc_length[key]
+        total = 0.0
+        for terms in token_terms:
+            best = 0.0
+            for term, weight in terms:
+                frequency = index._postings[term].get(key)
+                if frequency is not None:
+                    best = max(best, weight * index._impact(frequency, length, average_length))
+            total += best
+        scores[key] = total
+    return scores
+
+def assert_exact(index, query, limit):
+    results = index.search(query, limit)
+    scores = exact_scores(index, query)
+    expected = sorted(scores.values(), reverse=True)[:limit]
+    assert [score for _, score in results] == pytest.approx(expected, rel=1e-12, abs=1e-12), query
+    for key, score in results:
+        assert score == pytest.approx(scores[key], rel=1e-12, abs=1e-12), query
+
+def random_record(rng, short=False):
+    return {
+        "name": [rng.choice(_NAMES), rng.choice(_NAMES)],
+        "conditions": rng.sample(_CONDITIONS, rng.randint(0, 1 if short else 3)),
+        "address": " ".join(rng.choice(_PLACES) for _ in range(rng.randint(1, 2 if short else 6)))
+    }
+
+def random_query(rng):
+    words = rng.sample(_NAMES + _CONDITIONS + _PLACES, rng.randint(1, 4))
+    if rng.random() < 0.2:
+        words[-1] = words[-1][:rng.randint(2, len(words[-1]))]  # search-as-you-type prefix
+    if rng.random() < 0.1:
+        word = words[0]
+        position = rng.randrange(len(word))
+        words[0] = word[:position] + word[position + 1:]  # typo
+    return " ".join(words)
+
+@pytest.fixture
+def index():
+    rng = random.Random(46)
+    index = TextSearchIndex(FIELD_WEIGHTS)
+    index.rebuild((f"r{i}", random_record(rng)) for i in range(6000))
+    return index
+
+def test_tied_scores_match_exact(index):
+    for query in ["hypertension diabetes", "new york hypertension", "smith", "john smith boston", "new yo", "hypertensoin"]:
+        for limit in (1, 5, 10, 50):
+            assert_exact(index, query, limit)
+
+def test_random_queries_match_exact(index):
+    rng = random.Random(4646)
+    for _ in range(500):
+        assert_exact(index, random_query(rng), rng.choice((1, 5, 10)))
+
+def test_cached_blocks_stay_exact_under_drift(index):
+    """Cached blocks are reused while the average length drifts; their bounds must still hold"""
+    rng = random.Random(146)
+    queries = [random_query(rng) for _ in range(1500)]
+    for query in queries[:200]:
+        index.search(query, 5)  # Cache the long postings' blocks
+    cached_average = index._total_length / len(index)
+
+    # Shift the average length up to just under the rebuild threshold, changing few
+    # records per posting so the cached blocks are kept
+    added = 0
+    while index._total_length / len(index) < cached_average * (1 + RANKED_POSTING_MAX_DRIFT * 0.9):
+        index.add(f"long{added}", {"name": ["zed"], "address": " ".join(["quay"] * 40)})
+        added += 1
+    assert index._blocks, "expected cached blocks to survive the drift"
+
+    for query in queries:
+        assert_exact(index, query, 5)
+
+    # And down, by removing the long records again
+    for i in range(added):
+        index.remove(f"long{i}")
+    for _ in range(300):
+        index.add(f"short{_}", random_record(rng, short=True))
+    for query in queries[:500]:
+        assert_exact(index, query, 5)
+
+def test_updates_are_searchable(index):
+    index.search("asthma", 10)
+    index.add("r1", {"name": ["asthma", "asthma"], "conditions": ["asthma"], "address": "asthma"})
+    assert index.search("asthma", 1)[0][0] == "r1"
+    index.remove("r1")
+    assert "r1" not in [key for key, _ in index.search("asthma", 50)]
+    assert_exact(index, "asthma", 10)
+
+def test_population_scale_matches_exact():
+    """Patient search over a generated 200k population, as the service indexes it"""
+    pytest.importorskip("numpy")
+    from backend.benchmarks.population_generator import generate_population, population_counts
+    from backend.app.services.real_data_service import _patient_search_fields
+
+    index = TextSearchIndex(FIELD_WEIGHTS)
+    counts = population_counts(1, hospitals=200, doctors=2000, patients=200000)
+    index.rebuild(
+        (patient["id"], _patient_search_fields(patient))
+        for kind, batch in generate_population(counts, encounters_per_patient=0)
+        if kind == "patients"
+        for patient in batch
+    )
+    rng = random.Random(200)
+    queries = ["hypertension diabetes", "new york hypertension", "smith", "john smith boston", "asthma chicago", "new yo"]
+    vocabulary = [term for term in index._vocabulary if len(index._postings[term]) >= 100]
+    queries += [" ".join(rng.sample(vocabulary, rng.randint(1, 3))) for _ in range(40)]
+    for query in queries:
+        assert_exact(index, query, 10)
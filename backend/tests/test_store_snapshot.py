@@ -0,0 +1,74 @@
+"""
+Store snapshot tests: a SnapshotStore must list its records in the order a
+dict would, through writes, snapshots and reopening the file
+"""
+import random
+
+from backend.app.services.store_snapshot import SnapshotStore, _write_file, open_snapshot, save_stores
+
+def assert_same(store, model):
+    assert list(store.items()) == list(model.items())
+    assert list(store) == list(model)
+    assert len(store) == len(model)
+
+def apply(rng, store, model, keys):
+    key = rng.choice(keys)
+    action = rng.random()
+    if action < 0.35 and key in model:
+        del store[key]
+        del model[key]
+    else:
+        record = {"id": key, "value": rng.randrange(1000)}
+        store[key] = record
+        model[key] = record
+
+def test_reinserted_key_lists_last(tmp_path):
+    store = SnapshotStore()
+    for key in "abcd":
+        store[key] = {"id": key}
+    path = str(tmp_path / "stores.snap")
+    save_stores(path, {"records": store})
+
+    store["b"] = {"id": "b", "overwritten": True}  # keeps its place
+    del store["c"]
+    store["c"] = {"id": "c", "reinserted": True}  # moves to the end
+    assert list(store) == ["a", "b", "d", "c"]
+
+    save_stores(path, {"records": store})
+    reopened = SnapshotStore(open_snapshot(path)["records"])
+    assert list(reopened) == ["a", "b", "d", "c"]
+    assert reopened["c"] == {"id": "c", "reinserted": True}
+
+def test_random_writes_match_dict(tmp_path):
+    rng = random.Random(49)
+    keys = [f"k{i}" for i in range(40)]
+    path = str(tmp_path / "stores.snap")
+    store, model = SnapshotStore(), {}
+    for round_number in range(30):
+        for _ in range(rng.randint(0, 25)):
+            apply(rng, store, model, keys)
+        assert_same(store, model)
+        save_stores(path, {"records": store})
+        assert_same(store, model)
+        if round_number % 3 == 0:
+            store = SnapshotStore(open_snapshot(path)["records"])
+            assert_same(store, model)
+
+def test_writes_during_snapshot_match_dict(tmp_path):
+    """Writes made while a snapshot is written stay in the overlay, in dict order"""
+    rng = random.Random(490)
+    keys = [f"k{i}" for i in range(30)]
+    path = str(tmp_path / "stores.snap")
+    store, model = SnapshotStore(), {}
+    for _ in range(40):
+        apply(rng, store, model, keys)
+    for _ in range(20):
+        state = store.begin_snapshot()
+        frozen = dict(model)
+        for _ in range(rng.randint(0, 15)):
+            apply(rng, store, model, keys)
+        _write_file(path, {"records": store._iter_encoded(state)})
+        section = open_snapshot(path)["records"]
+        store.finish_snapshot(section)
+        assert list(SnapshotStore(section).items()) == list(frozen.items())
+        assert_same(store, model)